@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark of the per step perimeter cleanup overhead: the chain of four processing algorithms (fix geometries, dissolve,
+multipart to single parts and force right-hand rule) on memory layers against the in-process cleanup on geometries.
+Needs a QGIS installation.
+
+Usage: PYTHONPATH=src python benchmarks/geometry_cleanup.py
+"""
+
+import sys
+import time
+from typing import List
+
+import numpy
+from qgis.analysis import QgsNativeAlgorithms
+from qgis.core import QgsApplication
+from qgis.core import QgsFeature
+from qgis.core import QgsGeometry
+from qgis.core import QgsProcessingFeedback
+from qgis.core import QgsVectorLayer
+
+from gisfire_spread_simulation.qgis_helper_functions.geometry import clean_perimeter_geometries
+from gisfire_spread_simulation.qgis_helper_functions.geometry import perimeter_to_geometry
+from gisfire_spread_simulation.simulation_algorithms.perimeter import Perimeter
+
+REPETITIONS = 20
+SCENARIOS = ((1, 100), (10, 100), (10, 1000), (100, 1000))
+
+
+def processing_chain(geometries: List[QgsGeometry]) -> List[QgsGeometry]:
+    import processing
+    layer = QgsVectorLayer('Polygon', 'raw_perimeters', 'memory')
+    features = list()
+    for geometry in geometries:
+        feature = QgsFeature()
+        feature.setGeometry(geometry)
+        features.append(feature)
+    layer.dataProvider().addFeatures(features)
+    result = layer
+    for algorithm in ('native:fixgeometries', 'native:dissolve', 'native:multiparttosingleparts', 'native:forcerhr'):
+        params = {'INPUT': result, 'OUTPUT': 'memory:'}
+        result = processing.run(algorithm, params, feedback=QgsProcessingFeedback(), is_child_algorithm=False)['OUTPUT']
+    return [feature.geometry() for feature in result.getFeatures()]
+
+
+def main() -> None:
+    application = QgsApplication([], False)
+    application.initQgis()
+    sys.path.append(QgsApplication.pkgDataPath() + '/python/plugins')
+    from processing.core.Processing import Processing
+    Processing.initialize()
+    QgsApplication.processingRegistry().addProvider(QgsNativeAlgorithms())
+    rng = numpy.random.default_rng(0)
+    print('{:>6} {:>9} {:>16} {:>16}'.format('fires', 'vertices', 'processing (ms)', 'in-process (ms)'))
+    for fires, vertices in SCENARIOS:
+        angles = numpy.linspace(0, 2 * numpy.pi, vertices, endpoint=False)
+        geometries = list()
+        for center in rng.uniform(0, 50 * fires, (fires, 2)):
+            radius = 10 * (1 + 0.1 * numpy.sin(7 * angles))
+            perimeter = Perimeter(center[0] + radius * numpy.cos(angles), center[1] + radius * numpy.sin(angles))
+            geometries.append(perimeter_to_geometry(perimeter))
+        start = time.perf_counter()
+        for _ in range(REPETITIONS):
+            processing_chain(geometries)
+        processing_time = (time.perf_counter() - start) * 1000 / REPETITIONS
+        start = time.perf_counter()
+        for _ in range(REPETITIONS):
+            clean_perimeter_geometries(geometries)
+        native_time = (time.perf_counter() - start) * 1000 / REPETITIONS
+        print('{:>6} {:>9} {:>16.2f} {:>16.2f}'.format(fires, vertices, processing_time, native_time))
+    application.exitQgis()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark of the scalar Rothermel implementation against the vectorized batch one, with the fuel models given as a list
+(packed in each call) or as a FuelModelTable. The scalar path is timed on at most
+SCALAR_LIMIT evaluations and extrapolated linearly for larger batches.
+
+Usage: PYTHONPATH=src python benchmarks/rothermel_batch.py
+"""
+
+import time
+
+import numpy
+
+from gisfire_spread_simulation.fuel_models.fuel_model_table import FuelModelTable
+from gisfire_spread_simulation.fuel_models.standard_fuel_models import model_0
+from gisfire_spread_simulation.fuel_models.standard_fuel_models import model_1
+from gisfire_spread_simulation.fuel_models.standard_fuel_models import model_2
+from gisfire_spread_simulation.simulation_algorithms.rate_of_sprerad_algorithms import RateOfSpread
+
+SIZES = (10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6)
+SCALAR_LIMIT = 10 ** 4
+
+
+def main() -> None:
+    models = [model_0, model_1, model_2]
+    table = FuelModelTable(models)
+    rng = numpy.random.default_rng(0)
+    print('{:>10} {:>12} {:>12} {:>12} {:>10}'.format('vertices', 'scalar (s)', 'batch (s)', 'table (s)',
+                                                       'speedup'))
+    for size in SIZES:
+        fuel_index = rng.integers(1, len(models), size)
+        moisture = numpy.column_stack([rng.uniform(0.02, 0.1, (size, 3)), rng.uniform(0.3, 1.5, (size, 2))])
+        wind_speed = rng.uniform(0, 10, size)
+        wind_direction = rng.uniform(-numpy.pi, numpy.pi, size)
+        slope = rng.uniform(0, 0.5, size)
+        scalar_size = min(size, SCALAR_LIMIT)
+        start = time.perf_counter()
+        for i in range(scalar_size):
+            RateOfSpread.rothermel(fuel_model=models[fuel_index[i]],
+                                   moisture=(tuple(moisture[i, 0:3]), tuple(moisture[i, 3:5])),
+                                   wind=(wind_speed[i], wind_direction[i]), slope=slope[i])
+        scalar_time = (time.perf_counter() - start) * size / scalar_size
+        start = time.perf_counter()
+        RateOfSpread.rothermel_batch(models, fuel_index, moisture, wind_speed, wind_direction, slope)
+        batch_time = time.perf_counter() - start
+        start = time.perf_counter()
+        RateOfSpread.rothermel_batch(table, fuel_index, moisture, wind_speed, wind_direction, slope)
+        table_time = time.perf_counter() - start
+        print('{:>10} {:>12.4f} {:>12.4f} {:>12.4f} {:>9.1f}x'.format(size, scalar_time, batch_time, table_time,
+                                                                       scalar_time / table_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import csv
+import datetime
+import math
+from collections import OrderedDict
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Sequence
+from typing import Tuple
+from typing import Union
+
+import numpy
+from dateutil import parser
+from osgeo import gdal
+
+
+class WeatherStation:
+    """
+    Time series of the air temperature and relative humidity of a weather station, interpolated linearly between the
+    observations
+    """
+
+    def __init__(self, x: float, y: float, dates: Sequence[datetime.datetime], temperature: Sequence[float],
+                 humidity: Sequence[float]) -> None:
+        """
+        Constructor
+
+        :param x: X coordinate of the station in the CRS of the simulation layers
+        :type x: float
+        :param y: Y coordinate of the station
+        :type y: float
+        :param dates: Dates of the observations
+        :type dates: Sequence[datetime.datetime]
+        :param temperature: Air temperature of each observation in ºC
+        :type temperature: Sequence[float]
+        :param humidity: Relative humidity of each observation in percentage
+        :type humidity: Sequence[float]
+        """
+        if len(dates) == 0 or len(dates) != len(temperature) or len(dates) != len(humidity):
+            raise ValueError('A weather station needs the temperature and humidity of each observation')
+        order: numpy.ndarray = numpy.argsort([date.timestamp() for date in dates], kind='stable')
+        self._x: float = x
+        self._y: float = y
+        self._times: numpy.ndarray = numpy.array([dates[i].timestamp() for i in order])
+        self._temperature: numpy.ndarray = numpy.asarray(temperature, dtype=numpy.float64)[order]
+        self._humidity: numpy.ndarray = numpy.asarray(humidity, dtype=numpy.float64)[order]
+
+    @property
+    def x(self) -> float:
+        return self._x
+
+    @property
+    def y(self) -> float:
+        return self._y
+
+    def weather(self, date: datetime.datetime) -> Tuple[float, float]:
+        """
+        Weather of the station at a date, the first or last observation out of the series
+
+        :param date: The date
+        :type date: datetime.datetime
+        :return: The temperature in ºC and the relative humidity in percentage
+        :rtype: Tuple[float, float]
+        """
+        time: float = date.timestamp()
+        return (float(numpy.interp(time, self._times, self._temperature)),
+                float(numpy.interp(time, self._times, self._humidity)))
+
+
+def read_weather_stations(path: str) -> List[WeatherStation]:
+    """
+    Reads the observations of a set of weather stations from a CSV file with the station, x, y, datetime (ISO format),
+    temperature (ºC) and relative_humidity (%) columns, a row per observation
+
+    :param path: Path of the CSV file
+    :type path: str
+    :return: The stations in order of appearance
+    :rtype: List[WeatherStation]
+    """
+    observations: Dict[str, List[Dict[str, str]]] = dict()
+    with open(path, newline='', encoding='utf-8') as stations_file:
+        for row in csv.DictReader(stations_file):
+            observations.setdefault(row['station'], list()).append(row)
+    return [WeatherStation(float(rows[0]['x']), float(rows[0]['y']), [parser.parse(row['datetime']) for row in rows],
+                           [float(row['temperature']) for row in rows],
+                           [float(row['relative_humidity']) for row in rows])
+            for rows in observations.values()]
+
+
+class FuelMoistureField:
+    """
+    Gridded fuel moisture of the five fuel classes (1-h, 10-h and 100-h dead fuels, live herbaceous and live woody) that
+    changes hour by hour. The moisture of each class starts from a constant or a raster. With weather stations the 1-h
+    dead fuel is conditioned every hour: it moves towards the equilibrium moisture content of the temperature and
+    humidity of the hour, interpolated from the stations by inverse distance weighting, with the 1 hour time lag of the
+    class. The moisture of a date is interpolated linearly between the two hourly grids around it.
+
+    The grid is computed by square tiles when a query needs them and each (hour, tile) grid is kept in a least recently
+    used cache, so the steps within an hour are free and the grid of the next hour conditions the cached grid of the
+    previous one. The grid has no fixed extent: it is aligned to the first moisture raster, whose border cells are
+    extended outside it, and has cells of the given size without rasters.
+
+    A pickled field opens its rasters again.
+    """
+
+    CLASSES = 5
+    # Time lag of the 1-h dead fuel in hours
+    TIME_LAG_1_H = 1.0
+
+    def __init__(self, base: Sequence[Union[float, str]], start_date: datetime.datetime,
+                 stations: Union[Sequence[WeatherStation], None] = None, cell_size: float = 100.0, scale: float = 1.0,
+                 fill: Sequence[float] = (0.03, 0.03, 0.03, 0.45, 0.82), power: float = 2.0, tile_size: int = 64,
+                 max_tiles: int = 256) -> None:
+        """
+        Constructor
+
+        :param base: Moisture of each class at the start date as a constant (fraction) or the path of a raster, all
+        the rasters must share the same grid
+        :type base: Sequence[Union[float, str]]
+        :param start_date: Date of the base moisture
+        :type start_date: datetime.datetime
+        :param stations: Weather stations that condition the 1-h dead fuel, None keeps it constant
+        :type stations: Union[Sequence[WeatherStation], None]
+        :param cell_size: Cell size of the grid without rasters, in the units of the layers
+        :type cell_size: float
+        :param scale: Factor of the raster values to get fractions (i.e. 0.01 for rasters in percentage)
+        :type scale: float
+        :param fill: Moisture of each class of the no data cells of the rasters
+        :type fill: Sequence[float]
+        :param power: Power of the distance of the inverse distance weighting of the stations
+        :type power: float
+        :param tile_size: Number of rows and columns of the tiles
+        :type tile_size: int
+        :param max_tiles: Maximum number of (hour, tile) grids kept in memory
+        :type max_tiles: int
+        """
+        if len(base) != FuelMoistureField.CLASSES:
+            raise ValueError('The fuel moisture needs the {} fuel classes'.format(FuelMoistureField.CLASSES))
+        self._base: List[Union[float, str]] = list(base)
+        self._start_date: datetime.datetime = start_date
+        self._stations: List[WeatherStation] = list(stations) if stations is not None else list()
+        self._scale: float = scale
+        self._fill: numpy.ndarray = numpy.asarray(fill, dtype=numpy.float64)
+        self._power: float = power
+        self._tile_size: int = tile_size
+        self._max_tiles: int = max(2, max_tiles)
+        self._cache: OrderedDict = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.__open()
+        if self._raster_shape is None:
+            self._geo_transform: Tuple[float, float, float, float, float, float] = (0.0, cell_size, 0.0, 0.0, 0.0,
+                                                                                    -cell_size)
+
+    def __open(self) -> None:
+        """
+        Opens the moisture rasters and checks that they share the grid of the first one
+        """
+        self._datasets: Dict[str, gdal.Dataset] = dict()
+        self._raster_shape: Union[Tuple[int, int], None] = None
+        for source in self._base:
+            if not isinstance(source, str) or source in self._datasets:
+                continue
+            dataset: gdal.Dataset = gdal.Open(source, gdal.GA_ReadOnly)
+            if dataset is None:
+                raise ValueError('Unable to open the fuel moisture raster {}'.format(source))
+            geo_transform: Tuple[float, float, float, float, float, float] = tuple(dataset.GetGeoTransform())
+            if geo_transform[2] != 0 or geo_transform[4] != 0:
+                raise ValueError('Rotated fuel moisture rasters are not supported')
+            if self._raster_shape is None:
+                (self._geo_transform, self._raster_shape) = (geo_transform,
+                                                             (dataset.RasterYSize, dataset.RasterXSize))
+            elif not numpy.allclose(geo_transform, self._geo_transform) or \
+                    (dataset.RasterYSize, dataset.RasterXSize) != self._raster_shape:
+                raise ValueError('The fuel moisture raster {} does not match the first raster'.format(source))
+            self._datasets[source] = dataset
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # GDAL objects and the tiles are not pickled
+        state: Dict[str, Any] = self.__dict__.copy()
+        state['_datasets'] = dict()
+        state['_cache'] = OrderedDict()
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        geo_transform: Tuple[float, float, float, float, float, float] = self._geo_transform
+        self.__open()
+        self._geo_transform = geo_transform
+
+    @property
+    def resident_tiles(self) -> int:
+        return len(self._cache)
+
+    @staticmethod
+    def equilibrium_moisture(temperature: numpy.ndarray, humidity: numpy.ndarray) -> numpy.ndarray:
+        """
+        Equilibrium moisture content of the dead fuels (Simard 1968), as used by the NFDRS
+
+        :param temperature: Air temperature in ºC
+        :type temperature: numpy.ndarray
+        :param humidity: Relative humidity in percentage
+        :type humidity: numpy.ndarray
+        :return: The equilibrium moisture content as a fraction
+        :rtype: numpy.ndarray
+        """
+        fahrenheit: numpy.ndarray = numpy.asarray(temperature, dtype=numpy.float64) * 9 / 5 + 32
+        humidity = numpy.clip(numpy.asarray(humidity, dtype=numpy.float64), 0, 100)
+        return numpy.where(humidity < 10, 0.03229 + 0.281073 * humidity - 0.000578 * humidity * fahrenheit,
+                           numpy.where(humidity < 50, 2.22749 + 0.160107 * humidity - 0.01478 * fahrenheit,
+                                       21.0606 + 0.005565 * humidity ** 2 - 0.00035 * humidity * fahrenheit -
+                                       0.483199 * humidity)) / 100
+
+    def __base_tile(self, tile_row: int, tile_column: int) -> numpy.ndarray:
+        """
+        Moisture of the cells of a tile at the start date
+
+        :param tile_row: Row of the tile
+        :type tile_row: int
+        :param tile_column: Column of the tile
+        :type tile_column: int
+        :return: The moisture of each cell and class
+        :rtype: numpy.ndarray
+        """
+        size: int = self._tile_size
+        tile: numpy.ndarray = numpy.empty((size, size, FuelMoistureField.CLASSES), dtype=numpy.float64)
+        (rows, columns) = (numpy.arange(tile_row * size, (tile_row + 1) * size),
+                           numpy.arange(tile_column * size, (tile_column + 1) * size))
+        if self._raster_shape is not None:
+            # The cells outside the rasters get the values of their border cells
+            (rows, columns) = (numpy.clip(rows, 0, self._raster_shape[0] - 1),
+                               numpy.clip(columns, 0, self._raster_shape[1] - 1))
+        for (index, source) in enumerate(self._base):
+            if not isinstance(source, str):
+                tile[:, :, index] = source
+                continue
+            band: gdal.Band = self._datasets[source].GetRasterBand(1)
+            (row, column) = (int(rows[0]), int(columns[0]))
+            window: numpy.ndarray = band.ReadAsArray(column, row, int(columns[-1]) - column + 1,
+                                                     int(rows[-1]) - row + 1).astype(numpy.float64)
+            values: numpy.ndarray = window[numpy.ix_(rows - row, columns - column)]
+            no_data: Union[float, None] = band.GetNoDataValue()
+            invalid: numpy.ndarray = values == no_data if no_data is not None else numpy.zeros(values.shape, bool)
+            tile[:, :, index] = numpy.where(invalid, self._fill[index], values * self._scale)
+        return tile
+
+    def __condition(self, tile: numpy.ndarray, hour: int, tile_row: int, tile_column: int) -> numpy.ndarray:
+        """
+        Conditions the 1-h dead fuel moisture of a tile during an hour
+
+        :param tile: Moisture of the tile at the start of the hour
+        :type tile: numpy.ndarray
+        :param hour: Hour since the start date of the end of the conditioning
+        :type hour: int
+        :param tile_row: Row of the tile
+        :type tile_row: int
+        :param tile_column: Column of the tile
+        :type tile_column: int
+        :return: The moisture of the tile at the end of the hour
+        :rtype: numpy.ndarray
+        """
+        size: int = self._tile_size
+        (x_origin, cell_width, _, y_origin, _, cell_height) = self._geo_transform
+        x: numpy.ndarray = x_origin + (tile_column * size + numpy.arange(size) + 0.5) * cell_width
+        y: numpy.ndarray = y_origin + (tile_row * size + numpy.arange(size) + 0.5) * cell_height
+        date: datetime.datetime = self._start_date + datetime.timedelta(hours=hour)
+        weather: numpy.ndarray = numpy.array([station.weather(date) for station in self._stations])
+        # Inverse distance weights of the stations of each cell
+        distance: numpy.ndarray = numpy.hypot(x[None, None, :] - numpy.array([station.x for station in
+                                                                               self._stations])[:, None, None],
+                                              y[None, :, None] - numpy.array([station.y for station in
+                                                                              self._stations])[:, None, None])
+        weights: numpy.ndarray = 1 / numpy.maximum(distance, 1e-6) ** self._power
+        weights /= weights.sum(axis=0)
+        temperature: numpy.ndarray = numpy.tensordot(weather[:, 0], weights, axes=1)
+        humidity: numpy.ndarray = numpy.tensordot(weather[:, 1], weights, axes=1)
+        equilibrium: numpy.ndarray = FuelMoistureField.equilibrium_moisture(temperature, humidity)
+        conditioned: numpy.ndarray = tile.copy()
+        conditioned[:, :, 0] = equilibrium + (tile[:, :, 0] - equilibrium) * \
+            math.exp(-1 / FuelMoistureField.TIME_LAG_1_H)
+        return conditioned
+
+    def __tile(self, hour: int, tile_row: int, tile_column: int) -> numpy.ndarray:
+        """
+        Returns the moisture of a tile at an hour, computing it from the latest hour of the tile in memory (or from the
+        base moisture) and removing the least recently used grids if the cache is full
+
+        :param hour: Hour since the start date
+        :type hour: int
+        :param tile_row: Row of the tile
+        :type tile_row: int
+        :param tile_column: Column of the tile
+        :type tile_column: int
+        :return: The moisture of each cell and class of the tile
+        :rtype: numpy.ndarray
+        """
+        key: Tuple[int, int, int] = (hour, tile_row, tile_column)
+        tile: Union[numpy.ndarray, None] = self._cache.get(key)
+        if tile is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return tile
+        self.misses += 1
+        start: int = hour - 1
+        while start >= 0 and (start, tile_row, tile_column) not in self._cache:
+            start -= 1
+        tile = self._cache[(start, tile_row, tile_column)] if start >= 0 else \
+            self.__base_tile(tile_row, tile_column)
+        for step in range(max(start, 0) + 1, hour + 1):
+            tile = self.__condition(tile, step, tile_row, tile_column)
+        self._cache[key] = tile
+        while len(self._cache) > self._max_tiles:
+            self._cache.popitem(last=False)
+        return tile
+
+    def __values(self, hour: int, rows: numpy.ndarray, columns: numpy.ndarray) -> numpy.ndarray:
+        """
+        Moisture of a set of cells at an hour. The cells are grouped by tile, so each tile is accessed once per call
+
+        :param hour: Hour since the start date
+        :type hour: int
+        :param rows: Row of each cell
+        :type rows: numpy.ndarray
+        :param columns: Column of each cell
+        :type columns: numpy.ndarray
+        :return: The moisture of each cell and class
+        :rtype: numpy.ndarray
+        """
+        size: int = self._tile_size
+        values: numpy.ndarray = numpy.empty(rows.shape + (FuelMoistureField.CLASSES, ), dtype=numpy.float64)
+        (tile_rows, tile_columns) = (rows // size, columns // size)
+        (keys, inverse) = numpy.unique(numpy.stack((tile_rows, tile_columns), axis=-1).reshape(-1, 2), axis=0,
+                                       return_inverse=True)
+        inverse = inverse.reshape(-1)
+        order: numpy.ndarray = numpy.argsort(inverse, kind='stable')
+        starts: numpy.ndarray = numpy.searchsorted(inverse[order], numpy.arange(keys.shape[0]))
+        for ((tile_row, tile_column), group) in zip(keys.tolist(), numpy.split(order, starts[1:])):
+            tile: numpy.ndarray = self.__tile(hour, tile_row, tile_column)
+            values[group] = tile[rows[group] - tile_row * size, columns[group] - tile_column * size]
+        return values
+
+    def moisture(self, x: numpy.ndarray, y: numpy.ndarray, date: datetime.datetime) -> numpy.ndarray:
+        """
+        Fuel moisture of a set of points at a date
+
+        :param x: X coordinates of the points
+        :type x: numpy.ndarray
+        :param y: Y coordinates of the points
+        :type y: numpy.ndarray
+        :param date: Date of the moisture, dates before the start date get the base moisture
+        :type date: datetime.datetime
+        :return: The moisture (fraction) of each point as a (n, 5) array ordered as (1h, 10h, 100h, live herbaceous,
+        live woody)
+        :rtype: numpy.ndarray
+        """
+        (x_origin, cell_width, _, y_origin, _, cell_height) = self._geo_transform
+        columns: numpy.ndarray = numpy.floor((numpy.asarray(x, dtype=numpy.float64).reshape(-1) - x_origin) /
+                                             cell_width).astype(numpy.int64)
+        rows: numpy.ndarray = numpy.floor((numpy.asarray(y, dtype=numpy.float64).reshape(-1) - y_origin) /
+                                          cell_height).astype(numpy.int64)
+        if len(self._stations) == 0:
+            # The moisture does not change with time
+            return self.__values(0, rows, columns)
+        hours: float = max(0.0, (date - self._start_date).total_seconds() / 3600)
+        hour: int = int(math.floor(hours))
+        values: numpy.ndarray = self.__values(hour, rows, columns)
+        if hours > hour:
+            values = (hour + 1 - hours) * values + (hours - hour) * self.__values(hour + 1, rows, columns)
+        return values
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Union
+
+import numpy
+from osgeo import gdal
+
+import gisfire_spread_simulation.fuel_models.standard_fuel_models as models
+from gisfire_spread_simulation.fuel_models.fuel_model import FuelModel
+from gisfire_spread_simulation.fuel_models.fuel_model_table import FuelModelTable
+from gisfire_spread_simulation.data_providers.tile_cache import TileCache
+
+
+class RasterFuelLookup:
+    """
+    Fuel model lookup over a raster of fuel model codes (i.e. a GeoTIFF). The raster is read by tiles through GDAL and
+    only the tiles under the active fronts are kept in memory, so national scale rasters can be used. A query for a
+    whole perimeter is solved with index arithmetic: the coordinates are converted to pixels with the geo transform and
+    the codes are converted to fuel model indices with a lookup table.
+
+    Pixels with the no data value, codes without fuel model and points outside the raster get the non burnable model.
+    The coordinates of the queries must be in the CRS of the raster.
+
+    A pickled lookup opens the raster again from its path.
+    """
+
+    def __init__(self, path: str, fuel_models: Union[Dict[str, FuelModel], None] = None, band: int = 1,
+                 tile_size: int = 256, max_tiles: int = 64) -> None:
+        """
+        Constructor
+
+        :param path: Path of the raster
+        :type path: str
+        :param fuel_models: Fuel models by code, defaults to the standard fuel models. Only numeric codes can be stored
+        in a raster
+        :type fuel_models: Union[Dict[str, FuelModel], None]
+        :param band: Band of the raster with the fuel codes
+        :type band: int
+        :param tile_size: Number of rows and columns of the tiles read from the raster
+        :type tile_size: int
+        :param max_tiles: Maximum number of tiles kept in memory
+        :type max_tiles: int
+        """
+        self._path: str = path
+        self._band_number: int = band
+        self._tile_size: int = tile_size
+        self._max_tiles: int = max_tiles
+        self.__open()
+        # Code to fuel model index table, index 0 is always the non burnable model
+        catalogue: Dict[str, FuelModel] = models.fuel_models if fuel_models is None else fuel_models
+        table: FuelModelTable = FuelModelTable([])
+        codes: Dict[int, FuelModel] = {int(code): fuel_model for code, fuel_model in catalogue.items()
+                                       if code.isdigit()}
+        self._code_table: numpy.ndarray = numpy.zeros(max(codes.keys(), default=0) + 1, dtype=numpy.int32)
+        for code, fuel_model in sorted(codes.items()):
+            self._code_table[code] = table.register(fuel_model)
+        self._fuel_models: List[FuelModel] = table.fuel_models
+
+    def __open(self) -> None:
+        """
+        Opens the raster and creates the tile cache of its band
+        """
+        self._dataset: gdal.Dataset = gdal.Open(self._path, gdal.GA_ReadOnly)
+        if self._dataset is None:
+            raise ValueError('Unable to open the fuel raster {}'.format(self._path))
+        self._geo_transform = self._dataset.GetGeoTransform()
+        if self._geo_transform[2] != 0 or self._geo_transform[4] != 0:
+            raise ValueError('Rotated fuel rasters are not supported')
+        self._band: gdal.Band = self._dataset.GetRasterBand(self._band_number)
+        self._no_data: Union[float, None] = self._band.GetNoDataValue()
+        self._tiles: TileCache = TileCache(self.__read_window, self._dataset.RasterXSize, self._dataset.RasterYSize,
+                                           tile_size=self._tile_size, max_tiles=self._max_tiles, fill=-1,
+                                           dtype=numpy.int64)
+
+    def __read_window(self, x_offset: int, y_offset: int, width: int, height: int) -> numpy.ndarray:
+        """
+        Reads a window of the band with the no data pixels set to -1. The no data value is compared in the data type of
+        the raster, before the codes are converted to integers, and the NaN pixels of floating point rasters are always
+        no data
+
+        :param x_offset: Column of the upper left pixel
+        :type x_offset: int
+        :param y_offset: Row of the upper left pixel
+        :type y_offset: int
+        :param width: Number of columns
+        :type width: int
+        :param height: Number of rows
+        :type height: int
+        :return: The codes of the window
+        :rtype: numpy.ndarray
+        """
+        values: numpy.ndarray = self._band.ReadAsArray(x_offset, y_offset, width, height)
+        missing: numpy.ndarray = numpy.zeros(values.shape, dtype=bool)
+        if numpy.issubdtype(values.dtype, numpy.floating):
+            missing = ~numpy.isfinite(values)
+        if self._no_data is not None and not numpy.isnan(self._no_data):
+            missing |= values == self._no_data
+        return numpy.where(missing, -1, values).astype(numpy.int64)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # GDAL objects and the tiles are not pickled
+        return {'path': self._path, 'band': self._band_number, 'tile_size': self._tile_size,
+                'max_tiles': self._max_tiles, 'fuel_models': self._fuel_models, 'code_table': self._code_table}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self._path = state['path']
+        self._band_number = state['band']
+        self._tile_size = state['tile_size']
+        self._max_tiles = state['max_tiles']
+        self._fuel_models = state['fuel_models']
+        self._code_table = state['code_table']
+        self.__open()
+
+    @property
+    def fuel_models(self) -> List[FuelModel]:
+        """
+        Fuel models referenced by the indices returned by the lookup, the first one is the non burnable model
+        """
+        return self._fuel_models
+
+    @property
+    def tiles(self) -> TileCache:
+        return self._tiles
+
+    def lookup(self, x: numpy.ndarray, y: numpy.ndarray) -> numpy.ndarray:
+        """
+        Fuel model index of a set of points
+
+        :param x: X coordinates of the points
+        :type x: numpy.ndarray
+        :param y: Y coordinates of the points
+        :type y: numpy.ndarray
+        :return: The indices in fuel_models of the fuel model at each point
+        :rtype: numpy.ndarray
+        """
+        (x_origin, pixel_width, _, y_origin, _, pixel_height) = self._geo_transform
+        columns: numpy.ndarray = numpy.floor((numpy.asarray(x, dtype=numpy.float64) - x_origin) / pixel_width)
+        rows: numpy.ndarray = numpy.floor((numpy.asarray(y, dtype=numpy.float64) - y_origin) / pixel_height)
+        codes: numpy.ndarray = self._tiles.values(rows.astype(numpy.int64), columns.astype(numpy.int64))
+        known: numpy.ndarray = (codes >= 0) & (codes < self._code_table.shape[0])
+        return numpy.where(known, self._code_table[numpy.where(known, codes, 0)], 0).astype(numpy.int32)
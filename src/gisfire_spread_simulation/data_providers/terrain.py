@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations  # Needed to allow returning type of enclosing class PEP 563
+
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Tuple
+from typing import Union
+
+import numpy
+from osgeo import gdal
+
+
+class TerrainLookup:
+    """
+    Slope and aspect lookup of a digital elevation model. The slope and aspect of each cell are computed once, when the
+    lookup is created, with the Horn (1981) finite differences of the 3x3 neighbourhood of the cell, and are stored as
+    float32 arrays. For large areas the arrays can be memory mapped to a file, then the elevation model is processed by
+    blocks of rows and only the pages of the arrays under the active fronts are in memory. A query for a whole perimeter
+    is solved with index arithmetic like the fuel raster lookup (see RasterFuelLookup).
+
+    Points outside the elevation model, cells with no data and flat cells get no slope. The coordinates of the queries
+    must be in the CRS of the elevation model, which must have the same units horizontally and vertically.
+
+    A pickled memory mapped lookup only carries its file, which is mapped again read only, so all the processes share
+    the same pages.
+    """
+
+    def __init__(self, read_window: Callable[[int, int, int, int], numpy.ndarray], width: int, height: int,
+                 geo_transform: Tuple[float, float, float, float, float, float], no_data: Union[float, None] = None,
+                 memory_map: Union[str, None] = None, block_rows: int = 256) -> None:
+        """
+        Constructor, computes the slope and aspect of the elevation model
+
+        :param read_window: Function that reads a window of the elevation model given its column offset, row offset,
+        width and height and returns a (height, width) array
+        :type read_window: Callable[[int, int, int, int], numpy.ndarray]
+        :param width: Number of columns of the elevation model
+        :type width: int
+        :param height: Number of rows of the elevation model
+        :type height: int
+        :param geo_transform: GDAL geo transform of the elevation model
+        :type geo_transform: Tuple[float, float, float, float, float, float]
+        :param no_data: No data value of the elevation model
+        :type no_data: Union[float, None]
+        :param memory_map: File where the slope and aspect arrays are stored, None keeps them in memory
+        :type memory_map: Union[str, None]
+        :param block_rows: Number of rows of the elevation model read at once
+        :type block_rows: int
+        """
+        if geo_transform[2] != 0 or geo_transform[4] != 0:
+            raise ValueError('Rotated elevation models are not supported')
+        self._geo_transform: Tuple[float, float, float, float, float, float] = tuple(geo_transform)
+        self._memory_map: Union[str, None] = memory_map
+        # Slope and aspect of each cell, in this order
+        if memory_map is None:
+            self._grid: numpy.ndarray = numpy.zeros((2, height, width), dtype=numpy.float32)
+        else:
+            self._grid = numpy.lib.format.open_memmap(memory_map, mode='w+', dtype=numpy.float32,
+                                                      shape=(2, height, width))
+        for row in range(0, height, block_rows):
+            rows: int = min(block_rows, height - row)
+            # The block with a row of its neighbours above and below, the borders of the model repeat their cells
+            (top, bottom) = (max(row - 1, 0), min(row + rows + 1, height))
+            elevation: numpy.ndarray = numpy.asarray(read_window(0, top, width, bottom - top), dtype=numpy.float64)
+            if no_data is not None:
+                elevation[elevation == no_data] = numpy.nan
+            elevation = numpy.pad(elevation, ((1 if top == row else 0, 1 if bottom == row + rows else 0), (1, 1)),
+                                  mode='edge')
+            (self._grid[0, row:row + rows], self._grid[1, row:row + rows]) = TerrainLookup.horn(
+                elevation, geo_transform[1], -geo_transform[5])
+        if memory_map is not None:
+            self._grid.flush()
+
+    @staticmethod
+    def from_raster(path: str, band: int = 1, memory_map: Union[str, None] = None,
+                    block_rows: int = 256) -> TerrainLookup:
+        """
+        Lookup of an elevation raster read through GDAL
+
+        :param path: Path of the raster
+        :type path: str
+        :param band: Band of the raster with the elevation
+        :type band: int
+        :param memory_map: File where the slope and aspect arrays are stored, None keeps them in memory
+        :type memory_map: Union[str, None]
+        :param block_rows: Number of rows of the raster read at once
+        :type block_rows: int
+        :return: The lookup
+        :rtype: TerrainLookup
+        """
+        dataset: gdal.Dataset = gdal.Open(path, gdal.GA_ReadOnly)
+        if dataset is None:
+            raise ValueError('Unable to open the elevation raster {}'.format(path))
+        raster_band: gdal.Band = dataset.GetRasterBand(band)
+        return TerrainLookup(lambda x_offset, y_offset, width, height:
+                             raster_band.ReadAsArray(x_offset, y_offset, width, height),
+                             dataset.RasterXSize, dataset.RasterYSize, dataset.GetGeoTransform(),
+                             raster_band.GetNoDataValue(), memory_map=memory_map, block_rows=block_rows)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # A memory mapped grid is mapped again from its file
+        return {'geo_transform': self._geo_transform, 'memory_map': self._memory_map,
+                'grid': self._grid if self._memory_map is None else None}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self._geo_transform = state['geo_transform']
+        self._memory_map = state['memory_map']
+        self._grid = state['grid'] if self._memory_map is None else numpy.load(self._memory_map, mmap_mode='r')
+
+    @property
+    def width(self) -> int:
+        return self._grid.shape[2]
+
+    @property
+    def height(self) -> int:
+        return self._grid.shape[1]
+
+    @staticmethod
+    def horn(elevation: numpy.ndarray, cell_width: float,
+             cell_height: float) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Slope and aspect of the inner cells of an elevation grid with the Horn (1981) weighted finite differences
+
+        :param elevation: Elevation of the cells, rows from north to south, the outer rows and columns are only used as
+        neighbours
+        :type elevation: numpy.ndarray
+        :param cell_width: Width of the cells
+        :type cell_width: float
+        :param cell_height: Height of the cells
+        :type cell_height: float
+        :return: The slope in radians and the aspect (direction the slope faces) in radians clockwise from north
+        :rtype: Tuple[numpy.ndarray, numpy.ndarray]
+        """
+        # Neighbours of the inner cells: north west, north, north east, west, east, south west, south and south east
+        (rows, columns) = (elevation.shape[0] - 2, elevation.shape[1] - 2)
+        (nw, n, ne) = (elevation[0:rows, 0:columns], elevation[0:rows, 1:columns + 1], elevation[0:rows, 2:])
+        (w, e) = (elevation[1:rows + 1, 0:columns], elevation[1:rows + 1, 2:])
+        (sw, s, se) = (elevation[2:, 0:columns], elevation[2:, 1:columns + 1], elevation[2:, 2:])
+        # Elevation gradient to the east and to the north
+        east: numpy.ndarray = ((ne + 2 * e + se) - (nw + 2 * w + sw)) / (8 * cell_width)
+        north: numpy.ndarray = ((nw + 2 * n + ne) - (sw + 2 * s + se)) / (8 * cell_height)
+        (east, north) = (numpy.nan_to_num(east), numpy.nan_to_num(north))
+        slope: numpy.ndarray = numpy.arctan(numpy.hypot(east, north))
+        # The slope faces down the gradient
+        aspect: numpy.ndarray = numpy.mod(numpy.arctan2(-east, -north), 2 * numpy.pi)
+        return slope.astype(numpy.float32), aspect.astype(numpy.float32)
+
+    def lookup(self, x: numpy.ndarray, y: numpy.ndarray) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Slope and aspect of a set of points
+
+        :param x: X coordinates of the points
+        :type x: numpy.ndarray
+        :param y: Y coordinates of the points
+        :type y: numpy.ndarray
+        :return: The slope in radians and the aspect in radians clockwise from north of the cell of each point
+        :rtype: Tuple[numpy.ndarray, numpy.ndarray]
+        """
+        (x_origin, pixel_width, _, y_origin, _, pixel_height) = self._geo_transform
+        columns: numpy.ndarray = numpy.floor((numpy.asarray(x, dtype=numpy.float64) - x_origin) /
+                                             pixel_width).astype(numpy.int64)
+        rows: numpy.ndarray = numpy.floor((numpy.asarray(y, dtype=numpy.float64) - y_origin) /
+                                          pixel_height).astype(numpy.int64)
+        inside: numpy.ndarray = (rows >= 0) & (rows < self.height) & (columns >= 0) & (columns < self.width)
+        (rows, columns) = (numpy.where(inside, rows, 0), numpy.where(inside, columns, 0))
+        slope: numpy.ndarray = numpy.where(inside, self._grid[0][rows, columns], 0).astype(numpy.float64)
+        aspect: numpy.ndarray = numpy.where(inside, self._grid[1][rows, columns], 0).astype(numpy.float64)
+        return slope, aspect
+
+    def upslope(self, x: numpy.ndarray, y: numpy.ndarray) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Slope and upslope direction of a set of points, the direction as the heading of the spread ellipses of the
+        simulator (counterclockwise from north)
+
+        :param x: X coordinates of the points
+        :type x: numpy.ndarray
+        :param y: Y coordinates of the points
+        :type y: numpy.ndarray
+        :return: The slope and the upslope direction in radians
+        :rtype: Tuple[numpy.ndarray, numpy.ndarray]
+        """
+        (slope, aspect) = self.lookup(x, y)
+        return slope, -(aspect + numpy.pi)
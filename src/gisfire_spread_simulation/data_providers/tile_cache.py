@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from collections import OrderedDict
+from typing import Any
+from typing import Callable
+
+import numpy
+
+
+class TileCache:
+    """
+    Least recently used cache of the square tiles of a large grid. The grid is never read as a whole: the pixels are
+    requested by row and column and only the tiles that contain them are read and kept in memory, so the resident data
+    follows the active fire fronts. The grid is read with a window reader function, so any source (GDAL bands, memory
+    maps, arrays) can be used.
+    """
+
+    def __init__(self, read_window: Callable[[int, int, int, int], numpy.ndarray], width: int, height: int,
+                 tile_size: int = 256, max_tiles: int = 64, fill: Any = 0, dtype: Any = numpy.float64) -> None:
+        """
+        Constructor
+
+        :param read_window: Function that reads a window of the grid given its column offset, row offset, width and
+        height and returns a (height, width) array
+        :type read_window: Callable[[int, int, int, int], numpy.ndarray]
+        :param width: Number of columns of the grid
+        :type width: int
+        :param height: Number of rows of the grid
+        :type height: int
+        :param tile_size: Number of rows and columns of a tile
+        :type tile_size: int
+        :param max_tiles: Maximum number of tiles kept in memory
+        :type max_tiles: int
+        :param fill: Value of the pixels outside the grid
+        :type fill: Any
+        :param dtype: Type of the values returned
+        :type dtype: Any
+        """
+        self._read_window: Callable[[int, int, int, int], numpy.ndarray] = read_window
+        self._width: int = width
+        self._height: int = height
+        self._tile_size: int = tile_size
+        self._tile_columns: int = (width + tile_size - 1) // tile_size
+        self._max_tiles: int = max(1, max_tiles)
+        self._fill: Any = fill
+        self._dtype: Any = dtype
+        self._tiles: OrderedDict = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    @property
+    def width(self) -> int:
+        return self._width
+
+    @property
+    def height(self) -> int:
+        return self._height
+
+    @property
+    def resident_tiles(self) -> int:
+        return len(self._tiles)
+
+    def clear(self) -> None:
+        """
+        Removes all the tiles from memory and resets the statistics
+        """
+        self._tiles.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __tile(self, tile_id: int) -> numpy.ndarray:
+        """
+        Returns a tile, reading it if it is not in memory and removing the least recently used tile if the cache is
+        full
+
+        :param tile_id: Row major index of the tile
+        :type tile_id: int
+        :return: The pixels of the tile, the tiles in the right and bottom borders of the grid can be smaller
+        :rtype: numpy.ndarray
+        """
+        tile = self._tiles.get(tile_id)
+        if tile is not None:
+            self._tiles.move_to_end(tile_id)
+            self.hits += 1
+            return tile
+        self.misses += 1
+        row: int = (tile_id // self._tile_columns) * self._tile_size
+        column: int = (tile_id % self._tile_columns) * self._tile_size
+        tile = numpy.asarray(self._read_window(column, row, min(self._tile_size, self._width - column),
+                                               min(self._tile_size, self._height - row)), dtype=self._dtype)
+        self._tiles[tile_id] = tile
+        if len(self._tiles) > self._max_tiles:
+            self._tiles.popitem(last=False)
+        return tile
+
+    def values(self, rows: numpy.ndarray, columns: numpy.ndarray) -> numpy.ndarray:
+        """
+        Values of a set of pixels. The pixels are grouped by tile, so each tile is accessed once per call
+
+        :param rows: Row of each pixel
+        :type rows: numpy.ndarray
+        :param columns: Column of each pixel
+        :type columns: numpy.ndarray
+        :return: The value of each pixel, the fill value for the pixels outside the grid
+        :rtype: numpy.ndarray
+        """
+        rows = numpy.asarray(rows, dtype=numpy.int64)
+        columns = numpy.asarray(columns, dtype=numpy.int64)
+        values: numpy.ndarray = numpy.full(rows.shape, self._fill, dtype=self._dtype)
+        inside: numpy.ndarray = numpy.flatnonzero((rows >= 0) & (rows < self._height) &
+                                                  (columns >= 0) & (columns < self._width))
+        if inside.shape[0] == 0:
+            return values
+        tile_rows: numpy.ndarray = rows[inside] // self._tile_size
+        tile_columns: numpy.ndarray = columns[inside] // self._tile_size
+        tile_ids: numpy.ndarray = tile_rows * self._tile_columns + tile_columns
+        order: numpy.ndarray = numpy.argsort(tile_ids, kind='stable')
+        (unique_ids, starts) = numpy.unique(tile_ids[order], return_index=True)
+        for (tile_id, group) in zip(unique_ids.tolist(), numpy.split(order, starts[1:])):
+            tile: numpy.ndarray = self.__tile(tile_id)
+            pixels: numpy.ndarray = inside[group]
+            values[pixels] = tile[rows[pixels] - tile_rows[group] * self._tile_size,
+                                  columns[pixels] - tile_columns[group] * self._tile_size]
+        return values
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Tuple
+from typing import Union
+
+import numpy
+from qgis.core import QgsGeometry
+from qgis.core import QgsRectangle
+from qgis.core import QgsSpatialIndex
+from qgis.core import QgsVectorLayer
+
+import gisfire_spread_simulation.fuel_models.standard_fuel_models as models
+from gisfire_spread_simulation.fuel_models.fuel_model import FuelModel
+from gisfire_spread_simulation.fuel_models.fuel_model_table import FuelModelTable
+from gisfire_spread_simulation.fuel_models.standard_fuel_models import model_0
+from gisfire_spread_simulation.qgis_helper_functions.geometry import geometry_rings
+from gisfire_spread_simulation.simulation_algorithms.polygon_algorithms import PolygonAlgorithm
+
+
+class VectorFuelLookup:
+    """
+    Fuel model lookup over a land cover polygon layer. The layer is read once when the lookup is built: the bounding
+    boxes of the polygons are loaded into a spatial index and their rings are kept as coordinate arrays, so the queries
+    do not access the layer. A query answers all the points of a perimeter at once. The points are grouped in square
+    buckets about the size of a polygon and the spatial index gives the polygons that intersect the bounding box of each
+    bucket, so distant fronts do not select the polygons between them. Each candidate polygon tests the points of its
+    buckets inside its own bounding box with a vectorized point in polygon test.
+
+    The fuel model of a polygon is given by the code stored in a field of the layer. Points outside any polygon, and
+    polygons with an empty or unknown code, get the non burnable model. The coordinates of the queries must be in the
+    CRS of the layer.
+
+    A pickled lookup does not need the layer, the spatial index is built again from the bounding boxes of the polygons.
+    """
+
+    def __init__(self, layer: QgsVectorLayer, field: str = 'fuel_model',
+                 fuel_models: Union[Dict[str, FuelModel], None] = None,
+                 bucket_size: Union[float, None] = None) -> None:
+        """
+        Constructor, builds the spatial index of the layer
+
+        :param layer: Land cover polygon layer
+        :type layer: QgsVectorLayer
+        :param field: Name of the field with the fuel model code
+        :type field: str
+        :param fuel_models: Fuel models by code, defaults to the standard fuel models
+        :type fuel_models: Union[Dict[str, FuelModel], None]
+        :param bucket_size: Side of the buckets of the query points, defaults to the median size of the polygons
+        :type bucket_size: Union[float, None]
+        """
+        if layer.fields().indexOf(field) < 0:
+            raise ValueError('The land cover layer {} has no {} field'.format(layer.name(), field))
+        catalogue: Dict[str, FuelModel] = models.fuel_models if fuel_models is None else fuel_models
+        # Index 0 is always the non burnable model
+        table: FuelModelTable = FuelModelTable([])
+        self._fuel: Dict[int, int] = dict()
+        self._extents: Dict[int, Tuple[float, float, float, float]] = dict()
+        self._rings: Dict[int, List[numpy.ndarray]] = dict()
+        for feature in layer.getFeatures():
+            geometry: QgsGeometry = feature.geometry()
+            if geometry.isEmpty():
+                continue
+            fuel_model: Union[FuelModel, None] = catalogue.get(str(feature[field]))
+            if fuel_model is None or fuel_model is model_0:
+                # Non burnable polygons give the same answer as no polygon
+                continue
+            self._fuel[feature.id()] = table.register(fuel_model)
+            rectangle: QgsRectangle = geometry.boundingBox()
+            self._extents[feature.id()] = (rectangle.xMinimum(), rectangle.yMinimum(), rectangle.xMaximum(),
+                                           rectangle.yMaximum())
+            self._rings[feature.id()] = [numpy.column_stack((x, y)) for polygon in geometry_rings(geometry)
+                                         for (x, y) in polygon]
+        self._fuel_models: List[FuelModel] = table.fuel_models
+        if bucket_size is None:
+            sizes: numpy.ndarray = numpy.array([max(x_max - x_min, y_max - y_min) for (x_min, y_min, x_max, y_max)
+                                                in self._extents.values()])
+            bucket_size = float(numpy.median(sizes)) if sizes.shape[0] > 0 else 1.0
+        self._bucket_size: float = bucket_size if bucket_size > 0 else 1.0
+        self.__build_index()
+
+    def __build_index(self) -> None:
+        """
+        Builds the spatial index from the bounding boxes of the polygons with a fuel model
+        """
+        self._index: QgsSpatialIndex = QgsSpatialIndex()
+        for feature_id, (x_min, y_min, x_max, y_max) in self._extents.items():
+            self._index.addFeature(feature_id, QgsRectangle(x_min, y_min, x_max, y_max))
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The spatial index is not picklable
+        state: Dict[str, Any] = dict(self.__dict__)
+        del state['_index']
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.__build_index()
+
+    @property
+    def fuel_models(self) -> List[FuelModel]:
+        """
+        Fuel models referenced by the indices returned by the lookup, the first one is the non burnable model
+        """
+        return self._fuel_models
+
+    def lookup(self, x: numpy.ndarray, y: numpy.ndarray) -> numpy.ndarray:
+        """
+        Fuel model index of a set of points
+
+        :param x: X coordinates of the points
+        :type x: numpy.ndarray
+        :param y: Y coordinates of the points
+        :type y: numpy.ndarray
+        :return: The indices in fuel_models of the fuel model at each point
+        :rtype: numpy.ndarray
+        """
+        x = numpy.asarray(x, dtype=numpy.float64)
+        y = numpy.asarray(y, dtype=numpy.float64)
+        fuel: numpy.ndarray = numpy.zeros(x.shape, dtype=numpy.int32)
+        if x.shape[0] == 0:
+            return fuel
+        pending: numpy.ndarray = numpy.ones(x.shape, dtype=bool)
+        # Points of each polygon found by the spatial index queries of the buckets
+        cells: numpy.ndarray = numpy.floor(numpy.column_stack((x, y)) / self._bucket_size).astype(numpy.int64)
+        buckets: numpy.ndarray = numpy.unique(cells, axis=0, return_inverse=True)[1].ravel()
+        order: numpy.ndarray = numpy.argsort(buckets, kind='stable')
+        starts: numpy.ndarray = numpy.flatnonzero(numpy.diff(buckets[order])) + 1
+        points: Dict[int, List[numpy.ndarray]] = dict()
+        for group in numpy.split(order, starts):
+            rectangle: QgsRectangle = QgsRectangle(float(x[group].min()), float(y[group].min()),
+                                                   float(x[group].max()), float(y[group].max()))
+            for feature_id in self._index.intersects(rectangle):
+                points.setdefault(feature_id, list()).append(group)
+        # Sorted so overlapping polygons are always resolved the same way
+        for feature_id in sorted(points.keys()):
+            (x_min, y_min, x_max, y_max) = self._extents[feature_id]
+            candidates: numpy.ndarray = numpy.concatenate(points[feature_id])
+            candidates = candidates[pending[candidates] & (x[candidates] >= x_min) & (x[candidates] <= x_max) &
+                                    (y[candidates] >= y_min) & (y[candidates] <= y_max)]
+            if candidates.shape[0] == 0:
+                continue
+            inside: numpy.ndarray = PolygonAlgorithm.points_in_rings(x[candidates], y[candidates],
+                                                                     self._rings[feature_id])
+            fuel[candidates[inside]] = self._fuel[feature_id]
+            pending[candidates[inside]] = False
+            if not pending.any():
+                break
+        return fuel
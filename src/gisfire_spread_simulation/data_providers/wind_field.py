@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations  # Needed to allow returning type of enclosing class PEP 563
+
+import datetime
+import re
+from collections import OrderedDict
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Tuple
+from typing import Union
+
+import numpy
+from dateutil import parser
+from osgeo import gdal
+
+
+def read_ascii_grid(path: str) -> Tuple[numpy.ndarray, Tuple[float, float, float, float, float, float],
+                                        Union[float, None]]:
+    """
+    Reads an ESRI ASCII grid (i.e. the output of WindNinja)
+
+    :param path: Path of the grid
+    :type path: str
+    :return: The values, the GDAL geo transform of the grid and its no data value
+    :rtype: Tuple[numpy.ndarray, Tuple[float, float, float, float, float, float], Union[float, None]]
+    """
+    header: Dict[str, float] = dict()
+    with open(path, encoding='ascii') as grid_file:
+        while True:
+            position: int = grid_file.tell()
+            fields: List[str] = grid_file.readline().split()
+            if len(fields) != 2 or not fields[0][0].isalpha():
+                grid_file.seek(position)
+                break
+            header[fields[0].lower()] = float(fields[1])
+        values: numpy.ndarray = numpy.loadtxt(grid_file, dtype=numpy.float64, ndmin=2)
+    (columns, rows, cell_size) = (int(header['ncols']), int(header['nrows']), header['cellsize'])
+    if values.shape != (rows, columns):
+        raise ValueError('The grid {} does not have {} rows and {} columns'.format(path, rows, columns))
+    # The corner can be given by the lower left cell centre
+    x_corner: float = header['xllcorner'] if 'xllcorner' in header else header['xllcenter'] - cell_size / 2
+    y_corner: float = header['yllcorner'] if 'yllcorner' in header else header['yllcenter'] - cell_size / 2
+    return values, (x_corner, cell_size, 0.0, y_corner + rows * cell_size, 0.0, -cell_size), header.get('nodata_value')
+
+
+class WindField:
+    """
+    Gridded wind time series, i.e. the frames of a WindNinja simulation or the wind of a weather model, interpolated
+    bilinearly in space and linearly in time for a set of points. The frames are loaded when a query needs them and only
+    the most recently used ones are kept in memory, so a simulation step only touches the two frames around its date.
+    The wind is interpolated as east and north components, so directions around north do not cancel out.
+
+    All the frames must share the same grid, in the CRS of the simulation layers. Points outside the grid get the wind
+    of the nearest border cell, dates before the first frame or after the last one get the wind of that frame and no
+    data cells are calm.
+
+    A pickled field loads its frames again.
+    """
+
+    # Frame readers
+    ASCII = 'ascii'
+    GDAL = 'gdal'
+
+    def __init__(self, frames: List[Tuple[datetime.datetime, str, str, int]], reader: str = ASCII,
+                 components: bool = False, speed_factor: float = 1.0, max_frames: int = 4) -> None:
+        """
+        Constructor
+
+        :param frames: Date and sources of the two wind variables of each frame, with the band of the sources that holds
+        the frame. The variables are the speed and the direction the wind blows from, in degrees clockwise from north
+        :type frames: List[Tuple[datetime.datetime, str, str, int]]
+        :param reader: Reader of the sources: ASCII for ESRI ASCII grids or GDAL for any raster GDAL can open
+        :type reader: str
+        :param components: The variables are the east and north components of the wind instead of its speed and
+        direction
+        :type components: bool
+        :param speed_factor: Factor applied to the wind speed to get the mid-flame wind in m/s, i.e. a unit conversion
+        and a wind adjustment factor
+        :type speed_factor: float
+        :param max_frames: Maximum number of frames kept in memory
+        :type max_frames: int
+        """
+        if len(frames) == 0:
+            raise ValueError('A wind field needs at least one frame')
+        if reader not in (WindField.ASCII, WindField.GDAL):
+            raise ValueError('Unknown wind frame reader {}'.format(reader))
+        self._frames: List[Tuple[datetime.datetime, str, str, int]] = sorted(frames, key=lambda frame: frame[0])
+        self._reader: str = reader
+        self._components: bool = components
+        self._speed_factor: float = speed_factor
+        self._max_frames: int = max(2, max_frames)
+        self._times: numpy.ndarray = numpy.array([frame[0].timestamp() for frame in self._frames])
+        self._geo_transform: Union[Tuple[float, float, float, float, float, float], None] = None
+        self._shape: Union[Tuple[int, int], None] = None
+        self._cache: OrderedDict = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    @staticmethod
+    def from_ascii_grids(frames: List[Tuple[datetime.datetime, str, str]], speed_factor: float = 1.0,
+                         max_frames: int = 4) -> WindField:
+        """
+        Wind field of a series of ESRI ASCII grids of wind speed and direction, as written by WindNinja (the vel and
+        ang grids of each time)
+
+        :param frames: Date, speed grid and direction grid of each frame
+        :type frames: List[Tuple[datetime.datetime, str, str]]
+        :param speed_factor: Factor applied to the speed of the grids to get the mid-flame wind in m/s
+        :type speed_factor: float
+        :param max_frames: Maximum number of frames kept in memory
+        :type max_frames: int
+        :return: The wind field
+        :rtype: WindField
+        """
+        return WindField([(date, speed, direction, 1) for (date, speed, direction) in frames], WindField.ASCII,
+                         speed_factor=speed_factor, max_frames=max_frames)
+
+    @staticmethod
+    def from_netcdf(path: str, variables: Tuple[str, str] = ('speed', 'direction'), components: bool = False,
+                    time_dimension: str = 'time', speed_factor: float = 1.0, max_frames: int = 4) -> WindField:
+        """
+        Wind field of the variables of a NetCDF file, read through the GDAL NetCDF driver, with a band per time of the
+        time dimension. The dates are given by the values and the CF units of the dimension (i.e. hours since a date)
+
+        :param path: Path of the NetCDF file
+        :type path: str
+        :param variables: Names of the speed and direction variables, or of the east and north components
+        :type variables: Tuple[str, str]
+        :param components: The variables are the east and north components of the wind
+        :type components: bool
+        :param time_dimension: Name of the time dimension
+        :type time_dimension: str
+        :param speed_factor: Factor applied to the speed of the variables to get the mid-flame wind in m/s
+        :type speed_factor: float
+        :param max_frames: Maximum number of frames kept in memory
+        :type max_frames: int
+        :return: The wind field
+        :rtype: WindField
+        """
+        sources: List[str] = ['NETCDF:"{}":{}'.format(path, variable) for variable in variables]
+        dataset: gdal.Dataset = gdal.Open(sources[0], gdal.GA_ReadOnly)
+        if dataset is None:
+            raise ValueError('Unable to open the variable {} of {}'.format(variables[0], path))
+        metadata: Dict[str, str] = dataset.GetMetadata()
+        values: List[float] = [float(value) for value in
+                               metadata.get('NETCDF_DIM_{}_VALUES'.format(time_dimension), '').strip('{}').split(',')
+                               if value != '']
+        units: Union[re.Match, None] = re.match(r'\s*(\w+)\s+since\s+(.+)',
+                                                metadata.get('{}#units'.format(time_dimension), ''))
+        if units is None or len(values) != dataset.RasterCount:
+            raise ValueError('The time dimension {} of {} has no CF dates'.format(time_dimension, path))
+        seconds: Dict[str, float] = {'seconds': 1, 'minutes': 60, 'hours': 3600, 'days': 86400}
+        if units.group(1).lower() not in seconds:
+            raise ValueError('Unknown time units {}'.format(units.group(1)))
+        reference: datetime.datetime = parser.parse(units.group(2))
+        return WindField([(reference + datetime.timedelta(seconds=value * seconds[units.group(1).lower()]),
+                           sources[0], sources[1], band + 1) for band, value in enumerate(values)],
+                         WindField.GDAL, components=components, speed_factor=speed_factor, max_frames=max_frames)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The frames are not pickled
+        state: Dict[str, Any] = self.__dict__.copy()
+        state['_cache'] = OrderedDict()
+        return state
+
+    @property
+    def dates(self) -> List[datetime.datetime]:
+        return [frame[0] for frame in self._frames]
+
+    @property
+    def resident_frames(self) -> int:
+        return len(self._cache)
+
+    def __read(self, source: str, band: int) -> numpy.ndarray:
+        """
+        Reads a wind variable of a frame, checking that its grid is the grid of the field
+
+        :param source: Source of the variable
+        :type source: str
+        :param band: Band of the source
+        :type band: int
+        :return: The values of the variable, no data cells are not a number
+        :rtype: numpy.ndarray
+        """
+        if self._reader == WindField.ASCII:
+            (values, geo_transform, no_data) = read_ascii_grid(source)
+        else:
+            dataset: gdal.Dataset = gdal.Open(source, gdal.GA_ReadOnly)
+            if dataset is None:
+                raise ValueError('Unable to open the wind source {}'.format(source))
+            raster_band: gdal.Band = dataset.GetRasterBand(band)
+            (values, geo_transform, no_data) = (raster_band.ReadAsArray().astype(numpy.float64),
+                                                tuple(dataset.GetGeoTransform()), raster_band.GetNoDataValue())
+        if geo_transform[2] != 0 or geo_transform[4] != 0:
+            raise ValueError('Rotated wind grids are not supported')
+        if self._geo_transform is None:
+            (self._geo_transform, self._shape) = (geo_transform, values.shape)
+        elif not numpy.allclose(geo_transform, self._geo_transform) or values.shape != self._shape:
+            raise ValueError('The wind grid {} does not match the grid of the first frame'.format(source))
+        if no_data is not None:
+            values[values == no_data] = numpy.nan
+        return values
+
+    def __frame(self, index: int) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Returns the east and north wind components of a frame, loading it if it is not in memory and removing the least
+        recently used frame if the cache is full
+
+        :param index: Index of the frame
+        :type index: int
+        :return: The east and north components in m/s
+        :rtype: Tuple[numpy.ndarray, numpy.ndarray]
+        """
+        frame = self._cache.get(index)
+        if frame is not None:
+            self._cache.move_to_end(index)
+            self.hits += 1
+            return frame
+        self.misses += 1
+        (_, first, second, band) = self._frames[index]
+        (first_values, second_values) = (self.__read(first, band), self.__read(second, band))
+        if self._components:
+            (east, north) = (first_values, second_values)
+        else:
+            # The wind blows towards the opposite of its direction
+            direction: numpy.ndarray = numpy.radians(second_values)
+            (east, north) = (-first_values * numpy.sin(direction), -first_values * numpy.cos(direction))
+        frame = (numpy.nan_to_num(east * self._speed_factor), numpy.nan_to_num(north * self._speed_factor))
+        self._cache[index] = frame
+        if len(self._cache) > self._max_frames:
+            self._cache.popitem(last=False)
+        return frame
+
+    def components(self, x: numpy.ndarray, y: numpy.ndarray,
+                   date: datetime.datetime) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        East and north wind components of a set of points at a date
+
+        :param x: X coordinates of the points
+        :type x: numpy.ndarray
+        :param y: Y coordinates of the points
+        :type y: numpy.ndarray
+        :param date: Date of the wind
+        :type date: datetime.datetime
+        :return: The east and north components of the wind in m/s
+        :rtype: Tuple[numpy.ndarray, numpy.ndarray]
+        """
+        # Bracketing frames and the weight of the second one
+        time: float = date.timestamp()
+        second: int = int(numpy.clip(numpy.searchsorted(self._times, time, side='right'), 1, len(self._frames) - 1)) \
+            if len(self._frames) > 1 else 0
+        first: int = max(0, second - 1)
+        weight: float = 0.0 if first == second else \
+            float(numpy.clip((time - self._times[first]) / (self._times[second] - self._times[first]), 0, 1))
+        frames: List[Tuple[numpy.ndarray, numpy.ndarray]] = [self.__frame(first)]
+        if weight > 0:
+            frames.append(self.__frame(second))
+        # Bilinear weights of the four cell centres around each point
+        (x_origin, cell_width, _, y_origin, _, cell_height) = self._geo_transform
+        (rows, columns) = self._shape
+        column: numpy.ndarray = numpy.clip((numpy.asarray(x, dtype=numpy.float64) - x_origin) / cell_width - 0.5,
+                                           0, columns - 1)
+        row: numpy.ndarray = numpy.clip((numpy.asarray(y, dtype=numpy.float64) - y_origin) / cell_height - 0.5,
+                                        0, rows - 1)
+        (column_0, row_0) = (numpy.minimum(column.astype(numpy.intp), max(columns - 2, 0)),
+                             numpy.minimum(row.astype(numpy.intp), max(rows - 2, 0)))
+        (column_1, row_1) = (numpy.minimum(column_0 + 1, columns - 1), numpy.minimum(row_0 + 1, rows - 1))
+        (dx, dy) = (column - column_0, row - row_0)
+        result: List[numpy.ndarray] = list()
+        for component in range(2):
+            values: List[numpy.ndarray] = [frame[component][row_0, column_0] * (1 - dx) * (1 - dy) +
+                                           frame[component][row_0, column_1] * dx * (1 - dy) +
+                                           frame[component][row_1, column_0] * (1 - dx) * dy +
+                                           frame[component][row_1, column_1] * dx * dy for frame in frames]
+            result.append(values[0] if len(values) == 1 else (1 - weight) * values[0] + weight * values[1])
+        return result[0], result[1]
+
+    def wind(self, x: numpy.ndarray, y: numpy.ndarray,
+             date: datetime.datetime) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Wind of a set of points at a date, as the wind of the simulator: the speed and the direction the wind blows
+        towards, counterclockwise from north like the heading of the spread ellipses
+
+        :param x: X coordinates of the points
+        :type x: numpy.ndarray
+        :param y: Y coordinates of the points
+        :type y: numpy.ndarray
+        :param date: Date of the wind
+        :type date: datetime.datetime
+        :return: The wind speed in m/s and the wind direction in radians
+        :rtype: Tuple[numpy.ndarray, numpy.ndarray]
+        """
+        (east, north) = self.components(x, y, date)
+        return numpy.hypot(east, north), numpy.arctan2(-east, north)
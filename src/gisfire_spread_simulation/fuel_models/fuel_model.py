@@ -3,6 +3,7 @@
 
 from __future__ import annotations  # Needed to allow returning type of enclosing class PEP 563
 
+from typing import Any
 from typing import Union
 from enum import Enum
 
@@ -23,7 +24,8 @@ class FuelModel:
                  sav_ratio_live_herb: Union[float, None] = None, sav_ratio_live_wood: Union[float, None] = None,
                  fuel_bed_depth: Union[float, None] = None, moisture_of_extinction: Union[float, None] = None,
                  sav_ratio: Union[float, None] = None, bulk_density: Union[float, None] = None,
-                 relative_packing_ratio: Union[float, None] = None, model_type: Union[FuelModelType, None] = None):
+                 relative_packing_ratio: Union[float, None] = None, model_type: Union[FuelModelType, None] = None,
+                 fuel_load_dead_herb: Union[float, None] = None, sav_ratio_dead_herb: Union[float, None] = None):
         """
         TODO
 
@@ -63,6 +65,11 @@ class FuelModel:
         :type relative_packing_ratio:
         :param model_type:
         :type model_type:
+        :param fuel_load_dead_herb: Cured herbaceous fuel load, only present in the models derived from a dynamic model
+        (see cured)
+        :type fuel_load_dead_herb: Union[float, None]
+        :param sav_ratio_dead_herb: Surface-area-to-volume ratio of the cured herbaceous fuel
+        :type sav_ratio_dead_herb: Union[float, None]
         """
         self._particle_density = 32.
         self._heat_content = 8000.
@@ -86,6 +93,11 @@ class FuelModel:
         self._bulk_density = bulk_density
         self._relative_packing_ratio = relative_packing_ratio
         self._model_type = model_type
+        self._fuel_load_dead_herb = fuel_load_dead_herb
+        self._sav_ratio_dead_herb = sav_ratio_dead_herb
+        # Precomputed values that only depend on the fuel model (see FuelModelKernel). They are discarded each time a
+        # property of the model changes
+        self._kernel: Any = None
 
     @property
     def particle_density(self) -> float:
@@ -94,6 +106,7 @@ class FuelModel:
     @particle_density.setter
     def particle_density(self, pd: float) -> None:
         self._particle_density = pd
+        self._kernel = None
 
     @property
     def heat_content(self) -> float:
@@ -102,6 +115,7 @@ class FuelModel:
     @heat_content.setter
     def heat_content(self, hc: float) -> None:
         self._heat_content = hc
+        self._kernel = None
 
     @property
     def effective_mineral_content(self) -> float:
@@ -110,6 +124,7 @@ class FuelModel:
     @effective_mineral_content.setter
     def effective_mineral_content(self, emc: float) -> None:
         self._effective_mineral_content = emc
+        self._kernel = None
 
     @property
     def mineral_content(self) -> float:
@@ -118,6 +133,7 @@ class FuelModel:
     @mineral_content.setter
     def mineral_content(self, mc: float) -> None:
         self._mineral_content = mc
+        self._kernel = None
 
     @property
     def code(self) -> str:
@@ -142,6 +158,7 @@ class FuelModel:
     @fuel_load_1_h.setter
     def fuel_load_1_h(self, value: float) -> None:
         self._fuel_load_1_h = value
+        self._kernel = None
 
     @property
     def fuel_load_10_h(self) -> float:
@@ -150,6 +167,7 @@ class FuelModel:
     @fuel_load_10_h.setter
     def fuel_load_10_h(self, value: float) -> None:
         self._fuel_load_10_h = value
+        self._kernel = None
 
     @property
     def fuel_load_100_h(self) -> float:
@@ -158,6 +176,7 @@ class FuelModel:
     @fuel_load_100_h.setter
     def fuel_load_100_h(self, value: float) -> None:
         self._fuel_load_100_h = value
+        self._kernel = None
 
     @property
     def fuel_load_live_herb(self) -> float:
@@ -166,6 +185,7 @@ class FuelModel:
     @fuel_load_live_herb.setter
     def fuel_load_live_herb(self, value: float) -> None:
         self._fuel_load_live_herb = value
+        self._kernel = None
 
     @property
     def fuel_load_live_wood(self) -> float:
@@ -174,6 +194,16 @@ class FuelModel:
     @fuel_load_live_wood.setter
     def fuel_load_live_wood(self, value: float) -> None:
         self._fuel_load_live_wood = value
+        self._kernel = None
+
+    @property
+    def fuel_load_dead_herb(self) -> float:
+        return self._fuel_load_dead_herb
+
+    @fuel_load_dead_herb.setter
+    def fuel_load_dead_herb(self, value: float) -> None:
+        self._fuel_load_dead_herb = value
+        self._kernel = None
 
     @property
     def sav_ratio_1_h(self) -> float:
@@ -182,22 +212,25 @@ class FuelModel:
     @sav_ratio_1_h.setter
     def sav_ratio_1_h(self, value: float) -> None:
         self._sav_ratio_1_h = value
+        self._kernel = None
 
     @property
     def sav_ratio_10_h(self) -> float:
-        return self._mineral_content
+        return self._sav_ratio_10_h
 
     @sav_ratio_10_h.setter
     def sav_ratio_10_h(self, value: float) -> None:
         self._sav_ratio_10_h = value
+        self._kernel = None
 
     @property
     def sav_ratio_100_h(self) -> float:
-        return self._mineral_content
+        return self._sav_ratio_100_h
 
     @sav_ratio_100_h.setter
     def sav_ratio_100_h(self, value: float) -> None:
         self._sav_ratio_100_h = value
+        self._kernel = None
 
     @property
     def sav_ratio_live_herb(self) -> float:
@@ -206,6 +239,7 @@ class FuelModel:
     @sav_ratio_live_herb.setter
     def sav_ratio_live_herb(self, value: float) -> None:
         self._sav_ratio_live_herb = value
+        self._kernel = None
 
     @property
     def sav_ratio_live_wood(self) -> float:
@@ -214,6 +248,16 @@ class FuelModel:
     @sav_ratio_live_wood.setter
     def sav_ratio_live_wood(self, value: float) -> None:
         self._sav_ratio_live_wood = value
+        self._kernel = None
+
+    @property
+    def sav_ratio_dead_herb(self) -> float:
+        return self._sav_ratio_dead_herb
+
+    @sav_ratio_dead_herb.setter
+    def sav_ratio_dead_herb(self, value: float) -> None:
+        self._sav_ratio_dead_herb = value
+        self._kernel = None
 
     @property
     def fuel_bed_depth(self) -> float:
@@ -222,6 +266,7 @@ class FuelModel:
     @fuel_bed_depth.setter
     def fuel_bed_depth(self, value: float) -> None:
         self._fuel_bed_depth = value
+        self._kernel = None
 
     @property
     def moisture_of_extinction(self) -> float:
@@ -230,6 +275,7 @@ class FuelModel:
     @moisture_of_extinction.setter
     def moisture_of_extinction(self, value: float) -> None:
         self._moisture_of_extinction = value
+        self._kernel = None
 
     @property
     def sav_ratio(self) -> float:
@@ -238,6 +284,7 @@ class FuelModel:
     @sav_ratio.setter
     def sav_ratio(self, value: float) -> None:
         self._sav_ratio = value
+        self._kernel = None
 
     @property
     def bulk_density(self) -> float:
@@ -246,6 +293,7 @@ class FuelModel:
     @bulk_density.setter
     def bulk_density(self, value: float) -> None:
         self._bulk_density = value
+        self._kernel = None
 
     @property
     def relative_packing_ratio(self) -> float:
@@ -254,6 +302,7 @@ class FuelModel:
     @relative_packing_ratio.setter
     def relative_packing_ratio(self, value: float) -> None:
         self._relative_packing_ratio = value
+        self._kernel = None
 
     @property
     def model_type(self) -> FuelModelType:
@@ -262,6 +311,46 @@ class FuelModel:
     @model_type.setter
     def model_type(self, value: FuelModelType) -> None:
         self._model_type = value
+        self._kernel = None
+
+    @property
+    def kernel(self) -> Any:
+        return self._kernel
+
+    @kernel.setter
+    def kernel(self, value: Any) -> None:
+        self._kernel = value
+
+    def cured(self, live_herb_moisture: float) -> FuelModel:
+        """
+        Static fuel model equivalent to a dynamic model for a live herbaceous moisture content. A fraction of the live
+        herbaceous load is transferred to the dead herbaceous class, keeping its surface-area-to-volume ratio. The cured
+        fraction grows linearly from 0 at a 120% moisture content to 1 at 30% (Scott & Burgan 2005, pg. 11). Static
+        models and models without herbaceous load are returned unchanged.
+
+        :param live_herb_moisture: Live herbaceous fuel moisture content (fraction)
+        :type live_herb_moisture: float
+        :return: The cured fuel model
+        :rtype: FuelModel
+        """
+        if self._model_type != FuelModelType.DYNAMIC or not self._fuel_load_live_herb:
+            return self
+        curing: float = min(1.0, max(0.0, 1.333 - 1.11 * live_herb_moisture))
+        transferred: float = self._fuel_load_live_herb * curing
+        fuel_model: FuelModel = FuelModel(
+            code=self._code, name=self._name, fuel_load_1_h=self._fuel_load_1_h, fuel_load_10_h=self._fuel_load_10_h,
+            fuel_load_100_h=self._fuel_load_100_h, fuel_load_live_herb=self._fuel_load_live_herb - transferred,
+            fuel_load_live_wood=self._fuel_load_live_wood, sav_ratio_1_h=self._sav_ratio_1_h,
+            sav_ratio_10_h=self._sav_ratio_10_h, sav_ratio_100_h=self._sav_ratio_100_h,
+            sav_ratio_live_herb=self._sav_ratio_live_herb, sav_ratio_live_wood=self._sav_ratio_live_wood,
+            fuel_bed_depth=self._fuel_bed_depth, moisture_of_extinction=self._moisture_of_extinction,
+            model_type=FuelModelType.STATIC, fuel_load_dead_herb=(self._fuel_load_dead_herb or 0) + transferred,
+            sav_ratio_dead_herb=self._sav_ratio_live_herb)
+        fuel_model.particle_density = self._particle_density
+        fuel_model.heat_content = self._heat_content
+        fuel_model.effective_mineral_content = self._effective_mineral_content
+        fuel_model.mineral_content = self._mineral_content
+        return fuel_model
 
     def __eq__(self, other: FuelModel) -> bool:
         if not isinstance(other, FuelModel):
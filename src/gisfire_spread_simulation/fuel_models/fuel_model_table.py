@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations  # Needed to allow returning type of enclosing class PEP 563
+
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Sequence
+from typing import Union
+
+import numpy
+
+import gisfire_spread_simulation.fuel_models.standard_fuel_models as models
+from gisfire_spread_simulation.fuel_models.fuel_model import FuelModel
+from gisfire_spread_simulation.fuel_models.standard_fuel_models import model_0
+from gisfire_spread_simulation.simulation_algorithms.rate_of_sprerad_algorithms import FuelModelKernel
+
+
+class FuelModelTable:
+    """
+    Registry of fuel models packed in a structured numpy array, one row per model indexed by an integer fuel id. Each
+    row holds the parameters of the model and its moisture, wind and slope independent Rothermel values (see
+    FuelModelKernel), so vectorized code gathers the parameters of thousands of vertices with fancy index operations
+    instead of reading the model properties one by one. Each field is also kept as a contiguous array (columns), the
+    fastest layout to gather a field for many vertices (numpy.take(table.columns[field], fuel_ids)).
+
+    Models are identified by identity, as they are not hashable and different models can share the code. The table is
+    packed again when a model is registered or when a registered model has been modified.
+
+    The dynamic models are cured for each live herbaceous moisture content (see cured), the resulting tables are kept
+    until the table is packed again.
+    """
+
+    DTYPE = numpy.dtype([
+        ('burnable', numpy.bool_),
+        # Fuel model parameters
+        ('fuel_load_dead', numpy.float64, (4, )),
+        ('fuel_load_live', numpy.float64, (2, )),
+        ('sav_ratio_dead', numpy.float64, (4, )),
+        ('sav_ratio_live', numpy.float64, (2, )),
+        ('fuel_bed_depth', numpy.float64),
+        ('moisture_of_extinction', numpy.float64),
+        ('heat_content', numpy.float64),
+        ('particle_density', numpy.float64),
+        # Rothermel values that only depend on the fuel model
+        ('f_dead', numpy.float64, (4, )),
+        ('f_live', numpy.float64, (2, )),
+        ('fine_fuel_load_dead', numpy.float64, (4, )),
+        ('heat_sink_dead', numpy.float64, (4, )),
+        ('heat_sink_live', numpy.float64, (2, )),
+        ('heat_content_dead', numpy.float64),
+        ('heat_content_live', numpy.float64),
+        ('w', numpy.float64),
+        ('net_fuel_load_dead', numpy.float64),
+        ('net_fuel_load_live', numpy.float64),
+        ('reaction_velocity', numpy.float64),
+        ('mean_bulk_density', numpy.float64),
+        ('propagating_flux_ratio', numpy.float64),
+        ('relative_packing_ratio', numpy.float64),
+        ('slope_coefficient', numpy.float64),
+        ('wind_coefficient', numpy.float64),
+        ('c', numpy.float64),
+        ('b', numpy.float64),
+        ('e', numpy.float64),
+    ])
+
+    def __init__(self, fuel_models: Union[Iterable[FuelModel], None] = None) -> None:
+        """
+        Constructor
+
+        :param fuel_models: Models to register in order, defaults to the standard fuel models. The non burnable model
+        is always the first one (fuel id 0)
+        :type fuel_models: Union[Iterable[FuelModel], None]
+        """
+        self._fuel_models: List[FuelModel] = list()
+        self._positions: Dict[int, int] = dict()
+        self._kernels: List[FuelModelKernel] = list()
+        self._array: Union[numpy.ndarray, None] = None
+        self._columns: Union[Dict[str, numpy.ndarray], None] = None
+        self._cured: Dict[float, FuelModelTable] = dict()
+        self.register(model_0)
+        for fuel_model in (models.fuel_models.values() if fuel_models is None else fuel_models):
+            self.register(fuel_model)
+
+    def __len__(self) -> int:
+        return len(self._fuel_models)
+
+    def __getitem__(self, fuel_id: int) -> FuelModel:
+        return self._fuel_models[fuel_id]
+
+    @property
+    def fuel_models(self) -> List[FuelModel]:
+        return self._fuel_models
+
+    def register(self, fuel_model: FuelModel) -> int:
+        """
+        Adds a fuel model to the table if it is not registered yet
+
+        :param fuel_model: The fuel model
+        :type fuel_model: FuelModel
+        :return: The fuel id of the model
+        :rtype: int
+        """
+        position = self._positions.get(id(fuel_model))
+        if position is None:
+            position = len(self._fuel_models)
+            self._positions[id(fuel_model)] = position
+            self._fuel_models.append(fuel_model)
+            self._array = None
+            self._cured.clear()
+        return position
+
+    @property
+    def array(self) -> numpy.ndarray:
+        """
+        The packed table, one row per fuel id
+        """
+        kernels: List[FuelModelKernel] = [FuelModelKernel.of(fuel_model) for fuel_model in self._fuel_models]
+        # A new kernel means that the model has been modified since the table was packed
+        if self._array is None or any([kernel is not packed for kernel, packed in zip(kernels, self._kernels)]):
+            self._array = FuelModelTable.pack(self._fuel_models)
+            self._columns = None
+            self._cured.clear()
+            self._kernels = kernels
+        return self._array
+
+    @property
+    def columns(self) -> Dict[str, numpy.ndarray]:
+        """
+        The fields of the packed table as contiguous arrays. Gathering a field for many fuel ids from a contiguous array
+        (numpy.take) is several times faster than gathering whole rows of the structured array and reading the strided
+        fields of the result
+        """
+        array: numpy.ndarray = self.array
+        if self._columns is None:
+            self._columns = FuelModelTable.split(array)
+        return self._columns
+
+    def cured(self, live_herb_moisture: float) -> FuelModelTable:
+        """
+        Table with the same fuel ids where the dynamic models are replaced by their static equivalent for a live
+        herbaceous moisture content (see FuelModel.cured). The table of each moisture content is computed once
+
+        :param live_herb_moisture: Live herbaceous fuel moisture content (fraction)
+        :type live_herb_moisture: float
+        :return: The cured table
+        :rtype: FuelModelTable
+        """
+        # Packing the table discards the cured tables of modified models
+        _ = self.array
+        table: Union[FuelModelTable, None] = self._cured.get(live_herb_moisture)
+        if table is None:
+            table = FuelModelTable([fuel_model.cured(live_herb_moisture) for fuel_model in self._fuel_models[1:]])
+            self._cured[live_herb_moisture] = table
+        return table
+
+    @staticmethod
+    def split(array: numpy.ndarray) -> Dict[str, numpy.ndarray]:
+        """
+        Splits a packed table in one contiguous array per field
+
+        :param array: Structured array with the table layout
+        :type array: numpy.ndarray
+        :return: The arrays by field name
+        :rtype: Dict[str, numpy.ndarray]
+        """
+        return {name: numpy.ascontiguousarray(array[name]) for name in array.dtype.names}
+
+    @staticmethod
+    def pack(fuel_models: Sequence[FuelModel]) -> numpy.ndarray:
+        """
+        Packs a sequence of fuel models in a structured array with the table layout, one row per element of the
+        sequence
+
+        :param fuel_models: Fuel models
+        :type fuel_models: Sequence[FuelModel]
+        :return: The structured array
+        :rtype: numpy.ndarray
+        """
+        table: numpy.ndarray = numpy.zeros(len(fuel_models), dtype=FuelModelTable.DTYPE)
+        for row, fuel_model in zip(table, fuel_models):
+            kernel: FuelModelKernel = FuelModelKernel.of(fuel_model)
+            row['burnable'] = kernel.burnable
+            row['fuel_load_dead'] = (fuel_model.fuel_load_1_h or 0, fuel_model.fuel_load_10_h or 0,
+                                     fuel_model.fuel_load_100_h or 0, fuel_model.fuel_load_dead_herb or 0)
+            row['fuel_load_live'] = (fuel_model.fuel_load_live_herb or 0, fuel_model.fuel_load_live_wood or 0)
+            row['sav_ratio_dead'] = (fuel_model.sav_ratio_1_h or 0, fuel_model.sav_ratio_10_h or 0,
+                                     fuel_model.sav_ratio_100_h or 0, fuel_model.sav_ratio_dead_herb or 0)
+            row['sav_ratio_live'] = (fuel_model.sav_ratio_live_herb or 0, fuel_model.sav_ratio_live_wood or 0)
+            row['fuel_bed_depth'] = fuel_model.fuel_bed_depth or 0
+            row['moisture_of_extinction'] = kernel.moisture_of_extinction
+            row['heat_content'] = fuel_model.heat_content
+            row['particle_density'] = fuel_model.particle_density
+            row['f_dead'] = kernel.f_ij[0]
+            row['f_live'] = kernel.f_ij[1]
+            row['fine_fuel_load_dead'] = kernel.fine_fuel_load_dead
+            row['heat_sink_dead'] = kernel.heat_sink_ij[0]
+            row['heat_sink_live'] = kernel.heat_sink_ij[1]
+            row['heat_content_dead'] = kernel.heat_content_i[0]
+            row['heat_content_live'] = kernel.heat_content_i[1]
+            row['w'] = kernel.w
+            row['net_fuel_load_dead'] = kernel.net_fuel_load_dead
+            row['net_fuel_load_live'] = kernel.net_fuel_load_live
+            row['reaction_velocity'] = kernel.mean_optimal_reaction_velocity * kernel.mineral_damping
+            row['mean_bulk_density'] = kernel.mean_bulk_density
+            row['propagating_flux_ratio'] = kernel.propagating_flux_ratio
+            row['relative_packing_ratio'] = kernel.relative_packing_ratio
+            row['slope_coefficient'] = kernel.slope_coefficient
+            row['wind_coefficient'] = kernel.wind_coefficient
+            row['c'] = kernel.c
+            row['b'] = kernel.b
+            row['e'] = kernel.e
+        return table
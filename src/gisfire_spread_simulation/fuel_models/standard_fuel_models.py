@@ -1,55 +1,86 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+"""
+Standard fuel models: the 13 Anderson models (Anderson 1982) and the 40 Scott & Burgan models with their 5 non
+burnable models (Scott & Burgan 2005). The parameters are stored in the standard_fuel_models.csv file, in the units of
+the original tables (tons/acre, ft and percentage), and are parsed the first time one of the models is used. The
+models are accessed by code in fuel_models, where the Scott & Burgan models can also be found by their mnemonic (i.e.
+'GR1'), or as model_<code> attributes of the module (i.e. model_1 or model_101).
+"""
+
+import csv
+import os
+from typing import Any
+from typing import Dict
+from typing import Union
+
 from gisfire_spread_simulation.fuel_models.fuel_model import FuelModel
 from gisfire_spread_simulation.fuel_models.fuel_model import FuelModelType
+from gisfire_spread_simulation.simulation_algorithms.rate_of_sprerad_algorithms import FuelModelKernel
+
+CATALOGUE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'standard_fuel_models.csv')
 
 model_0 = FuelModel(code='0')
 
-model_1 = FuelModel(
-    code='1',
-    name='Short grass',
-    fuel_load_1_h=0.74 * FuelModel.TONS_ACRE_TO_LB_FT2,
-    fuel_load_10_h=0 * FuelModel.TONS_ACRE_TO_LB_FT2,
-    fuel_load_100_h=0 * FuelModel.TONS_ACRE_TO_LB_FT2,
-    fuel_load_live_herb=0 * FuelModel.TONS_ACRE_TO_LB_FT2,
-    fuel_load_live_wood=0 * FuelModel.TONS_ACRE_TO_LB_FT2,
-    sav_ratio_1_h=3500,
-    sav_ratio_10_h=109,
-    sav_ratio_100_h=30,
-    sav_ratio_live_herb=0,
-    sav_ratio_live_wood=0,
-    fuel_bed_depth=1,
-    moisture_of_extinction=0.12,
-    sav_ratio=3500,
-    bulk_density=0.03,
-    relative_packing_ratio=0.25,
-    model_type=FuelModelType.STATIC
-)
-
-model_2 = FuelModel(
-    code='1',
-    name='Timber grass and understory',
-    fuel_load_1_h=2 * FuelModel.TONS_ACRE_TO_LB_FT2,
-    fuel_load_10_h=1 * FuelModel.TONS_ACRE_TO_LB_FT2,
-    fuel_load_100_h=0.5 * FuelModel.TONS_ACRE_TO_LB_FT2,
-    fuel_load_live_herb=0.5 * FuelModel.TONS_ACRE_TO_LB_FT2,
-    fuel_load_live_wood=0 * FuelModel.TONS_ACRE_TO_LB_FT2,
-    sav_ratio_1_h=3000,
-    sav_ratio_10_h=109,
-    sav_ratio_100_h=30,
-    sav_ratio_live_herb=1500,
-    sav_ratio_live_wood=0,
-    fuel_bed_depth=1,
-    moisture_of_extinction=0.15,
-    sav_ratio=2784,
-    bulk_density=0.18,
-    relative_packing_ratio=1.14,
-    model_type=FuelModelType.STATIC
-)
-
-fuel_models = {
-    model_0.code: model_0,
-    model_1.code: model_1,
-    model_2.code: model_2,
-}
+_fuel_models: Union[Dict[str, FuelModel], None] = None
+
+
+def load_fuel_models(path: str = CATALOGUE_PATH) -> Dict[str, FuelModel]:
+    """
+    Reads a fuel model catalogue file
+
+    :param path: Path of the CSV catalogue, with a row per model and the loads in tons/acre, the surface-area-to-volume
+    ratios in 1/ft, the fuel bed depth in ft and the moisture of extinction in percentage
+    :type path: str
+    :return: The fuel models by code and mnemonic, including the non burnable model with code 0
+    :rtype: Dict[str, FuelModel]
+    """
+    catalogue: Dict[str, FuelModel] = {model_0.code: model_0}
+    with open(path, newline='', encoding='utf-8') as catalogue_file:
+        for row in csv.DictReader(catalogue_file):
+            fuel_model: FuelModel = FuelModel(
+                code=row['code'],
+                name=row['name'],
+                fuel_load_1_h=float(row['fuel_load_1_h']) * FuelModel.TONS_ACRE_TO_LB_FT2,
+                fuel_load_10_h=float(row['fuel_load_10_h']) * FuelModel.TONS_ACRE_TO_LB_FT2,
+                fuel_load_100_h=float(row['fuel_load_100_h']) * FuelModel.TONS_ACRE_TO_LB_FT2,
+                fuel_load_live_herb=float(row['fuel_load_live_herb']) * FuelModel.TONS_ACRE_TO_LB_FT2,
+                fuel_load_live_wood=float(row['fuel_load_live_wood']) * FuelModel.TONS_ACRE_TO_LB_FT2,
+                sav_ratio_1_h=float(row['sav_ratio_1_h']),
+                sav_ratio_10_h=float(row['sav_ratio_10_h']),
+                sav_ratio_100_h=float(row['sav_ratio_100_h']),
+                sav_ratio_live_herb=float(row['sav_ratio_live_herb']),
+                sav_ratio_live_wood=float(row['sav_ratio_live_wood']),
+                fuel_bed_depth=float(row['fuel_bed_depth']),
+                moisture_of_extinction=float(row['moisture_of_extinction']) / 100,
+                model_type=FuelModelType[row['model_type']]
+            )
+            # Characteristic values of the fuel bed. (Andrews 2018, pg. 18)
+            kernel: FuelModelKernel = FuelModelKernel.of(fuel_model)
+            if kernel.burnable:
+                fuel_model.sav_ratio = kernel.mean_sav_ratio
+                fuel_model.bulk_density = kernel.mean_bulk_density
+                fuel_model.relative_packing_ratio = kernel.relative_packing_ratio
+                # The characteristic values are not used by the kernel, so it is still valid
+                fuel_model.kernel = kernel
+            catalogue[fuel_model.code] = fuel_model
+            if row['mnemonic'] != '':
+                catalogue[row['mnemonic']] = fuel_model
+    return catalogue
+
+
+def __getattr__(name: str) -> Any:
+    """
+    Module attributes of the standard models, parsed on first access (PEP 562)
+    """
+    global _fuel_models
+    if name == 'fuel_models' or name.startswith('model_'):
+        if _fuel_models is None:
+            _fuel_models = load_fuel_models()
+        if name == 'fuel_models':
+            return _fuel_models
+        fuel_model: Union[FuelModel, None] = _fuel_models.get(name[len('model_'):])
+        if fuel_model is not None and fuel_model.code == name[len('model_'):]:
+            return fuel_model
+    raise AttributeError('module {} has no attribute {}'.format(__name__, name))
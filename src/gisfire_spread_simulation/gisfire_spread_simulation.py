@@ -3,6 +3,8 @@
 
 import os.path
 from typing import Dict
+from typing import List
+from typing import Tuple
 from typing import Union
 import datetime
 
@@ -15,8 +17,11 @@ from qgis.PyQt.QtCore import QTranslator
 from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtWidgets import QAction
 from qgis.PyQt.QtWidgets import QDialog
+from qgis.PyQt.QtWidgets import QInputDialog
 from qgis.PyQt.QtWidgets import QMenu
 from qgis.PyQt.QtWidgets import QToolBar
+from qgis.core import QgsApplication
+from qgis.core import QgsGeometry
 from qgis.core import QgsMapLayer
 from qgis.core import QgsPoint
 from qgis.core import QgsPointXY
@@ -33,12 +38,7 @@ from .resources import *
 from .ui.dialogs.ignition_datetime import IgnitionDateTimeDialog
 from .ui.dialogs.settings import SettingsDialog
 from gisfire_spread_simulation.simulation_algorithms.spread_simulator import SpreadSimulator
-
-from qgis.analysis import QgsNativeAlgorithms
-from qgis.core import QgsApplication
-from processing.core.Processing import Processing
-Processing.initialize()
-QgsApplication.processingRegistry().addProvider(QgsNativeAlgorithms()) # NOQA
+from gisfire_spread_simulation.simulation_algorithms.simulation_task import SimulationTask
 
 
 class GisFIRESpreadSimulation:
@@ -100,6 +100,11 @@ class GisFIRESpreadSimulation:
         self._perimeter_layer: Union[QgsVectorLayer, None] = None
         self._land_cover_layer: Union[QgsVectorLayer, None] = None
         self._simulator: SpreadSimulator = SpreadSimulator()
+        self._simulation_task: Union[SimulationTask, None] = None
+        # Reset requested while a simulation task was running, done when the task ends
+        self._reset_pending: bool = False
+        # Ignition points (x, y, date) created while a simulation task was running, added when the task ends
+        self._pending_ignition_points: List[Tuple[float, float, datetime.datetime]] = list()
         # noinspection PyUnresolvedReferences
         self._iface.newProjectCreated.connect(self.__on_new_project)
         project = QgsProject()
@@ -188,6 +193,34 @@ class GisFIRESpreadSimulation:
         action.setWhatsThis(self.tr('Step Simulation'))
         self._toolbar.addAction(action)
         self._toolbar_actions['simulation_step'] = action
+        # Run Simulation
+        action: QAction = QAction(
+            QIcon(':/{}/step.png'.format(self.PLUGIN_NAME)),
+            self.tr('Run Simulation'),
+            None
+        )
+        # noinspection PyUnresolvedReferences
+        action.triggered.connect(self._on_run_simulation)
+        action.setEnabled(True)
+        action.setCheckable(False)
+        action.setStatusTip(self.tr('Run Simulation'))
+        action.setWhatsThis(self.tr('Run Simulation'))
+        self._toolbar.addAction(action)
+        self._toolbar_actions['simulation_run'] = action
+        # Cancel Simulation
+        action: QAction = QAction(
+            QgsApplication.getThemeIcon('/mTaskCancel.svg'),
+            self.tr('Cancel Simulation'),
+            None
+        )
+        # noinspection PyUnresolvedReferences
+        action.triggered.connect(self._on_cancel_simulation)
+        action.setEnabled(True)
+        action.setCheckable(False)
+        action.setStatusTip(self.tr('Cancel Simulation'))
+        action.setWhatsThis(self.tr('Cancel Simulation'))
+        self._toolbar.addAction(action)
+        self._toolbar_actions['simulation_cancel'] = action
 
     def __add_menu_actions(self) -> None:
         """
@@ -229,6 +262,20 @@ class GisFIRESpreadSimulation:
         # noinspection PyUnresolvedReferences
         action.triggered.connect(self._on_step_simulation)
         self._menu_actions['simulation_step'] = action
+        # Run simulation
+        action: QAction = self._menu.addAction(self.tr('Run simulation'))
+        action.setIcon(QIcon(':/{}/step.png'.format(self.PLUGIN_NAME)))
+        action.setIconVisibleInMenu(True)
+        # noinspection PyUnresolvedReferences
+        action.triggered.connect(self._on_run_simulation)
+        self._menu_actions['simulation_run'] = action
+        # Cancel simulation
+        action: QAction = self._menu.addAction(self.tr('Cancel simulation'))
+        action.setIcon(QgsApplication.getThemeIcon('/mTaskCancel.svg'))
+        action.setIconVisibleInMenu(True)
+        # noinspection PyUnresolvedReferences
+        action.triggered.connect(self._on_cancel_simulation)
+        self._menu_actions['simulation_cancel'] = action
 
     def __enable_menu_entries(self, enable: bool = True) -> None:
         """
@@ -498,7 +545,12 @@ class GisFIRESpreadSimulation:
             self._dlg.point_y = point.y()
             result: int = self._dlg.exec_()
             if result == QDialog.Accepted:
-                add_ignition_point(QgsPoint(point), self._dlg.ignition_datetime, self._ignition_layer)
+                if add_ignition_point(QgsPoint(point), self._dlg.ignition_datetime, self._ignition_layer):
+                    # Keep a running simulation up to date, the simulator can not be changed while a task uses it
+                    if self._simulation_task is not None:
+                        self._pending_ignition_points.append((point.x(), point.y(), self._dlg.ignition_datetime))
+                    else:
+                        self._simulator.add_ignition_point(point.x(), point.y(), self._dlg.ignition_datetime)
         canvas = self._iface.mapCanvas()
         canvas.setMapTool(self._previousTool)
         del self._pointTool
@@ -620,8 +672,113 @@ class GisFIRESpreadSimulation:
     # TODO - IMPROVEMENT: the layer and the project settings store
 
     def _on_reset_simulation(self):
-        self._simulator.reset_simulation()
+        if self._simulation_task is not None:
+            # The simulator is in use by the task, it is reset when the task ends
+            self._reset_pending = True
+            self._simulation_task.cancel()
+            self._iface.messageBar().pushInfo(self.tr('GisFIRE Spread Simulation'),
+                                              self.tr('The running simulation is cancelled and will be reset when '
+                                                      'the current step ends'))
+            return
+        self.__reset_simulation()
+
+    def _on_cancel_simulation(self):
+        if self._simulation_task is None:
+            self._iface.messageBar().pushInfo(self.tr('GisFIRE Spread Simulation'),
+                                              self.tr('No simulation is running'))
+            return
+        self._simulation_task.cancel()
+
+    def __reset_simulation(self) -> bool:
+        """
+        Resets the simulator, reporting to the user the errors of the simulation setup
+
+        :return: True if the simulation has been reset
+        :rtype: bool
+        """
+        try:
+            self._simulator.reset_simulation()
+        except ValueError as e:
+            self._iface.messageBar().pushCritical(self.tr('GisFIRE Spread Simulation'), str(e))
+            return False
+        return True
 
     def _on_step_simulation(self):
-        self._simulator.simulation_step()
+        self.__start_simulation_task(1)
+
+    def _on_run_simulation(self):
+        n_steps, ok = QInputDialog.getInt(self._iface.mainWindow(), self.tr('Run Simulation'),
+                                          self.tr('Number of time steps'), 60, 1, 1000000)
+        if ok:
+            self.__start_simulation_task(n_steps)
+
+    def __start_simulation_task(self, n_steps: int) -> None:
+        """
+        Runs simulation steps in a QGIS background task. Only one simulation task can run at the same time
+
+        :param n_steps: Number of time steps to simulate
+        :type n_steps: int
+        :return: Nothing
+        :rtype: None
+        """
+        if self._simulation_task is not None:
+            self._iface.messageBar().pushWarning(self.tr('GisFIRE Spread Simulation'),
+                                                 self.tr('A simulation is already running'))
+            return
+        if self._simulator.current_date is None and not self.__reset_simulation():
+            return
+        self._simulation_task = SimulationTask(self._simulator, n_steps=n_steps)
+        # The perimeters are written to the layer in the main thread
+        self._simulation_task.perimeters_ready.connect(self.__on_perimeters_ready, Qt.QueuedConnection)
+        self._simulation_task.taskCompleted.connect(self.__on_simulation_task_end)
+        self._simulation_task.taskTerminated.connect(self.__on_simulation_task_terminated)
+        QgsApplication.taskManager().addTask(self._simulation_task)
+
+    def __on_perimeters_ready(self, perimeters: List[Tuple[datetime.datetime, List[QgsGeometry]]]) -> None:
+        """
+        Writes a batch of perimeters sent by the simulation task to the perimeter layer
+
+        :param perimeters: List of dates and perimeter geometries of the simulated steps
+        :type perimeters: List[Tuple[datetime.datetime, List[QgsGeometry]]]
+        :return: Nothing
+        :rtype: None
+        """
+        for date, geometries in perimeters:
+            self._simulator.write_perimeters(date, geometries)
+        self._perimeter_layer.triggerRepaint()
+
+    def __on_simulation_task_terminated(self) -> None:
+        """
+        Reports why the simulation task has not simulated all its steps: an error of the simulation or its cancellation
+
+        :return: Nothing
+        :rtype: None
+        """
+        task: SimulationTask = self._simulation_task
+        if task.exception is not None:
+            self._iface.messageBar().pushCritical(self.tr('GisFIRE Spread Simulation'),
+                                                  self.tr('The simulation failed: {}').format(task.exception))
+        elif not self._reset_pending:
+            self._iface.messageBar().pushInfo(self.tr('GisFIRE Spread Simulation'),
+                                              self.tr('The simulation has been cancelled after {} steps').format(
+                                                  task.simulated_steps))
+        self.__on_simulation_task_end()
+
+    def __on_simulation_task_end(self) -> None:
+        """
+        Releases the simulator when the simulation task ends, resetting it if it has been requested meanwhile or adding
+        the ignition points created meanwhile otherwise (a reset reads them from the ignition layer)
+
+        :return: Nothing
+        :rtype: None
+        """
+        self._simulation_task = None
+        ignition_points: List[Tuple[float, float, datetime.datetime]] = self._pending_ignition_points
+        self._pending_ignition_points = list()
+        if self._reset_pending:
+            self._reset_pending = False
+            self.__reset_simulation()
+            return
+        for (x, y, ignition_date) in ignition_points:
+            self._simulator.add_ignition_point(x, y, ignition_date)
 
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from qgis.core import QgsAbstractGeometry
+from qgis.core import QgsCurve
+from qgis.core import QgsCurvePolygon
+from qgis.core import QgsGeometry
+from qgis.core import QgsGeometryCollection
+from qgis.core import QgsLineString
+from qgis.core import QgsPolygon
+from qgis.core import QgsWkbTypes
+
+from typing import List
+from typing import Tuple
+
+import numpy
+
+from gisfire_spread_simulation.simulation_algorithms.perimeter import Perimeter
+
+
+def perimeter_to_geometry(perimeter: Perimeter) -> QgsGeometry:
+    """
+    Converts a perimeter to a QGis polygon geometry. The first ring of the perimeter is the exterior ring of the polygon
+    and the rest are its interior rings. The coordinate arrays are passed directly to the QGis line strings, so no
+    intermediate point objects are created
+
+    :param perimeter: Perimeter to convert
+    :type perimeter: Perimeter
+    :return: A polygon geometry with the rings of the perimeter
+    :rtype: QgsGeometry
+    """
+    polygon: QgsPolygon = QgsPolygon()
+    for index, ring in enumerate(perimeter.split()):
+        # QGis rings are explicitly closed
+        x: numpy.ndarray = numpy.append(ring.x, ring.x[0])
+        y: numpy.ndarray = numpy.append(ring.y, ring.y[0])
+        if index == 0:
+            polygon.setExteriorRing(QgsLineString(x.tolist(), y.tolist()))
+        else:
+            polygon.addInteriorRing(QgsLineString(x.tolist(), y.tolist()))
+    return QgsGeometry(polygon)
+
+
+def geometry_rings(geometry: QgsGeometry) -> List[List[Tuple[numpy.ndarray, numpy.ndarray]]]:
+    """
+    Coordinates of the rings of a polygon or multipolygon geometry, the exterior ring of each polygon followed by its
+    interior rings. The coordinates are read as whole vectors from the line strings of the geometry (xVector and
+    yVector), so no point object is created per vertex. Curved rings are segmentized and the rings keep their closing
+    vertex
+
+    :param geometry: Polygon or multipolygon geometry
+    :type geometry: QgsGeometry
+    :return: The x and y coordinate arrays of each ring of each polygon
+    :rtype: List[List[Tuple[numpy.ndarray, numpy.ndarray]]]
+    """
+    abstract_geometry: QgsAbstractGeometry = geometry.constGet()
+    if abstract_geometry is None:
+        return list()
+    if QgsWkbTypes.isCurvedType(abstract_geometry.wkbType()):
+        abstract_geometry = abstract_geometry.segmentize()
+    parts: List[QgsCurvePolygon] = [abstract_geometry]
+    if isinstance(abstract_geometry, QgsGeometryCollection):
+        parts = [abstract_geometry.geometryN(index) for index in range(abstract_geometry.numGeometries())]
+    polygons: List[List[Tuple[numpy.ndarray, numpy.ndarray]]] = list()
+    for part in parts:
+        curves: List[QgsCurve] = [part.exteriorRing()] + [part.interiorRing(index)
+                                                          for index in range(part.numInteriorRings())]
+        rings: List[Tuple[numpy.ndarray, numpy.ndarray]] = [(numpy.array(curve.xVector(), dtype=numpy.float64),
+                                                             numpy.array(curve.yVector(), dtype=numpy.float64))
+                                                            for curve in curves
+                                                            if curve is not None and curve.numPoints() > 0]
+        if len(rings) > 0:
+            polygons.append(rings)
+    return polygons
+
+
+def perimeter_from_geometry(geometry: QgsGeometry) -> Perimeter:
+    """
+    Converts a QGis polygon geometry to a perimeter, with the exterior ring of the polygon followed by its interior
+    rings. The closing vertex of the rings is removed
+
+    :param geometry: Polygon geometry
+    :type geometry: QgsGeometry
+    :return: The perimeter with the rings of the polygon
+    :rtype: Perimeter
+    """
+    rings: List[Perimeter] = list()
+    for polygon in geometry_rings(geometry):
+        for (x, y) in polygon:
+            rings.append(Perimeter(x[:-1], y[:-1]))
+    return Perimeter.concatenate(rings)
+
+
+def clean_perimeter_geometries(geometries: List[QgsGeometry]) -> List[QgsGeometry]:
+    """
+    Cleans the raw perimeters produced by a simulation step working directly on the geometries, without creating layers
+    nor running processing algorithms. It is equivalent to the fix geometries, dissolve, multipart to single parts and
+    force right-hand rule algorithms chain:
+    - Invalid geometries (i.e. self-intersecting perimeters) are made valid
+    - All the perimeters are merged in a single geometry
+    - The merged geometry is split in single polygons
+    - The polygons are oriented following the right-hand rule (clockwise exterior rings)
+
+    :param geometries: Raw perimeter polygons
+    :type geometries: List[QgsGeometry]
+    :return: The cleaned single part polygons
+    :rtype: List[QgsGeometry]
+    """
+    valid_geometries: List[QgsGeometry] = list()
+    for geometry in geometries:
+        if geometry.isEmpty():
+            continue
+        valid_geometries.append(geometry if geometry.isGeosValid() else geometry.makeValid())
+    if len(valid_geometries) == 0:
+        return list()
+    dissolved: QgsGeometry = QgsGeometry.unaryUnion(valid_geometries)
+    cleaned: List[QgsGeometry] = list()
+    for part in dissolved.asGeometryCollection():
+        # Making a geometry valid can collapse parts of it into lines or points, which are not perimeters
+        if part.type() == QgsWkbTypes.PolygonGeometry and not part.isEmpty():
+            cleaned.append(part.forceRHR())
+    return cleaned
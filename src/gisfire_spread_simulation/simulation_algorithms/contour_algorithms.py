@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import List
+
+import numpy
+
+from gisfire_spread_simulation.simulation_algorithms.perimeter import Perimeter
+from gisfire_spread_simulation.simulation_algorithms.polygon_algorithms import PolygonAlgorithm
+
+
+class ContourAlgorithm:
+
+    @staticmethod
+    def marching_squares(values: numpy.ndarray, level: float, x_origin: float, y_origin: float,
+                         cell_size: float) -> List[Perimeter]:
+        """
+        Polygons of the region of a grid with values lower or equal than a level, i.e. the burned area of an arrival
+        time grid at a date. The values are sampled at the centres of the cells, the rows of the grid go from north to
+        south as in a raster. The contour crosses the edges between centres at the linear interpolation of the level,
+        or halfway when one of the values is infinite. The segments of all the squares are computed at once, oriented
+        with the region on their left, and joined through the edges they share, so the rings are closed and do not
+        intersect each other. The saddle squares are solved with the mean of their corners
+
+        :param values: Values at the cell centres
+        :type values: numpy.ndarray
+        :param level: Level of the contour
+        :type level: float
+        :param x_origin: X coordinate of the upper left corner of the grid
+        :type x_origin: float
+        :param y_origin: Y coordinate of the upper left corner of the grid
+        :type y_origin: float
+        :param cell_size: Size of the cells
+        :type cell_size: float
+        :return: One perimeter per polygon, a counterclockwise exterior ring followed by its clockwise interior rings
+        :rtype: List[Perimeter]
+        """
+        # The region never touches the border of the padded grid, so all the rings are closed
+        grid: numpy.ndarray = numpy.pad(numpy.asarray(values, dtype=numpy.float64), 1, constant_values=numpy.inf)
+        (height, width) = grid.shape
+        inside: numpy.ndarray = grid <= level
+        # Crossing point of each edge between centres: horizontal edges (i, j)-(i, j + 1) and then vertical edges
+        # (i, j)-(i + 1, j)
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            horizontal: numpy.ndarray = (level - grid[:, :-1]) / (grid[:, 1:] - grid[:, :-1])
+            vertical: numpy.ndarray = (level - grid[:-1, :]) / (grid[1:, :] - grid[:-1, :])
+        horizontal = numpy.where(numpy.isfinite(grid[:, :-1]) & numpy.isfinite(grid[:, 1:]), horizontal, 0.5)
+        vertical = numpy.where(numpy.isfinite(grid[:-1, :]) & numpy.isfinite(grid[1:, :]), vertical, 0.5)
+        (rows, columns) = numpy.mgrid[0:height, 0:width]
+        x: numpy.ndarray = numpy.concatenate(((columns[:, :-1] + horizontal).ravel(), columns[:-1, :].ravel()))
+        y: numpy.ndarray = numpy.concatenate((rows[:, :-1].ravel(), (rows[:-1, :] + vertical).ravel()))
+        (x, y) = (x_origin + (x - 0.5) * cell_size, y_origin - (y - 0.5) * cell_size)
+        vertical_0: int = height * (width - 1)
+        # Corners and edges of the squares in counterclockwise order: bottom left, bottom right, top right, top left
+        (i, j) = (rows[:-1, :-1].ravel(), columns[:-1, :-1].ravel())
+        corners: numpy.ndarray = numpy.stack((inside[i + 1, j], inside[i + 1, j + 1], inside[i, j + 1], inside[i, j]))
+        edges: numpy.ndarray = numpy.stack(((i + 1) * (width - 1) + j, vertical_0 + i * width + j + 1,
+                                            i * (width - 1) + j, vertical_0 + i * width + j))
+        following: numpy.ndarray = numpy.roll(corners, -1, axis=0)
+        # The segments go from the edge where the walk leaves the region to the edge where it enters it again
+        leaves: numpy.ndarray = corners & ~following
+        enters: numpy.ndarray = ~corners & following
+        saddle: numpy.ndarray = leaves.sum(axis=0) == 2
+        (squares, centres) = (numpy.flatnonzero(saddle), numpy.zeros(0, dtype=bool))
+        if squares.shape[0] > 0:
+            centres = grid[i[squares], j[squares]] + grid[i[squares] + 1, j[squares]] + \
+                grid[i[squares], j[squares] + 1] + grid[i[squares] + 1, j[squares] + 1] <= 4 * level
+        (side, square) = numpy.nonzero(leaves)
+        order: numpy.ndarray = numpy.argsort(square, kind='stable')
+        (side, square) = (side[order], square[order])
+        # A single segment enters through the only entry edge, in a saddle the next edge when the centre is inside
+        # (the region joins the two corners) and the previous one when it is outside
+        entry: numpy.ndarray = numpy.argmax(enters, axis=0)[square]
+        paired: numpy.ndarray = saddle[square]
+        joined: numpy.ndarray = numpy.zeros(saddle.shape[0], dtype=bool)
+        joined[squares] = centres
+        entry = numpy.where(paired, numpy.where(joined[square], side + 1, side - 1) % 4, entry)
+        successor: numpy.ndarray = numpy.full(x.shape[0], -1, dtype=numpy.int64)
+        successor[edges[side, square]] = edges[entry, square]
+        # Each crossing point starts one segment and ends another one
+        rings: List[Perimeter] = list()
+        visited: numpy.ndarray = successor < 0
+        for start in numpy.flatnonzero(~visited).tolist():
+            if visited[start]:
+                continue
+            ring: List[int] = list()
+            point: int = start
+            while not visited[point]:
+                visited[point] = True
+                ring.append(point)
+                point = int(successor[point])
+            rings.append(Perimeter(x[ring], y[ring]))
+        return ContourAlgorithm.__polygons(rings)
+
+    @staticmethod
+    def __polygons(rings: List[Perimeter]) -> List[Perimeter]:
+        """
+        Groups the rings of a contour in polygons, each interior ring goes with the smallest exterior ring around it
+
+        :param rings: Counterclockwise exterior rings and clockwise interior rings
+        :type rings: List[Perimeter]
+        :return: One perimeter per polygon, the exterior ring followed by its interior rings
+        :rtype: List[Perimeter]
+        """
+        areas: numpy.ndarray = numpy.array([ring.area() for ring in rings])
+        exteriors: List[int] = numpy.flatnonzero(areas > 0)[numpy.argsort(areas[areas > 0])].tolist()
+        polygons: List[List[Perimeter]] = [[rings[index]] for index in exteriors]
+        for index in numpy.flatnonzero(areas < 0).tolist():
+            (x, y) = (rings[index].x[0:1], rings[index].y[0:1])
+            for polygon in polygons:
+                if PolygonAlgorithm.points_in_rings(x, y, [numpy.column_stack((polygon[0].x, polygon[0].y))])[0]:
+                    polygon.append(rings[index])
+                    break
+        return [Perimeter.concatenate(polygon) for polygon in polygons]
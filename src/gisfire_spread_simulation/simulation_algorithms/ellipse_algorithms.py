@@ -5,6 +5,8 @@ from typing import Tuple
 from math import exp
 from math import pow
 
+import numpy
+
 
 class EllipseAlgorithm:
 
@@ -27,6 +29,28 @@ class EllipseAlgorithm:
         c = b - ros / HB
         return a, b, c
 
+    # noinspection PyPep8Naming
+    @staticmethod
+    def alexander_batch(ros: numpy.ndarray, wind: numpy.ndarray) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        """
+        Vectorized version of alexander, each element of the arrays is an independent ellipse
+
+        :param ros: Rate of spread of each ellipse
+        :type ros: numpy.ndarray
+        :param wind: Effective wind speed of each ellipse
+        :type wind: numpy.ndarray
+        :return: The a, b and c parameters of the ellipses
+        :rtype: Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]
+        """
+        LB = 0.936 * numpy.exp(0.2566 * wind) + 0.461 * numpy.exp(-0.1548 * wind) - 0.397
+        # Without wind the length to breadth ratio can round below 1
+        root = numpy.sqrt(numpy.maximum(LB ** 2 - 1, 0))
+        HB = (LB + root) / (LB - root)
+        a = 0.5 * (ros + ros / HB) / LB
+        b = (ros + ros / HB) / 2
+        c = b - ros / HB
+        return a, b, c
+
     # noinspection PyPep8Naming,SpellCheckingInspection
     @staticmethod
     def catchpole(ros: float, Ue: float) -> Tuple[float, float, float]:
@@ -49,3 +73,75 @@ class EllipseAlgorithm:
         h = W / 2
         g = Rh - f
         return h, f, g
+
+    # noinspection PyPep8Naming
+    @staticmethod
+    def richards(xs: numpy.ndarray, ys: numpy.ndarray, a: numpy.ndarray, b: numpy.ndarray, c: numpy.ndarray,
+                 theta: numpy.ndarray) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Richards (1990) differential equations of the fire front growth evaluated for all the vertices of a perimeter
+        at once. Given the tangent of the perimeter at each vertex and the spread ellipse of the vertex, it computes the
+        velocity of the vertex. The trigonometric and squared terms are computed only once per vertex. Vertices with a
+        zero tangent (i.e. their neighbours are in the same position) have an undefined normal, so they get a zero
+        velocity.
+
+        :param xs: Derivative of the x coordinate along the perimeter at each vertex
+        :type xs: numpy.ndarray
+        :param ys: Derivative of the y coordinate along the perimeter at each vertex
+        :type ys: numpy.ndarray
+        :param a: Semi-minor axis of the ellipse per time unit
+        :type a: numpy.ndarray
+        :param b: Semi-major axis of the ellipse per time unit
+        :type b: numpy.ndarray
+        :param c: Distance from the ignition point to the center of the ellipse per time unit
+        :type c: numpy.ndarray
+        :param theta: Direction of the major axis of the ellipse in radians
+        :type theta: numpy.ndarray
+        :return: The x and y components of the velocity of each vertex
+        :rtype: Tuple[numpy.ndarray, numpy.ndarray]
+        """
+        cos_theta = numpy.cos(theta)
+        sin_theta = numpy.sin(theta)
+        a2 = numpy.square(a)
+        b2 = numpy.square(b)
+        u = xs * sin_theta + ys * cos_theta
+        v = xs * cos_theta - ys * sin_theta
+        norm = numpy.sqrt(b2 * numpy.square(v) + a2 * numpy.square(u))
+        valid = norm > 0
+        norm = numpy.where(valid, norm, 1)
+        xt = numpy.where(valid, (a2 * cos_theta * u - b2 * sin_theta * v) / norm + c * sin_theta, 0)
+        yt = numpy.where(valid, (-a2 * sin_theta * u - b2 * cos_theta * v) / norm + c * cos_theta, 0)
+        return xt, yt
+
+    # noinspection PyPep8Naming
+    @staticmethod
+    def directional_rate(a: numpy.ndarray, b: numpy.ndarray, c: numpy.ndarray, alpha: numpy.ndarray,
+                         direction: numpy.ndarray) -> numpy.ndarray:
+        """
+        Rate of spread of an ellipse in a direction, i.e. the distance from the ignition point to the ellipse along a
+        ray. With the ray at an angle psi from the major axis of the ellipse, the distance is the positive root of
+        A t^2 - 2 c cos(psi) t / b^2 + c^2 / b^2 - 1 = 0 with A = sin(psi)^2 / a^2 + cos(psi)^2 / b^2. Ellipses without
+        spread (a or b zero) have a zero rate in all the directions
+
+        :param a: Semi-minor axis of the ellipse per time unit
+        :type a: numpy.ndarray
+        :param b: Semi-major axis of the ellipse per time unit
+        :type b: numpy.ndarray
+        :param c: Distance from the ignition point to the center of the ellipse per time unit
+        :type c: numpy.ndarray
+        :param alpha: Heading of the ellipse in radians counterclockwise from north
+        :type alpha: numpy.ndarray
+        :param direction: Direction of the ray in radians counterclockwise from north
+        :type direction: numpy.ndarray
+        :return: The rate of spread in the direction
+        :rtype: numpy.ndarray
+        """
+        psi = numpy.asarray(direction) - alpha
+        valid = (a > 0) & (b > 0)
+        a = numpy.where(valid, a, 1)
+        b2 = numpy.square(numpy.where(valid, b, 1))
+        cos_psi = numpy.cos(psi)
+        A = numpy.square(numpy.sin(psi)) / numpy.square(a) + numpy.square(cos_psi) / b2
+        half_b = c * cos_psi / b2
+        t = (half_b + numpy.sqrt(numpy.maximum(numpy.square(half_b) - A * (numpy.square(c) / b2 - 1), 0))) / A
+        return numpy.where(valid, t, 0)
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import datetime
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import wait
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Set
+from typing import Tuple
+from typing import Union
+
+import numpy
+from osgeo import gdal
+
+from gisfire_spread_simulation.simulation_algorithms.perimeter import Perimeter
+from gisfire_spread_simulation.simulation_algorithms.polygon_algorithms import PolygonAlgorithm
+from gisfire_spread_simulation.simulation_algorithms.spread_simulator import SpreadSimulator
+
+# Simulator state, ignition points, end date and grid geometry of the members of the worker process, set by the pool
+# initializer
+_member_setup: Any = None
+
+
+def _initialize_worker(state: Dict[str, Any], ignition_points: List[SpreadSimulator.IgnitionPoint],
+                       end_date: datetime.datetime, geometry: Tuple[float, float, float]) -> None:
+    """
+    Keeps the data shared by all the members simulated in a worker process, sent once when the pool starts
+
+    :param state: Propagation state of the simulator (see SpreadSimulator.propagation_state)
+    :type state: Dict[str, Any]
+    :param ignition_points: Ignition points of the simulations
+    :type ignition_points: List[SpreadSimulator.IgnitionPoint]
+    :param end_date: Date to stop the simulations
+    :type end_date: datetime.datetime
+    :param geometry: Origin x and y and cell size of the burn probability grid
+    :type geometry: Tuple[float, float, float]
+    """
+    global _member_setup
+    _member_setup = (state, ignition_points, end_date, geometry)
+
+
+def _run_member(environment: Tuple[Any, Any]) -> Tuple[int, int, Tuple[int, int], numpy.ndarray]:
+    """
+    Simulates a member of the ensemble in a worker process
+
+    :param environment: Moisture and wind of the member
+    :type environment: Tuple[Any, Any]
+    :return: The burn window of the member with its mask packed in bits (see EnsembleRunner.run_member)
+    :rtype: Tuple[int, int, Tuple[int, int], numpy.ndarray]
+    """
+    return EnsembleRunner.run_member(*_member_setup, environment)
+
+
+class BurnProbabilityGrid:
+    """
+    Burn probability raster of an ensemble of simulations: the number of members that burn each cell over the number of
+    members. The members are added one by one as they finish and the counts are kept in square tiles allocated the
+    first time a member burns them, so only the burned area is stored and the memory does not grow with the number of
+    members. The grid has no fixed extent, its rows go from north to south from the origin as in a raster.
+    """
+
+    def __init__(self, x_origin: float, y_origin: float, cell_size: float, tile_size: int = 256) -> None:
+        """
+        Constructor
+
+        :param x_origin: X coordinate of the upper left corner of the grid
+        :type x_origin: float
+        :param y_origin: Y coordinate of the upper left corner of the grid
+        :type y_origin: float
+        :param cell_size: Size of the cells in the units of the layers
+        :type cell_size: float
+        :param tile_size: Number of rows and columns of the tiles
+        :type tile_size: int
+        """
+        self._x_origin: float = x_origin
+        self._y_origin: float = y_origin
+        self._cell_size: float = cell_size
+        self._tile_size: int = tile_size
+        self._tiles: Dict[Tuple[int, int], numpy.ndarray] = dict()
+        self._members: int = 0
+
+    @property
+    def x_origin(self) -> float:
+        return self._x_origin
+
+    @property
+    def y_origin(self) -> float:
+        return self._y_origin
+
+    @property
+    def cell_size(self) -> float:
+        return self._cell_size
+
+    @property
+    def geometry(self) -> Tuple[float, float, float]:
+        return self._x_origin, self._y_origin, self._cell_size
+
+    @property
+    def members(self) -> int:
+        return self._members
+
+    @property
+    def tile_count(self) -> int:
+        return len(self._tiles)
+
+    @staticmethod
+    def burn_window(fronts: List[Perimeter], x_origin: float, y_origin: float,
+                    cell_size: float) -> Tuple[int, int, numpy.ndarray]:
+        """
+        Cells burned by the fronts of a simulation, the union of the cells inside each front (see
+        PolygonAlgorithm.rasterize)
+
+        :param fronts: Fronts of the simulation
+        :type fronts: List[Perimeter]
+        :param x_origin: X coordinate of the upper left corner of the grid
+        :type x_origin: float
+        :param y_origin: Y coordinate of the upper left corner of the grid
+        :type y_origin: float
+        :param cell_size: Size of the cells
+        :type cell_size: float
+        :return: The row and column of the upper left cell of the window that contains all the fronts and the mask of
+        the burned cells in the window
+        :rtype: Tuple[int, int, numpy.ndarray]
+        """
+        windows: List[Tuple[int, int, numpy.ndarray]] = [
+            PolygonAlgorithm.rasterize(front, x_origin, y_origin, cell_size) for front in fronts if len(front) > 2]
+        if len(windows) == 0:
+            return 0, 0, numpy.zeros((0, 0), dtype=bool)
+        (row, column) = (min(window[0] for window in windows), min(window[1] for window in windows))
+        mask: numpy.ndarray = numpy.zeros((max(window[0] + window[2].shape[0] for window in windows) - row,
+                                           max(window[1] + window[2].shape[1] for window in windows) - column),
+                                          dtype=bool)
+        for (window_row, window_column, window_mask) in windows:
+            mask[window_row - row:window_row - row + window_mask.shape[0],
+                 window_column - column:window_column - column + window_mask.shape[1]] |= window_mask
+        return row, column, mask
+
+    def add_member(self, fronts: List[Perimeter]) -> None:
+        """
+        Adds the cells burned by the fronts of a member
+
+        :param fronts: Final fronts of the member
+        :type fronts: List[Perimeter]
+        """
+        self.add_window(*BurnProbabilityGrid.burn_window(fronts, self._x_origin, self._y_origin, self._cell_size))
+
+    def add_window(self, row: int, column: int, mask: numpy.ndarray) -> None:
+        """
+        Adds the cells burned by a member
+
+        :param row: Row of the upper left cell of the window
+        :type row: int
+        :param column: Column of the upper left cell of the window
+        :type column: int
+        :param mask: Burned cells of the window
+        :type mask: numpy.ndarray
+        """
+        self._members += 1
+        if mask.size == 0:
+            return
+        size: int = self._tile_size
+        (height, width) = mask.shape
+        for tile_row in range(row // size, (row + height - 1) // size + 1):
+            (top, bottom) = (max(row, tile_row * size), min(row + height, (tile_row + 1) * size))
+            for tile_column in range(column // size, (column + width - 1) // size + 1):
+                (left, right) = (max(column, tile_column * size), min(column + width, (tile_column + 1) * size))
+                part: numpy.ndarray = mask[top - row:bottom - row, left - column:right - column]
+                if not part.any():
+                    continue
+                tile: Union[numpy.ndarray, None] = self._tiles.get((tile_row, tile_column))
+                if tile is None:
+                    tile = numpy.zeros((size, size), dtype=numpy.uint32)
+                    self._tiles[(tile_row, tile_column)] = tile
+                tile[top - tile_row * size:bottom - tile_row * size,
+                     left - tile_column * size:right - tile_column * size] += part
+
+    def counts(self) -> Tuple[int, int, numpy.ndarray]:
+        """
+        Number of members that burn each cell, over the tiles burned by any member
+
+        :return: The row and column of the upper left cell of the burned tiles and the counts
+        :rtype: Tuple[int, int, numpy.ndarray]
+        """
+        if len(self._tiles) == 0:
+            return 0, 0, numpy.zeros((0, 0), dtype=numpy.uint32)
+        size: int = self._tile_size
+        (tile_row, tile_column) = (min(key[0] for key in self._tiles), min(key[1] for key in self._tiles))
+        counts: numpy.ndarray = numpy.zeros(((max(key[0] for key in self._tiles) - tile_row + 1) * size,
+                                             (max(key[1] for key in self._tiles) - tile_column + 1) * size),
+                                            dtype=numpy.uint32)
+        for ((i, j), tile) in self._tiles.items():
+            (top, left) = ((i - tile_row) * size, (j - tile_column) * size)
+            counts[top:top + size, left:left + size] = tile
+        return tile_row * size, tile_column * size, counts
+
+    def probability(self) -> Tuple[numpy.ndarray, Tuple[float, float, float, float, float, float]]:
+        """
+        Burn probability of the cells of the tiles burned by any member
+
+        :return: The probabilities and their GDAL geo transform
+        :rtype: Tuple[numpy.ndarray, Tuple[float, float, float, float, float, float]]
+        """
+        (row, column, counts) = self.counts()
+        probability: numpy.ndarray = (counts / max(1, self._members)).astype(numpy.float32)
+        return probability, (self._x_origin + column * self._cell_size, self._cell_size, 0.0,
+                             self._y_origin - row * self._cell_size, 0.0, -self._cell_size)
+
+    def save(self, path: str, projection: str = '') -> None:
+        """
+        Writes the burn probability to a GeoTIFF
+
+        :param path: Path of the GeoTIFF
+        :type path: str
+        :param projection: CRS of the grid as WKT
+        :type projection: str
+        """
+        (probability, geo_transform) = self.probability()
+        if probability.size == 0:
+            raise ValueError('No member of the ensemble has burned')
+        dataset = gdal.GetDriverByName('GTiff').Create(path, probability.shape[1], probability.shape[0], 1,
+                                                       gdal.GDT_Float32, ['COMPRESS=DEFLATE', 'TILED=YES'])
+        if dataset is None:
+            raise ValueError('Unable to create the raster {}'.format(path))
+        dataset.SetGeoTransform(geo_transform)
+        if projection != '':
+            dataset.SetProjection(projection)
+        dataset.GetRasterBand(1).WriteArray(probability)
+        dataset.FlushCache()
+        dataset = None
+
+
+class EnsembleRunner:
+    """
+    Monte Carlo ensemble of simulations over perturbed weather and fuel moisture. Each member is a simulation without
+    layers of the same ignition points with its own wind speed and direction and moisture of each fuel class, drawn
+    from normal distributions centred in the environment of the simulator. The members run in a pool of worker
+    processes that get the fuel data once, when the pool starts, and return only the cells burned by the member, that
+    are added to the burn probability grid as soon as the member finishes. The wind and moisture fields of the
+    simulator, if any, replace the perturbed wind and moisture.
+    """
+
+    def __init__(self, simulator: SpreadSimulator, members: int, wind_speed_deviation: float = 0.0,
+                 wind_direction_deviation: float = 0.0,
+                 moisture_deviation: Tuple[Tuple[float, float, float], Tuple[float, float]] = ((0.0, 0.0, 0.0),
+                                                                                              (0.0, 0.0)),
+                 seed: Union[int, None] = None, workers: int = 1, mp_context: Any = None) -> None:
+        """
+        Constructor
+
+        :param simulator: Simulator of the members, its fuel data is the one of its last reset (see
+        SpreadSimulator.propagation_state)
+        :type simulator: SpreadSimulator
+        :param members: Number of members of the ensemble
+        :type members: int
+        :param wind_speed_deviation: Standard deviation of the wind speed in m/s
+        :type wind_speed_deviation: float
+        :param wind_direction_deviation: Standard deviation of the wind direction in radians
+        :type wind_direction_deviation: float
+        :param moisture_deviation: Standard deviation of the moisture of each dead (1-h, 10-h and 100-h) and live
+        (herbaceous and woody) fuel class, as a fraction
+        :type moisture_deviation: Tuple[Tuple[float, float, float], Tuple[float, float]]
+        :param seed: Seed of the random generator, so an ensemble can be repeated
+        :type seed: Union[int, None]
+        :param workers: Number of worker processes, with 1 the members run in this process
+        :type workers: int
+        :param mp_context: Multiprocessing context of the pool, defaults to the platform default
+        :type mp_context: Any
+        """
+        self._simulator: SpreadSimulator = simulator
+        self._members: int = members
+        self._wind_speed_deviation: float = wind_speed_deviation
+        self._wind_direction_deviation: float = wind_direction_deviation
+        self._moisture_deviation: Tuple[Tuple[float, float, float], Tuple[float, float]] = moisture_deviation
+        self._seed: Union[int, None] = seed
+        self._workers: int = workers
+        self._mp_context: Any = mp_context
+
+    @property
+    def members(self) -> int:
+        return self._members
+
+    @property
+    def workers(self) -> int:
+        return self._workers
+
+    def environments(self) -> List[Tuple[Any, Any]]:
+        """
+        Draws the environment of each member. The wind speed can not be negative and the moisture of any fuel class is
+        at least 1%
+
+        :return: The moisture and wind of each member as expected by RateOfSpread.rothermel
+        :rtype: List[Tuple[Any, Any]]
+        """
+        generator: numpy.random.Generator = numpy.random.default_rng(self._seed)
+        (dead, live) = self._simulator.default_moisture
+        (speed, direction) = self._simulator.default_wind
+        speeds: numpy.ndarray = numpy.maximum(generator.normal(speed, self._wind_speed_deviation, self._members), 0)
+        directions: numpy.ndarray = generator.normal(direction, self._wind_direction_deviation, self._members)
+        dead_moisture: numpy.ndarray = numpy.maximum(
+            generator.normal(dead, self._moisture_deviation[0], (self._members, len(dead))), 0.01)
+        live_moisture: numpy.ndarray = numpy.maximum(
+            generator.normal(live, self._moisture_deviation[1], (self._members, len(live))), 0.01)
+        return [((tuple(dead_moisture[i].tolist()), tuple(live_moisture[i].tolist())),
+                 (float(speeds[i]), float(directions[i]))) for i in range(self._members)]
+
+    @staticmethod
+    def run_member(state: Dict[str, Any], ignition_points: List[SpreadSimulator.IgnitionPoint],
+                   end_date: datetime.datetime, geometry: Tuple[float, float, float],
+                   environment: Tuple[Any, Any]) -> Tuple[int, int, Tuple[int, int], numpy.ndarray]:
+        """
+        Simulates a member of the ensemble. Each member gets a new simulator, so the caches of its environment are not
+        kept between members, but the fuel lookup of the state is shared by all of them
+
+        :param state: Propagation state of the simulator
+        :type state: Dict[str, Any]
+        :param ignition_points: Ignition points of the simulation
+        :type ignition_points: List[SpreadSimulator.IgnitionPoint]
+        :param end_date: Date to stop the simulation
+        :type end_date: datetime.datetime
+        :param geometry: Origin x and y and cell size of the burn probability grid
+        :type geometry: Tuple[float, float, float]
+        :param environment: Moisture and wind of the member
+        :type environment: Tuple[Any, Any]
+        :return: The row and column of the burn window (see BurnProbabilityGrid.burn_window), its shape and its mask
+        packed in bits
+        :rtype: Tuple[int, int, Tuple[int, int], numpy.ndarray]
+        """
+        simulator: SpreadSimulator = SpreadSimulator.from_propagation_state(state)
+        (simulator.default_moisture, simulator.default_wind) = environment
+        (row, column, mask) = BurnProbabilityGrid.burn_window(simulator.simulate_fronts(ignition_points, end_date),
+                                                              *geometry)
+        return row, column, mask.shape, numpy.packbits(mask)
+
+    def run(self, ignition_points: List[SpreadSimulator.IgnitionPoint], end_date: datetime.datetime,
+            grid: BurnProbabilityGrid) -> BurnProbabilityGrid:
+        """
+        Runs the members of the ensemble and adds them to a burn probability grid. Only a few members per worker are
+        pending at any time, so the finished members are not kept in memory
+
+        :param ignition_points: Ignition points of the simulations
+        :type ignition_points: List[SpreadSimulator.IgnitionPoint]
+        :param end_date: Date to stop the simulations
+        :type end_date: datetime.datetime
+        :param grid: Grid where the burned cells of the members are added
+        :type grid: BurnProbabilityGrid
+        :return: The grid
+        :rtype: BurnProbabilityGrid
+        """
+        state: Dict[str, Any] = self._simulator.propagation_state()
+        # The features of the ignition layer can not be sent to other processes
+        points: List[SpreadSimulator.IgnitionPoint] = [
+            SpreadSimulator.IgnitionPoint(x=point.x, y=point.y, ignition_date=point.ignition_date)
+            for point in ignition_points]
+        environments: List[Tuple[Any, Any]] = self.environments()
+        if self._workers <= 1:
+            for environment in environments:
+                EnsembleRunner.__add_member(grid, EnsembleRunner.run_member(state, points, end_date, grid.geometry,
+                                                                            environment))
+            return grid
+        with ProcessPoolExecutor(max_workers=self._workers, mp_context=self._mp_context, initializer=_initialize_worker,
+                                 initargs=(state, points, end_date, grid.geometry)) as executor:
+            pending: Set[Future] = set()
+            for environment in environments:
+                if len(pending) >= 2 * self._workers:
+                    (done, pending) = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        EnsembleRunner.__add_member(grid, future.result())
+                pending.add(executor.submit(_run_member, environment))
+            for future in wait(pending).done:
+                EnsembleRunner.__add_member(grid, future.result())
+        return grid
+
+    @staticmethod
+    def __add_member(grid: BurnProbabilityGrid, member: Tuple[int, int, Tuple[int, int], numpy.ndarray]) -> None:
+        """
+        Adds a member returned by run_member to a grid
+
+        :param grid: The grid
+        :type grid: BurnProbabilityGrid
+        :param member: The burn window of the member with its mask packed in bits
+        :type member: Tuple[int, int, Tuple[int, int], numpy.ndarray]
+        """
+        (row, column, shape, bits) = member
+        grid.add_window(row, column, numpy.unpackbits(bits, count=shape[0] * shape[1]).reshape(shape).astype(bool))
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import datetime
+from typing import Dict
+from typing import Iterable
+from typing import List
+
+from gisfire_spread_simulation.simulation_algorithms.perimeter import Perimeter
+
+
+class FrontStore:
+    """
+    In memory store of the active fire fronts of a simulation indexed by simulation time. The simulator keeps here the
+    fronts it has to propagate, so it never has to read back (and parse) the perimeters it has written to the output
+    layer. Fronts are removed from the store when they are propagated, so its size does not depend on the length of the
+    simulation.
+    """
+
+    def __init__(self) -> None:
+        """
+        Constructor
+        """
+        self._fronts: Dict[datetime.datetime, List[Perimeter]] = dict()
+
+    def __len__(self) -> int:
+        return sum([len(fronts) for fronts in self._fronts.values()])
+
+    @property
+    def dates(self) -> List[datetime.datetime]:
+        return sorted(self._fronts.keys())
+
+    def add(self, date: datetime.datetime, fronts: Iterable[Perimeter]) -> None:
+        """
+        Adds active fronts at a simulation time
+
+        :param date: Simulation time of the fronts
+        :type date: datetime.datetime
+        :param fronts: Fronts to add
+        :type fronts: Iterable[Perimeter]
+        """
+        self._fronts.setdefault(date, list()).extend(fronts)
+
+    def get(self, date: datetime.datetime) -> List[Perimeter]:
+        """
+        Returns the active fronts at a simulation time without removing them
+
+        :param date: Simulation time
+        :type date: datetime.datetime
+        :return: The fronts, an empty list if there are no fronts at that time
+        :rtype: List[Perimeter]
+        """
+        return list(self._fronts.get(date, list()))
+
+    def pop(self, date: datetime.datetime) -> List[Perimeter]:
+        """
+        Removes and returns the active fronts at a simulation time
+
+        :param date: Simulation time
+        :type date: datetime.datetime
+        :return: The fronts, an empty list if there are no fronts at that time
+        :rtype: List[Perimeter]
+        """
+        return self._fronts.pop(date, list())
+
+    def clear(self) -> None:
+        """
+        Removes all the fronts
+        """
+        self._fronts.clear()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import datetime
+import heapq
+import itertools
+from typing import Any
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Tuple
+
+
+class IgnitionQueue:
+    """
+    Priority queue of ignition points ordered by ignition date. It is built once per simulation and each simulation step
+    only pops the ignitions that are due in its time window. Points with the same ignition date are returned in the
+    order they were added.
+    """
+
+    def __init__(self, ignition_points: Iterable[Any] = ()) -> None:
+        """
+        Constructor
+
+        :param ignition_points: Initial ignition points. Any object with an ignition_date property can be queued
+        :type ignition_points: Iterable[Any]
+        """
+        self._counter: Iterator[int] = itertools.count()
+        self._heap: List[Tuple[datetime.datetime, int, Any]] = [(point.ignition_date, next(self._counter), point)
+                                                                 for point in ignition_points]
+        heapq.heapify(self._heap)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, ignition_point: Any) -> None:
+        """
+        Adds an ignition point to the queue
+
+        :param ignition_point: The ignition point
+        :type ignition_point: Any
+        """
+        heapq.heappush(self._heap, (ignition_point.ignition_date, next(self._counter), ignition_point))
+
+    def peek_date(self) -> datetime.datetime:
+        """
+        Returns the ignition date of the next ignition point without removing it
+
+        :return: The date of the earliest ignition point or None if the queue is empty
+        :rtype: datetime.datetime
+        """
+        return self._heap[0][0] if len(self._heap) > 0 else None
+
+    def pop_until(self, date: datetime.datetime) -> List[Any]:
+        """
+        Removes and returns all the ignition points that ignite before a date
+
+        :param date: End of the time window (not included)
+        :type date: datetime.datetime
+        :return: The ignition points sorted by ignition date
+        :rtype: List[Any]
+        """
+        points: List[Any] = list()
+        while len(self._heap) > 0 and self._heap[0][0] < date:
+            points.append(heapq.heappop(self._heap)[2])
+        return points
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import heapq
+import math
+from typing import Callable
+from typing import List
+from typing import Tuple
+
+import numpy
+
+from gisfire_spread_simulation.simulation_algorithms.contour_algorithms import ContourAlgorithm
+from gisfire_spread_simulation.simulation_algorithms.perimeter import Perimeter
+
+
+class LevelSet:
+    """
+    Level set spread on a grid (Osher and Sethian 1988): the burned area is the region where a signed distance field,
+    sampled at the cell centres, is negative, and the fronts are its zero contour. The field evolves with the equation
+    phi_t + F |grad(phi)| = 0, where the normal speed F of each cell is the support function of its spread ellipse in
+    the direction of the normal of the front, the speed of the envelope of the Huygens wavelets. The normals are
+    central differences and |grad(phi)| is the upwind (Godunov) gradient, all computed at once with array operations.
+
+    Only the cells of a narrow band around the fronts are updated, the field is clamped to the band width outside it.
+    Every few sub-steps the field of the band (extended by the distance the fronts can travel) is reinitialized to a
+    signed distance with the Sussman, Smereka and Osher (1994) iterations, keeping the cells next to the fronts fixed so
+    the fronts do not move, and the band is rebuilt. Fires merge in the field without any geometry operation, the
+    perimeters are only extracted at the reporting times (see ContourAlgorithm.marching_squares).
+
+    The grid covers a window around the fires that is extended when the band gets close to its border. The spread
+    ellipses of the cells are computed the first time they enter the band.
+    """
+
+    def __init__(self, ellipses: Callable[[numpy.ndarray, numpy.ndarray], Tuple[numpy.ndarray, numpy.ndarray,
+                                                                                numpy.ndarray, numpy.ndarray,
+                                                                                numpy.ndarray]],
+                 x_origin: float, y_origin: float, cell_size: float, band_width: int = 6, courant_number: float = 0.5,
+                 reinitialization_interval: int = 4, extension: int = 32) -> None:
+        """
+        Constructor
+
+        :param ellipses: Function that returns the spread ellipses (a, b, c, heading and whether it burns) of a set of
+        points given their x and y coordinates, the rates per second
+        :type ellipses: Callable[[numpy.ndarray, numpy.ndarray], Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray,
+        numpy.ndarray, numpy.ndarray]]
+        :param x_origin: X coordinate of the upper left corner of the cell (0, 0)
+        :type x_origin: float
+        :param y_origin: Y coordinate of the upper left corner of the cell (0, 0)
+        :type y_origin: float
+        :param cell_size: Size of the cells
+        :type cell_size: float
+        :param band_width: Half width of the narrow band in cells
+        :type band_width: int
+        :param courant_number: Maximum fraction of a cell the fronts travel in a sub-step
+        :type courant_number: float
+        :param reinitialization_interval: Number of sub-steps between reinitializations
+        :type reinitialization_interval: int
+        :param extension: Number of cells the window is extended when the band reaches its border
+        :type extension: int
+        """
+        self._ellipses: Callable[[numpy.ndarray, numpy.ndarray], Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray,
+                                                                       numpy.ndarray, numpy.ndarray]] = ellipses
+        self._x_origin: float = x_origin
+        self._y_origin: float = y_origin
+        self._cell_size: float = cell_size
+        self._band_width: int = band_width
+        self._courant_number: float = courant_number
+        self._reinitialization_interval: int = reinitialization_interval
+        self._extension: int = extension
+        # Cells the fronts can travel between reinitializations, the band is extended by them before reinitializing
+        self._travel: int = int(math.ceil(reinitialization_interval * courant_number)) + 1
+        # Window of the grid: row and column of its upper left cell, the field and the ellipses (a, b, c and heading)
+        # of its cells, not computed yet while a is NaN
+        (self._row_0, self._column_0) = (0, 0)
+        self._phi: numpy.ndarray = numpy.zeros((0, 0))
+        self._ellipse: numpy.ndarray = numpy.zeros((4, 0, 0))
+        # Flat indices of the cells of the narrow band in the window
+        self._band: numpy.ndarray = numpy.zeros(0, dtype=numpy.int64)
+        # Ignitions after the current time, as (time, x, y)
+        self._pending: List[Tuple[float, float, float]] = list()
+        self._time: float = 0.0
+        self._sub_steps: int = 0
+        self._reinitializations: int = 0
+
+    @property
+    def cell_size(self) -> float:
+        return self._cell_size
+
+    @property
+    def time(self) -> float:
+        return self._time
+
+    @property
+    def band_size(self) -> int:
+        return self._band.shape[0]
+
+    @property
+    def window_shape(self) -> Tuple[int, int]:
+        return self._phi.shape
+
+    @property
+    def sub_steps(self) -> int:
+        return self._sub_steps
+
+    @property
+    def reinitializations(self) -> int:
+        return self._reinitializations
+
+    def clear_rates(self) -> None:
+        """
+        Discards the spread ellipses of the cells, so they are computed again in the environment of the next sub-step
+        (i.e. when the wind changes)
+        """
+        self._ellipse[0] = numpy.nan
+
+    def ignite(self, x: float, y: float, time: float) -> None:
+        """
+        Adds an ignition, a burned circle of one cell of radius around the ignition point that is added to the field
+        when it is advanced to the ignition time. Ignitions in cells that do not burn are ignored
+
+        :param x: X coordinate of the ignition point
+        :type x: float
+        :param y: Y coordinate of the ignition point
+        :type y: float
+        :param time: Ignition time in seconds
+        :type time: float
+        """
+        heapq.heappush(self._pending, (max(time, self._time), x, y))
+
+    def advance(self, time: float) -> None:
+        """
+        Advances the field until a time with sub-steps that satisfy the CFL condition of the fastest cell of the band,
+        adding the ignitions at their times
+
+        :param time: Time in seconds
+        :type time: float
+        """
+        width: float = self._band_width * self._cell_size
+        while True:
+            while len(self._pending) > 0 and self._pending[0][0] <= self._time:
+                (_, x, y) = heapq.heappop(self._pending)
+                self.__add_ignition(x, y)
+            if self._time >= time:
+                break
+            end: float = time if len(self._pending) == 0 else min(time, self._pending[0][0])
+            band: numpy.ndarray = self._band
+            if band.shape[0] == 0:
+                self._time = end
+                continue
+            (a, b, c, alpha) = self.__band_ellipses(band)
+            fastest: float = float(numpy.max(numpy.maximum(a, b) + numpy.abs(c)))
+            if fastest <= 0:
+                self._time = end
+                continue
+            dt: float = min(end - self._time, self._courant_number * self._cell_size / fastest)
+            phi: numpy.ndarray = self._phi.reshape(-1)
+            (x_minus, x_plus, y_minus, y_plus) = self.__differences(phi, band)
+            # Outward normal of the fronts and the speed of the ellipse envelope in that direction
+            (gx, gy) = (0.5 * (x_minus + x_plus), 0.5 * (y_minus + y_plus))
+            norm: numpy.ndarray = numpy.hypot(gx, gy)
+            norm = numpy.where(norm > 0, norm, 1)
+            (sin_alpha, cos_alpha) = (numpy.sin(alpha), numpy.cos(alpha))
+            along: numpy.ndarray = (-gx * sin_alpha + gy * cos_alpha) / norm
+            across: numpy.ndarray = (gx * cos_alpha + gy * sin_alpha) / norm
+            speed: numpy.ndarray = c * along + numpy.sqrt(numpy.square(a * across) + numpy.square(b * along))
+            gradient: numpy.ndarray = numpy.sqrt(numpy.square(numpy.maximum(x_minus, 0)) +
+                                                 numpy.square(numpy.minimum(x_plus, 0)) +
+                                                 numpy.square(numpy.maximum(y_minus, 0)) +
+                                                 numpy.square(numpy.minimum(y_plus, 0)))
+            phi[band] = numpy.clip(phi[band] - dt * numpy.maximum(speed, 0) * gradient, -width, width)
+            self._time += dt
+            self._sub_steps += 1
+            if self._sub_steps % self._reinitialization_interval == 0:
+                self.__reinitialize()
+
+    def isochrones(self, time: float) -> List[Perimeter]:
+        """
+        Burned area at the time the field has been advanced to, the only one the field knows
+
+        :param time: Time in seconds
+        :type time: float
+        :return: One perimeter per burned polygon, a counterclockwise exterior ring followed by its clockwise interior
+        rings
+        :rtype: List[Perimeter]
+        """
+        if time != self._time:
+            raise ValueError('The level set is only known at the time it has been advanced to')
+        if self._band.shape[0] == 0 or self._phi.min() > 0:
+            return list()
+        return ContourAlgorithm.marching_squares(self._phi, 0.0, self._x_origin + self._column_0 * self._cell_size,
+                                                 self._y_origin - self._row_0 * self._cell_size, self._cell_size)
+
+    def __differences(self, phi: numpy.ndarray, cells: numpy.ndarray) \
+            -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        """
+        One sided differences of the field at a set of cells, the neighbours of the cells must be in the window
+
+        :param phi: Flat field
+        :type phi: numpy.ndarray
+        :param cells: Flat indices of the cells
+        :type cells: numpy.ndarray
+        :return: The backward and forward differences in x (east) and y (north)
+        :rtype: Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]
+        """
+        (columns, value) = (self._phi.shape[1], phi[cells])
+        return ((value - phi[cells - 1]) / self._cell_size, (phi[cells + 1] - value) / self._cell_size,
+                (value - phi[cells + columns]) / self._cell_size, (phi[cells - columns] - value) / self._cell_size)
+
+    def __band_ellipses(self, band: numpy.ndarray) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        """
+        Spread ellipses of the cells of the band, computing the missing ones at once
+
+        :param band: Flat indices of the cells of the band
+        :type band: numpy.ndarray
+        :return: The a, b, c and heading of the cells, a, b and c zero if they do not burn
+        :rtype: Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]
+        """
+        ellipse: numpy.ndarray = self._ellipse.reshape(4, -1)
+        missing: numpy.ndarray = band[numpy.isnan(ellipse[0, band])]
+        if missing.shape[0] > 0:
+            (rows, columns) = numpy.divmod(missing, self._phi.shape[1])
+            (a, b, c, alpha, burnable) = self._ellipses(
+                self._x_origin + (self._column_0 + columns + 0.5) * self._cell_size,
+                self._y_origin - (self._row_0 + rows + 0.5) * self._cell_size)
+            ellipse[:, missing] = numpy.stack((numpy.where(burnable, a, 0), numpy.where(burnable, b, 0),
+                                               numpy.where(burnable, c, 0), alpha))
+        return ellipse[0, band], ellipse[1, band], ellipse[2, band], ellipse[3, band]
+
+    def __cover(self, row_min: int, row_max: int, column_min: int, column_max: int) -> None:
+        """
+        Extends the window so it covers a range of rows and columns of the grid. The window grows the extension beyond
+        the range on the sides it does not cover, so it is not extended again at each sub-step. The new cells are
+        unburned and outside the band
+
+        :param row_min: First row
+        :type row_min: int
+        :param row_max: Last row
+        :type row_max: int
+        :param column_min: First column
+        :type column_min: int
+        :param column_max: Last column
+        :type column_max: int
+        """
+        (height, width) = self._phi.shape
+        if self._phi.size == 0:
+            (self._row_0, self._column_0) = (row_min, column_min)
+            (top, left, bottom, right) = (0, 0, row_max - row_min + 1, column_max - column_min + 1)
+        else:
+            top: int = self._row_0 - row_min + self._extension if row_min < self._row_0 else 0
+            left: int = self._column_0 - column_min + self._extension if column_min < self._column_0 else 0
+            bottom: int = row_max - self._row_0 - height + 1 + self._extension if \
+                row_max >= self._row_0 + height else 0
+            right: int = column_max - self._column_0 - width + 1 + self._extension if \
+                column_max >= self._column_0 + width else 0
+            if top == left == bottom == right == 0:
+                return
+        (rows, columns) = numpy.divmod(self._band, max(width, 1))
+        self._phi = numpy.pad(self._phi, ((top, bottom), (left, right)),
+                              constant_values=self._band_width * self._cell_size)
+        self._ellipse = numpy.pad(self._ellipse, ((0, 0), (top, bottom), (left, right)), constant_values=numpy.nan)
+        self._band = (rows + top) * self._phi.shape[1] + columns + left
+        (self._row_0, self._column_0) = (self._row_0 - top, self._column_0 - left)
+
+    def __add_ignition(self, x: float, y: float) -> None:
+        """
+        Adds the burned circle of an ignition to the field, if the ignition point burns, and its cells closer to the
+        circle than the band width to the band
+
+        :param x: X coordinate of the ignition point
+        :type x: float
+        :param y: Y coordinate of the ignition point
+        :type y: float
+        """
+        if not self._ellipses(numpy.array([x]), numpy.array([y]))[4][0]:
+            return
+        (row, column) = (int(math.floor((self._y_origin - y) / self._cell_size)),
+                         int(math.floor((x - self._x_origin) / self._cell_size)))
+        reach: int = self._band_width + 2
+        self.__cover(row - reach - self._travel - 2, row + reach + self._travel + 2,
+                     column - reach - self._travel - 2, column + reach + self._travel + 2)
+        (rows, columns) = numpy.mgrid[row - reach:row + reach + 1, column - reach:column + reach + 1]
+        distance: numpy.ndarray = numpy.hypot(self._x_origin + (columns + 0.5) * self._cell_size - x,
+                                              self._y_origin - (rows + 0.5) * self._cell_size - y)
+        cells: numpy.ndarray = ((rows - self._row_0) * self._phi.shape[1] + columns - self._column_0).ravel()
+        phi: numpy.ndarray = self._phi.reshape(-1)
+        phi[cells] = numpy.minimum(phi[cells], distance.ravel() - self._cell_size)
+        self._band = numpy.union1d(self._band, cells[numpy.abs(phi[cells]) < self._band_width * self._cell_size])
+
+    def __reinitialize(self) -> None:
+        """
+        Reinitializes the field of the band, extended by the distance the fronts can travel until the next
+        reinitialization, to a signed distance and rebuilds the band with its cells closer to the fronts than the band
+        width
+        """
+        width: float = self._band_width * self._cell_size
+        # Cells of the band in the grid, the window is extended so the extended band and its neighbours are in it
+        (rows, columns) = numpy.divmod(self._band, self._phi.shape[1])
+        (rows, columns) = (rows + self._row_0, columns + self._column_0)
+        margin: int = self._travel + 2
+        self.__cover(int(rows.min()) - margin, int(rows.max()) + margin, int(columns.min()) - margin,
+                     int(columns.max()) + margin)
+        size: int = self._phi.shape[1]
+        offsets: numpy.ndarray = (numpy.arange(-self._travel, self._travel + 1)[:, None] * size +
+                                  numpy.arange(-self._travel, self._travel + 1)[None, :]).ravel()
+        cells: numpy.ndarray = numpy.unique((((rows - self._row_0) * size + columns - self._column_0)[:, None] +
+                                             offsets[None, :]).ravel())
+        phi: numpy.ndarray = self._phi.reshape(-1)
+        initial: numpy.ndarray = phi[cells]
+        # The cells with a neighbour at the other side of the fronts keep the fronts in place: their distance is the
+        # field over its central gradient
+        neighbours: numpy.ndarray = numpy.stack((phi[cells - 1], phi[cells + 1], phi[cells - size], phi[cells + size]))
+        front: numpy.ndarray = numpy.any((neighbours > 0) != (initial > 0), axis=0)
+        (x_minus, x_plus, y_minus, y_plus) = self.__differences(phi, cells[front])
+        gradient: numpy.ndarray = numpy.hypot(0.5 * (x_minus + x_plus), 0.5 * (y_minus + y_plus))
+        phi[cells[front]] = initial[front] / numpy.maximum(gradient, 1e-6)
+        free: numpy.ndarray = cells[~front]
+        sign: numpy.ndarray = initial[~front] / numpy.sqrt(numpy.square(initial[~front]) + self._cell_size ** 2)
+        for _ in range(2 * (self._band_width + self._travel)):
+            (x_minus, x_plus, y_minus, y_plus) = self.__differences(phi, free)
+            # Godunov upwind gradient, from the fronts outwards on both sides
+            outside: numpy.ndarray = numpy.sqrt(
+                numpy.maximum(numpy.square(numpy.maximum(x_minus, 0)), numpy.square(numpy.minimum(x_plus, 0))) +
+                numpy.maximum(numpy.square(numpy.maximum(y_minus, 0)), numpy.square(numpy.minimum(y_plus, 0))))
+            inside: numpy.ndarray = numpy.sqrt(
+                numpy.maximum(numpy.square(numpy.minimum(x_minus, 0)), numpy.square(numpy.maximum(x_plus, 0))) +
+                numpy.maximum(numpy.square(numpy.minimum(y_minus, 0)), numpy.square(numpy.maximum(y_plus, 0))))
+            gradient = numpy.where(sign > 0, outside, inside)
+            phi[free] = phi[free] - 0.5 * self._cell_size * sign * (gradient - 1)
+        phi[cells] = numpy.clip(phi[cells], -width, width)
+        self._band = cells[numpy.abs(phi[cells]) < width]
+        self._reinitializations += 1
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import heapq
+import math
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Set
+from typing import Tuple
+
+import numpy
+
+from gisfire_spread_simulation.simulation_algorithms.contour_algorithms import ContourAlgorithm
+from gisfire_spread_simulation.simulation_algorithms.ellipse_algorithms import EllipseAlgorithm
+from gisfire_spread_simulation.simulation_algorithms.perimeter import Perimeter
+
+
+class MinimumTravelTime:
+    """
+    Minimum travel time (Finney 2002) spread on a grid: the arrival time of the fire to each cell is the shortest path
+    from the ignitions, solved with the Dijkstra algorithm. The travel time between the centres of two neighbour cells
+    is half the distance over the rate of spread of each cell in the direction of the path, the directional rate of
+    spread of the spread ellipse of the cell (see EllipseAlgorithm.directional_rate). The neighbours are the 8 adjacent
+    cells and the 8 cells a knight move away, so the paths can follow 16 directions and the isochrones are less
+    distorted by the grid.
+
+    The cells with a tentative arrival time (the narrow band around the burned area) are kept in a binary heap, and the
+    band is advanced until a date fixing the arrival time of all the cells that burn before it. The isochrone at any
+    date before the advanced one is the contour of the arrival times (see ContourAlgorithm.marching_squares), so there
+    are no fronts to clean. The grid has no bounds: the arrival times and the directional rates are stored in square
+    tiles created when the band reaches them, the rates computed at once for all the cells of a tile.
+    """
+
+    # Row and column offsets of the neighbours of a cell
+    NEIGHBOURS = ((-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1),
+                  (-2, 1), (-1, 2), (1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1))
+
+    def __init__(self, ellipses: Callable[[numpy.ndarray, numpy.ndarray], Tuple[numpy.ndarray, numpy.ndarray,
+                                                                                numpy.ndarray, numpy.ndarray,
+                                                                                numpy.ndarray]],
+                 x_origin: float, y_origin: float, cell_size: float, tile_size: int = 64) -> None:
+        """
+        Constructor
+
+        :param ellipses: Function that returns the spread ellipses (a, b, c, heading and whether it burns) of a set of
+        points given their x and y coordinates, the rates per second
+        :type ellipses: Callable[[numpy.ndarray, numpy.ndarray], Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray,
+        numpy.ndarray, numpy.ndarray]]
+        :param x_origin: X coordinate of the upper left corner of the cell (0, 0)
+        :type x_origin: float
+        :param y_origin: Y coordinate of the upper left corner of the cell (0, 0)
+        :type y_origin: float
+        :param cell_size: Size of the cells
+        :type cell_size: float
+        :param tile_size: Number of rows and columns of the tiles
+        :type tile_size: int
+        """
+        self._ellipses: Callable[[numpy.ndarray, numpy.ndarray], Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray,
+                                                                       numpy.ndarray, numpy.ndarray]] = ellipses
+        self._x_origin: float = x_origin
+        self._y_origin: float = y_origin
+        self._cell_size: float = cell_size
+        self._tile_size: int = tile_size
+        # Arrival time and whether it is final of the cells of each tile, by tile row and column
+        self._arrival: Dict[Tuple[int, int], numpy.ndarray] = dict()
+        self._settled: Dict[Tuple[int, int], numpy.ndarray] = dict()
+        # Rate of spread of the cells of each tile towards each neighbour, (neighbours, rows, columns)
+        self._rates: Dict[Tuple[int, int], numpy.ndarray] = dict()
+        # Narrow band of cells with a tentative arrival time, as (arrival time, row, column)
+        self._band: List[Tuple[float, int, int]] = list()
+        # Heading of each neighbour direction as the ellipse headings (counterclockwise from north) and half the
+        # distance to it
+        self._directions: numpy.ndarray = numpy.array([math.atan2(-column, -row) for (row, column)
+                                                       in MinimumTravelTime.NEIGHBOURS])
+        self._half_distances: List[float] = [0.5 * cell_size * math.hypot(row, column) for (row, column)
+                                             in MinimumTravelTime.NEIGHBOURS]
+        self._settled_cells: int = 0
+
+    @property
+    def cell_size(self) -> float:
+        return self._cell_size
+
+    @property
+    def band_size(self) -> int:
+        return len(self._band)
+
+    @property
+    def settled_cells(self) -> int:
+        return self._settled_cells
+
+    @property
+    def tile_count(self) -> int:
+        return len(self._arrival)
+
+    def __cell(self, x: float, y: float) -> Tuple[int, int]:
+        """
+        Row and column of the cell of a point
+
+        :param x: X coordinate of the point
+        :type x: float
+        :param y: Y coordinate of the point
+        :type y: float
+        :return: The row and column
+        :rtype: Tuple[int, int]
+        """
+        return (int(math.floor((self._y_origin - y) / self._cell_size)),
+                int(math.floor((x - self._x_origin) / self._cell_size)))
+
+    def __tile(self, key: Tuple[int, int]) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Arrival times and settled flags of a tile, created without arrival times the first time it is reached
+
+        :param key: Row and column of the tile
+        :type key: Tuple[int, int]
+        :return: The arrival times and settled flags of its cells
+        :rtype: Tuple[numpy.ndarray, numpy.ndarray]
+        """
+        arrival: numpy.ndarray = self._arrival.get(key)
+        if arrival is None:
+            arrival = numpy.full((self._tile_size, self._tile_size), numpy.inf)
+            self._arrival[key] = arrival
+            self._settled[key] = numpy.zeros((self._tile_size, self._tile_size), dtype=bool)
+        return arrival, self._settled[key]
+
+    def __tile_rates(self, key: Tuple[int, int]) -> numpy.ndarray:
+        """
+        Directional rates of spread of the cells of a tile, computed for all its cells at once
+
+        :param key: Row and column of the tile
+        :type key: Tuple[int, int]
+        :return: The rates towards each neighbour, zero for the cells that do not burn
+        :rtype: numpy.ndarray
+        """
+        rates: numpy.ndarray = self._rates.get(key)
+        if rates is None:
+            (rows, columns) = numpy.mgrid[0:self._tile_size, 0:self._tile_size]
+            x: numpy.ndarray = self._x_origin + (key[1] * self._tile_size + columns.ravel() + 0.5) * self._cell_size
+            y: numpy.ndarray = self._y_origin - (key[0] * self._tile_size + rows.ravel() + 0.5) * self._cell_size
+            (a, b, c, alpha, burnable) = self._ellipses(x, y)
+            rates = numpy.where(burnable, EllipseAlgorithm.directional_rate(a, b, c, alpha,
+                                                                            self._directions[:, None]), 0)
+            rates = rates.reshape((len(MinimumTravelTime.NEIGHBOURS), self._tile_size, self._tile_size))
+            self._rates[key] = rates
+        return rates
+
+    def clear_rates(self) -> None:
+        """
+        Discards the directional rates of spread, so they are computed again in the environment of the next cells that
+        burn (i.e. when the wind changes). The arrival times already computed are kept
+        """
+        self._rates.clear()
+
+    def ignite(self, x: float, y: float, time: float) -> None:
+        """
+        Adds an ignition to the narrow band, the cell of the ignition point burns at the ignition time. Ignitions in
+        cells that do not burn are ignored
+
+        :param x: X coordinate of the ignition point
+        :type x: float
+        :param y: Y coordinate of the ignition point
+        :type y: float
+        :param time: Ignition time in seconds
+        :type time: float
+        """
+        (row, column) = self.__cell(x, y)
+        (tile_row, r) = divmod(row, self._tile_size)
+        (tile_column, c) = divmod(column, self._tile_size)
+        (arrival, settled) = self.__tile((tile_row, tile_column))
+        if self.__tile_rates((tile_row, tile_column))[:, r, c].max() <= 0:
+            return
+        if not settled[r, c] and time < arrival[r, c]:
+            arrival[r, c] = time
+            heapq.heappush(self._band, (time, row, column))
+
+    def advance(self, time: float) -> None:
+        """
+        Fixes the arrival time of all the cells that burn until a time. The cell of the band with the earliest arrival
+        time is settled and the arrival times of its neighbours are updated, until the earliest one is after the time
+
+        :param time: Time in seconds
+        :type time: float
+        """
+        size: int = self._tile_size
+        while len(self._band) > 0 and self._band[0][0] <= time:
+            (arrival_time, row, column) = heapq.heappop(self._band)
+            (tile_row, r) = divmod(row, size)
+            (tile_column, c) = divmod(column, size)
+            (arrival, settled) = self.__tile((tile_row, tile_column))
+            # Cells are pushed again when their arrival time improves, the outdated entries are skipped
+            if settled[r, c]:
+                continue
+            settled[r, c] = True
+            self._settled_cells += 1
+            source_rates: List[float] = self.__tile_rates((tile_row, tile_column))[:, r, c].tolist()
+            for (index, (row_offset, column_offset)) in enumerate(MinimumTravelTime.NEIGHBOURS):
+                if source_rates[index] <= 0:
+                    continue
+                (neighbour_tile_row, nr) = divmod(row + row_offset, size)
+                (neighbour_tile_column, nc) = divmod(column + column_offset, size)
+                key: Tuple[int, int] = (neighbour_tile_row, neighbour_tile_column)
+                (neighbour_arrival, neighbour_settled) = self.__tile(key)
+                if neighbour_settled[nr, nc]:
+                    continue
+                target_rate: float = float(self.__tile_rates(key)[index, nr, nc])
+                if target_rate <= 0:
+                    continue
+                candidate: float = arrival_time + self._half_distances[index] * (1 / source_rates[index] +
+                                                                                 1 / target_rate)
+                if candidate < neighbour_arrival[nr, nc]:
+                    neighbour_arrival[nr, nc] = candidate
+                    heapq.heappush(self._band, (candidate, row + row_offset, column + column_offset))
+
+    @staticmethod
+    def __tile_groups(keys: List[Tuple[int, int]]) -> List[List[Tuple[int, int]]]:
+        """
+        Groups tiles in the connected components of their 8-neighbourhood with a flood fill over the tile positions
+
+        :param keys: Row and column of the tiles
+        :type keys: List[Tuple[int, int]]
+        :return: The tiles of each group, in the order of the first tile of each group in the keys
+        :rtype: List[List[Tuple[int, int]]]
+        """
+        pending: Set[Tuple[int, int]] = set(keys)
+        groups: List[List[Tuple[int, int]]] = list()
+        for key in keys:
+            if key not in pending:
+                continue
+            pending.remove(key)
+            group: List[Tuple[int, int]] = [key]
+            # The group grows while it is visited, so it is also the queue of the fill
+            for (row, column) in group:
+                for neighbour in ((row + i, column + j) for i in (-1, 0, 1) for j in (-1, 0, 1)):
+                    if neighbour in pending:
+                        pending.remove(neighbour)
+                        group.append(neighbour)
+            groups.append(group)
+        return groups
+
+    def isochrones(self, time: float) -> List[Perimeter]:
+        """
+        Burned area at a time, that must not be after the time the band has been advanced to. The tiles are contoured in
+        groups of neighbour tiles, so distant fires do not need a grid covering the space between them
+
+        :param time: Time in seconds
+        :type time: float
+        :return: One perimeter per burned polygon, a counterclockwise exterior ring followed by its clockwise interior
+        rings
+        :rtype: List[Perimeter]
+        """
+        # The tiles with only band cells are part of the grid, their tentative arrival times place the contour
+        keys: List[Tuple[int, int]] = [key for (key, arrival) in self._arrival.items()
+                                       if numpy.isfinite(arrival).any()]
+        size: int = self._tile_size
+        perimeters: List[Perimeter] = list()
+        # Tiles that touch each other are contoured together
+        for group in MinimumTravelTime.__tile_groups(keys):
+            if min(self._arrival[key].min() for key in group) > time:
+                continue
+            rows: List[int] = [row for (row, _) in group]
+            columns: List[int] = [column for (_, column) in group]
+            (row_0, column_0) = (min(rows), min(columns))
+            grid: numpy.ndarray = numpy.full(((max(rows) - row_0 + 1) * size, (max(columns) - column_0 + 1) * size),
+                                             numpy.inf)
+            for (row, column) in group:
+                (top, left) = ((row - row_0) * size, (column - column_0) * size)
+                grid[top:top + size, left:left + size] = self._arrival[(row, column)]
+            perimeters.extend(ContourAlgorithm.marching_squares(grid, time,
+                                                                self._x_origin + column_0 * size * self._cell_size,
+                                                                self._y_origin - row_0 * size * self._cell_size,
+                                                                self._cell_size))
+        return perimeters
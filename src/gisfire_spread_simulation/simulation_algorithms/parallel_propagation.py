@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any
+from typing import Callable
+from typing import List
+from typing import Tuple
+from typing import Union
+
+import numpy
+
+from gisfire_spread_simulation.simulation_algorithms.perimeter import Perimeter
+
+# Propagator of the worker process, built by the pool initializer
+_propagator: Any = None
+
+
+def _initialize_worker(factory: Callable[[Any], Any], state: Any) -> None:
+    """
+    Builds the propagator of a worker process from the state of the simulator
+
+    :param factory: Function that builds the propagator from the state
+    :type factory: Callable[[Any], Any]
+    :param state: Picklable state of the simulator
+    :type state: Any
+    """
+    global _propagator
+    _propagator = factory(state)
+
+
+def _propagate_block(name: str, size: int, ring_count: int, date: Any) -> Tuple[str, int, int, int, int, int, int]:
+    """
+    Propagates the perimeter stored in a shared memory block in a worker process. The result is written to a new block,
+    that the parent process copies and unlinks
+
+    :param name: Name of the shared memory block of the perimeter
+    :type name: str
+    :param size: Number of vertices of the perimeter
+    :type size: int
+    :param ring_count: Number of rings of the perimeter
+    :type ring_count: int
+    :param date: Date of the time step
+    :type date: Any
+    :return: The name of the block of the propagated perimeter, its number of vertices and rings, and the sub-steps,
+    rejected sub-steps, environment cache hits and environment cache misses of the propagation
+    :rtype: Tuple[str, int, int, int, int, int, int]
+    """
+    statistics: Any = _propagator.step_statistics
+    (sub_steps, rejected_steps) = (statistics.sub_steps, statistics.rejected_steps)
+    (cache_hits, cache_misses) = (statistics.cache_hits, statistics.cache_misses)
+    block: SharedMemory = SharedMemory(name=name)
+    try:
+        # The propagated perimeter can share arrays with the input one, so it is written before closing the input
+        propagated: Perimeter = _propagator.propagate_batch(SharedPerimeter.read(block, size, ring_count), date)
+        output: SharedMemory = SharedPerimeter.write(propagated)
+        (size, ring_count) = (len(propagated), propagated.ring_count)
+        del propagated
+        output.close()
+    finally:
+        block.close()
+    return (output.name, size, ring_count, statistics.sub_steps - sub_steps, statistics.rejected_steps - rejected_steps,
+            statistics.cache_hits - cache_hits, statistics.cache_misses - cache_misses)
+
+
+class SharedPerimeter:
+    """
+    Layout of a perimeter in a shared memory block, so the vertex arrays are passed between processes without pickling
+    them: the x and y coordinates, the first vertex of each ring and the fuel of each vertex, one after the other.
+    """
+
+    @staticmethod
+    def write(perimeter: Perimeter) -> SharedMemory:
+        """
+        Copies a perimeter to a new shared memory block
+
+        :param perimeter: The perimeter
+        :type perimeter: Perimeter
+        :return: The block, the caller must close it and unlink it once it is not needed
+        :rtype: SharedMemory
+        """
+        (size, ring_count) = (len(perimeter), perimeter.ring_count)
+        block: SharedMemory = SharedMemory(create=True, size=max(1, SharedPerimeter.nbytes(size, ring_count)))
+        (x, y, rings, fuel) = SharedPerimeter.arrays(block, size, ring_count)
+        (x[:], y[:], rings[:], fuel[:]) = (perimeter.x, perimeter.y, perimeter.rings, perimeter.fuel)
+        return block
+
+    @staticmethod
+    def read(block: SharedMemory, size: int, ring_count: int) -> Perimeter:
+        """
+        Returns the perimeter stored in a shared memory block as a view of the block (no data is copied), the perimeter
+        must be released before closing the block
+
+        :param block: The block
+        :type block: SharedMemory
+        :param size: Number of vertices of the perimeter
+        :type size: int
+        :param ring_count: Number of rings of the perimeter
+        :type ring_count: int
+        :return: The perimeter
+        :rtype: Perimeter
+        """
+        (x, y, rings, fuel) = SharedPerimeter.arrays(block, size, ring_count)
+        return Perimeter(x, y, fuel, rings)
+
+    @staticmethod
+    def load(name: str, size: int, ring_count: int) -> Perimeter:
+        """
+        Copies the perimeter stored in a shared memory block and unlinks the block
+
+        :param name: Name of the block
+        :type name: str
+        :param size: Number of vertices of the perimeter
+        :type size: int
+        :param ring_count: Number of rings of the perimeter
+        :type ring_count: int
+        :return: The perimeter
+        :rtype: Perimeter
+        """
+        block: SharedMemory = SharedMemory(name=name)
+        try:
+            (x, y, rings, fuel) = [array.copy() for array in SharedPerimeter.arrays(block, size, ring_count)]
+        finally:
+            block.close()
+            block.unlink()
+        return Perimeter(x, y, fuel, rings)
+
+    @staticmethod
+    def nbytes(size: int, ring_count: int) -> int:
+        """
+        Size of the block of a perimeter
+
+        :param size: Number of vertices of the perimeter
+        :type size: int
+        :param ring_count: Number of rings of the perimeter
+        :type ring_count: int
+        :return: The size in bytes
+        :rtype: int
+        """
+        return 2 * size * numpy.dtype(numpy.float64).itemsize + ring_count * numpy.dtype(numpy.intp).itemsize + \
+            size * numpy.dtype(numpy.int32).itemsize
+
+    @staticmethod
+    def arrays(block: SharedMemory, size: int, ring_count: int) \
+            -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        """
+        Arrays of a perimeter over a shared memory block
+
+        :param block: The block
+        :type block: SharedMemory
+        :param size: Number of vertices of the perimeter
+        :type size: int
+        :param ring_count: Number of rings of the perimeter
+        :type ring_count: int
+        :return: The x, y, rings and fuel arrays
+        :rtype: Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]
+        """
+        coordinates: int = size * numpy.dtype(numpy.float64).itemsize
+        rings: int = ring_count * numpy.dtype(numpy.intp).itemsize
+        return (numpy.ndarray((size, ), dtype=numpy.float64, buffer=block.buf, offset=0),
+                numpy.ndarray((size, ), dtype=numpy.float64, buffer=block.buf, offset=coordinates),
+                numpy.ndarray((ring_count, ), dtype=numpy.intp, buffer=block.buf, offset=2 * coordinates),
+                numpy.ndarray((size, ), dtype=numpy.int32, buffer=block.buf, offset=2 * coordinates + rings))
+
+
+class ParallelPropagator:
+    """
+    Propagates the fronts of a simulation step in a pool of worker processes. Each worker builds its own propagator
+    (i.e. a simulator without layers) from the state of the simulator when the pool starts, so the fuel data is sent
+    once. In each step the fronts are packed in as many batches as workers, balanced by number of vertices, and the
+    batches are passed through shared memory. The propagation of a front does not depend on the other fronts, so the
+    batches can be propagated in any order and the fronts that may collide are merged afterwards.
+    """
+
+    def __init__(self, factory: Callable[[Any], Any], state: Any, max_workers: int, mp_context: Any = None) -> None:
+        """
+        Constructor, starts the pool
+
+        :param factory: Picklable function that builds the propagator of a worker from the state. The propagator has a
+        propagate_batch(perimeter, date) method that returns the propagated perimeter and step_statistics
+        :type factory: Callable[[Any], Any]
+        :param state: Picklable state of the simulator
+        :type state: Any
+        :param max_workers: Number of worker processes
+        :type max_workers: int
+        :param mp_context: Multiprocessing context of the pool, defaults to the platform default
+        :type mp_context: Any
+        """
+        self._max_workers: int = max_workers
+        self._executor: Union[ProcessPoolExecutor, None] = ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=mp_context, initializer=_initialize_worker, initargs=(factory, state))
+
+    @property
+    def max_workers(self) -> int:
+        return self._max_workers
+
+    @staticmethod
+    def balance(sizes: List[int], bins: int) -> List[List[int]]:
+        """
+        Distributes items in bins with similar total size, assigning the largest items first to the smallest bin
+
+        :param sizes: Size of each item
+        :type sizes: List[int]
+        :param bins: Maximum number of bins
+        :type bins: int
+        :return: The indices of the items of each non empty bin
+        :rtype: List[List[int]]
+        """
+        contents: List[List[int]] = [list() for _ in range(max(1, min(bins, len(sizes))))]
+        totals: List[int] = [0] * len(contents)
+        for item in sorted(range(len(sizes)), key=lambda index: -sizes[index]):
+            smallest: int = totals.index(min(totals))
+            contents[smallest].append(item)
+            totals[smallest] += sizes[item]
+        return [sorted(content) for content in contents if len(content) > 0]
+
+    def propagate(self, fronts: List[Perimeter], date: Any = None) -> Tuple[List[Perimeter], int, int, int, int]:
+        """
+        Propagates fronts one time step in the worker processes
+
+        :param fronts: Fronts to propagate
+        :type fronts: List[Perimeter]
+        :param date: Date of the time step, passed to the propagators
+        :type date: Any
+        :return: The propagated fronts, the number of sub-steps, the number of rejected sub-steps and the environment
+        cache hits and misses of all the workers
+        :rtype: Tuple[List[Perimeter], int, int, int, int]
+        """
+        if self._executor is None:
+            raise ValueError('The parallel propagator has been shut down')
+        batches: List[Perimeter] = [Perimeter.concatenate([fronts[index] for index in content])
+                                    for content in ParallelPropagator.balance([len(front) for front in fronts],
+                                                                              self._max_workers)]
+        blocks: List[SharedMemory] = [SharedPerimeter.write(batch) for batch in batches]
+        propagated: List[Perimeter] = list()
+        (sub_steps, rejected_steps, cache_hits, cache_misses) = (0, 0, 0, 0)
+        error: Union[BaseException, None] = None
+        try:
+            futures: List[Future] = [self._executor.submit(_propagate_block, block.name, len(batch),
+                                                          batch.ring_count, date)
+                                     for block, batch in zip(blocks, batches)]
+            # All the results are collected, even after an error, so no output block is left behind
+            for future in futures:
+                try:
+                    (name, size, ring_count, batch_sub_steps, batch_rejected_steps, batch_cache_hits,
+                     batch_cache_misses) = future.result()
+                except BaseException as e:
+                    error = e if error is None else error
+                    continue
+                propagated.extend(SharedPerimeter.load(name, size, ring_count).polygons())
+                # The batches are propagated at the same time, they count as a single sub-step each
+                sub_steps = max(sub_steps, batch_sub_steps)
+                rejected_steps += batch_rejected_steps
+                cache_hits += batch_cache_hits
+                cache_misses += batch_cache_misses
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+        if error is not None:
+            raise error
+        return propagated, sub_steps, rejected_steps, cache_hits, cache_misses
+
+    def shutdown(self) -> None:
+        """
+        Stops the worker processes
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
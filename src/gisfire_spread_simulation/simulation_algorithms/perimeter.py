@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations  # Needed to allow returning type of enclosing class PEP 563
+
+from typing import Iterable
+from typing import List
+from typing import Sequence
+from typing import Tuple
+from typing import Union
+
+import numpy
+
+
+class Perimeter:
+    """
+    Fire perimeter stored as a struct of arrays: the x and y coordinates of the vertices and the fuel index of each
+    vertex are kept in contiguous arrays instead of one Python object per vertex. The ring is implicitly closed, so the
+    last vertex is not a copy of the first one.
+
+    A perimeter can hold several rings one after the other, i.e. the exterior ring of a fire followed by the interior
+    rings of its unburned islands, or the rings of several fires, so they are processed with the same array operations.
+    The rings are defined by the index of their first vertex. Exterior rings are counterclockwise and interior rings
+    clockwise, so all of them spread towards the unburned side.
+    """
+
+    def __init__(self, x: Union[numpy.ndarray, Iterable[float]], y: Union[numpy.ndarray, Iterable[float]],
+                 fuel: Union[numpy.ndarray, Iterable[int], None] = None,
+                 rings: Union[numpy.ndarray, Iterable[int], None] = None) -> None:
+        """
+        Constructor. Arrays that already have the right type are not copied, so a perimeter can be built as a view of
+        other arrays.
+
+        :param x: X coordinates of the vertices
+        :type x: Union[numpy.ndarray, Iterable[float]]
+        :param y: Y coordinates of the vertices
+        :type y: Union[numpy.ndarray, Iterable[float]]
+        :param fuel: Fuel index of each vertex, defaults to 0 for all the vertices
+        :type fuel: Union[numpy.ndarray, Iterable[int], None]
+        :param rings: Index of the first vertex of each ring, starting with 0, defaults to a single ring
+        :type rings: Union[numpy.ndarray, Iterable[int], None]
+        """
+        self._x: numpy.ndarray = numpy.asarray(x, dtype=numpy.float64)
+        self._y: numpy.ndarray = numpy.asarray(y, dtype=numpy.float64)
+        if self._x.shape != self._y.shape or self._x.ndim != 1:
+            raise ValueError('x and y must be one dimensional arrays of the same length')
+        self._fuel: numpy.ndarray
+        if fuel is None:
+            self._fuel = numpy.zeros(self._x.shape, dtype=numpy.int32)
+        else:
+            self._fuel = numpy.asarray(fuel, dtype=numpy.int32)
+            if self._fuel.shape != self._x.shape:
+                raise ValueError('fuel must have the same length as the coordinates')
+        self._rings: numpy.ndarray = numpy.zeros(1, dtype=numpy.intp) if rings is None else \
+            numpy.asarray(rings, dtype=numpy.intp)
+        if self._rings.ndim != 1 or self._rings.shape[0] == 0 or self._rings[0] != 0 or \
+                numpy.any(numpy.diff(numpy.append(self._rings, self._x.shape[0])) <= 0) and self._x.shape[0] > 0:
+            raise ValueError('rings must be the increasing indices of the first vertex of each ring, starting with 0')
+
+    @staticmethod
+    def concatenate(perimeters: Sequence[Perimeter]) -> Perimeter:
+        """
+        Creates a perimeter with all the rings of a sequence of perimeters, in the same order
+
+        :param perimeters: Perimeters to join
+        :type perimeters: Sequence[Perimeter]
+        :return: The new perimeter, or the perimeter itself if there is only one
+        :rtype: Perimeter
+        """
+        if len(perimeters) == 1:
+            return perimeters[0]
+        sizes: numpy.ndarray = numpy.array([len(perimeter) for perimeter in perimeters], dtype=numpy.intp)
+        starts: numpy.ndarray = numpy.cumsum(sizes) - sizes
+        return Perimeter(numpy.concatenate([perimeter.x for perimeter in perimeters]),
+                         numpy.concatenate([perimeter.y for perimeter in perimeters]),
+                         numpy.concatenate([perimeter.fuel for perimeter in perimeters]),
+                         numpy.concatenate([perimeter.rings + start for perimeter, start in zip(perimeters, starts)]))
+
+    @staticmethod
+    def from_points(points: Iterable[Tuple[float, float]]) -> Perimeter:
+        """
+        Creates a perimeter from a sequence of (x, y) tuples
+
+        :param points: Vertices of the perimeter
+        :type points: Iterable[Tuple[float, float]]
+        :return: The new perimeter
+        :rtype: Perimeter
+        """
+        xy = numpy.array(list(points), dtype=numpy.float64).reshape(-1, 2)
+        return Perimeter(xy[:, 0].copy(), xy[:, 1].copy())
+
+    @property
+    def x(self) -> numpy.ndarray:
+        return self._x
+
+    @property
+    def y(self) -> numpy.ndarray:
+        return self._y
+
+    @property
+    def fuel(self) -> numpy.ndarray:
+        return self._fuel
+
+    @fuel.setter
+    def fuel(self, value: Union[numpy.ndarray, Iterable[int]]) -> None:
+        fuel = numpy.asarray(value, dtype=numpy.int32)
+        if fuel.shape != self._x.shape:
+            raise ValueError('fuel must have the same length as the coordinates')
+        self._fuel = fuel
+
+    @property
+    def rings(self) -> numpy.ndarray:
+        return self._rings
+
+    @property
+    def ring_count(self) -> int:
+        return self._rings.shape[0]
+
+    def __len__(self) -> int:
+        return self._x.shape[0]
+
+    def ring_sizes(self) -> numpy.ndarray:
+        """
+        Number of vertices of each ring
+
+        :return: The ring sizes
+        :rtype: numpy.ndarray
+        """
+        return numpy.diff(numpy.append(self._rings, self._x.shape[0]))
+
+    def ring_ids(self) -> numpy.ndarray:
+        """
+        Ring of each vertex
+
+        :return: The ring index of each vertex
+        :rtype: numpy.ndarray
+        """
+        return numpy.repeat(numpy.arange(self._rings.shape[0]), self.ring_sizes())
+
+    def neighbours(self) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Indices of the previous and the next vertex of each vertex in its ring, they replace numpy.roll on perimeters
+        with several rings
+
+        :return: The previous and the next vertex indices
+        :rtype: Tuple[numpy.ndarray, numpy.ndarray]
+        """
+        n: int = self._x.shape[0]
+        ends: numpy.ndarray = numpy.append(self._rings[1:], n) - 1
+        previous: numpy.ndarray = numpy.arange(-1, n - 1)
+        following: numpy.ndarray = numpy.arange(1, n + 1)
+        if n > 0:
+            previous[self._rings] = ends
+            following[ends] = self._rings
+        return previous, following
+
+    def ring(self, index: int) -> Perimeter:
+        """
+        Returns a single ring of the perimeter as a view (no data is copied)
+
+        :param index: Index of the ring
+        :type index: int
+        :return: The ring
+        :rtype: Perimeter
+        """
+        return self.view_rings(index, index + 1)
+
+    def view_rings(self, start: int, stop: int) -> Perimeter:
+        """
+        Returns a range of rings of the perimeter as a view (no data is copied)
+
+        :param start: First ring of the range
+        :type start: int
+        :param stop: Ring after the last one of the range
+        :type stop: int
+        :return: The perimeter with the rings
+        :rtype: Perimeter
+        """
+        first: int = int(self._rings[start])
+        last: Union[int, None] = int(self._rings[stop]) if stop < self._rings.shape[0] else None
+        return Perimeter(self._x[first:last], self._y[first:last], self._fuel[first:last],
+                         self._rings[start:stop] - first)
+
+    def split(self) -> List[Perimeter]:
+        """
+        Splits the perimeter in its rings, as views
+
+        :return: The rings
+        :rtype: List[Perimeter]
+        """
+        return [self.ring(index) for index in range(self._rings.shape[0])]
+
+    def select_rings(self, keep: numpy.ndarray) -> Perimeter:
+        """
+        Returns a perimeter with some of the rings of this one
+
+        :param keep: True for each ring to keep
+        :type keep: numpy.ndarray
+        :return: The new perimeter
+        :rtype: Perimeter
+        """
+        sizes: numpy.ndarray = self.ring_sizes()[keep]
+        vertices: numpy.ndarray = numpy.repeat(keep, self.ring_sizes())
+        rings: numpy.ndarray = numpy.cumsum(sizes) - sizes
+        return Perimeter(self._x[vertices], self._y[vertices], self._fuel[vertices],
+                         rings if rings.shape[0] > 0 else None)
+
+    def polygons(self) -> List[Perimeter]:
+        """
+        Splits a perimeter with the rings of several polygons, each one a counterclockwise exterior ring followed by its
+        clockwise interior rings, in one perimeter per polygon (as views)
+
+        :return: The perimeters of the polygons
+        :rtype: List[Perimeter]
+        """
+        exteriors: List[int] = numpy.flatnonzero(self.ring_areas() > 0).tolist()
+        return [self.view_rings(start, stop) for start, stop in zip(exteriors, exteriors[1:] + [self.ring_count])]
+
+    def view(self, start: int = 0, stop: Union[int, None] = None) -> Perimeter:
+        """
+        Returns a perimeter that shares the memory of a range of vertices of this one (no data is copied)
+
+        :param start: First vertex of the range
+        :type start: int
+        :param stop: Vertex after the last one of the range, defaults to the end of the perimeter
+        :type stop: Union[int, None]
+        :return: The perimeter view
+        :rtype: Perimeter
+        """
+        return Perimeter(self._x[start:stop], self._y[start:stop], self._fuel[start:stop])
+
+    def reversed(self) -> Perimeter:
+        """
+        Returns a perimeter with the vertices of each ring in the opposite order. A single ring perimeter shares the
+        memory of this one (no data is copied)
+
+        :return: The reversed perimeter
+        :rtype: Perimeter
+        """
+        if self._rings.shape[0] == 1:
+            return Perimeter(self._x[::-1], self._y[::-1], self._fuel[::-1])
+        # The vertex i of a ring [s, e) is the vertex s + e - 1 - i of the reversed ring
+        ring_ids: numpy.ndarray = self.ring_ids()
+        ends: numpy.ndarray = numpy.append(self._rings[1:], self._x.shape[0])
+        source: numpy.ndarray = self._rings[ring_ids] + ends[ring_ids] - 1 - numpy.arange(self._x.shape[0])
+        return Perimeter(self._x[source], self._y[source], self._fuel[source], self._rings.copy())
+
+    def copy(self) -> Perimeter:
+        """
+        Returns a deep copy of the perimeter
+
+        :return: The perimeter copy
+        :rtype: Perimeter
+        """
+        return Perimeter(self._x.copy(), self._y.copy(), self._fuel.copy(), self._rings.copy())
+
+    def area(self) -> float:
+        """
+        Signed area of the perimeter (shoelace formula). It is positive if the vertices are in counterclockwise order.
+        The area of a perimeter with several rings is the sum of the areas of its rings, so the clockwise interior rings
+        are subtracted from their exterior ring
+
+        :return: The signed area
+        :rtype: float
+        """
+        if self._rings.shape[0] > 1:
+            return float(numpy.sum(self.ring_areas()))
+        return 0.5 * float(numpy.dot(self._x, numpy.roll(self._y, -1)) - numpy.dot(numpy.roll(self._x, -1), self._y))
+
+    def bounds(self) -> Tuple[float, float, float, float]:
+        """
+        Bounding box of the perimeter
+
+        :return: The minimum x, minimum y, maximum x and maximum y coordinates
+        :rtype: Tuple[float, float, float, float]
+        """
+        return float(self._x.min()), float(self._y.min()), float(self._x.max()), float(self._y.max())
+
+    def ring_areas(self) -> numpy.ndarray:
+        """
+        Signed area of each ring (see area)
+
+        :return: The signed areas
+        :rtype: numpy.ndarray
+        """
+        (_, following) = self.neighbours()
+        shoelace: numpy.ndarray = self._x * self._y[following] - self._x[following] * self._y
+        return 0.5 * numpy.bincount(self.ring_ids(), weights=shoelace, minlength=self._rings.shape[0])
+
+    def segment_lengths(self) -> numpy.ndarray:
+        """
+        Length of the segments of the perimeter, the segment i joins the vertex i with the next vertex of its ring (the
+        last one closes the ring)
+
+        :return: The segment lengths
+        :rtype: numpy.ndarray
+        """
+        if self._rings.shape[0] > 1:
+            (_, following) = self.neighbours()
+            return numpy.hypot(self._x[following] - self._x, self._y[following] - self._y)
+        return numpy.hypot(numpy.roll(self._x, -1) - self._x, numpy.roll(self._y, -1) - self._y)
+
+    def redistributed(self, max_spacing: float, min_spacing: Union[float, None] = None) -> Perimeter:
+        """
+        Returns a perimeter with its vertex density adapted to a resolution: vertices closer than the minimum spacing to
+        the previous vertex are removed and points are inserted in the segments longer than the maximum spacing, so the
+        number of vertices is proportional to the length of the perimeter. In each removal pass the vertices of a run of
+        short segments are removed alternately, so the run is thinned without opening gaps. The inserted points are
+        evenly spaced along the segment and get the fuel of its first vertex
+
+        :param max_spacing: Maximum distance between consecutive vertices
+        :type max_spacing: float
+        :param min_spacing: Minimum distance between consecutive vertices, defaults to a third of the maximum spacing.
+        It can not be greater than half the maximum spacing, or the inserted points would be removed again
+        :type min_spacing: Union[float, None]
+        :return: The new perimeter
+        :rtype: Perimeter
+        """
+        min_spacing = max_spacing / 3 if min_spacing is None else min_spacing
+        if min_spacing > max_spacing / 2:
+            raise ValueError('The minimum spacing can not be greater than half the maximum spacing')
+        if self._rings.shape[0] > 1:
+            return Perimeter.concatenate([ring.redistributed(max_spacing, min_spacing) for ring in self.split()])
+        x: numpy.ndarray = self._x
+        y: numpy.ndarray = self._y
+        fuel: numpy.ndarray = self._fuel
+        while x.shape[0] > 3:
+            short: numpy.ndarray = numpy.hypot(x - numpy.roll(x, 1), y - numpy.roll(y, 1)) < min_spacing
+            if not short.any():
+                break
+            # Start the ring at a vertex with a long previous segment so no run of short segments wraps around. If all
+            # the segments are short the first vertex is kept in this pass
+            start: int = int(numpy.argmin(short))
+            (x, y, fuel, short) = (numpy.roll(x, -start), numpy.roll(y, -start), numpy.roll(fuel, -start),
+                                   numpy.roll(short, -start))
+            positions: numpy.ndarray = numpy.arange(x.shape[0])
+            run_position: numpy.ndarray = positions - numpy.maximum.accumulate(numpy.where(short, 0, positions))
+            remove: numpy.ndarray = short & (run_position % 2 == 1)
+            # Never leave less than 3 vertices
+            remove[numpy.flatnonzero(remove)[max(0, x.shape[0] - 3):]] = False
+            (x, y, fuel) = (x[~remove], y[~remove], fuel[~remove])
+        lengths: numpy.ndarray = numpy.hypot(numpy.roll(x, -1) - x, numpy.roll(y, -1) - y)
+        counts: numpy.ndarray = numpy.maximum(1, numpy.ceil(lengths / max_spacing)).astype(numpy.intp)
+        if not (counts > 1).any():
+            return Perimeter(x, y, fuel) if x is not self._x else self.copy()
+        segment: numpy.ndarray = numpy.repeat(numpy.arange(x.shape[0]), counts)
+        fraction: numpy.ndarray = (numpy.arange(segment.shape[0]) - numpy.repeat(numpy.cumsum(counts) - counts,
+                                                                                   counts)) / counts[segment]
+        next_x: numpy.ndarray = numpy.roll(x, -1)
+        next_y: numpy.ndarray = numpy.roll(y, -1)
+        return Perimeter(x[segment] + fraction * (next_x[segment] - x[segment]),
+                         y[segment] + fraction * (next_y[segment] - y[segment]), fuel[segment])
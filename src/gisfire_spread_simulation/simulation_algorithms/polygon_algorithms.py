@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import Dict
+from typing import List
+from typing import Sequence
+from typing import Tuple
+
+import numpy
+
+from gisfire_spread_simulation.simulation_algorithms.perimeter import Perimeter
+
+
+class PolygonAlgorithm:
+
+    @staticmethod
+    def points_in_rings(x: numpy.ndarray, y: numpy.ndarray, rings: Sequence[numpy.ndarray],
+                        max_elements: int = 1 << 20) -> numpy.ndarray:
+        """
+        Vectorized point in polygon test of a set of points against the rings of a polygon with the even-odd (ray
+        crossing) rule, so the holes of the polygon are taken into account. The rings can be passed closed (last vertex
+        equal to the first one) or not. The points are processed in chunks to limit the memory used by the
+        points x edges crossing matrix.
+
+        :param x: X coordinates of the points
+        :type x: numpy.ndarray
+        :param y: Y coordinates of the points
+        :type y: numpy.ndarray
+        :param rings: Rings of the polygon (exterior and interior ones in any order) as (n, 2) coordinate arrays
+        :type rings: Sequence[numpy.ndarray]
+        :param max_elements: Maximum size of the crossing matrix of a chunk of points
+        :type max_elements: int
+        :return: True for the points inside the polygon
+        :rtype: numpy.ndarray
+        """
+        x = numpy.asarray(x, dtype=numpy.float64)
+        y = numpy.asarray(y, dtype=numpy.float64)
+        inside: numpy.ndarray = numpy.zeros(x.shape, dtype=bool)
+        for ring in rings:
+            x1: numpy.ndarray = ring[:, 0]
+            y1: numpy.ndarray = ring[:, 1]
+            x2: numpy.ndarray = numpy.roll(x1, -1)
+            y2: numpy.ndarray = numpy.roll(y1, -1)
+            chunk: int = max(1, max_elements // max(1, ring.shape[0]))
+            for start in range(0, x.shape[0], chunk):
+                px: numpy.ndarray = x[start:start + chunk, None]
+                py: numpy.ndarray = y[start:start + chunk, None]
+                # Edges that cross the horizontal line of the point, the horizontal ones never do
+                crosses: numpy.ndarray = (y1 > py) != (y2 > py)
+                with numpy.errstate(divide='ignore', invalid='ignore'):
+                    x_cross: numpy.ndarray = x1 + (py - y1) * (x2 - x1) / (y2 - y1)
+                crossings: numpy.ndarray = numpy.count_nonzero(crosses & (px < x_cross), axis=1)
+                inside[start:start + chunk] ^= (crossings % 2) == 1
+        return inside
+
+    @staticmethod
+    def overlapping_groups(boxes: numpy.ndarray, padding: float = 0.0) -> List[List[int]]:
+        """
+        Groups a set of bounding boxes in the connected components of their overlap: two boxes are in the same group if
+        they overlap or if they are connected through other overlapping boxes. The boxes are swept by their minimum x
+        coordinate, each box is only tested against the boxes of the sweep that it can reach in x and the overlapping
+        ones are joined in a union-find forest, so there is no n x n overlap matrix
+
+        :param boxes: Boxes as a (n, 4) array of minimum x, minimum y, maximum x and maximum y coordinates
+        :type boxes: numpy.ndarray
+        :param padding: Distance added to each side of the boxes
+        :type padding: float
+        :return: The indices of the boxes of each group, sorted by their first box
+        :rtype: List[List[int]]
+        """
+        boxes = numpy.asarray(boxes, dtype=numpy.float64).reshape(-1, 4)
+        (x_min, y_min) = (boxes[:, 0] - padding, boxes[:, 1] - padding)
+        (x_max, y_max) = (boxes[:, 2] + padding, boxes[:, 3] + padding)
+        parents: List[int] = list(range(boxes.shape[0]))
+        # Boxes of the sweep whose maximum x has not been passed yet
+        active: numpy.ndarray = numpy.zeros(0, dtype=numpy.int64)
+        for i in numpy.argsort(x_min, kind='stable').tolist():
+            active = active[x_max[active] >= x_min[i]]
+            for j in active[(y_min[active] <= y_max[i]) & (y_max[active] >= y_min[i])].tolist():
+                (root_i, root_j) = (PolygonAlgorithm.__root(parents, i), PolygonAlgorithm.__root(parents, j))
+                # The smallest index is the root, so the groups are found in the order of their first box
+                parents[max(root_i, root_j)] = min(root_i, root_j)
+            active = numpy.append(active, i)
+        groups: Dict[int, List[int]] = dict()
+        for i in range(boxes.shape[0]):
+            groups.setdefault(PolygonAlgorithm.__root(parents, i), list()).append(i)
+        return list(groups.values())
+
+    @staticmethod
+    def __root(parents: List[int], i: int) -> int:
+        """
+        Root of an element of a union-find forest, the path to the root is halved on the way
+
+        :param parents: Parent of each element, the roots are their own parent
+        :type parents: List[int]
+        :param i: The element
+        :type i: int
+        :return: The root of the element
+        :rtype: int
+        """
+        while parents[i] != i:
+            parents[i] = parents[parents[i]]
+            i = parents[i]
+        return i
+
+    @staticmethod
+    def segment_intersections(x: numpy.ndarray, y: numpy.ndarray) \
+            -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        """
+        Finds the self-intersections of a closed ring with a uniform grid segment index. Each segment is registered in
+        the grid cells covered by its bounding box, with a cell size of twice the mean segment length, and only the
+        segments that share a cell are tested. The index is built with a sort of the cell keys, so the cost is
+        O(n log n) for rings with evenly spaced vertices. Only proper crossings are reported, segments that touch at an
+        end point or overlap are not.
+
+        :param x: X coordinates of the ring vertices, without closing vertex
+        :type x: numpy.ndarray
+        :param y: Y coordinates of the ring vertices, without closing vertex
+        :type y: numpy.ndarray
+        :return: The index of the first and second segment of each crossing (i < j, the segment i joins the vertices i
+        and i + 1) and the coordinates of the crossing point, sorted by i and then by j in decreasing order
+        :rtype: Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]
+        """
+        x = numpy.asarray(x, dtype=numpy.float64)
+        y = numpy.asarray(y, dtype=numpy.float64)
+        n: int = x.shape[0]
+        empty: numpy.ndarray = numpy.zeros(0, dtype=numpy.intp)
+        if n < 4:
+            return empty, empty, numpy.zeros(0), numpy.zeros(0)
+        x1: numpy.ndarray = numpy.roll(x, -1)
+        y1: numpy.ndarray = numpy.roll(y, -1)
+        lengths: numpy.ndarray = numpy.hypot(x1 - x, y1 - y)
+        cell: float = 2 * float(numpy.mean(lengths))
+        if cell <= 0:
+            cell = float(lengths.max()) if lengths.max() > 0 else 1.0
+        x_origin: float = float(x.min())
+        y_origin: float = float(y.min())
+        column_0: numpy.ndarray = numpy.floor((numpy.minimum(x, x1) - x_origin) / cell).astype(numpy.int64)
+        column_1: numpy.ndarray = numpy.floor((numpy.maximum(x, x1) - x_origin) / cell).astype(numpy.int64)
+        row_0: numpy.ndarray = numpy.floor((numpy.minimum(y, y1) - y_origin) / cell).astype(numpy.int64)
+        row_1: numpy.ndarray = numpy.floor((numpy.maximum(y, y1) - y_origin) / cell).astype(numpy.int64)
+        rows: int = int(row_1.max()) + 1
+        # One entry per segment and covered cell
+        widths: numpy.ndarray = column_1 - column_0 + 1
+        counts: numpy.ndarray = widths * (row_1 - row_0 + 1)
+        segments: numpy.ndarray = numpy.repeat(numpy.arange(n), counts)
+        offsets: numpy.ndarray = numpy.arange(segments.shape[0]) - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+        keys: numpy.ndarray = (column_0[segments] + offsets % widths[segments]) * rows + \
+            row_0[segments] + offsets // widths[segments]
+        order: numpy.ndarray = numpy.argsort(keys, kind='stable')
+        keys = keys[order]
+        segments = segments[order]
+        # Candidate pairs: the entries of a cell are contiguous, so each entry is paired with the next d entries of its
+        # cell, for d from 1 to the size of the largest cell. A pair of segments that share several cells is only taken
+        # in the first cell of the intersection of their bounding boxes, so no pair is tested twice
+        group_end: numpy.ndarray = numpy.append(numpy.flatnonzero(numpy.diff(keys)) + 1, keys.shape[0])
+        remaining: numpy.ndarray = numpy.repeat(group_end, numpy.diff(numpy.concatenate(([0], group_end)))) - \
+            numpy.arange(keys.shape[0]) - 1
+        active: numpy.ndarray = numpy.flatnonzero(remaining > 0)
+        first: List[numpy.ndarray] = list()
+        second: List[numpy.ndarray] = list()
+        distance: int = 1
+        while active.shape[0] > 0:
+            (a, b) = (segments[active], segments[active + distance])
+            reference: numpy.ndarray = numpy.maximum(column_0[a], column_0[b]) * rows + \
+                numpy.maximum(row_0[a], row_0[b])
+            (a, b) = (a[reference == keys[active]], b[reference == keys[active]])
+            (i, j) = (numpy.minimum(a, b), numpy.maximum(a, b))
+            # Consecutive segments share a vertex, they are not crossings
+            valid: numpy.ndarray = (j - i > 1) & ~((i == 0) & (j == n - 1))
+            first.append(i[valid])
+            second.append(j[valid])
+            distance += 1
+            active = active[remaining[active] >= distance]
+        if len(first) == 0:
+            return empty, empty, numpy.zeros(0), numpy.zeros(0)
+        i: numpy.ndarray = numpy.concatenate(first)
+        j: numpy.ndarray = numpy.concatenate(second)
+        # Proper crossing test with the orientation of the end points of each segment against the other one
+        (dx_i, dy_i) = (x1[i] - x[i], y1[i] - y[i])
+        (dx_j, dy_j) = (x1[j] - x[j], y1[j] - y[j])
+        d1: numpy.ndarray = dx_i * (y[j] - y[i]) - dy_i * (x[j] - x[i])
+        d2: numpy.ndarray = dx_i * (y1[j] - y[i]) - dy_i * (x1[j] - x[i])
+        d3: numpy.ndarray = dx_j * (y[i] - y[j]) - dy_j * (x[i] - x[j])
+        d4: numpy.ndarray = dx_j * (y1[i] - y[j]) - dy_j * (x1[i] - x[j])
+        crossing: numpy.ndarray = (d1 * d2 < 0) & (d3 * d4 < 0)
+        (i, j, d3, d4) = (i[crossing], j[crossing], d3[crossing], d4[crossing])
+        t: numpy.ndarray = d3 / (d3 - d4)
+        order = numpy.lexsort((-j, i))
+        (i, j, t) = (i[order], j[order], t[order])
+        return i, j, x[i] + t * (x1[i] - x[i]), y[i] + t * (y1[i] - y[i])
+
+    @staticmethod
+    def winding_numbers(x: numpy.ndarray, y: numpy.ndarray, ring_x: numpy.ndarray,
+                        ring_y: numpy.ndarray) -> numpy.ndarray:
+        """
+        Winding number of a set of points around a closed ring: the number of counterclockwise turns of the ring around
+        each point, negative for clockwise turns. Only the edges that cross the horizontal line of a point count, so the
+        edges are registered in horizontal bands with a height of the mean vertical extent of the edges (at most two
+        entries per edge on average) and each point is only tested against the edges of its band.
+
+        :param x: X coordinates of the points
+        :type x: numpy.ndarray
+        :param y: Y coordinates of the points
+        :type y: numpy.ndarray
+        :param ring_x: X coordinates of the ring vertices, without closing vertex
+        :type ring_x: numpy.ndarray
+        :param ring_y: Y coordinates of the ring vertices, without closing vertex
+        :type ring_y: numpy.ndarray
+        :return: The winding number of each point
+        :rtype: numpy.ndarray
+        """
+        x = numpy.asarray(x, dtype=numpy.float64)
+        y = numpy.asarray(y, dtype=numpy.float64)
+        x1: numpy.ndarray = numpy.asarray(ring_x, dtype=numpy.float64)
+        y1: numpy.ndarray = numpy.asarray(ring_y, dtype=numpy.float64)
+        x2: numpy.ndarray = numpy.roll(x1, -1)
+        y2: numpy.ndarray = numpy.roll(y1, -1)
+        height: float = float(numpy.mean(numpy.abs(y2 - y1))) if x1.shape[0] > 0 else 0.0
+        if height <= 0 or x.shape[0] == 0:
+            # Without edges that span a vertical extent there are no crossings
+            return numpy.zeros(x.shape, dtype=numpy.int64)
+        y_origin: float = float(y1.min())
+        band_0: numpy.ndarray = numpy.floor((numpy.minimum(y1, y2) - y_origin) / height).astype(numpy.int64)
+        band_1: numpy.ndarray = numpy.floor((numpy.maximum(y1, y2) - y_origin) / height).astype(numpy.int64)
+        # One entry per edge and band, sorted by band
+        counts: numpy.ndarray = band_1 - band_0 + 1
+        edges: numpy.ndarray = numpy.repeat(numpy.arange(x1.shape[0]), counts)
+        bands: numpy.ndarray = band_0[edges] + numpy.arange(edges.shape[0]) - \
+            numpy.repeat(numpy.cumsum(counts) - counts, counts)
+        order: numpy.ndarray = numpy.argsort(bands, kind='stable')
+        (edges, bands) = (edges[order], bands[order])
+        # Pairs of points and edges of their band
+        point_bands: numpy.ndarray = numpy.floor((y - y_origin) / height).astype(numpy.int64)
+        first: numpy.ndarray = numpy.searchsorted(bands, point_bands, side='left')
+        last: numpy.ndarray = numpy.searchsorted(bands, point_bands, side='right')
+        counts = last - first
+        points: numpy.ndarray = numpy.repeat(numpy.arange(x.shape[0]), counts)
+        edges = edges[numpy.repeat(first, counts) + numpy.arange(points.shape[0]) -
+                      numpy.repeat(numpy.cumsum(counts) - counts, counts)]
+        (px, py) = (x[points], y[points])
+        (ex1, ey1, ex2, ey2) = (x1[edges], y1[edges], x2[edges], y2[edges])
+        # Side of the point with respect to each edge, positive at its left
+        side: numpy.ndarray = (ex2 - ex1) * (py - ey1) - (px - ex1) * (ey2 - ey1)
+        upward: numpy.ndarray = (ey1 <= py) & (ey2 > py) & (side > 0)
+        downward: numpy.ndarray = (ey1 > py) & (ey2 <= py) & (side < 0)
+        winding: numpy.ndarray = numpy.bincount(points, weights=upward.astype(numpy.int64) - downward,
+                                                minlength=x.shape[0])
+        return winding.astype(numpy.int64)
+
+    @staticmethod
+    def remove_rotten_loops(perimeter: Perimeter, max_passes: int = 8) -> Perimeter:
+        """
+        Removes the rotten loops of a propagated front. Where the front crosses itself the part between the two crossing
+        segments forms a loop. A loop that has burned twice (i.e. the swallowtails of the front where it converges) is
+        covered twice by the front, so it is replaced by the crossing point. Loops around unburned areas (islands
+        enclosed by the front) and loops of two fronts that touch are kept for the geometry cleanup. A loop is rotten
+        if the winding number of its centroid around the front, in the direction of the front, is 2 or more. The areas
+        and centroids of the loops are computed in constant time with prefix sums of the shoelace terms. The process is
+        repeated while loops are removed, up to a maximum number of passes. The rings of a perimeter with several rings
+        are cleaned one by one, the crossings between different rings are left for the geometry cleanup
+
+        :param perimeter: Front to clean
+        :type perimeter: Perimeter
+        :param max_passes: Maximum number of passes
+        :type max_passes: int
+        :return: The front without rotten loops, the crossing points get the fuel of the first vertex of the crossing
+        segment
+        :rtype: Perimeter
+        """
+        if perimeter.ring_count > 1:
+            return Perimeter.concatenate([PolygonAlgorithm.remove_rotten_loops(ring, max_passes)
+                                          for ring in perimeter.split()])
+        for _ in range(max_passes):
+            (x, y, fuel) = (perimeter.x, perimeter.y, perimeter.fuel)
+            (first, second, x_cross, y_cross) = PolygonAlgorithm.segment_intersections(x, y)
+            if first.shape[0] == 0:
+                break
+            n: int = x.shape[0]
+            (next_x, next_y) = (numpy.roll(x, -1), numpy.roll(y, -1))
+            shoelace: numpy.ndarray = x * next_y - next_x * y
+            prefix_area: numpy.ndarray = numpy.concatenate(([0.0], numpy.cumsum(shoelace)))
+            prefix_x: numpy.ndarray = numpy.concatenate(([0.0], numpy.cumsum((x + next_x) * shoelace)))
+            prefix_y: numpy.ndarray = numpy.concatenate(([0.0], numpy.cumsum((y + next_y) * shoelace)))
+            orientation: int = 1 if prefix_area[n] >= 0 else -1
+            # Twice the signed area and the area moments of the loops, that go from the crossing point through the
+            # vertices i + 1 to j, and of the rest of the front, from the crossing point through the vertices j + 1 to i
+            (start_x, start_y) = (x[first + 1], y[first + 1])
+            (end_x, end_y) = (x[second], y[second])
+            start_term: numpy.ndarray = x_cross * start_y - start_x * y_cross
+            end_term: numpy.ndarray = end_x * y_cross - x_cross * end_y
+            loop_area: numpy.ndarray = start_term + prefix_area[second] - prefix_area[first + 1] + end_term
+            loop_x: numpy.ndarray = (x_cross + start_x) * start_term + prefix_x[second] - prefix_x[first + 1] + \
+                (end_x + x_cross) * end_term
+            loop_y: numpy.ndarray = (y_cross + start_y) * start_term + prefix_y[second] - prefix_y[first + 1] + \
+                (end_y + y_cross) * end_term
+            (rest_area, rest_x, rest_y) = (prefix_area[n] - loop_area, prefix_x[n] - loop_x, prefix_y[n] - loop_y)
+            with numpy.errstate(divide='ignore', invalid='ignore'):
+                centroids_x: numpy.ndarray = numpy.concatenate((loop_x / (3 * loop_area), rest_x / (3 * rest_area)))
+                centroids_y: numpy.ndarray = numpy.concatenate((loop_y / (3 * loop_area), rest_y / (3 * rest_area)))
+            covered: numpy.ndarray = PolygonAlgorithm.winding_numbers(centroids_x, centroids_y, x, y) * orientation >= 2
+            (loop_rotten, rest_rotten) = (covered[:first.shape[0]], covered[first.shape[0]:])
+            removals: List[Tuple[int, int, float, float]] = list()
+            cursor: int = 0
+            for (i, j, xc, yc, loop, rest) in zip(first.tolist(), second.tolist(), x_cross.tolist(),
+                                                  y_cross.tolist(), loop_rotten.tolist(), rest_rotten.tolist()):
+                if i < cursor:
+                    # The crossing is inside a loop already removed
+                    continue
+                if loop:
+                    removals.append((i, j, xc, yc))
+                    cursor = j + 1
+                elif rest and len(removals) == 0:
+                    # The rest of the front is the rotten loop, the loop is the front
+                    perimeter = Perimeter(numpy.concatenate(([xc], x[i + 1:j + 1])),
+                                          numpy.concatenate(([yc], y[i + 1:j + 1])),
+                                          numpy.concatenate(([fuel[i]], fuel[i + 1:j + 1])))
+                    break
+            else:
+                if len(removals) == 0:
+                    break
+                (pieces_x, pieces_y, pieces_fuel) = (list(), list(), list())
+                start: int = 0
+                for (i, j, xc, yc) in removals:
+                    pieces_x.extend((x[start:i + 1], [xc]))
+                    pieces_y.extend((y[start:i + 1], [yc]))
+                    pieces_fuel.extend((fuel[start:i + 1], [fuel[i]]))
+                    start = j + 1
+                pieces_x.append(x[start:])
+                pieces_y.append(y[start:])
+                pieces_fuel.append(fuel[start:])
+                perimeter = Perimeter(numpy.concatenate(pieces_x), numpy.concatenate(pieces_y),
+                                      numpy.concatenate(pieces_fuel))
+        return perimeter
+
+    @staticmethod
+    def rasterize(perimeter: Perimeter, x_origin: float, y_origin: float,
+                  cell_size: float) -> Tuple[int, int, numpy.ndarray]:
+        """
+        Cells of a grid whose centre is inside a perimeter, with the even-odd rule over all its rings so the interior
+        rings are holes. The rows of the grid go from north to south as in a raster (the origin is the upper left
+        corner). The crossings of the edges with the row centres of the bounding box are computed at once, sorted by
+        row and x coordinate, and each pair of consecutive crossings of a row fills the cells between them through a
+        difference array
+
+        :param perimeter: The perimeter
+        :type perimeter: Perimeter
+        :param x_origin: X coordinate of the upper left corner of the grid
+        :type x_origin: float
+        :param y_origin: Y coordinate of the upper left corner of the grid
+        :type y_origin: float
+        :param cell_size: Size of the cells
+        :type cell_size: float
+        :return: The row and column of the grid of the upper left cell of the bounding box of the perimeter, and the
+        mask of the cells inside the perimeter in the bounding box
+        :rtype: Tuple[int, int, numpy.ndarray]
+        """
+        (x_min, y_min, x_max, y_max) = perimeter.bounds()
+        (row_0, column_0) = (int(numpy.floor((y_origin - y_max) / cell_size)),
+                             int(numpy.floor((x_min - x_origin) / cell_size)))
+        height: int = int(numpy.floor((y_origin - y_min) / cell_size)) - row_0 + 1
+        width: int = int(numpy.floor((x_max - x_origin) / cell_size)) - column_0 + 1
+        (x1, y1) = (perimeter.x, perimeter.y)
+        (_, following) = perimeter.neighbours()
+        (x2, y2) = (x1[following], y1[following])
+        # An edge crosses the row centres y with min(y1, y2) <= y < max(y1, y2), rows grow to the south
+        first: numpy.ndarray = numpy.floor((y_origin - numpy.maximum(y1, y2)) / cell_size - 0.5 - row_0).astype(
+            numpy.int64) + 1
+        last: numpy.ndarray = numpy.floor((y_origin - numpy.minimum(y1, y2)) / cell_size - 0.5 - row_0).astype(
+            numpy.int64)
+        counts: numpy.ndarray = numpy.maximum(last - first + 1, 0)
+        edges: numpy.ndarray = numpy.repeat(numpy.arange(x1.shape[0]), counts)
+        rows: numpy.ndarray = first[edges] + numpy.arange(edges.shape[0]) - numpy.repeat(numpy.cumsum(counts) - counts,
+                                                                                         counts)
+        y_centre: numpy.ndarray = y_origin - (row_0 + rows + 0.5) * cell_size
+        x_cross: numpy.ndarray = x1[edges] + (y_centre - y1[edges]) * (x2[edges] - x1[edges]) / \
+            (y2[edges] - y1[edges])
+        order: numpy.ndarray = numpy.lexsort((x_cross, rows))
+        (rows, x_cross) = (rows[order], x_cross[order])
+        # Cells whose centre x is in [x_start, x_end) of each pair of crossings
+        columns: numpy.ndarray = numpy.clip(numpy.ceil((x_cross - x_origin) / cell_size - 0.5 - column_0),
+                                            0, width).astype(numpy.int64)
+        fill: numpy.ndarray = numpy.zeros((height, width + 1), dtype=numpy.int32)
+        numpy.add.at(fill, (rows[0::2], columns[0::2]), 1)
+        numpy.add.at(fill, (rows[1::2], columns[1::2]), -1)
+        return row_0, column_0, numpy.cumsum(fill, axis=1)[:, :width] > 0
@@ -1,10 +1,15 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+from __future__ import annotations  # Needed to allow returning type of enclosing class PEP 563
+
 from gisfire_spread_simulation.fuel_models.fuel_model import FuelModel
+from typing import Any
+from typing import Dict
 from typing import Tuple
 from typing import Union
 from typing import List
+from typing import Sequence
 from math import exp
 from math import pow
 from math import tan
@@ -12,42 +17,42 @@ from math import cos
 from math import sin
 from math import atan2
 
+import numpy
 
-class RateOfSpread:
-    FEET_TO_METER = 0.3048
-    METER_SECOND_TO_FEET_MINUTE = 3.28084 * 60
+
+class FuelModelKernel:
+    """
+    Part of the Rothermel model that only depends on the fuel model: surface area weighting factors, packing ratios,
+    optimum reaction velocity, propagating flux ratio, wind and slope coefficients, etc. It is computed once per fuel
+    model and stored in the model (see FuelModel.kernel), which discards it when any of its properties is modified.
+    """
 
     # noinspection SpellCheckingInspection
-    @staticmethod
-    def rothermel(fuel_model: Union[FuelModel, None] = None,
-                  moisture: Union[Tuple[Tuple[float, float, float], Tuple[float, float]], None] = None,
-                  wind: Union[Tuple[float, float], float, None] = None, slope: Union[float, None] = None) \
-            -> Union[float, Tuple[float, float, float]]:
+    def __init__(self, fuel_model: FuelModel) -> None:
         """
-        TODO
-        :param fuel_model:
+        Computes the moisture, wind and slope independent values of the Rothermel model for a fuel model. Undefined
+        values of the fuel model (such as the ones of the non burnable model) are considered 0.
+
+        :param fuel_model: Fuel model to precompute
         :type fuel_model: FuelModel
-        :param moisture: Fuel moisture content for the different fuel classes
-        :type moisture: Tuple[Tuple[float, float, float], Tuple[float, float]]
-        :param wind:
-        :type wind:
-        :param slope:
-        :type slope:
-        :return:
-        :rtype:
         """
-        # Vectorice the "Surface to Volume Ratio" of the fire model provided. This value is sigma in the formulation
-        sav_ratio: Tuple[Tuple[float, float, float], Tuple[float, float]] = \
-            ((fuel_model.sav_ratio_1_h, fuel_model.sav_ratio_10_h, fuel_model.sav_ratio_100_h),
-             (fuel_model.sav_ratio_live_herb, fuel_model.sav_ratio_live_wood))
+        # Vectorice the "Surface to Volume Ratio" of the fire model provided. This value is sigma in the formulation.
+        # The fourth dead class is the cured herbaceous fuel of the dynamic models (see FuelModel.cured)
+        sav_ratio: Tuple[Tuple[float, float, float, float], Tuple[float, float]] = \
+            ((fuel_model.sav_ratio_1_h or 0, fuel_model.sav_ratio_10_h or 0, fuel_model.sav_ratio_100_h or 0,
+              fuel_model.sav_ratio_dead_herb or 0),
+             (fuel_model.sav_ratio_live_herb or 0, fuel_model.sav_ratio_live_wood or 0))
         # Vectorice the "Oven Dry Fuel Load" of the provided model. This value is w sub 0
-        fuel_load: Tuple[Tuple[float, float, float], Tuple[float, float]] = \
-            ((fuel_model.fuel_load_1_h, fuel_model.fuel_load_10_h, fuel_model.fuel_load_100_h),
-             (fuel_model.fuel_load_live_herb, fuel_model.fuel_load_live_wood))
+        fuel_load: Tuple[Tuple[float, float, float, float], Tuple[float, float]] = \
+            ((fuel_model.fuel_load_1_h or 0, fuel_model.fuel_load_10_h or 0, fuel_model.fuel_load_100_h or 0,
+              fuel_model.fuel_load_dead_herb or 0),
+             (fuel_model.fuel_load_live_herb or 0, fuel_model.fuel_load_live_wood or 0))
+        fuel_bed_depth: float = fuel_model.fuel_bed_depth or 0
+        self.moisture_of_extinction: float = fuel_model.moisture_of_extinction or 0
         # Mean total surface area per unit fuel cell of each size class within each category. (Andrews 2018, pg. 17)
         # Although the formula uses the particle density for each categoru (ro sub i, j) the fire models consider it
         # constant for all categories and equal to 32 lb/ft³
-        a_ij: List[List[float]] = [[0] * 3, [0] * 2]
+        a_ij: List[List[float]] = [[0] * 4, [0] * 2]
         for i in range(0, 2):
             for j in range(0, len(a_ij[i])):
                 a_ij[i][j] = (sav_ratio[i][j] * fuel_load[i][j]) / fuel_model.particle_density
@@ -55,75 +60,82 @@ class RateOfSpread:
         a_i: Tuple[float, float] = (sum(a_ij[0]), sum(a_ij[1]))
         # Mean total surface area of the fuel. (Andrews 2018, pg. 17)
         a_t: float = sum(a_i)
+        # A model without fuel, fuel bed or moisture of extinction does not burn
+        self.burnable: bool = a_t > 0 and fuel_bed_depth > 0 and self.moisture_of_extinction > 0
+        if not self.burnable:
+            a_t = 1
+            fuel_bed_depth = 1
+            self.moisture_of_extinction = 1
         # Weighting factor for characteristic dead and live heat content, effective mineral content, moisture content,
         # and surface-area-to-volume ratio. (Andrews 2018, pg. 17)
-        f_ij: List[List[float]] = [[0] * 3, [0] * 2]
+        f_ij: List[List[float]] = [[0] * 4, [0] * 2]
         for i in range(0, 2):
             for j in range(0, len(f_ij[i])):
                 f_ij[i][j] = a_ij[i][j] / a_i[i] if a_i[i] > 0 else 0
+        self.f_ij: Tuple[Tuple[float, float, float, float], Tuple[float, float]] = (tuple(f_ij[0]), tuple(f_ij[1]))
         # Weighting factor for characteristic fuel bed surface-area-to-volume ratio. (Andrews 2018, pg. 17)
         f_i: Tuple[float, float] = (a_i[0] / a_t, a_i[1] / a_t)
+        self.f_i: Tuple[float, float] = f_i
         # Surface-area-to-volume ratio (ft²/ft³). (Andrews 2018, pg. 18)
         # In the formulation is identified by sigma sub i
         # noinspection DuplicatedCode
-        sav_ratio_i: Tuple[float, float] = (
-            f_ij[0][0] * sav_ratio[0][0] + f_ij[0][1] * sav_ratio[0][1] + f_ij[0][2] * sav_ratio[0][2],
-            f_ij[1][0] * sav_ratio[1][0] + f_ij[1][1] * sav_ratio[1][1])
+        sav_ratio_i: Tuple[float, float] = (sum([f * sigma for f, sigma in zip(f_ij[0], sav_ratio[0])]),
+                                            sum([f * sigma for f, sigma in zip(f_ij[1], sav_ratio[1])]))
         # Surface-area-to-volume ratio (ft²/ft³). (Andrews 2018, pg. 18)
         # In the formulation is identified by sigma
-        mean_sav_ratio: float = f_i[0] * sav_ratio_i[0] + f_i[1] * sav_ratio_i[1]
+        mean_sav_ratio: float = f_i[0] * sav_ratio_i[0] + f_i[1] * sav_ratio_i[1] if self.burnable else 1
+        self.mean_sav_ratio: float = mean_sav_ratio
         # Mean bulk density (lb/ft³). (Andrews 2018, pg. 18)
         # The formulation says that is the sum of the sum all the Oven-dry fuel load (w sub 0) divided by delta, the
         # fuel bed depth
-        mean_bulk_density: float = (sum(fuel_load[0]) + sum(fuel_load[1])) / fuel_model.fuel_bed_depth
+        self.mean_bulk_density: float = (sum(fuel_load[0]) + sum(fuel_load[1])) / fuel_bed_depth
         # Mean packing ratio. (Andrews 2018, pg. 18)
         # As all classes have the same particle density it can be moved out of the sumations simplifying the formula
-        mean_packing_ratio: float = mean_bulk_density / fuel_model.particle_density
+        mean_packing_ratio: float = self.mean_bulk_density / fuel_model.particle_density if self.burnable else 1
+        self.mean_packing_ratio: float = mean_packing_ratio
         # Propagating flux ratio. (Andrews 2018, pg. 19)
-        propagating_flux_ratio: float = exp((0.792 + 0.681 * pow(mean_sav_ratio, 0.5)) * (0.1 + mean_packing_ratio)) *\
+        self.propagating_flux_ratio: float = \
+            exp((0.792 + 0.681 * pow(mean_sav_ratio, 0.5)) * (0.1 + mean_packing_ratio)) * \
             pow((192 + 0.2595 * mean_sav_ratio), -1)
         # Optimum reaction velocity (min⁻¹) A exponent. (Andrews 2018, pg. 19)
         a: float = 133 * pow(mean_sav_ratio, -0.7913)
         # Optimum packing ratio. (Andrews 2018, pg. 18)
         # Beta sub opt in the formulation
         mean_optimal_packing_ratio: float = 3.348 * pow(mean_sav_ratio, -0.8189)
+        self.relative_packing_ratio: float = mean_packing_ratio / mean_optimal_packing_ratio
         # Maximum reaction velocity (min⁻¹). (Andrews 2018, pg. 19)
         # Capital Gamma prima max in the formulation
         mean_maximum_reaction_velocity: float = pow(mean_sav_ratio, 1.5) / (495 + 0.0594 * pow(mean_sav_ratio, 1.5))
         # Optimum reaction velocity (min⁻¹). (Andrews 2018, pg. 19)
         # Capital Gamma prima in the formulation
-        mean_optimal_reaction_velocity: float = mean_maximum_reaction_velocity * \
+        self.mean_optimal_reaction_velocity: float = mean_maximum_reaction_velocity * \
             pow((mean_packing_ratio / mean_optimal_packing_ratio), a) * \
             exp(a * (1 - (mean_packing_ratio / mean_optimal_packing_ratio)))
         # Net fuel load (lb/ft²). (Andrews 2018, pg. 18)
-        net_fuel_load: List[List[float]] = [[0] * 3, [0] * 2]
+        net_fuel_load: List[List[float]] = [[0] * 4, [0] * 2]
         for i in range(0, len(net_fuel_load)):
             for j in range(0, len(net_fuel_load[i])):
                 net_fuel_load[i][j] = fuel_load[i][j] * (1 - fuel_model.mineral_content)
+        # Weighting factor of the net fuel load, g sub ij. The size classes are grouped in subclasses by their
+        # surface-area-to-volume ratio and each class gets the sum of the f_ij weights of its subclass. (Andrews 2018,
+        # pg. 17). For the standard dead classes each one falls in a different subclass and g_ij equals f_ij, but the
+        # cured herbaceous fuel shares the subclass of the 1h fuel
+        g_ij: List[List[float]] = [[0] * 4, [0] * 2]
+        for i in range(0, 2):
+            subclasses: List[int] = [FuelModelKernel.size_subclass(sigma) for sigma in sav_ratio[i]]
+            for j in range(0, len(g_ij[i])):
+                g_ij[i][j] = sum([f for f, subclass in zip(f_ij[i], subclasses) if subclass == subclasses[j]])
         # Dead fraction net fuel load (lb/ft²). (Andrews 2018, pg. 18)
-        # In Andrews explain the g_ij categorization of the f_ij, but as for dead always each of the 3 possible values
-        # fall in different categories for all models it is not necesdsary to calculate g and use directly f
-        net_fuel_load_dead: float = f_ij[0][0] * net_fuel_load[0][0] + f_ij[0][1] * net_fuel_load[0][1] + f_ij[0][2] * \
-            net_fuel_load[0][2]
+        self.net_fuel_load_dead: float = sum([g * wn for g, wn in zip(g_ij[0], net_fuel_load[0])])
         # Live fraction net fuel load (lb/ft²). (Andrews 2018, pg. 18)
-        # In Andrews explain the g_ij categorization of the f_ij, but as for life always each of the 2 possible values
-        # fall in the same categories for all models it is not necesdsary to calculate g because it wil be always 1 (the
-        # sum of f weights of live fuels)
-        net_fuel_load_live: float = net_fuel_load[1][0] + net_fuel_load[1][1]
+        self.net_fuel_load_live: float = sum([g * wn for g, wn in zip(g_ij[1], net_fuel_load[1])])
         # Heat content (Btu/lb). (Andrews 2018, pg. 18)
-        heat_content_i: Tuple[float, float] = (fuel_model.heat_content * sum(f_ij[0]),
-                                               fuel_model.heat_content * sum(f_ij[1]))
-        # Moisture content (fraction). (Andrews 2018, pg. 18)
-        # noinspection DuplicatedCode
-        fuel_moisrute_i: Tuple[float, float] = (f_ij[0][0] * moisture[0][0] + f_ij[0][1] * moisture[0][1] +
-                                                f_ij[0][2] * moisture[0][2],
-                                                f_ij[1][0] * moisture[1][0] + f_ij[1][1] * moisture[1][1])
-        # Live fuel moisture of extinction (fraction). Dead-to-live load ratio W numerator part calculation.
-        # (Andrews 2018, pg. 17)
-        w_num: float = 0
-        for j in range(0, len(sav_ratio[0])):
-            if sav_ratio[0][j] > 0:
-                w_num += fuel_load[0][j] * exp(-138 / sav_ratio[0][j])
+        self.heat_content_i: Tuple[float, float] = (fuel_model.heat_content * sum(f_ij[0]),
+                                                    fuel_model.heat_content * sum(f_ij[1]))
+        # Live fuel moisture of extinction (fraction). "Fine" dead fuel loads, used both in the numerator of the
+        # dead-to-live load ratio W and in the "fine" dead fuel moisture M sub f dead. (Andrews 2018, pg. 17)
+        self.fine_fuel_load_dead: Tuple[float, float, float, float] = \
+            tuple([fuel_load[0][j] * exp(-138 / sav_ratio[0][j]) if sav_ratio[0][j] > 0 else 0 for j in range(0, 4)])
         # Live fuel moisture of extinction (fraction). Dead-to-live load ratio W denominator part calculation.
         # (Andrews 2018, pg. 17)
         w_den: float = 0
@@ -131,88 +143,261 @@ class RateOfSpread:
             if sav_ratio[1][j] > 0:
                 w_den += fuel_load[1][j] * exp(-500 / sav_ratio[1][j])
         # Live fuel moisture of extinction (fraction). Dead-to-live load ratio W calculation. (Andrews 2018, pg. 17)
-        w: float = w_num / w_den if w_den > 0 else 0
+        self.w: float = sum(self.fine_fuel_load_dead) / w_den if w_den > 0 else 0
+        # Mineral damping coefficient. (Andrews 2018, pg. 18)
+        self.mineral_damping: float = min(1.0, 0.174 * pow(fuel_model.effective_mineral_content, -0.19))
+        # Heat sink (Btu/ft³) weights of the heat of preignition of each size class, live and dead.
+        # (Andrews 2018, pg. 19)
+        self.heat_sink_ij: Tuple[Tuple[float, float, float, float], Tuple[float, float]] = tuple([
+            tuple([f_i[i] * f_ij[i][j] * exp(-138 / sav_ratio[i][j]) if sav_ratio[i][j] > 0 else 0
+                   for j in range(0, len(f_ij[i]))]) for i in range(0, 2)])
+        # Wind factor pre-calculations. (Andrews 2018, pg. 18)
+        self.c: float = 7.47 * exp(-0.133 * pow(mean_sav_ratio, 0.55))
+        self.b: float = 0.02526 * pow(mean_sav_ratio, 0.54)
+        self.e: float = 0.715 * exp(-3.59e-4 * mean_sav_ratio)
+        # Slope factor coefficient. (Andrews 2018, pg. 18)
+        self.slope_coefficient: float = 5.275 * pow(mean_packing_ratio, -0.3)
+        # Wind factor coefficient. (Andrews 2018, pg. 18)
+        self.wind_coefficient: float = self.c * pow(self.relative_packing_ratio, -self.e)
+
+    @staticmethod
+    def size_subclass(sav_ratio: float) -> int:
+        """
+        Size subclass of a fuel class used to weight the net fuel load, given by its surface-area-to-volume ratio with
+        the limits 1200, 192, 96, 48 and 16 ft²/ft³ (Andrews 2018, pg. 17)
+
+        :param sav_ratio: Surface-area-to-volume ratio (ft²/ft³)
+        :type sav_ratio: float
+        :return: The subclass, 0 for the finest fuels
+        :rtype: int
+        """
+        return sum([1 for limit in (1200, 192, 96, 48, 16) if sav_ratio < limit])
+
+    @staticmethod
+    def of(fuel_model: FuelModel) -> FuelModelKernel:
+        """
+        Returns the kernel of a fuel model, computing it only if the model has not been precomputed yet or it has been
+        modified since
+
+        :param fuel_model: Fuel model
+        :type fuel_model: FuelModel
+        :return: The kernel of the fuel model
+        :rtype: FuelModelKernel
+        """
+        if fuel_model.kernel is None:
+            fuel_model.kernel = FuelModelKernel(fuel_model)
+        return fuel_model.kernel
+
+
+class RateOfSpread:
+    FEET_TO_METER = 0.3048
+    METER_SECOND_TO_FEET_MINUTE = 3.28084 * 60
+
+    # noinspection SpellCheckingInspection
+    @staticmethod
+    def rothermel(fuel_model: Union[FuelModel, None] = None,
+                  moisture: Union[Tuple[Tuple[float, float, float], Tuple[float, float]], None] = None,
+                  wind: Union[Tuple[float, float], float, None] = None, slope: Union[float, None] = None) \
+            -> Union[float, Tuple[float, float, float]]:
+        """
+        TODO
+        :param fuel_model:
+        :type fuel_model: FuelModel
+        :param moisture: Fuel moisture content for the different fuel classes
+        :type moisture: Tuple[Tuple[float, float, float], Tuple[float, float]]
+        :param wind:
+        :type wind:
+        :param slope:
+        :type slope:
+        :return:
+        :rtype:
+        """
+        # Fuel model dependent part of the formulation
+        kernel: FuelModelKernel = FuelModelKernel.of(fuel_model)
+        f_ij = kernel.f_ij
+        # The cured herbaceous fuel has the moisture content of the 1h fuel (Scott & Burgan 2005, pg. 11)
+        moisture = (tuple(moisture[0][0:3]) + (moisture[0][0], ), tuple(moisture[1]))
+        # Moisture content (fraction). (Andrews 2018, pg. 18)
+        # noinspection DuplicatedCode
+        fuel_moisrute_i: Tuple[float, float] = (sum([f * m for f, m in zip(f_ij[0], moisture[0])]),
+                                                sum([f * m for f, m in zip(f_ij[1], moisture[1])]))
         # Live fuel moisture of extinction (fraction). "Fine" dead fuel moisture M sub f dead calculation.
         # (Andrews 2018, pg. 17)
-        mf_dead: float = ((moisture[0][0] * fuel_load[0][0] * exp(-138 / sav_ratio[0][0])) +
-                          (moisture[0][1] * fuel_load[0][1] * exp(-138 / sav_ratio[0][1])) +
-                          (moisture[0][2] * fuel_load[0][2] * exp(-138 / sav_ratio[0][2]))) / \
-                         ((fuel_load[0][0] * exp(-138 / sav_ratio[0][0])) +
-                          (fuel_load[0][1] * exp(-138 / sav_ratio[0][1])) +
-                          (fuel_load[0][2] * exp(-138 / sav_ratio[0][2])))
+        fine_fuel_load_dead = kernel.fine_fuel_load_dead
+        mf_dead: float = sum([m * load for m, load in zip(moisture[0], fine_fuel_load_dead)]) / \
+            sum(fine_fuel_load_dead) if kernel.burnable else 0
         # Live fuel moisture of extinction (fraction). (Andrews 2018, pg. 17)
-        live_moisture_of_extinction: float = max(2.9 * w * (1 - (mf_dead / fuel_model.moisture_of_extinction)) - 0.226,
-                                                 fuel_model.moisture_of_extinction)
+        live_moisture_of_extinction: float = max(2.9 * kernel.w * (1 - (mf_dead / kernel.moisture_of_extinction)) -
+                                                 0.226, kernel.moisture_of_extinction)
         # Moisture damping coefficient (part 1). (Andrews 2018, pg. 18)
-        moisture_relation_i: Tuple[float, float] = (min(1.0, fuel_moisrute_i[0] / fuel_model.moisture_of_extinction),
+        moisture_relation_i: Tuple[float, float] = (min(1.0, fuel_moisrute_i[0] / kernel.moisture_of_extinction),
                                                     min(1.0, fuel_moisrute_i[1] / live_moisture_of_extinction))
         # Moisture damping coefficient (part 2). (Andrews 2018, pg. 18)
         moisture_damping_i: List[float] = [0] * 2
         for i in range(0, 2):
             moisture_damping_i[i] = 1 - 2.59 * moisture_relation_i[i] + 5.11 * pow(moisture_relation_i[i], 2) - \
                                     3.52 * pow(moisture_relation_i[i], 3)
-        # Mineral damping coefficient. (Andrews 2018, pg. 18)
-        mineral_damping: float = min(1.0, 0.174 * pow(fuel_model.effective_mineral_content, -0.19))
         # Reaction intensity (dead fuel). (Andrews 2018, pg. 19)
-        intensity_reaction_a: float = net_fuel_load_dead * heat_content_i[0] * moisture_damping_i[0] * mineral_damping
+        intensity_reaction_a: float = kernel.net_fuel_load_dead * kernel.heat_content_i[0] * moisture_damping_i[0] * \
+            kernel.mineral_damping
         # Reaction intensity (live fuel). (Andrews 2018, pg. 19)
-        intensity_reaction_b: float = net_fuel_load_live * heat_content_i[1] * moisture_damping_i[1] * mineral_damping
+        intensity_reaction_b: float = kernel.net_fuel_load_live * kernel.heat_content_i[1] * moisture_damping_i[1] * \
+            kernel.mineral_damping
         # Reaction intensity (Btu/ft -min). (Andrews 2018, pg. 19)
-        intensity_reaction: float = mean_optimal_reaction_velocity * (intensity_reaction_a + intensity_reaction_b)
-        # Heat of preignition for each size class, live and dead (Btu/lb). (Andrews 2018, pg. 19)
-        heat_of_preignition_ij: List[List[float]] = [[0] * 3, [0] * 2]
-        for i in range(0, 2):
-            for j in range(0, len(heat_of_preignition_ij[i])):
-                heat_of_preignition_ij[i][j] = 250 + 1116 * moisture[i][j]
-        # Heat sink (Btu/ft³) summation. (Andrews 2018, pg. 19)
-        heat_number_tmp: List[float] = [0] * 2
-        for i in range(0, len(heat_number_tmp)):
-            heat_number_tmp[i] = f_i[i] * sum([a * (exp(-138 / b) if b > 0 else 0) * c for a, b, c in
-                                              zip(f_ij[i], sav_ratio[i], heat_of_preignition_ij[i])])
+        intensity_reaction: float = kernel.mean_optimal_reaction_velocity * (intensity_reaction_a +
+                                                                             intensity_reaction_b)
         # Heat sink (Btu/ft³). (Andrews 2018, pg. 19)
-        heat_sink: float = mean_bulk_density * sum(heat_number_tmp)
+        # The heat of preignition for each size class, live and dead (Btu/lb) is 250 + 1116 * moisture
+        heat_sink: float = kernel.mean_bulk_density * sum([
+            sum([weight * (250 + 1116 * m) for weight, m in zip(kernel.heat_sink_ij[i], moisture[i])])
+            for i in range(0, 2)])
         # Wind factor pre-calculations. (Andrews 2018, pg. 18)
-        c: float = 7.47 * exp(-0.133 * pow(mean_sav_ratio, 0.55))
-        b: float = 0.02526 * pow(mean_sav_ratio, 0.54)
-        e: float = 0.715 * exp(-3.59e-4 * mean_sav_ratio)
+        c: float = kernel.c
+        b: float = kernel.b
+        e: float = kernel.e
         # Slope factor. (Andrews 2018, pg. 18)
-        slope_factor: float = 5.275 * pow(mean_packing_ratio, -0.3) * pow(tan(slope), 2)
+        slope_factor: float = kernel.slope_coefficient * pow(tan(slope), 2)
         # If the wind is a scalar it means that the wind blows in the same direction as the slope and therefore no
         # vector calculations are needed to determine the final fire direction. If the wind is a tuple or list with 2
         # elements, then the first element is the magnitude and the second the angle, and the vector product with the
         # ROS has to be calculated
         if isinstance(wind, (int, float)):
+            if not kernel.burnable:
+                return 0.0
             # Convert from m/s to imperial units
             wind = wind * RateOfSpread.METER_SECOND_TO_FEET_MINUTE
             # Add the wind limit. (Andrews 2018, pg. 25)
             limited_wind = min(wind, 96.8 * pow(intensity_reaction, 1/3))
             # Wind factor. (Andrews 2018, pg. 18)
-            wind_factor = c * pow(limited_wind, b) * pow(mean_packing_ratio / mean_optimal_packing_ratio, -e)
+            wind_factor = kernel.wind_coefficient * pow(limited_wind, b)
             # Finally, compute the rate of spread. (Andrews 2018, pg. 19)
-            rate_of_spread = (intensity_reaction * propagating_flux_ratio * (1 + wind_factor + slope_factor)) / (
+            rate_of_spread = (intensity_reaction * kernel.propagating_flux_ratio * (1 + wind_factor + slope_factor)) / (
                 heat_sink)
             return rate_of_spread * RateOfSpread.FEET_TO_METER
         else:
+            if not kernel.burnable:
+                return 0.0, 0.0, 0.0
             # Convert from m/s to imperial units
             wind_feet_minute: float = wind[0] * RateOfSpread.METER_SECOND_TO_FEET_MINUTE
             # Add the wind limit. (Andrews 2018, pg. 25)
             limited_wind = min(wind_feet_minute, 96.8 * pow(intensity_reaction, 1 / 3))
             # Wind factor. (Andrews 2018, pg. 18)
-            wind_factor = c * pow(limited_wind, b) * pow(mean_packing_ratio / mean_optimal_packing_ratio, -e)
+            wind_factor = kernel.wind_coefficient * pow(limited_wind, b)
             # Finally, compute the rate of spread. (Andrews 2018, pg. 19)
-            rate_of_spread = (intensity_reaction * propagating_flux_ratio) / heat_sink
+            rate_of_spread = (intensity_reaction * kernel.propagating_flux_ratio) / heat_sink
             # Compute the compound product of two vectors. (Andrews 2018, pg. 85-88)
             d_s = rate_of_spread * slope_factor
             d_w = rate_of_spread * wind_factor
-            d_h = pow((d_s + d_w * cos(wind[1])) ** 2 + (d_w * sin(wind[1]) ** 2), 0.5)
+            d_h = pow((d_s + d_w * cos(wind[1])) ** 2 + (d_w * sin(wind[1])) ** 2, 0.5)
             composite_rate_of_spread = rate_of_spread + d_h
             # Calculate the resulting angle. (Andrews 2018, pg. 85-88)
             alpha = atan2(d_w * sin(wind[1]), d_s + d_w * cos(wind[1]))
             # Calculate the effective wind factor. (Andrews 2018, pg. 85-88)
             effective_wind_factor = (composite_rate_of_spread / rate_of_spread) - 1
-            effective_wind_speed = pow(effective_wind_factor *
-                                       pow(mean_packing_ratio / mean_optimal_packing_ratio, e) / c,
-                                       1 / b)
+            effective_wind_speed = pow(effective_wind_factor * pow(kernel.relative_packing_ratio, e) / c, 1 / b)
             return (composite_rate_of_spread * RateOfSpread.FEET_TO_METER,
                     alpha,
                     effective_wind_speed * (1 / RateOfSpread.METER_SECOND_TO_FEET_MINUTE))
+
+    # noinspection SpellCheckingInspection,DuplicatedCode
+    @staticmethod
+    def rothermel_batch(fuel_models: Union[Sequence[FuelModel], Any], fuel_index: numpy.ndarray,
+                        moisture: numpy.ndarray, wind_speed: Union[numpy.ndarray, float],
+                        wind_direction: Union[numpy.ndarray, float],
+                        slope: Union[numpy.ndarray, float]) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        """
+        Vectorized version of the Rothermel model with the slope and wind vector composition. Each element of the input
+        arrays is an independent evaluation and the result is the same that would be obtained calling rothermel with a
+        (speed, direction) wind tuple for each one of them. All the arrays are broadcast against the fuel index array.
+        Fuel models without fuel load (non burnable) get a rate of spread of 0.
+
+        :param fuel_models: Fuel models referenced by the fuel indices, a FuelModelTable avoids packing the models in
+        each call
+        :type fuel_models: Union[Sequence[FuelModel], FuelModelTable]
+        :param fuel_index: Position in fuel_models of the fuel model of each evaluation
+        :type fuel_index: numpy.ndarray
+        :param moisture: Fuel moisture content (fraction) of each evaluation as an array with a last dimension of 5
+        elements ordered as (1h, 10h, 100h, live herbaceous, live woody)
+        :type moisture: numpy.ndarray
+        :param wind_speed: Mid-flame wind speed in m/s
+        :type wind_speed: Union[numpy.ndarray, float]
+        :param wind_direction: Angle between the wind and the upslope direction in radians
+        :type wind_direction: Union[numpy.ndarray, float]
+        :param slope: Terrain slope in radians
+        :type slope: Union[numpy.ndarray, float]
+        :return: The rate of spread in m/min, the heading angle of the fire referred to the upslope direction in radians
+        and the effective wind speed in m/s
+        :rtype: Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]
+        """
+        fuel_index = numpy.asarray(fuel_index, dtype=numpy.intp)
+        moisture = numpy.asarray(moisture, dtype=numpy.float64)
+        wind_speed = numpy.broadcast_to(numpy.asarray(wind_speed, dtype=numpy.float64), fuel_index.shape)
+        wind_direction = numpy.broadcast_to(numpy.asarray(wind_direction, dtype=numpy.float64), fuel_index.shape)
+        slope = numpy.broadcast_to(numpy.asarray(slope, dtype=numpy.float64), fuel_index.shape)
+        moisture = numpy.broadcast_to(moisture, fuel_index.shape + (5, ))
+        # The cured herbaceous fuel has the moisture content of the 1h fuel (Scott & Burgan 2005, pg. 11)
+        moisture_dead: numpy.ndarray = numpy.concatenate([moisture[..., 0:3], moisture[..., 0:1]], axis=-1)
+        moisture_live: numpy.ndarray = moisture[..., 3:5]
+        # The fuel model table module depends on this one, so it can not be imported at module level
+        from gisfire_spread_simulation.fuel_models.fuel_model_table import FuelModelTable
+        # Gather the fuel model dependent part of the formulation with the fuel index of each evaluation
+        columns: Dict[str, numpy.ndarray] = fuel_models.columns if isinstance(fuel_models, FuelModelTable) else \
+            FuelModelTable.split(FuelModelTable.pack(fuel_models))
+        rows: Dict[str, numpy.ndarray] = {name: numpy.take(column, fuel_index, axis=0)
+                                          for name, column in columns.items()}
+        burnable = rows['burnable']
+        f_dead = rows['f_dead']
+        f_live = rows['f_live']
+        fine_fuel_load_dead = rows['fine_fuel_load_dead']
+        heat_sink_dead = rows['heat_sink_dead']
+        heat_sink_live = rows['heat_sink_live']
+        heat_content_dead = rows['heat_content_dead']
+        heat_content_live = rows['heat_content_live']
+        mx_dead = rows['moisture_of_extinction']
+        w = rows['w']
+        net_fuel_load_dead = rows['net_fuel_load_dead']
+        net_fuel_load_live = rows['net_fuel_load_live']
+        reaction_velocity = rows['reaction_velocity']
+        mean_bulk_density = rows['mean_bulk_density']
+        propagating_flux_ratio = rows['propagating_flux_ratio']
+        relative_packing_ratio = rows['relative_packing_ratio']
+        slope_coefficient = rows['slope_coefficient']
+        wind_coefficient = rows['wind_coefficient']
+        c = rows['c']
+        b = rows['b']
+        e = rows['e']
+        with numpy.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            # Moisture, wind and slope dependent part of the model, computed for each element of the batch with the
+            # same formulation of the scalar version
+            fuel_moisture_dead = (f_dead * moisture_dead).sum(axis=-1)
+            fuel_moisture_live = (f_live * moisture_live).sum(axis=-1)
+            fine_fuel_load_dead_sum = fine_fuel_load_dead.sum(axis=-1)
+            mf_dead = numpy.where(fine_fuel_load_dead_sum > 0,
+                                  (fine_fuel_load_dead * moisture_dead).sum(axis=-1) / fine_fuel_load_dead_sum, 0)
+            mx_live = numpy.maximum(2.9 * w * (1 - mf_dead / mx_dead) - 0.226, mx_dead)
+            relation_dead = numpy.minimum(1.0, fuel_moisture_dead / mx_dead)
+            relation_live = numpy.minimum(1.0, fuel_moisture_live / mx_live)
+            damping_dead = 1 - 2.59 * relation_dead + 5.11 * relation_dead ** 2 - 3.52 * relation_dead ** 3
+            damping_live = 1 - 2.59 * relation_live + 5.11 * relation_live ** 2 - 3.52 * relation_live ** 3
+            intensity_reaction = reaction_velocity * (net_fuel_load_dead * heat_content_dead * damping_dead +
+                                                      net_fuel_load_live * heat_content_live * damping_live)
+            heat_sink = mean_bulk_density * ((heat_sink_dead * (250 + 1116 * moisture_dead)).sum(axis=-1) +
+                                             (heat_sink_live * (250 + 1116 * moisture_live)).sum(axis=-1))
+            slope_factor = slope_coefficient * numpy.tan(slope) ** 2
+            wind_feet_minute = wind_speed * RateOfSpread.METER_SECOND_TO_FEET_MINUTE
+            limited_wind = numpy.minimum(wind_feet_minute, 96.8 * numpy.cbrt(intensity_reaction))
+            wind_factor = wind_coefficient * numpy.power(limited_wind, b)
+            rate_of_spread = numpy.where(burnable, intensity_reaction * propagating_flux_ratio / heat_sink, 0)
+            # Compound of the slope and wind vectors. (Andrews 2018, pg. 85-88)
+            d_s = rate_of_spread * slope_factor
+            d_w = rate_of_spread * wind_factor
+            x = d_s + d_w * numpy.cos(wind_direction)
+            y = d_w * numpy.sin(wind_direction)
+            composite_rate_of_spread = rate_of_spread + numpy.hypot(x, y)
+            alpha = numpy.arctan2(y, x)
+            effective_wind_factor = numpy.where(rate_of_spread > 0, composite_rate_of_spread / rate_of_spread - 1, 0)
+            effective_wind_speed = numpy.power(effective_wind_factor * numpy.power(relative_packing_ratio, e) / c,
+                                               1 / b)
+        return (composite_rate_of_spread * RateOfSpread.FEET_TO_METER,
+                alpha,
+                effective_wind_speed * (1 / RateOfSpread.METER_SECOND_TO_FEET_MINUTE))
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import datetime
+import math
+import traceback
+from typing import List
+from typing import Tuple
+from typing import Union
+
+from qgis.PyQt.QtCore import pyqtSignal
+from qgis.core import Qgis
+from qgis.core import QgsGeometry
+from qgis.core import QgsMessageLog
+from qgis.core import QgsProcessingFeedback
+from qgis.core import QgsTask
+
+from gisfire_spread_simulation.simulation_algorithms.spread_simulator import SpreadSimulator
+
+
+class SimulationTask(QgsTask):
+    """
+    Runs simulation steps of a spread simulator in a QGIS background task, so the user interface is not blocked during
+    long simulations. The perimeter layer belongs to the main thread, so the task does not write it: the perimeters of
+    the simulated steps are sent in batches with the perimeters_ready signal and the receiver (connected with a queued
+    connection) writes them to the layer. The simulation can be cancelled between steps, leaving the simulator in the
+    state of the last simulated step. An error of the simulation ends the task as a cancellation, the error is kept in
+    exception and written to the QGIS message log.
+    """
+
+    # List of (date, perimeter geometries) tuples
+    perimeters_ready = pyqtSignal(list)
+
+    def __init__(self, simulator: SpreadSimulator, n_steps: Union[int, None] = None,
+                 end_date: Union[datetime.datetime, None] = None, batch_size: int = 10,
+                 feedback: Union[QgsProcessingFeedback, None] = None,
+                 description: str = 'GisFIRE spread simulation') -> None:
+        """
+        Constructor. The number of simulation steps is given directly or by the date where the simulation ends
+
+        :param simulator: Simulator already reset
+        :type simulator: SpreadSimulator
+        :param n_steps: Number of time steps to simulate
+        :type n_steps: Union[int, None]
+        :param end_date: Date to stop the simulation
+        :type end_date: Union[datetime.datetime, None]
+        :param batch_size: Number of simulated steps whose perimeters are sent together
+        :type batch_size: int
+        :param feedback: Feedback to report the progress, a new one is created if not provided
+        :type feedback: Union[QgsProcessingFeedback, None]
+        :param description: Description of the task shown in QGIS
+        :type description: str
+        """
+        super().__init__(description, QgsTask.CanCancel)
+        if n_steps is None and end_date is None:
+            raise ValueError('The number of steps or the end date must be provided')
+        if n_steps is None:
+            n_steps = max(0, math.ceil((end_date - simulator.current_date).total_seconds() / simulator.time_step))
+        self._simulator: SpreadSimulator = simulator
+        self._n_steps: int = n_steps
+        self._batch_size: int = max(1, batch_size)
+        self._batch: List[Tuple[datetime.datetime, List[QgsGeometry]]] = list()
+        self._feedback: QgsProcessingFeedback = feedback if feedback is not None else QgsProcessingFeedback()
+        self._feedback.progressChanged.connect(self.setProgress)
+        self._simulated_steps: int = 0
+        self._exception: Union[Exception, None] = None
+        self._traceback: str = ''
+
+    @property
+    def feedback(self) -> QgsProcessingFeedback:
+        return self._feedback
+
+    @property
+    def simulated_steps(self) -> int:
+        return self._simulated_steps
+
+    @property
+    def exception(self) -> Union[Exception, None]:
+        """
+        Error raised by the simulation, None if the task has not failed
+        """
+        return self._exception
+
+    def __add_perimeters(self, date: datetime.datetime, geometries: List[QgsGeometry]) -> None:
+        """
+        Perimeter sink of the simulator while the task runs
+
+        :param date: Date of the perimeters
+        :type date: datetime.datetime
+        :param geometries: Cleaned perimeter polygons
+        :type geometries: List[QgsGeometry]
+        """
+        self._batch.append((date, geometries))
+
+    def __send_batch(self) -> None:
+        """
+        Sends the perimeters of the steps simulated since the last batch
+        """
+        if len(self._batch) > 0:
+            self.perimeters_ready.emit(self._batch)
+            self._batch = list()
+
+    def run(self) -> bool:
+        """
+        Runs the simulation steps in the worker thread
+
+        :return: True if all the steps have been simulated, False if the task has been cancelled or has failed
+        :rtype: bool
+        """
+        self._simulator.perimeter_sink = self.__add_perimeters
+        try:
+            for step in range(self._n_steps):
+                if self.isCanceled() or self._feedback.isCanceled():
+                    return False
+                self._simulator.simulation_step()
+                self._simulated_steps += 1
+                if len(self._batch) >= self._batch_size:
+                    self.__send_batch()
+                self._feedback.setProgress(100.0 * (step + 1) / self._n_steps)
+        except Exception as e:
+            # Exceptions must not leave the worker thread
+            self._exception = e
+            self._traceback = traceback.format_exc()
+            return False
+        finally:
+            # The perimeters of the simulated steps are always delivered, also when the task is cancelled
+            self.__send_batch()
+            self._simulator.perimeter_sink = None
+        return True
+
+    def finished(self, result: bool) -> None:
+        """
+        Writes the error of a failed simulation to the QGIS message log, called in the main thread when the task ends
+
+        :param result: Value returned by run
+        :type result: bool
+        """
+        if self._exception is not None:
+            QgsMessageLog.logMessage(self._traceback, self.description(), Qgis.Critical)
+
+    def cancel(self) -> None:
+        """
+        Requests the cancellation of the task, the step being simulated is finished
+        """
+        self._feedback.cancel()
+        super().cancel()
@@ -4,31 +4,55 @@
 from __future__ import annotations  # Needed to allow returning type of enclosing class PEP 563
 
 import datetime
+import time
+from enum import Enum
+from typing import Dict
 from typing import List
 from typing import Union
 from typing import Any
+from typing import Callable
 from typing import Tuple
 
 import math
 import numpy
 from dateutil import parser
-from qgis.core import QgsApplication
 from qgis.core import QgsFeature
+from qgis.core import QgsRasterLayer
 from qgis.core import QgsVectorLayer
-from qgis.core import QgsProject
 from qgis.core import edit
-from qgis.core import QgsPointXY
 from qgis.core import QgsGeometry
-from qgis.core import QgsProcessingFeedback
+from qgis.core import QgsPointXY
 
 import gisfire_spread_simulation.fuel_models.standard_fuel_models as models
-from gisfire_spread_simulation.fuel_models.standard_fuel_models import model_1
-from gisfire_spread_simulation.fuel_models.standard_fuel_models import model_0
 from gisfire_spread_simulation.fuel_models.fuel_model import FuelModel
+from gisfire_spread_simulation.fuel_models.fuel_model_table import FuelModelTable
 from gisfire_spread_simulation.simulation_algorithms.ellipse_algorithms import EllipseAlgorithm
+from gisfire_spread_simulation.simulation_algorithms.level_set import LevelSet
+from gisfire_spread_simulation.simulation_algorithms.minimum_travel_time import MinimumTravelTime
+from gisfire_spread_simulation.simulation_algorithms.rate_of_sprerad_algorithms import FuelModelKernel
 from gisfire_spread_simulation.simulation_algorithms.rate_of_sprerad_algorithms import RateOfSpread
+from gisfire_spread_simulation.simulation_algorithms.perimeter import Perimeter
+from gisfire_spread_simulation.simulation_algorithms.polygon_algorithms import PolygonAlgorithm
+from gisfire_spread_simulation.simulation_algorithms.ignition_queue import IgnitionQueue
+from gisfire_spread_simulation.simulation_algorithms.front_store import FrontStore
+from gisfire_spread_simulation.simulation_algorithms.parallel_propagation import ParallelPropagator
+from gisfire_spread_simulation.data_providers.raster_fuel import RasterFuelLookup
+from gisfire_spread_simulation.data_providers.vector_fuel import VectorFuelLookup
+from gisfire_spread_simulation.data_providers.fuel_moisture import FuelMoistureField
+from gisfire_spread_simulation.data_providers.terrain import TerrainLookup
+from gisfire_spread_simulation.data_providers.wind_field import WindField
+from gisfire_spread_simulation.qgis_helper_functions.geometry import perimeter_from_geometry
+from gisfire_spread_simulation.qgis_helper_functions.geometry import perimeter_to_geometry
+from gisfire_spread_simulation.qgis_helper_functions.geometry import clean_perimeter_geometries
 
-import processing
+
+class SpreadEngine(Enum):
+    # Huygens propagation of the vertices of the fronts
+    VECTOR = 1
+    # Minimum travel time on a grid, the perimeters are isochrones of the arrival times
+    RASTER = 2
+    # Level set of a signed distance field on a grid, the perimeters are its zero contour
+    LEVEL_SET = 3
 
 
 class SpreadSimulator:
@@ -115,14 +139,185 @@ class SpreadSimulator:
         def fuel_model(self, value: FuelModel) -> None:
             self._fuel_model = value
 
+    class EnvironmentCache:
+        """
+        Cache of the spread ellipses of the vertices of a perimeter. Vertices that share the same environment (fuel
+        model, moisture, wind and slope) share the same Rothermel rate of spread and ellipse, so they are computed only
+        once. A miss is an ellipse computed for an environment, a hit is an ellipse used again without computing it:
+        a lookup of an environment already in the cache or a read of the ellipses of a sub-step after the first one
+        (see read). The ellipses computed per vertex with the environment providers are also counted (see computed).
+        """
+        def __init__(self) -> None:
+            self._ellipses: Dict[Tuple[int, Any, Any, Any], Union[Tuple[float, float, float, float], None]] = dict()
+            self._hits: int = 0
+            self._misses: int = 0
+            # Environments of the last computed array of ellipses and times it has been read
+            self._environments: int = 0
+            self._reads: int = 0
+
+        @property
+        def hits(self) -> int:
+            return self._hits
+
+        @property
+        def misses(self) -> int:
+            return self._misses
+
+        @property
+        def hit_rate(self) -> float:
+            total = self._hits + self._misses
+            return self._hits / total if total > 0 else 0.0
+
+        def clear(self) -> None:
+            """
+            Removes the cached ellipses and resets the counters. Environment data can change between steps, so the
+            cache is only valid during a step
+            """
+            self._ellipses.clear()
+            self._hits = 0
+            self._misses = 0
+            self._environments = 0
+            self._reads = 0
+
+        def computed(self, count: int) -> None:
+            """
+            Records an array of ellipses computed without the cache, one miss per environment
+
+            :param count: Number of environments of the array, one per vertex with the environment providers
+            :type count: int
+            """
+            self._misses += count
+            self._environments = count
+            self._reads = 0
+
+        def read(self) -> int:
+            """
+            Records a read of the last computed array of ellipses. The first read uses the computed ellipses, the next
+            ones (i.e. the corrector or the rejected tries of a sub-step) reuse them with one hit per environment
+
+            :return: The hits of the read
+            :rtype: int
+            """
+            hits: int = self._environments if self._reads > 0 else 0
+            self._hits += hits
+            self._reads += 1
+            return hits
+
+        def ellipse(self, fuel_model: FuelModel, moisture: Any, wind: Any,
+                    slope: Any) -> Union[Tuple[float, float, float, float], None]:
+            """
+            Returns the spread ellipse of a vertex with the provided environment
+
+            :param fuel_model: Fuel model of the vertex
+            :type fuel_model: FuelModel
+            :param moisture: Fuel moisture content of the vertex as expected by RateOfSpread.rothermel
+            :type moisture: Any
+            :param wind: Wind (speed, direction) of the vertex as expected by RateOfSpread.rothermel
+            :type wind: Any
+            :param slope: Slope of the vertex as expected by RateOfSpread.rothermel
+            :type slope: Any
+            :return: The ellipse parameters (a, b, c) and the heading angle of the fire, or None if the vertex does not
+            burn
+            :rtype: Union[Tuple[float, float, float, float], None]
+            """
+            # Fuel models are identified by identity (see FuelModelTable)
+            key = (id(fuel_model), moisture, wind, slope)
+            if key in self._ellipses:
+                self._hits += 1
+                return self._ellipses[key]
+            self._misses += 1
+            # Dynamic fuel models burn as their cured static equivalent for the live herbaceous moisture
+            fuel_model = fuel_model.cured(moisture[1][0]) if fuel_model is not None else None
+            if fuel_model is None or not FuelModelKernel.of(fuel_model).burnable:
+                ellipse = None
+            else:
+                (rate, alpha, effective_wind) = RateOfSpread.rothermel(fuel_model=fuel_model, moisture=moisture,
+                                                                       wind=wind, slope=slope)
+                (a, b, c) = EllipseAlgorithm.alexander(rate / 60, effective_wind)
+                ellipse = (a, b, c, alpha)
+            self._ellipses[key] = ellipse
+            return ellipse
+
+        def ellipses(self, fuel_models: FuelModelTable, fuel_index: numpy.ndarray, moisture: Any, wind: Any,
+                     slope: Any) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+            """
+            Returns the spread ellipses of a set of vertices that share the moisture, wind and slope values as arrays,
+            one element per vertex
+
+            :param fuel_models: Fuel models referenced by the fuel indices
+            :type fuel_models: FuelModelTable
+            :param fuel_index: Fuel index of each vertex
+            :type fuel_index: numpy.ndarray
+            :param moisture: Fuel moisture content of the vertices as expected by RateOfSpread.rothermel
+            :type moisture: Any
+            :param wind: Wind (speed, direction) of the vertices as expected by RateOfSpread.rothermel
+            :type wind: Any
+            :param slope: Slope of the vertices as expected by RateOfSpread.rothermel
+            :type slope: Any
+            :return: The ellipse parameters a, b, c, the heading angle of the fire and whether the vertex burns
+            :rtype: Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]
+            """
+            # The curing of the dynamic models is computed once per live herbaceous moisture
+            cured_models: FuelModelTable = fuel_models.cured(moisture[1][0])
+            (fuels, inverse) = numpy.unique(fuel_index, return_inverse=True)
+            values = numpy.zeros((len(fuels), 5))
+            for i, fuel in enumerate(fuels.tolist()):
+                ellipse = self.ellipse(cured_models[fuel], moisture, wind, slope)
+                if ellipse is not None:
+                    values[i, 0:4] = ellipse
+                    values[i, 4] = 1
+            (self._environments, self._reads) = (len(fuels), 0)
+            values = values[inverse.reshape(-1)]
+            return values[:, 0], values[:, 1], values[:, 2], values[:, 3], values[:, 4] > 0
+
+    class StepStatistics:
+        """
+        Counters of the time stepping of a simulation: the simulation steps (reporting intervals), the propagation
+        sub-steps of the fronts, the sub-steps rejected by the adaptive stability control, the time spent propagating
+        the fronts and the hits and misses of the environment cache (see EnvironmentCache) in all the sub-steps
+        """
+        def __init__(self) -> None:
+            self.steps: int = 0
+            self.sub_steps: int = 0
+            self.rejected_steps: int = 0
+            self.elapsed: float = 0.0
+            self.cache_hits: int = 0
+            self.cache_misses: int = 0
+
+        @property
+        def sub_steps_per_second(self) -> float:
+            return self.sub_steps / self.elapsed if self.elapsed > 0 else 0.0
+
+        @property
+        def cache_hit_rate(self) -> float:
+            total = self.cache_hits + self.cache_misses
+            return self.cache_hits / total if total > 0 else 0.0
+
+        def clear(self) -> None:
+            """
+            Resets the counters
+            """
+            self.steps = 0
+            self.sub_steps = 0
+            self.rejected_steps = 0
+            self.elapsed = 0.0
+            self.cache_hits = 0
+            self.cache_misses = 0
+
+    # Environment without providers: moisture of the dead and live fuel classes, wind speed (m/s) and direction relative
+    # to upslope (radians) and slope (radians)
     default_moisture = ((0.03, 0.03, 0.03), (0.45, 0.82))
     default_wind = (2, 0)
     default_slope = 0
 
     def __init__(self, time_step: int = 30, initial_sampling: int = 100,
                  ignition_layer: Union[QgsVectorLayer, None] = None,
-                 perimeter_layer: Union[QgsVectorLayer, None] = None, fuel_layer: Union[QgsVectorLayer, None] = None,
-                 starting_time: Union[datetime.datetime, None] = None) -> None:
+                 perimeter_layer: Union[QgsVectorLayer, None] = None,
+                 fuel_layer: Union[QgsVectorLayer, QgsRasterLayer, None] = None,
+                 starting_time: Union[datetime.datetime, None] = None, adaptive_time_step: bool = False,
+                 courant_number: float = 0.5, min_time_step: float = 1.0,
+                 perimeter_resolution: Union[float, None] = None, workers: int = 1,
+                 engine: SpreadEngine = SpreadEngine.VECTOR, raster_cell_size: float = 30.0) -> None:
         """
         TODO
 
@@ -135,10 +330,28 @@ class SpreadSimulator:
         :type ignition_layer: QgsVectorLayer
         :param perimeter_layer:
         :type perimeter_layer: QgsVectorLayer
-        :param fuel_layer:
-        :type fuel_layer: QgsVectorLayer
+        :param fuel_layer: Land cover polygon layer or raster of fuel model codes
+        :type fuel_layer: Union[QgsVectorLayer, QgsRasterLayer, None]
         :param starting_time:
         :type starting_time: datetime.datetime
+        :param adaptive_time_step: Propagate the fronts with sub-steps adapted to the spread rate and vertex spacing,
+        the time step is then the interval between the reported perimeters
+        :type adaptive_time_step: bool
+        :param courant_number: Maximum fraction of the distance to its neighbours that a vertex can travel in a sub-step
+        :type courant_number: float
+        :param min_time_step: Minimum sub-step in seconds
+        :type min_time_step: float
+        :param perimeter_resolution: Maximum distance between the vertices of the fronts in the units of the layers,
+        vertices closer than a third of it are removed (see Perimeter.redistributed). None keeps the vertices of the
+        fronts
+        :type perimeter_resolution: Union[float, None]
+        :param workers: Number of processes that propagate the fronts, with 1 they are propagated in this process
+        :type workers: int
+        :param engine: Spread engine, the grid engines (raster and level set) ignore the time stepping, resolution and
+        workers parameters
+        :type engine: SpreadEngine
+        :param raster_cell_size: Cell size of the grid engines in the units of the layers
+        :type raster_cell_size: float
         """
         # Simulation parameters
         self._time_step = time_step
@@ -147,9 +360,38 @@ class SpreadSimulator:
         self._perimeter_layer = perimeter_layer
         self._fuel_layer = fuel_layer
         self._start_date: datetime.datetime = starting_time
+        self._adaptive_time_step: bool = adaptive_time_step
+        self._courant_number: float = courant_number
+        self._min_time_step: float = min_time_step
+        self._perimeter_resolution: Union[float, None] = perimeter_resolution
+        self._workers: int = workers
+        self._engine: SpreadEngine = engine
+        self._raster_cell_size: float = raster_cell_size
         # Simulation internal state
         self._t_now: Union[datetime.datetime, None] = None
-        self._ignition_points: Union[List[SpreadSimulator.IgnitionPoint], None] = None
+        self._ignition_queue: Union[IgnitionQueue, None] = None
+        self._front_store: FrontStore = FrontStore()
+        # Receives the perimeters of each step instead of the perimeter layer, i.e. when running in a background task
+        self._perimeter_sink: Union[Callable[[datetime.datetime, List[QgsGeometry]], None], None] = None
+        self._environment_cache: SpreadSimulator.EnvironmentCache = SpreadSimulator.EnvironmentCache()
+        self._step_statistics: SpreadSimulator.StepStatistics = SpreadSimulator.StepStatistics()
+        # Fuel models referenced by the fuel indices of the perimeter vertices
+        self._fuel_table: FuelModelTable = FuelModelTable()
+        # Fuel lookup of the fuel layer, built when the simulation is reset, and the fuel indices of its fuel models
+        self._fuel_field: str = 'fuel_model'
+        self._fuel_lookup: Union[VectorFuelLookup, RasterFuelLookup, None] = None
+        self._fuel_lookup_indices: numpy.ndarray = numpy.zeros(1, dtype=numpy.int32)
+        # Pool of worker processes, started when the simulation is reset if there is more than one worker
+        self._parallel_propagator: Union[ParallelPropagator, None] = None
+        # Gridded wind used instead of the default wind, evaluated at the date of the fronts being propagated
+        self._wind_field: Union[WindField, None] = None
+        # Slope and aspect used instead of the default slope
+        self._terrain: Union[TerrainLookup, None] = None
+        # Gridded fuel moisture used instead of the default moisture
+        self._fuel_moisture: Union[FuelMoistureField, None] = None
+        self._environment_date: Union[datetime.datetime, None] = None
+        # Grid of the raster or level set engine, built when the simulation is reset
+        self._grid_engine: Union[MinimumTravelTime, LevelSet, None] = None
 
     @property
     def time_step(self) -> int:
@@ -192,323 +434,936 @@ class SpreadSimulator:
         self._perimeter_layer = layer
 
     @property
-    def fuel_layer(self) -> QgsVectorLayer:
+    def fuel_layer(self) -> Union[QgsVectorLayer, QgsRasterLayer]:
         return self._fuel_layer
 
     @fuel_layer.setter
-    def fuel_layer(self, layer: QgsVectorLayer) -> None:
+    def fuel_layer(self, layer: Union[QgsVectorLayer, QgsRasterLayer]) -> None:
         self._fuel_layer = layer
 
+    @property
+    def fuel_field(self) -> str:
+        return self._fuel_field
+
+    @fuel_field.setter
+    def fuel_field(self, field: str) -> None:
+        self._fuel_field = field
+
+    @property
+    def fuel_table(self) -> FuelModelTable:
+        return self._fuel_table
+
+    @property
+    def environment_cache(self) -> SpreadSimulator.EnvironmentCache:
+        return self._environment_cache
+
+    @property
+    def adaptive_time_step(self) -> bool:
+        return self._adaptive_time_step
+
+    @adaptive_time_step.setter
+    def adaptive_time_step(self, value: bool) -> None:
+        self._adaptive_time_step = value
+
+    @property
+    def courant_number(self) -> float:
+        return self._courant_number
+
+    @courant_number.setter
+    def courant_number(self, value: float) -> None:
+        self._courant_number = value
+
+    @property
+    def min_time_step(self) -> float:
+        return self._min_time_step
+
+    @min_time_step.setter
+    def min_time_step(self, value: float) -> None:
+        self._min_time_step = value
+
+    @property
+    def perimeter_resolution(self) -> Union[float, None]:
+        return self._perimeter_resolution
+
+    @perimeter_resolution.setter
+    def perimeter_resolution(self, value: Union[float, None]) -> None:
+        self._perimeter_resolution = value
+
+    @property
+    def workers(self) -> int:
+        return self._workers
+
+    @workers.setter
+    def workers(self, value: int) -> None:
+        self._workers = value
+
+    @property
+    def engine(self) -> SpreadEngine:
+        return self._engine
+
+    @engine.setter
+    def engine(self, value: SpreadEngine) -> None:
+        self._engine = value
+
+    @property
+    def raster_cell_size(self) -> float:
+        return self._raster_cell_size
+
+    @raster_cell_size.setter
+    def raster_cell_size(self, value: float) -> None:
+        self._raster_cell_size = value
+
+    @property
+    def grid_engine(self) -> Union[MinimumTravelTime, LevelSet, None]:
+        return self._grid_engine
+
+    @property
+    def wind_field(self) -> Union[WindField, None]:
+        return self._wind_field
+
+    @wind_field.setter
+    def wind_field(self, value: Union[WindField, None]) -> None:
+        self._wind_field = value
+
+    @property
+    def terrain(self) -> Union[TerrainLookup, None]:
+        return self._terrain
+
+    @terrain.setter
+    def terrain(self, value: Union[TerrainLookup, None]) -> None:
+        self._terrain = value
+
+    @property
+    def fuel_moisture(self) -> Union[FuelMoistureField, None]:
+        return self._fuel_moisture
+
+    @fuel_moisture.setter
+    def fuel_moisture(self, value: Union[FuelMoistureField, None]) -> None:
+        self._fuel_moisture = value
+
+    @property
+    def step_statistics(self) -> SpreadSimulator.StepStatistics:
+        return self._step_statistics
+
+    @property
+    def current_date(self) -> Union[datetime.datetime, None]:
+        return self._t_now
+
+    @property
+    def front_store(self) -> FrontStore:
+        return self._front_store
+
+    @property
+    def perimeter_sink(self) -> Union[Callable[[datetime.datetime, List[QgsGeometry]], None], None]:
+        return self._perimeter_sink
+
+    @perimeter_sink.setter
+    def perimeter_sink(self, sink: Union[Callable[[datetime.datetime, List[QgsGeometry]], None], None]) -> None:
+        self._perimeter_sink = sink
+
     def reset_simulation(self):
         """
         Initialize the internal variables to perform a simulation. It clears the perimeter layer in case it has any data
         and the internal time counter to the starting time
         """
+        # Index the fuel layer once per simulation, before changing any state in case it fails
+        if self._fuel_layer is None:
+            self._fuel_lookup = None
+        elif isinstance(self._fuel_layer, QgsRasterLayer):
+            self._fuel_lookup = RasterFuelLookup(self._fuel_layer.source())
+        else:
+            self._fuel_lookup = VectorFuelLookup(self._fuel_layer, self._fuel_field)
+        if self._fuel_lookup is not None:
+            self._fuel_lookup_indices = numpy.array([self.__fuel_index(fuel_model)
+                                                     for fuel_model in self._fuel_lookup.fuel_models],
+                                                    dtype=numpy.int32)
+        # The workers get the fuel data of this simulation
+        self.close()
+        if self._workers > 1 and self._engine == SpreadEngine.VECTOR:
+            self._parallel_propagator = ParallelPropagator(SpreadSimulator.from_propagation_state,
+                                                           self.propagation_state(), self._workers)
         # Initialize simulation time
         self._t_now = self._start_date
+        # Build the ignition queue once
+        self._ignition_queue = IgnitionQueue(self.read_ignition_points())
+        self._front_store.clear()
+        self._step_statistics.clear()
+        self._grid_engine = self.__new_grid_engine()
         # Clean the perimeter layer
         with edit(self._perimeter_layer):
             feature_ids = [feature.id() for feature in self._perimeter_layer.getFeatures()]
             self._perimeter_layer.deleteFeatures(feature_ids)
 
-    def __ellipse(self, point: Point) -> Union[List[Point], None]:
+    def read_ignition_points(self) -> List[SpreadSimulator.IgnitionPoint]:
         """
-        TODO
-        :param point:
+        Reads the ignition points of the ignition layer. Ignition date strings are parsed only here and ignitions prior
+        to the starting date of the simulation are discarded
+
+        :return: The ignition points
+        :rtype: List[SpreadSimulator.IgnitionPoint]
+        """
+        ignition_points: List[SpreadSimulator.IgnitionPoint] = list()
+        for feature in self._ignition_layer.getFeatures():
+            ignition_date: datetime.datetime = parser.parse(feature['datetime'])
+            if ignition_date >= self._start_date:
+                point: QgsPointXY = feature.geometry().asPoint()
+                ignition_points.append(SpreadSimulator.IgnitionPoint(feature=feature, x=point.x(), y=point.y(),
+                                                                     ignition_date=ignition_date))
+        return ignition_points
+
+    def close(self) -> None:
+        """
+        Stops the worker processes of the simulation, if any. They are started again when the simulation is reset
+        """
+        if self._parallel_propagator is not None:
+            self._parallel_propagator.shutdown()
+            self._parallel_propagator = None
+
+    def propagation_state(self) -> Dict[str, Any]:
+        """
+        Picklable state needed to propagate the fronts of this simulation in another process: the time stepping
+        parameters, the environment, the fuel model table and the fuel lookup
+
+        :return: The state
+        :rtype: Dict[str, Any]
+        """
+        return {
+            'time_step': self._time_step,
+            'initial_sampling': self._initial_sampling,
+            'starting_time': self._start_date,
+            'adaptive_time_step': self._adaptive_time_step,
+            'courant_number': self._courant_number,
+            'min_time_step': self._min_time_step,
+            'perimeter_resolution': self._perimeter_resolution,
+            'engine': self._engine,
+            'raster_cell_size': self._raster_cell_size,
+            'environment': (self.default_moisture, self.default_wind, self.default_slope),
+            'wind_field': self._wind_field,
+            'terrain': self._terrain,
+            'fuel_moisture': self._fuel_moisture,
+            'fuel_models': self._fuel_table.fuel_models,
+            'fuel_lookup': self._fuel_lookup,
+            'fuel_lookup_indices': self._fuel_lookup_indices
+        }
+
+    @staticmethod
+    def from_propagation_state(state: Dict[str, Any]) -> SpreadSimulator:
+        """
+        Creates a simulator without layers that propagates fronts like the simulator of the state (see
+        propagation_state and propagate_batch)
+
+        :param state: State of a simulator
+        :type state: Dict[str, Any]
+        :return: The new simulator
+        :rtype: SpreadSimulator
+        """
+        simulator: SpreadSimulator = SpreadSimulator(time_step=state['time_step'],
+                                                     initial_sampling=state['initial_sampling'],
+                                                     starting_time=state['starting_time'],
+                                                     adaptive_time_step=state['adaptive_time_step'],
+                                                     courant_number=state['courant_number'],
+                                                     min_time_step=state['min_time_step'],
+                                                     perimeter_resolution=state['perimeter_resolution'],
+                                                     engine=state['engine'],
+                                                     raster_cell_size=state['raster_cell_size'])
+        (simulator.default_moisture, simulator.default_wind, simulator.default_slope) = state['environment']
+        simulator._wind_field = state['wind_field']
+        simulator._terrain = state['terrain']
+        simulator._fuel_moisture = state['fuel_moisture']
+        # The first model is a copy of the non burnable model, the table always adds the original one
+        simulator._fuel_table = FuelModelTable(state['fuel_models'][1:])
+        simulator._fuel_lookup = state['fuel_lookup']
+        simulator._fuel_lookup_indices = state['fuel_lookup_indices']
+        return simulator
+
+    def add_ignition_point(self, x: float, y: float, ignition_date: datetime.datetime,
+                           feature: Union[QgsFeature, None] = None) -> None:
+        """
+        Adds an ignition point to a running simulation. Points added before the simulation is reset are read from the
+        ignition layer when it is reset, and points that ignite before the current simulation time are ignored. It must
+        not be called while the simulation steps run in another thread (see SimulationTask)
+
+        :param x: X coordinate of the ignition point
+        :type x: float
+        :param y: Y coordinate of the ignition point
+        :type y: float
+        :param ignition_date: Date when the ignition starts
+        :type ignition_date: datetime.datetime
+        :param feature: Feature of the ignition layer that holds the ignition point
+        :type feature: Union[QgsFeature, None]
+        """
+        if self._ignition_queue is None or ignition_date < self._t_now:
+            return
+        self._ignition_queue.push(SpreadSimulator.IgnitionPoint(feature=feature, x=x, y=y,
+                                                                ignition_date=ignition_date))
+
+    def __ellipse(self, point: Point) -> Union[Perimeter, None]:
+        """
+        Spread ellipse of a point after one time step, sampled with the initial sampling of the simulation and rotated
+        to the heading of the fire. The ellipse of the point is computed in its environment, with the wind, terrain and
+        fuel moisture providers if there are any
+
+        :param point: Point with its fuel model
         :type point: SpreadSimulator.Point
-        :param model:
-        :type model: FuelModel
-        :return:
-        :rtype:
+        :return: The ellipse as a perimeter with the fuel of the point, None if the point does not burn
+        :rtype: Union[Perimeter, None]
         """
-        if point.fuel_model == model_0:
+        if not self.__has_environment_providers():
+            ellipse = self._environment_cache.ellipse(point.fuel_model, self.default_moisture, self.default_wind,
+                                                      self.default_slope)
+        else:
+            ellipses = self._vertex_ellipses(numpy.array([point.x]), numpy.array([point.y]),
+                                             numpy.array([self.__fuel_index(point.fuel_model)], dtype=numpy.int32))
+            ellipse = tuple(float(value[0]) for value in ellipses[0:4]) if ellipses[4][0] else None
+        if ellipse is None:
             return None
-        # TODO: Get moisture, wind and slope from layers instead of defaults
-        # TODO: rotate the wind according to the aspect of the slope
-        (rate, alpha, wind) = RateOfSpread.rothermel(fuel_model=point.fuel_model,
-                                                     moisture=SpreadSimulator.default_moisture,
-                                                     wind=SpreadSimulator.default_wind,
-                                                     slope=SpreadSimulator.default_slope)
-        (a, b, c) = EllipseAlgorithm.alexander(rate / 60, wind)
+        (a, b, c, alpha) = ellipse
 
         dt = self._time_step
         ds = (2 * numpy.pi) / self._initial_sampling
         steps = numpy.arange(0, 2 * numpy.pi, ds)
-        points: List[SpreadSimulator.Point] = [
-            SpreadSimulator.Point(dt * a * math.cos(step), dt * b * math.sin(step) + dt * c) for step in steps]
-        points = [SpreadSimulator.Point(p.x * math.cos(alpha) - p.y * math.sin(alpha),
-                                        p.x * math.sin(alpha) + p.y * math.cos(alpha)) for p in points]
-        points = [SpreadSimulator.Point(p.x + point.x, p.y + point.y) for p in points]
-        # TODO: rotate the ellipse to meet the aspect of the slope
-        return points
+        x = dt * a * numpy.cos(steps)
+        y = dt * b * numpy.sin(steps) + dt * c
+        # The ellipse is rotated to the heading of the fire
+        perimeter = Perimeter(x * math.cos(alpha) - y * math.sin(alpha) + point.x,
+                              x * math.sin(alpha) + y * math.cos(alpha) + point.y)
+        perimeter.fuel[:] = self.__fuel_index(point.fuel_model)
+        return perimeter
 
-    def __ignite_point(self, ignition_point: Point) -> Union[List[Point], None]:
+    def __ignite_point(self, ignition_point: Point) -> Union[Perimeter, None]:
         """
-        TODO
-        :param ignition_point:
-        :type ignition_point:
-        :return:
-        :rtype:
+        Initial perimeter of an ignition point, the spread ellipse of one time step around it. The fuel model of the
+        point must have been read from the fuel layer (see _get_fire_model)
+
+        :param ignition_point: The ignition point with its fuel model
+        :type ignition_point: SpreadSimulator.Point
+        :return: The initial perimeter, None if the point does not burn
+        :rtype: Union[Perimeter, None]
         """
-        # TODO: Get fuel from fuel layer
         return self.__ellipse(ignition_point)
 
+    def __store_perimeters(self, perimeters: List[Perimeter], date: datetime.datetime) -> None:
+        """
+        Cleans the raw perimeters of a simulation step, keeps them as the active fronts to propagate in the next step
+        and sends them to the output of the simulation: the perimeter sink if there is one or the perimeter layer. The
+        rotten loops of the fronts are removed on the arrays (see PolygonAlgorithm.remove_rotten_loops), the geometry
+        cleanup only merges the fronts and fixes the remaining self-intersections. The cleanup is done for each group of
+        perimeters with overlapping bounding boxes, as the rest can not collide
+
+        :param perimeters: Raw perimeters
+        :type perimeters: List[Perimeter]
+        :param date: Date of the perimeters
+        :type date: datetime.datetime
+        """
+        geometries: List[QgsGeometry] = list()
+        # Only the perimeters whose bounding boxes overlap can be merged
+        for group in PolygonAlgorithm.overlapping_groups(numpy.array([perimeter.bounds() for perimeter in perimeters])):
+            geometries.extend(clean_perimeter_geometries(
+                [perimeter_to_geometry(PolygonAlgorithm.remove_rotten_loops(perimeters[index])) for index in group]))
+        # Cleaned perimeters follow the right-hand rule (clockwise exterior rings) but they are propagated with
+        # counterclockwise exterior rings and clockwise interior rings, so all of them spread to the unburned side
+        self._front_store.add(date, [self.__redistribute(perimeter_from_geometry(geometry).reversed())
+                                     for geometry in geometries])
+        if self._perimeter_sink is not None:
+            self._perimeter_sink(date, geometries)
+        else:
+            self.write_perimeters(date, geometries)
+
+    def write_perimeters(self, date: datetime.datetime, geometries: List[QgsGeometry]) -> None:
+        """
+        Writes perimeters to the perimeter layer. It must be called from the thread that owns the layer
+
+        :param date: Date of the perimeters
+        :type date: datetime.datetime
+        :param geometries: Cleaned perimeter polygons
+        :type geometries: List[QgsGeometry]
+        """
+        fields = self._perimeter_layer.fields()
+        features: List[QgsFeature] = list()
+        for geometry in geometries:
+            feature: QgsFeature = QgsFeature()
+            feature.setGeometry(geometry)
+            feature.setFields(fields)
+            feature['datetime'] = date.strftime("%Y-%m-%dT%H:%M:%S%Z")
+            features.append(feature)
+        with edit(self._perimeter_layer):
+            (_, _) = self._perimeter_layer.dataProvider().addFeatures(features)
+
+    def __redistribute(self, perimeter: Perimeter) -> Perimeter:
+        """
+        Adapts the vertices of a front to the perimeter resolution, if there is one, so the cost of propagating it is
+        proportional to its length instead of the vertices inherited from previous steps or merged fronts
+
+        :param perimeter: Front
+        :type perimeter: Perimeter
+        :return: The front with the vertex density of the resolution
+        :rtype: Perimeter
+        """
+        if self._perimeter_resolution is None:
+            return perimeter
+        return perimeter.redistributed(self._perimeter_resolution)
+
+    def __fuel_index(self, fuel_model: FuelModel) -> int:
+        """
+        Returns the fuel id of a fuel model in the fuel model table of the simulation, registering it if it is not in
+        the table yet
+
+        :param fuel_model: Fuel model
+        :type fuel_model: FuelModel
+        :return: The fuel index
+        :rtype: int
+        """
+        return self._fuel_table.register(fuel_model)
+
+    def _propagate_perimeter(self, perimeter: Perimeter, dt: Union[float, None] = None,
+                             ellipses: Union[Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray,
+                                                   numpy.ndarray], None] = None) -> Perimeter:
+        """
+        Propagates a perimeter one time step using the Richards (1990) differential equations integrated with a
+        predictor-corrector scheme. All the vertices are computed at once, also when the perimeter has several rings
+        (see Perimeter). The tangent of the Richards equations is normalized, so the parametrization step ds does not
+        change the result.
+
+        :param perimeter: Perimeter to propagate
+        :type perimeter: Perimeter
+        :param dt: Time step in seconds, defaults to the time step of the simulation
+        :type dt: Union[float, None]
+        :param ellipses: Spread ellipses of the vertices already computed for this sub-step (see _sub_step_ellipses),
+        they are computed if not provided
+        :type ellipses: Union[Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray], None]
+        :return: The propagated perimeter
+        :rtype: Perimeter
+        """
+        n = len(perimeter)
+        ds = (2 * numpy.pi) / n
+        dt = self._time_step if dt is None else dt
+        x = perimeter.x
+        y = perimeter.y
+        # The tangent of each vertex is computed with its neighbours in its own ring
+        (previous, following) = perimeter.neighbours()
+        # The environment of each vertex (and therefore its spread ellipse) is the same in the predictor and the
+        # corrector, so it is computed only once per vertex and step
+        (a, b, c, alpha, burnable) = self._sub_step_ellipses(perimeter) if ellipses is None else ellipses
+        self.__read_ellipses()
+        theta = -alpha
+        # Predictor
+        xs = (x[following] - x[previous]) / (2 * ds)
+        ys = (y[following] - y[previous]) / (2 * ds)
+        (xt, yt) = EllipseAlgorithm.richards(xs, ys, a, b, c, theta)
+        dxij = numpy.where(burnable, dt * xt, 0)
+        dyij = numpy.where(burnable, dt * yt, 0)
+        xijp1_bar = x + dxij
+        yijp1_bar = y + dyij
+        # Corrector
+        self.__read_ellipses()
+        xs = (xijp1_bar[following] - xijp1_bar[previous]) / (2 * ds)
+        ys = (yijp1_bar[following] - yijp1_bar[previous]) / (2 * ds)
+        (xt, yt) = EllipseAlgorithm.richards(xs, ys, a, b, c, theta)
+        # The predicted neighbours of a vertex can collapse into the same point, then there is no tangent to correct
+        # the vertex velocity and the predicted one is used
+        degenerate = (xs == 0) & (ys == 0)
+        if perimeter.ring_count > 1:
+            # An island that burns completely in the predictor turns its ring inside out, the corrector would move it
+            # back, so the predicted ring is kept and the ring is removed as collapsed (see _remove_collapsed_rings)
+            predicted = Perimeter(xijp1_bar, yijp1_bar, perimeter.fuel, perimeter.rings)
+            degenerate |= SpreadSimulator._collapsed_rings(perimeter, predicted)[perimeter.ring_ids()]
+        dxij_bar = numpy.where(degenerate, dxij, dt * xt)
+        dyij_bar = numpy.where(degenerate, dyij, dt * yt)
+        new_x = numpy.where(burnable, x + 0.5 * (dxij + dxij_bar), x)
+        new_y = numpy.where(burnable, y + 0.5 * (dyij + dyij_bar), y)
+        return Perimeter(new_x, new_y, perimeter.fuel.copy(), perimeter.rings)
+
+    def __environment_date(self) -> datetime.datetime:
+        """
+        Date of the environment of the fronts being propagated, the starting date before the first step
+
+        :return: The date
+        :rtype: datetime.datetime
+        """
+        return self._environment_date if self._environment_date is not None else self._start_date
+
+    def _sub_step_ellipses(self, perimeter: Perimeter) \
+            -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        """
+        Spread ellipses of the vertices of a perimeter for a propagation sub-step (see _ellipses). The environment can
+        change between sub-steps, so the cache is cleared and its hits and misses are added to the step statistics
+
+        :param perimeter: Perimeter with the fuel of its vertices
+        :type perimeter: Perimeter
+        :return: The ellipse parameters a, b, c, the heading angle of the fire and whether the vertex burns
+        :rtype: Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]
+        """
+        self._environment_cache.clear()
+        ellipses = self._ellipses(perimeter)
+        self._step_statistics.cache_hits += self._environment_cache.hits
+        self._step_statistics.cache_misses += self._environment_cache.misses
+        return ellipses
+
+    def __read_ellipses(self) -> None:
+        """
+        Records a read of the ellipses of the sub-step by a stage of the propagation, the reads after the first one are
+        cache hits (see EnvironmentCache.read)
+        """
+        self._step_statistics.cache_hits += self._environment_cache.read()
+
+    def _ellipses(self, perimeter: Perimeter) \
+            -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        """
+        Spread ellipses of the vertices of a perimeter in their environment. Without wind field, terrain and fuel
+        moisture all the vertices share the default environment and the ellipses are computed once per fuel model
+
+        :param perimeter: Perimeter with the fuel of its vertices
+        :type perimeter: Perimeter
+        :return: The ellipse parameters a, b, c, the heading angle of the fire and whether the vertex burns
+        :rtype: Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]
+        """
+        if not self.__has_environment_providers():
+            return self._environment_cache.ellipses(self._fuel_table, perimeter.fuel, self.default_moisture,
+                                                    self.default_wind, self.default_slope)
+        ellipses = self._vertex_ellipses(perimeter.x, perimeter.y, perimeter.fuel)
+        # Each vertex has its own environment
+        self._environment_cache.computed(len(perimeter))
+        return ellipses
+
+    def __has_environment_providers(self) -> bool:
+        """
+        Checks if any part of the environment of the vertices is read from a provider instead of the defaults
+
+        :return: True if there is a wind field, a terrain or a fuel moisture field
+        :rtype: bool
+        """
+        return self._wind_field is not None or self._terrain is not None or self._fuel_moisture is not None
+
+    def _vertex_ellipses(self, x: numpy.ndarray, y: numpy.ndarray, fuel: numpy.ndarray) \
+            -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        """
+        Spread ellipses of a set of vertices with their own wind, terrain and fuel moisture, computed for all the
+        vertices at once (see RateOfSpread.rothermel_batch). The wind and the slope are composed in the frame of the
+        upslope direction of each vertex and the heading of the fire is turned back to the frame of the map. The default
+        wind direction is then the direction the wind blows towards, counterclockwise from north as the directions of
+        the wind field
+
+        :param x: X coordinates of the vertices
+        :type x: numpy.ndarray
+        :param y: Y coordinates of the vertices
+        :type y: numpy.ndarray
+        :param fuel: Fuel index of the vertices
+        :type fuel: numpy.ndarray
+        :return: The ellipse parameters a, b, c, the heading angle of the fire and whether the vertex burns
+        :rtype: Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]
+        """
+        if self._wind_field is None:
+            (speed, direction) = self.default_wind
+        else:
+            (speed, direction) = self._wind_field.wind(x, y, self.__environment_date())
+        if self._terrain is None:
+            (slope, upslope) = (self.default_slope, 0.0)
+        else:
+            (slope, upslope) = self._terrain.upslope(x, y)
+        if self._fuel_moisture is None:
+            moisture: numpy.ndarray = numpy.broadcast_to(numpy.concatenate(self.default_moisture), fuel.shape + (5, ))
+        else:
+            moisture = self._fuel_moisture.moisture(x, y, self.__environment_date())
+        (speed, direction, slope, upslope) = numpy.broadcast_arrays(speed, direction, slope, upslope, fuel)[0:4]
+        (rate, alpha, effective_wind) = (numpy.zeros(fuel.shape), numpy.zeros(fuel.shape), numpy.zeros(fuel.shape))
+        burnable: numpy.ndarray = numpy.zeros(fuel.shape, dtype=bool)
+        # Dynamic fuel models burn as their cured static equivalent for the live herbaceous moisture, the models are
+        # cured once per live herbaceous moisture rounded to 1%
+        herbaceous: numpy.ndarray = numpy.round(moisture[:, 3], 2)
+        for value in numpy.unique(herbaceous).tolist():
+            group: numpy.ndarray = numpy.flatnonzero(herbaceous == value)
+            cured_models: FuelModelTable = self._fuel_table.cured(value)
+            (rate[group], alpha[group], effective_wind[group]) = RateOfSpread.rothermel_batch(
+                cured_models, fuel[group], moisture[group], speed[group], direction[group] - upslope[group],
+                slope[group])
+            burnable[group] = cured_models.columns['burnable'][fuel[group]]
+        (a, b, c) = EllipseAlgorithm.alexander_batch(rate / 60, effective_wind)
+        return a, b, c, alpha + upslope, burnable
+
+    def _stable_time_step(self, perimeter: Perimeter,
+                          ellipses: Union[Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray,
+                                                numpy.ndarray], None] = None) -> float:
+        """
+        Largest time step that satisfies the CFL-like stability condition of a perimeter: no vertex travels more than
+        the Courant number times the length of its shortest adjacent segment. The spread rate of a vertex is bounded by
+        the fastest direction of its spread ellipse
+
+        :param perimeter: Perimeter with the fuel of its vertices
+        :type perimeter: Perimeter
+        :param ellipses: Spread ellipses of the vertices already computed for this sub-step (see _sub_step_ellipses),
+        they are computed if not provided
+        :type ellipses: Union[Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray], None]
+        :return: The time step in seconds, infinite if no vertex burns
+        :rtype: float
+        """
+        (a, b, c, _, burnable) = self._sub_step_ellipses(perimeter) if ellipses is None else ellipses
+        self.__read_ellipses()
+        speed: numpy.ndarray = numpy.where(burnable, numpy.maximum(a, b) + numpy.abs(c), 0)
+        if not numpy.any(speed > 0):
+            return math.inf
+        segments: numpy.ndarray = perimeter.segment_lengths()
+        (previous, _) = perimeter.neighbours()
+        spacing: numpy.ndarray = numpy.minimum(segments, segments[previous])
+        moving: numpy.ndarray = speed > 0
+        return self._courant_number * float(numpy.min(spacing[moving] / speed[moving]))
+
     @staticmethod
-    def __create_memory_layer(layer_type: str, name: str) -> QgsVectorLayer:
-        project = QgsProject()
-        project_instance = project.instance()
-        return QgsVectorLayer(layer_type + '?crs=' + project_instance.crs().authid(), name, 'memory')
+    def _is_folded(perimeter: Perimeter, propagated: Perimeter) -> bool:
+        """
+        Checks if a propagated perimeter has any segment that points against the same segment of the original
+        perimeter. A reversed segment is a local loop of the front, which produces self intersections and undefined
+        tangents in the next step
 
-    def _propagate_perimeter(self, perimeter: List[SpreadSimulator.Point]):
-        ds = (2 * numpy.pi) / len(perimeter)
-        dt = self._time_step
-        dxij = list()
-        dyij = list()
-        xijp1_bar = list()
-        yijp1_bar = list()
-        for i in range(0, len(perimeter)):
-            if perimeter[i].fuel_model != model_0:
-                (rate, alpha, wind) = RateOfSpread.rothermel(fuel_model=perimeter[i].fuel_model,
-                                                             moisture=SpreadSimulator.default_moisture,
-                                                             wind=SpreadSimulator.default_wind,
-                                                             slope=SpreadSimulator.default_slope)
-                alpha = -alpha
-                (a, b, c) = EllipseAlgorithm.alexander(rate / 60, wind)
-                xij = perimeter[i].x
-                yij = perimeter[i].y
-                xs = (perimeter[(i+1) % len(perimeter)].x - perimeter[i-1].x) / (2 * ds)
-                ys = (perimeter[(i+1) % len(perimeter)].y - perimeter[i-1].y) / (2 * ds)
-                (xt, yt) = self.__fg(xs, ys, (a, b, c), alpha)
-                dxij.append(dt * xt)
-                dyij.append(dt * yt)
-                xijp1_bar.append(xij + dt * xt)
-                yijp1_bar.append(yij + dt * yt)
-            else:
-                dxij.append(0)
-                dyij.append(0)
-                xijp1_bar.append(perimeter[i].x)
-                yijp1_bar.append(perimeter[i].y)
-        dxij_bar = list()
-        dyij_bar = list()
-        new_perimeter: List[SpreadSimulator.Point] = list()
-        for i in range(0, len(perimeter)):
-            if perimeter[i].fuel_model != model_0:
-                (rate, alpha, wind) = RateOfSpread.rothermel(fuel_model=perimeter[i].fuel_model,
-                                                             moisture=SpreadSimulator.default_moisture,
-                                                             wind=SpreadSimulator.default_wind,
-                                                             slope=SpreadSimulator.default_slope)
-                alpha = -alpha
-                (a, b, c) = EllipseAlgorithm.alexander(rate / 60, wind)
-                xij = perimeter[i].x
-                yij = perimeter[i].y
-                xs = (xijp1_bar[(i+1) % len(perimeter)] - xijp1_bar[i-1]) / (2 * ds)
-                ys = (yijp1_bar[(i+1) % len(perimeter)] - yijp1_bar[i-1]) / (2 * ds)
-                if xs != 0 or ys != 0:
-                    (xt, yt) = SpreadSimulator.__fg(xs, ys, (a, b, c), alpha)
-                    dxij_bar.append(dt * xt)
-                    dyij_bar.append(dt * yt)
-                    xijp1 = xij + 0.5 * (dxij[i] + dt * xt)
-                    yijp1 = yij + 0.5 * (dyij[i] + dt * yt)
-                    new_perimeter.append(SpreadSimulator.Point(x=xijp1, y=yijp1))
-                else:
-                    print("ERROR")
-            else:
-                dxij_bar.append(0)
-                dyij_bar.append(0)
-                new_perimeter.append(SpreadSimulator.Point(x=perimeter[i].x, y=perimeter[i].y))
-        return new_perimeter
+        :param perimeter: Perimeter before the propagation
+        :type perimeter: Perimeter
+        :param propagated: Perimeter after the propagation, with the same vertices
+        :type propagated: Perimeter
+        :return: True if the propagated perimeter is folded
+        :rtype: bool
+        """
+        return bool(numpy.any(SpreadSimulator._reversed_segments(perimeter, propagated)))
+
+    @staticmethod
+    def _reversed_segments(perimeter: Perimeter, propagated: Perimeter) -> numpy.ndarray:
+        """
+        Segments of a propagated perimeter that point against the same segment of the original perimeter
+
+        :param perimeter: Perimeter before the propagation
+        :type perimeter: Perimeter
+        :param propagated: Perimeter after the propagation, with the same vertices
+        :type propagated: Perimeter
+        :return: True for each reversed segment
+        :rtype: numpy.ndarray
+        """
+        (_, following) = perimeter.neighbours()
+        dot: numpy.ndarray = (perimeter.x[following] - perimeter.x) * (propagated.x[following] - propagated.x) + \
+            (perimeter.y[following] - perimeter.y) * (propagated.y[following] - propagated.y)
+        return dot < 0
+
+    @staticmethod
+    def _collapsed_rings(perimeter: Perimeter, propagated: Perimeter) -> numpy.ndarray:
+        """
+        Interior rings that have collapsed in a propagation. Interior rings are clockwise and shrink as the fire burns
+        the island, when the island is burned the ring turns inside out: it becomes counterclockwise or, if it turns
+        through its center keeping the orientation, most of its segments are reversed
+
+        :param perimeter: Perimeter before the propagation
+        :type perimeter: Perimeter
+        :param propagated: Perimeter after the propagation, with the same vertices
+        :type propagated: Perimeter
+        :return: True for each collapsed ring
+        :rtype: numpy.ndarray
+        """
+        reversed_segments: numpy.ndarray = numpy.bincount(
+            perimeter.ring_ids(), weights=SpreadSimulator._reversed_segments(perimeter, propagated),
+            minlength=perimeter.ring_count)
+        return (perimeter.ring_areas() < 0) & \
+            ((propagated.ring_areas() >= 0) | (reversed_segments > perimeter.ring_sizes() / 2))
 
     @staticmethod
-    def __fg(xs: float, ys: float, ellipse: Tuple[float, float, float], theta: float) -> Tuple[float, float]:
-        """
-        TODO:
-
-        :param xs:
-        :type xs:
-        :param ys:
-        :type ys:
-        :param ellipse:
-        :type ellipse:
-        :param theta:
-        :type theta:
-        :return:
-        :rtype:
-        """
-        (a, b, c) = ellipse
-        part1 = (a ** 2) * (math.cos(theta)) * (xs * math.sin(theta) + ys * math.cos(theta))
-        part2 = (b ** 2) * (math.sin(theta)) * (xs * math.cos(theta) - ys * math.sin(theta))
-        part3 = (b ** 2) * ((xs * math.cos(theta) - ys * math.sin(theta)) ** 2)
-        part4 = (a ** 2) * ((xs * math.sin(theta) + ys * math.cos(theta)) ** 2)
-        part5 = c * math.sin(theta)
-        part6 = math.sqrt(part3 + part4)
-        xt = ((part1 - part2) / part6) + part5
-        part1 = (a ** 2) * (math.sin(theta)) * (xs * math.sin(theta) + ys * math.cos(theta))
-        part2 = (b ** 2) * (math.cos(theta)) * (xs * math.cos(theta) - ys * math.sin(theta))
-        part5 = c * math.cos(theta)
-        yt = ((-part1 - part2) / part6) + part5
-        return xt, yt
+    def _remove_collapsed_rings(perimeter: Perimeter, propagated: Perimeter) -> Perimeter:
+        """
+        Removes the interior rings that have collapsed in a propagation (see _collapsed_rings)
+
+        :param perimeter: Perimeter before the propagation
+        :type perimeter: Perimeter
+        :param propagated: Perimeter after the propagation, with the same vertices
+        :type propagated: Perimeter
+        :return: The propagated perimeter without the collapsed rings
+        :rtype: Perimeter
+        """
+        if propagated.ring_count == 1:
+            return propagated
+        collapsed: numpy.ndarray = SpreadSimulator._collapsed_rings(perimeter, propagated)
+        if not collapsed.any():
+            return propagated
+        return propagated.select_rings(~collapsed)
+
+    def _propagate_perimeter_adaptive(self, perimeter: Perimeter, interval: float) -> Perimeter:
+        """
+        Propagates a perimeter a time interval with adaptive sub-steps. Each sub-step is the stable time step of the
+        perimeter (see _stable_time_step), so slow fronts advance the whole interval at once and fast fronts take as
+        many sub-steps as needed. A sub-step that folds the front is rejected and repeated with half the time step,
+        down to the minimum time step. The fuel of the vertices is updated before each sub-step and the interior rings
+        that collapse are removed after it
+
+        :param perimeter: Perimeter to propagate
+        :type perimeter: Perimeter
+        :param interval: Time to propagate in seconds
+        :type interval: float
+        :return: The propagated perimeter
+        :rtype: Perimeter
+        """
+        elapsed: float = 0.0
+        start: Union[datetime.datetime, None] = self._environment_date
+        while elapsed < interval:
+            if start is not None:
+                self._environment_date = start + datetime.timedelta(seconds=elapsed)
+            perimeter.fuel = self._get_fire_models(perimeter.x, perimeter.y)
+            # The ellipses of the sub-step are computed once for the stable time step and all the propagation tries
+            ellipses = self._sub_step_ellipses(perimeter)
+            dt: float = min(interval - elapsed, max(self._min_time_step, self._stable_time_step(perimeter, ellipses)))
+            propagated: Perimeter = self._propagate_perimeter(perimeter, dt, ellipses)
+            while dt > self._min_time_step and SpreadSimulator._is_folded(perimeter, propagated):
+                self._step_statistics.rejected_steps += 1
+                dt = max(self._min_time_step, dt / 2)
+                propagated = self._propagate_perimeter(perimeter, dt, ellipses)
+            self._step_statistics.sub_steps += 1
+            elapsed += dt
+            # The spacing of a growing front increases in each sub-step
+            perimeter = self.__redistribute(SpreadSimulator._remove_collapsed_rings(perimeter, propagated))
+        return perimeter
+
+    def _propagate_fronts(self, fronts: List[Perimeter]) -> List[Perimeter]:
+        """
+        Propagates the active fronts one time step. All the rings of all the fronts, exterior and interior ones, are
+        joined in a single perimeter and propagated at once, the interior rings spread into their islands and are
+        removed when the islands are completely burned. With several workers the fronts are split in one batch per
+        worker process (see ParallelPropagator)
+
+        :param fronts: Fronts to propagate, each one the exterior ring of a fire followed by its interior rings
+        :type fronts: List[Perimeter]
+        :return: The propagated fronts
+        :rtype: List[Perimeter]
+        """
+        if len(fronts) == 0:
+            return list()
+        if self._parallel_propagator is not None and len(fronts) > 1:
+            (propagated, sub_steps, rejected_steps, cache_hits, cache_misses) = \
+                self._parallel_propagator.propagate(fronts, self._environment_date)
+            self._step_statistics.sub_steps += sub_steps
+            self._step_statistics.rejected_steps += rejected_steps
+            self._step_statistics.cache_hits += cache_hits
+            self._step_statistics.cache_misses += cache_misses
+            return propagated
+        # Exterior rings are the only counterclockwise ones
+        return self.propagate_batch(Perimeter.concatenate(fronts)).polygons()
+
+    def propagate_batch(self, perimeter: Perimeter, date: Union[datetime.datetime, None] = None) -> Perimeter:
+        """
+        Propagates all the rings of a perimeter one time step, with fixed or adaptive time stepping, and removes the
+        interior rings that collapse. The fuel of the vertices is read from the fuel layer
+
+        :param perimeter: Rings of the fronts to propagate
+        :type perimeter: Perimeter
+        :param date: Date of the start of the time step, defaults to the date of the current step
+        :type date: Union[datetime.datetime, None]
+        :return: The propagated rings
+        :rtype: Perimeter
+        """
+        if date is not None:
+            self._environment_date = date
+        if self._adaptive_time_step:
+            return self._propagate_perimeter_adaptive(perimeter, self._time_step)
+        perimeter.fuel = self._get_fire_models(perimeter.x, perimeter.y)
+        self._step_statistics.sub_steps += 1
+        return SpreadSimulator._remove_collapsed_rings(perimeter, self._propagate_perimeter(perimeter))
+
+    def _get_fire_models(self, x: numpy.ndarray, y: numpy.ndarray) -> numpy.ndarray:
+        """
+        Fuel of a set of points, i.e. all the vertices of a perimeter, in a single query to the fuel lookup. Without
+        fuel layer the whole area is covered by the fuel model 1
+
+        :param x: X coordinates of the points
+        :type x: numpy.ndarray
+        :param y: Y coordinates of the points
+        :type y: numpy.ndarray
+        :return: The fuel index of each point
+        :rtype: numpy.ndarray
+        """
+        if self._fuel_lookup is None:
+            return numpy.full(numpy.shape(x), self.__fuel_index(models.model_1), dtype=numpy.int32)
+        return self._fuel_lookup_indices[self._fuel_lookup.lookup(x, y)]
 
     def _get_fire_model(self, x: float, y: float) -> FuelModel:
         """
-        TODO:
-        :param x:
-        :type x:
-        :param y:
-        :type y:
-        :return:
-        :rtype:
+        Fuel model of a single point
+
+        :param x: X coordinate of the point
+        :type x: float
+        :param y: Y coordinate of the point
+        :type y: float
+        :return: The fuel model at the point
+        :rtype: FuelModel
         """
-        # TODO: Get the land cover element ...
-        return model_1
+        return self._fuel_table[int(self._get_fire_models(numpy.array([x]), numpy.array([y]))[0])]
 
     def simulation_step(self):
-        # TODO: Remove print
-        print("Step start", self._t_now)
+        """
+        Advances the simulation one time step: ignites the ignition points of the time step, propagates the active
+        fronts and writes the resulting perimeters to the perimeter layer. With adaptive time stepping the fronts are
+        propagated with as many sub-steps as needed, but the perimeters are still reported once per time step. With the
+        grid engines the grid is advanced to the end of the step and its isochrone is reported instead
+        """
         future_time: datetime.datetime = self._t_now + datetime.timedelta(seconds=self._time_step)
-        # Create the ignition points list and sort it by ignition date
-        ignition_points: List[SpreadSimulator.IgnitionPoint]
-        ignition_points = [SpreadSimulator.IgnitionPoint(feature=feature, x=feature.geometry().asPoint().x(),
-                                                         y=feature.geometry().asPoint().y(),
-                                                         ignition_date=parser.parse(feature.attributes()[1])) for feature
-                           in self._ignition_layer.getFeatures()]
-        print(self._ignition_layer, ignition_points[0].ignition_date)
-        ignition_points.sort()
-        # Delete ignition points that ignited prior to the starting date of the simulation
-        while (len(ignition_points) > 0) and (ignition_points[0].ignition_date < self._t_now):
-            print("delete", ignition_points[0].ignition_date)
-            ignition_points.pop(0)
-        ignition_points = [point for point in ignition_points if self._t_now <= point.ignition_date < future_time]
-        if len(ignition_points) > 0:
-            # Compute the perimeter of the ignition point if it has to burn
-            ignition_perimeters: List[List[SpreadSimulator.Point]] = list()
-            for ignition_point in ignition_points:
-                print(ignition_point.ignition_date)
+        self._environment_date = self._t_now
+        # Get the ignition points that ignite during this step and compute their perimeters if they have to burn
+        ignition_points: List[SpreadSimulator.IgnitionPoint] = self._ignition_queue.pop_until(future_time)
+        if self._grid_engine is not None:
+            self.__grid_engine_step(ignition_points, future_time)
+            self._t_now = future_time
+            return
+        raw_perimeters: List[Perimeter] = list()
+        for ignition_point in ignition_points:
+            ignition_point.fuel_model = self._get_fire_model(ignition_point.x, ignition_point.y)
+            perimeter = self.__ignite_point(ignition_point)
+            if perimeter is not None:
+                raw_perimeters.append(perimeter)
+        # Propagate the active fronts
+        start: float = time.perf_counter()
+        raw_perimeters.extend(self._propagate_fronts(self._front_store.pop(self._t_now)))
+        self._step_statistics.elapsed += time.perf_counter() - start
+        self._step_statistics.steps += 1
+        if len(raw_perimeters) > 0:
+            self.__store_perimeters(raw_perimeters, future_time)
+        # Update time
+        self._t_now = future_time
+
+    def __grid_engine_step(self, ignition_points: List[SpreadSimulator.IgnitionPoint],
+                           future_time: datetime.datetime) -> None:
+        """
+        Simulation step of the grid engines: ignites the ignition points of the step, advances the grid to the end of
+        the step and sends the isochrone to the output of the simulation. The isochrones are contours of the grid, they
+        do not intersect each other and need no cleanup
+
+        :param ignition_points: Ignition points that ignite during the step
+        :type ignition_points: List[SpreadSimulator.IgnitionPoint]
+        :param future_time: Date of the end of the step
+        :type future_time: datetime.datetime
+        """
+        start: float = time.perf_counter()
+        self.__advance_grid_engine(self._grid_engine, ignition_points, future_time)
+        perimeters: List[Perimeter] = self._grid_engine.isochrones(self.__seconds(future_time))
+        self._step_statistics.elapsed += time.perf_counter() - start
+        self._step_statistics.steps += 1
+        if len(perimeters) == 0:
+            return
+        # The output follows the right-hand rule (clockwise exterior rings) as the cleaned perimeters
+        geometries: List[QgsGeometry] = [perimeter_to_geometry(perimeter.reversed()) for perimeter in perimeters]
+        if self._perimeter_sink is not None:
+            self._perimeter_sink(future_time, geometries)
+        else:
+            self.write_perimeters(future_time, geometries)
+
+    def __advance_grid_engine(self, grid_engine: Union[MinimumTravelTime, LevelSet],
+                              ignition_points: List[SpreadSimulator.IgnitionPoint],
+                              future_time: datetime.datetime) -> None:
+        """
+        Ignites a set of ignition points in the grid of a grid engine and advances it to a date. The wind and the fuel
+        moisture change with time, so with their providers the spread rates of the cells that burn in the step are
+        computed again at the date of the step
+
+        :param grid_engine: Grid of the engine
+        :type grid_engine: Union[MinimumTravelTime, LevelSet]
+        :param ignition_points: Ignition points
+        :type ignition_points: List[SpreadSimulator.IgnitionPoint]
+        :param future_time: Date to advance the arrival times to
+        :type future_time: datetime.datetime
+        """
+        if self._wind_field is not None or self._fuel_moisture is not None:
+            grid_engine.clear_rates()
+        for ignition_point in ignition_points:
+            grid_engine.ignite(ignition_point.x, ignition_point.y, self.__seconds(ignition_point.ignition_date))
+        grid_engine.advance(self.__seconds(future_time))
+
+    def __new_grid_engine(self) -> Union[MinimumTravelTime, LevelSet, None]:
+        """
+        Empty grid of the raster or level set engine, aligned to the origin of the CRS of the layers. The spread
+        ellipses of its cells are the ones of the vertices of the vector engine at the cell centres
+
+        :return: The grid, None with the vector engine
+        :rtype: Union[MinimumTravelTime, LevelSet, None]
+        """
+        ellipses: Callable[[numpy.ndarray, numpy.ndarray], Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray,
+                                                                 numpy.ndarray, numpy.ndarray]] = \
+            lambda x, y: self._ellipses(Perimeter(x, y, self._get_fire_models(x, y)))
+        if self._engine == SpreadEngine.RASTER:
+            return MinimumTravelTime(ellipses, 0.0, 0.0, self._raster_cell_size)
+        if self._engine == SpreadEngine.LEVEL_SET:
+            return LevelSet(ellipses, 0.0, 0.0, self._raster_cell_size)
+        return None
+
+    def __seconds(self, date: datetime.datetime) -> float:
+        """
+        Time of a date in the arrival time grid, the seconds since the starting date of the simulation
+
+        :param date: The date
+        :type date: datetime.datetime
+        :return: The time in seconds
+        :rtype: float
+        """
+        return (date - self._start_date).total_seconds()
+
+    def simulate_fronts(self, ignition_points: List[SpreadSimulator.IgnitionPoint],
+                        end_date: datetime.datetime) -> List[Perimeter]:
+        """
+        Runs a simulation without layers from the starting date until a date and returns its last fronts, i.e. a member
+        of an ensemble in a worker process. The steps are the ones of simulation_step, but the fronts of different fires
+        are not merged: only their rotten loops are removed, so they can overlap and the burned area is their union.
+        With the grid engines the fronts are the isochrone of the end of the last step
+
+        :param ignition_points: Ignition points of the simulation
+        :type ignition_points: List[SpreadSimulator.IgnitionPoint]
+        :param end_date: Date to stop the simulation, the last time step can end after it
+        :type end_date: datetime.datetime
+        :return: The fronts at the end of the simulation
+        :rtype: List[Perimeter]
+        """
+        ignition_queue: IgnitionQueue = IgnitionQueue([point for point in ignition_points
+                                                       if point.ignition_date >= self._start_date])
+        fronts: List[Perimeter] = list()
+        grid_engine: Union[MinimumTravelTime, LevelSet, None] = self.__new_grid_engine()
+        t_now: datetime.datetime = self._start_date
+        while t_now < end_date:
+            future_time: datetime.datetime = t_now + datetime.timedelta(seconds=self._time_step)
+            self._environment_date = t_now
+            if grid_engine is not None:
+                self.__advance_grid_engine(grid_engine, ignition_queue.pop_until(future_time), future_time)
+                self._step_statistics.steps += 1
+                t_now = future_time
+                continue
+            raw_perimeters: List[Perimeter] = list()
+            for ignition_point in ignition_queue.pop_until(future_time):
                 ignition_point.fuel_model = self._get_fire_model(ignition_point.x, ignition_point.y)
                 perimeter = self.__ignite_point(ignition_point)
                 if perimeter is not None:
-                    ignition_perimeters.append(perimeter)
-            # Move perimeters to a QGIS layer
-            fields = self._perimeter_layer.fields()
-            raw_perimeters_layer: QgsVectorLayer = SpreadSimulator.__create_memory_layer('Polygon', 'raw_perimeters')
-            for perimeter in ignition_perimeters:
-                qgis_points: List[QgsPointXY] = [QgsPointXY(point.x, point.y) for point in perimeter]
-                qgis_feature: QgsFeature = QgsFeature()
-                qgis_geometry: QgsGeometry = QgsGeometry.fromPolygonXY([qgis_points]) # NOQA
-                qgis_feature.setGeometry(qgis_geometry)
-                qgis_data_provider: QgsVectorLayer = raw_perimeters_layer.dataProvider()
-                qgis_data_provider.addFeature(qgis_feature) # NOQA
-            # Fix geometries
-            params = {'INPUT': raw_perimeters_layer, 'OUTPUT': 'memory:'}
-            feedback = QgsProcessingFeedback()
-            result = processing.run('native:fixgeometries', params, feedback=feedback, is_child_algorithm=False)
-            fixed_layer = result['OUTPUT']
-            print(result)
-            params = {'INPUT': fixed_layer, 'OUTPUT': 'memory:', 'FIELD': None}
-            feedback = QgsProcessingFeedback()
-            result = processing.run('native:dissolve', params, feedback=feedback, is_child_algorithm=False)
-            dissolved_layer = result['OUTPUT']
-            print(result)
-            params = {'INPUT': dissolved_layer, 'OUTPUT': 'memory:'}
-            feedback = QgsProcessingFeedback()
-            result = processing.run('native:multiparttosingleparts', params, feedback=feedback, is_child_algorithm=False)
-            single_part_layer = result['OUTPUT']
-            params = {'INPUT': single_part_layer, 'OUTPUT': 'memory:'}
-            feedback = QgsProcessingFeedback()
-            result = processing.run('native:forcerhr', params, feedback=feedback, is_child_algorithm=False)
-            del fixed_layer
-            del dissolved_layer
-            del single_part_layer
-            with edit(self._perimeter_layer):
-                features = list()
-                for feature in result['OUTPUT'].getFeatures():
-                    feat = QgsFeature()
-                    feat.setGeometry(QgsGeometry.fromPolygonXY(feature.geometry().asPolygon()))
-                    feat.setFields(fields)
-                    feat['datetime'] = future_time.strftime("%Y-%m-%dT%H:%M:%S%Z")
-                    features.append(feat)
-                (_, _) = self._perimeter_layer.dataProvider().addFeatures(features)
-            del result['OUTPUT']
-            del raw_perimeters_layer
-
-        # Calculate the propagation perimeters
-        propagation_perimeters: List[List[Any]] = list()
-        # Filter the perimeters needed to propagate and convert to simple points
-        features_of_perimeters_to_propagate = [feature for feature in self._perimeter_layer.getFeatures() if parser.parse(feature.attributes()[1]) == self._t_now]
-        for feature in features_of_perimeters_to_propagate:
-            # Get the geometries, if a polygon is a list its points define the polygon, if it is a list of lists the
-            # first defines the polygon and the other lists the islands. The islands can have polygons inside and so on.
-            # So a recursive function is implemented
-            propagation_perimeter: List[Any] = list()
-            geometry = feature.geometry().asPolygon()
-            points: List[SpreadSimulator.Point] = [SpreadSimulator.Point(x=point.x(), y=point.y()) for point in geometry[0]]
-            for point in points:
-                point.fuel_model = self._get_fire_model(point.x, point.y)
-            propagation_perimeter.append(points)
-            if len(geometry) > 1: # Has islands
-                # TODO: Recursion
-                pass
-            propagation_perimeters.append(propagation_perimeter)
-        if len(propagation_perimeters) > 0:
-            # Propagate the perimeters as points
-            propagated_perimeters: List[List[Any]] = list()
-            for perimeter in propagation_perimeters:
-                propagated_perimeter: List[Any] = list()
-                new_perimeter = self._propagate_perimeter(perimeter[0][-2::-1])
-                propagated_perimeter.append(new_perimeter)
-                if len(perimeter) > 1: # Has islands
-                    # TODO: Recursion
-                    pass
-                propagated_perimeters.append(propagated_perimeter)
-            # Move perimeters to a QGIS layer
-            fields = self._perimeter_layer.fields()
-            raw_perimeters_layer: QgsVectorLayer = SpreadSimulator.__create_memory_layer('Polygon', 'raw_perimeters')
-            for perimeter in propagated_perimeters:
-                qgis_perimeter: List[List[Any]] = list()
-                qgis_points: List[QgsPointXY] = [QgsPointXY(point.x, point.y) for point in perimeter[0]]
-                qgis_feature: QgsFeature = QgsFeature()
-                qgis_perimeter.append(qgis_points)
-                if len(perimeter) > 1:
-                    # TODO: Recursion
-                    pass
-                qgis_geometry: QgsGeometry = QgsGeometry.fromPolygonXY(qgis_perimeter) # NOQA
-                qgis_feature.setGeometry(qgis_geometry)
-                qgis_data_provider: QgsVectorLayer = raw_perimeters_layer.dataProvider()
-                qgis_data_provider.addFeature(qgis_feature) # NOQA
-            # Fix geometries
-            params = {'INPUT': raw_perimeters_layer, 'OUTPUT': 'memory:'}
-            feedback = QgsProcessingFeedback()
-            result = processing.run('native:fixgeometries', params, feedback=feedback, is_child_algorithm=False)
-            fixed_layer = result['OUTPUT']
-            print(result)
-            params = {'INPUT': fixed_layer, 'OUTPUT': 'memory:', 'FIELD': None}
-            feedback = QgsProcessingFeedback()
-            result = processing.run('native:dissolve', params, feedback=feedback, is_child_algorithm=False)
-            dissolved_layer = result['OUTPUT']
-            print(result)
-            params = {'INPUT': dissolved_layer, 'OUTPUT': 'memory:'}
-            feedback = QgsProcessingFeedback()
-            result = processing.run('native:multiparttosingleparts', params, feedback=feedback, is_child_algorithm=False)
-            single_part_layer = result['OUTPUT']
-            params = {'INPUT': single_part_layer, 'OUTPUT': 'memory:'}
-            feedback = QgsProcessingFeedback()
-            result = processing.run('native:forcerhr', params, feedback=feedback, is_child_algorithm=False)
-            del fixed_layer
-            del dissolved_layer
-            del single_part_layer
-            with edit(self._perimeter_layer):
-                features = list()
-                for feature in result['OUTPUT'].getFeatures():
-                    feat = QgsFeature()
-                    feat.setGeometry(QgsGeometry.fromPolygonXY(feature.geometry().asPolygon()))
-                    feat.setFields(fields)
-                    feat['datetime'] = future_time.strftime("%Y-%m-%dT%H:%M:%S%Z")
-                    features.append(feat)
-                (_, _) = self._perimeter_layer.dataProvider().addFeatures(features)
-            del result['OUTPUT']
-            del raw_perimeters_layer
+                    raw_perimeters.append(perimeter)
+            raw_perimeters.extend(self._propagate_fronts(fronts))
+            self._step_statistics.steps += 1
+            fronts = [self.__redistribute(PolygonAlgorithm.remove_rotten_loops(perimeter))
+                      for perimeter in raw_perimeters]
+            t_now = future_time
+        if grid_engine is not None:
+            return grid_engine.isochrones(self.__seconds(t_now))
+        return fronts
 
-        # Update time
-        self._t_now = future_time
-        # TODO: Remove print
-        print(self._t_now.strftime("%Y-%m-%dT%H:%M:%S%Z"))
+    def run(self, n_steps: int) -> None:
+        """
+        Runs a number of simulation steps without any user interaction. The simulation is reset if it has not been
+        started
+
+        :param n_steps: Number of time steps to simulate
+        :type n_steps: int
+        """
+        if self._t_now is None:
+            self.reset_simulation()
+        for _ in range(n_steps):
+            self.simulation_step()
 
+    def run_until(self, end_date: datetime.datetime) -> int:
+        """
+        Runs the simulation without any user interaction until its time reaches a date. The simulation is reset if it
+        has not been started. The last time step can end after the end date as the time step is not changed
+
+        :param end_date: Date to stop the simulation
+        :type end_date: datetime.datetime
+        :return: The number of simulated time steps
+        :rtype: int
+        """
+        if self._t_now is None:
+            self.reset_simulation()
+        n_steps: int = 0
+        while self._t_now < end_date:
+            self.simulation_step()
+            n_steps += 1
+        return n_steps
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Command line entry point to run a full wildfire spread simulation without the QGIS user interface. The simulation
+layers are read either from a QGIS project set up with the plugin or from a GeoPackage.
+
+Usage examples:
+    python -m gisfire_spread_simulation.simulation_cli --project fire.qgz --steps 120 --output perimeters.gpkg
+    python -m gisfire_spread_simulation.simulation_cli --geopackage fire.gpkg --start 2022-07-15T12:00:00
+        --end 2022-07-16T12:00:00 --time-step 60
+    python -m gisfire_spread_simulation.simulation_cli --project fire.qgz --steps 120 --members 200 --workers 8
+        --wind-speed-deviation 1.5 --wind-direction-deviation 20 --probability-output probability.tif
+"""
+
+import argparse
+import datetime
+import math
+import sys
+import time
+from typing import List
+from typing import Union
+
+from dateutil import parser as date_parser
+from qgis.core import QgsApplication
+from qgis.core import QgsProject
+from qgis.core import QgsRasterLayer
+from qgis.core import QgsVectorFileWriter
+from qgis.core import QgsVectorLayer
+
+from gisfire_spread_simulation.data_providers.fuel_moisture import FuelMoistureField
+from gisfire_spread_simulation.data_providers.fuel_moisture import read_weather_stations
+from gisfire_spread_simulation.data_providers.terrain import TerrainLookup
+from gisfire_spread_simulation.simulation_algorithms.ensemble import BurnProbabilityGrid
+from gisfire_spread_simulation.simulation_algorithms.ensemble import EnsembleRunner
+from gisfire_spread_simulation.simulation_algorithms.spread_simulator import SpreadEngine
+from gisfire_spread_simulation.simulation_algorithms.spread_simulator import SpreadSimulator
+
+PLUGIN_NAME = 'gisfire_spread_simulation'
+
+
+def configure_from_project(simulator: SpreadSimulator, project: QgsProject) -> None:
+    """
+    Sets the simulation layers, time step and starting date stored in a QGIS project by the plugin setup dialog
+
+    :param simulator: Simulator to configure
+    :type simulator: SpreadSimulator
+    :param project: QGIS project already read
+    :type project: QgsProject
+    """
+    plugin_version, plugin_version_ok = project.readEntry(PLUGIN_NAME, 'version', '')
+    if not plugin_version_ok or plugin_version == '':
+        raise ValueError('The project has not been set up for GisFIRE spread simulation')
+    ignition_layer_id, _ = project.readEntry(PLUGIN_NAME, 'ignition_layer_id', '')
+    perimeter_layer_id, _ = project.readEntry(PLUGIN_NAME, 'perimeter_layer_id', '')
+    land_cover_layer_id, _ = project.readEntry(PLUGIN_NAME, 'land_cover_layer_id', '')
+    simulator.ignition_layer = project.mapLayer(ignition_layer_id)
+    simulator.perimeter_layer = project.mapLayer(perimeter_layer_id)
+    simulator.fuel_layer = project.mapLayer(land_cover_layer_id)
+    simulation_time_step_str, _ = project.readEntry(PLUGIN_NAME, 'simulation_time_step', '')
+    if simulation_time_step_str != '':
+        simulator.time_step = int(simulation_time_step_str)
+    simulation_start_date_str, _ = project.readEntry(PLUGIN_NAME, 'simulation_start_date', '')
+    if simulation_start_date_str != '':
+        simulator.start_date = datetime.datetime.strptime(simulation_start_date_str, "%Y-%m-%dT%H:%M:%S%Z")
+
+
+def configure_from_geopackage(simulator: SpreadSimulator, path: str, ignition_layer: str, perimeter_layer: str,
+                              fuel_layer: str) -> None:
+    """
+    Sets the simulation layers from the layers of a GeoPackage
+
+    :param simulator: Simulator to configure
+    :type simulator: SpreadSimulator
+    :param path: Path of the GeoPackage
+    :type path: str
+    :param ignition_layer: Name of the ignition points layer
+    :type ignition_layer: str
+    :param perimeter_layer: Name of the perimeters layer, it must have a datetime string field
+    :type perimeter_layer: str
+    :param fuel_layer: Name of the fuel (land cover) layer or raster
+    :type fuel_layer: str
+    """
+    layers: List[QgsVectorLayer] = list()
+    for name in (ignition_layer, perimeter_layer):
+        layer: QgsVectorLayer = QgsVectorLayer('{}|layername={}'.format(path, name), name, 'ogr')
+        if not layer.isValid():
+            raise ValueError('Layer {} not found in {}'.format(name, path))
+        layers.append(layer)
+    simulator.ignition_layer, simulator.perimeter_layer = layers
+    # The fuel can be a polygon layer or a raster table of the GeoPackage
+    fuel: Union[QgsVectorLayer, QgsRasterLayer] = QgsVectorLayer('{}|layername={}'.format(path, fuel_layer),
+                                                                 fuel_layer, 'ogr')
+    if not fuel.isValid():
+        fuel = QgsRasterLayer('GPKG:{}:{}'.format(path, fuel_layer), fuel_layer, 'gdal')
+        if not fuel.isValid():
+            raise ValueError('Layer {} not found in {}'.format(fuel_layer, path))
+    simulator.fuel_layer = fuel
+
+
+def parse_arguments(arguments: List[str]) -> argparse.Namespace:
+    """
+    Parses the command line arguments
+
+    :param arguments: Command line arguments without the program name
+    :type arguments: List[str]
+    :return: The parsed arguments
+    :rtype: argparse.Namespace
+    """
+    argument_parser = argparse.ArgumentParser(description='Runs a GisFIRE wildfire spread simulation')
+    source = argument_parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--project', help='QGIS project set up with the GisFIRE spread simulation plugin')
+    source.add_argument('--geopackage', help='GeoPackage with the ignition, perimeter and fuel layers')
+    argument_parser.add_argument('--ignition-layer', default='ignition',
+                                 help='Name of the ignition layer in the GeoPackage')
+    argument_parser.add_argument('--perimeter-layer', default='perimeter',
+                                 help='Name of the perimeter layer in the GeoPackage')
+    argument_parser.add_argument('--fuel-layer', default='land_cover', help='Name of the fuel layer in the GeoPackage')
+    argument_parser.add_argument('--fuel-raster', help='Raster of fuel model codes used instead of the fuel layer')
+    argument_parser.add_argument('--fuel-field', default='fuel_model',
+                                 help='Field of the fuel layer with the fuel model codes')
+    argument_parser.add_argument('--start', help='Starting date of the simulation (ISO format)')
+    argument_parser.add_argument('--time-step', type=int, help='Simulation time step in seconds')
+    argument_parser.add_argument('--adaptive', action='store_true',
+                                 help='Propagate the fronts with adaptive sub-steps, the time step is the interval '
+                                      'between reported perimeters')
+    argument_parser.add_argument('--courant-number', type=float, default=0.5,
+                                 help='Maximum fraction of the vertex spacing travelled in an adaptive sub-step')
+    argument_parser.add_argument('--resolution', type=float,
+                                 help='Maximum distance between the vertices of the fronts in the units of the layers')
+    argument_parser.add_argument('--engine', choices=['vector', 'raster', 'level_set'], default='vector',
+                                 help='Spread engine: propagation of the vertices of the fronts, minimum travel time '
+                                      'on a grid or level set on a grid')
+    argument_parser.add_argument('--raster-cell-size', type=float, default=30.0,
+                                 help='Cell size of the raster and level set engines in the units of the layers')
+    argument_parser.add_argument('--dem', help='Elevation raster, its slope and aspect drive the spread')
+    argument_parser.add_argument('--dem-memory-map',
+                                 help='File where the slope and aspect of the elevation raster are memory mapped')
+    argument_parser.add_argument('--moisture', nargs=5, metavar='MOISTURE',
+                                 help='Moisture of the 1-h, 10-h and 100-h dead fuel and the live herbaceous and woody '
+                                      'fuel, each as a fraction or a raster path')
+    argument_parser.add_argument('--weather-stations',
+                                 help='CSV file with the hourly temperature and humidity of the weather stations that '
+                                      'condition the 1-h dead fuel moisture')
+    argument_parser.add_argument('--workers', type=int, default=1,
+                                 help='Number of processes that propagate the fronts')
+    end = argument_parser.add_mutually_exclusive_group(required=True)
+    end.add_argument('--end', help='Ending date of the simulation (ISO format)')
+    end.add_argument('--steps', type=int, help='Number of time steps to simulate')
+    argument_parser.add_argument('--output', help='GeoPackage where the simulated perimeters are saved')
+    ensemble = argument_parser.add_argument_group('ensemble', 'Monte Carlo ensemble over perturbed weather and fuel '
+                                                              'moisture, the workers run the members')
+    ensemble.add_argument('--members', type=int, help='Number of members of the ensemble')
+    ensemble.add_argument('--wind-speed-deviation', type=float, default=0.0,
+                          help='Standard deviation of the wind speed in m/s')
+    ensemble.add_argument('--wind-direction-deviation', type=float, default=0.0,
+                          help='Standard deviation of the wind direction in degrees')
+    ensemble.add_argument('--moisture-deviation', type=float, default=0.0,
+                          help='Standard deviation of the moisture of all the fuel classes as a fraction')
+    ensemble.add_argument('--seed', type=int, help='Seed of the random generator of the members')
+    ensemble.add_argument('--cell-size', type=float, default=30.0,
+                          help='Cell size of the burn probability raster in the units of the layers')
+    ensemble.add_argument('--probability-output', help='GeoTIFF where the burn probability is saved')
+    return argument_parser.parse_args(arguments)
+
+
+def is_number(value: str) -> bool:
+    """
+    Checks if a command line value is a number
+
+    :param value: The value
+    :type value: str
+    :return: True if the value is a number
+    :rtype: bool
+    """
+    try:
+        float(value)
+    except ValueError:
+        return False
+    return True
+
+
+def run_ensemble(simulator: SpreadSimulator, args: argparse.Namespace) -> BurnProbabilityGrid:
+    """
+    Runs an ensemble of simulations of the ignition layer of a simulator and saves its burn probability
+
+    :param simulator: Simulator already configured
+    :type simulator: SpreadSimulator
+    :param args: Parsed command line arguments
+    :type args: argparse.Namespace
+    :return: The burn probability grid
+    :rtype: BurnProbabilityGrid
+    """
+    if args.probability_output is None:
+        raise ValueError('The burn probability output of the ensemble is not defined')
+    # The members are run by the ensemble workers, the fronts of a member are propagated in its worker
+    simulator.workers = 1
+    simulator.reset_simulation()
+    if args.steps is not None:
+        end_date: datetime.datetime = simulator.start_date + \
+            datetime.timedelta(seconds=args.steps * simulator.time_step)
+    else:
+        end_date = date_parser.parse(args.end)
+    runner: EnsembleRunner = EnsembleRunner(simulator, args.members, wind_speed_deviation=args.wind_speed_deviation,
+                                            wind_direction_deviation=math.radians(args.wind_direction_deviation),
+                                            moisture_deviation=((args.moisture_deviation, ) * 3,
+                                                                (args.moisture_deviation, ) * 2),
+                                            seed=args.seed, workers=args.workers)
+    grid: BurnProbabilityGrid = runner.run(simulator.read_ignition_points(), end_date,
+                                           BurnProbabilityGrid(0.0, 0.0, args.cell_size))
+    grid.save(args.probability_output, simulator.ignition_layer.crs().toWkt())
+    return grid
+
+
+def main(arguments: Union[List[str], None] = None) -> int:
+    """
+    Runs a simulation with the command line arguments
+
+    :param arguments: Command line arguments without the program name, defaults to sys.argv
+    :type arguments: Union[List[str], None]
+    :return: Process exit code
+    :rtype: int
+    """
+    args: argparse.Namespace = parse_arguments(sys.argv[1:] if arguments is None else arguments)
+    application: QgsApplication = QgsApplication([], False)
+    application.initQgis()
+    simulator: SpreadSimulator = SpreadSimulator()
+    try:
+        if args.project is not None:
+            project: QgsProject = QgsProject.instance()
+            if not project.read(args.project):
+                raise ValueError('Unable to read the project {}'.format(args.project))
+            configure_from_project(simulator, project)
+        else:
+            configure_from_geopackage(simulator, args.geopackage, args.ignition_layer, args.perimeter_layer,
+                                      args.fuel_layer)
+        if args.start is not None:
+            simulator.start_date = date_parser.parse(args.start)
+        if args.time_step is not None:
+            simulator.time_step = args.time_step
+        simulator.fuel_field = args.fuel_field
+        simulator.adaptive_time_step = args.adaptive
+        simulator.courant_number = args.courant_number
+        simulator.perimeter_resolution = args.resolution
+        simulator.workers = args.workers
+        simulator.engine = SpreadEngine[args.engine.upper()]
+        simulator.raster_cell_size = args.raster_cell_size
+        if args.fuel_raster is not None:
+            fuel_raster: QgsRasterLayer = QgsRasterLayer(args.fuel_raster, 'fuel')
+            if not fuel_raster.isValid():
+                raise ValueError('Unable to read the fuel raster {}'.format(args.fuel_raster))
+            simulator.fuel_layer = fuel_raster
+        if args.dem is not None:
+            simulator.terrain = TerrainLookup.from_raster(args.dem, memory_map=args.dem_memory_map)
+        if simulator.start_date is None:
+            raise ValueError('The simulation starting date is not defined')
+        if args.moisture is not None:
+            simulator.fuel_moisture = FuelMoistureField(
+                [float(value) if is_number(value) else value for value in args.moisture], simulator.start_date,
+                None if args.weather_stations is None else read_weather_stations(args.weather_stations))
+        elif args.weather_stations is not None:
+            raise ValueError('The weather stations need the base fuel moisture')
+        start: float = time.perf_counter()
+        if args.members is not None:
+            grid: BurnProbabilityGrid = run_ensemble(simulator, args)
+            print('Simulated {} members in {:.2f} s, {} burned tiles'.format(grid.members, time.perf_counter() - start,
+                                                                           grid.tile_count))
+            return 0
+        simulator.reset_simulation()
+        if args.steps is not None:
+            simulator.run(args.steps)
+        else:
+            simulator.run_until(date_parser.parse(args.end))
+        elapsed: float = time.perf_counter() - start
+        if args.output is not None:
+            options: QgsVectorFileWriter.SaveVectorOptions = QgsVectorFileWriter.SaveVectorOptions()
+            options.driverName = 'GPKG'
+            error = QgsVectorFileWriter.writeAsVectorFormatV3(simulator.perimeter_layer, args.output,
+                                                              QgsProject.instance().transformContext(), options)
+            if error[0] != QgsVectorFileWriter.NoError:
+                raise ValueError('Unable to write the perimeters to {}: {}'.format(args.output, error[1]))
+        print('Simulated until {} in {:.2f} s'.format(simulator.current_date.isoformat(), elapsed))
+        statistics: SpreadSimulator.StepStatistics = simulator.step_statistics
+        print('{} steps, {} front sub-steps ({} rejected), {:.1f} sub-steps/s'.format(
+            statistics.steps, statistics.sub_steps, statistics.rejected_steps, statistics.sub_steps_per_second))
+        # The grid engines compute the ellipses of their cells without the sub-steps of the fronts
+        if statistics.cache_hits + statistics.cache_misses == 0:
+            print('Environment cache: not used')
+        else:
+            print('Environment cache: {} hits, {} misses ({:.1%} hit rate)'.format(
+                statistics.cache_hits, statistics.cache_misses, statistics.cache_hit_rate))
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        simulator.close()
+        application.exitQgis()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
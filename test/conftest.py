@@ -1,6 +1,13 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import sys
+from pathlib import Path
+
+# The plugin modules import each other as 'gisfire_spread_simulation', so the source folder must be importable to test
+# the simulation algorithms without loading the plugin into QGIS
+sys.path.insert(0, str(Path(__file__).parent.parent) + '/src')
+
 pytest_plugins = [
     'test.fixtures.locale',
     'test.fixtures.qgis_load_plugin',
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy
+
+from gisfire_spread_simulation.simulation_algorithms.perimeter import Perimeter
+
+
+def circle(radius: float, n: int, x: float = 0, y: float = 0) -> Perimeter:
+    """
+    Counterclockwise circular perimeter
+
+    :param radius: Radius of the circle
+    :type radius: float
+    :param n: Number of vertices
+    :type n: int
+    :param x: X coordinate of the centre
+    :type x: float
+    :param y: Y coordinate of the centre
+    :type y: float
+    :return: The perimeter
+    :rtype: Perimeter
+    """
+    angles = numpy.linspace(0, 2 * numpy.pi, n, endpoint=False)
+    return Perimeter(radius * numpy.cos(angles) + x, radius * numpy.sin(angles) + y)
+
+
+def ellipses(a: float, b: float, c: float, alpha: float, x_limit: float = numpy.inf):
+    """
+    Spread ellipses function of the grid engines with the same ellipse everywhere, the cells east of a limit do not
+    burn
+
+    :param a: Semi-minor axis rate of the ellipse
+    :type a: float
+    :param b: Semi-major axis rate of the ellipse
+    :type b: float
+    :param c: Distance rate from the centre of the ellipse to the ignition point
+    :type c: float
+    :param alpha: Heading of the fire, counterclockwise from north
+    :type alpha: float
+    :param x_limit: X coordinate where the fuel ends
+    :type x_limit: float
+    :return: The function of the x and y coordinates of the cells
+    :rtype: Callable
+    """
+    def spread(x: numpy.ndarray, y: numpy.ndarray):
+        return (numpy.full(x.shape, a), numpy.full(x.shape, b), numpy.full(x.shape, c), numpy.full(x.shape, alpha),
+                x < x_limit)
+    return spread
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy
+import pytest
+
+from gisfire_spread_simulation.simulation_algorithms.contour_algorithms import ContourAlgorithm
+
+
+def distances(x: float, y: float, size: int) -> numpy.ndarray:
+    (rows, columns) = numpy.mgrid[0:size, 0:size]
+    return numpy.hypot(columns + 0.5 - x, -(rows + 0.5) - y)
+
+
+def test_marching_squares_01():
+    """
+    The contour of a distance grid is a counterclockwise circle, an annulus is an exterior ring with a clockwise hole
+    and separate regions are separate polygons
+    """
+    polygons = ContourAlgorithm.marching_squares(distances(30, -30, 60), 20, 0, 0, 1)
+    assert len(polygons) == 1
+    assert polygons[0].ring_count == 1
+    assert polygons[0].area() == pytest.approx(numpy.pi * 400, rel=1e-3)
+    polygons = ContourAlgorithm.marching_squares(numpy.abs(distances(30, -30, 60) - 15), 5, 100, 200, 1)
+    assert polygons[0].ring_count == 2
+    assert polygons[0].ring_areas() == pytest.approx([numpy.pi * 400, -numpy.pi * 100], rel=1e-2)
+    assert polygons[0].bounds() == pytest.approx((110, 150, 150, 190), abs=0.1)
+    two = numpy.minimum(distances(10, -10, 60), distances(50, -50, 60))
+    assert len(ContourAlgorithm.marching_squares(two, 5, 0, 0, 1)) == 2
+    assert ContourAlgorithm.marching_squares(two, -1, 0, 0, 1) == []
+
+
+def test_marching_squares_02():
+    """
+    Saddles join the diagonal cells when the centre is inside, and the contour is halfway to the infinite values
+    """
+    saddle = numpy.array([[0, 2], [2, 0]])
+    assert len(ContourAlgorithm.marching_squares(saddle, 0.5, 0, 0, 1)) == 2
+    assert len(ContourAlgorithm.marching_squares(saddle, 1.5, 0, 0, 1)) == 1
+    polygon = ContourAlgorithm.marching_squares(numpy.array([[0, numpy.inf]]), 0, 0, 0, 2)[0]
+    assert polygon.bounds() == (0, -2, 2, 0)
+    assert polygon.area() == 2
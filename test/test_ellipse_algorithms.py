@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy
+import pytest
+
+from gisfire_spread_simulation.simulation_algorithms.ellipse_algorithms import EllipseAlgorithm
+
+
+def test_richards_01():
+    """
+    With a circular ellipse centered in the ignition point the vertices move along the normal of the perimeter at the
+    spread rate, whatever the direction of the ellipse is
+    """
+    angles = numpy.linspace(0, 2 * numpy.pi, 16, endpoint=False)
+    xs = -numpy.sin(angles)
+    ys = numpy.cos(angles)
+    (xt, yt) = EllipseAlgorithm.richards(xs, ys, numpy.full(16, 2.0), numpy.full(16, 2.0), numpy.zeros(16), angles)
+    assert numpy.hypot(xt, yt) == pytest.approx(numpy.full(16, 2.0))
+    assert xt * xs + yt * ys == pytest.approx(numpy.zeros(16), abs=1e-12)
+
+
+def test_richards_02():
+    """
+    The head of an elongated ellipse moves at the head rate of spread (b + c) and zero tangents give zero velocity
+    """
+    a = numpy.array([1.0, 1.0])
+    b = numpy.array([3.0, 3.0])
+    c = numpy.array([2.0, 2.0])
+    theta = numpy.array([0.0, 0.0])
+    # Vertex at the head of a counterclockwise perimeter heading north has a tangent pointing west
+    (xt, yt) = EllipseAlgorithm.richards(numpy.array([-1.0, 0.0]), numpy.array([0.0, 0.0]), a, b, c, theta)
+    assert xt[0] == pytest.approx(0)
+    assert yt[0] == pytest.approx(5)
+    assert xt[1] == 0 and yt[1] == 0
+
+
+def test_directional_rate_01():
+    """
+    The directional rate is the head rate (b + c) along the heading, the back rate (b - c) against it, and the rays end
+    on the ellipse in any direction
+    """
+    (a, b, c, alpha) = (1.0, 3.0, 2.0, 0.5)
+    directions = numpy.linspace(0, 2 * numpy.pi, 12, endpoint=False) + alpha
+    rate = EllipseAlgorithm.directional_rate(a, b, c, alpha, directions)
+    assert rate[0] == pytest.approx(5)
+    assert rate[6] == pytest.approx(1)
+    # Back to the frame of the ellipse, with the major axis along y
+    (x, y) = (-rate * numpy.sin(directions - alpha), rate * numpy.cos(directions - alpha))
+    assert numpy.square(x / a) + numpy.square((y - c) / b) == pytest.approx(numpy.ones(12))
+    assert EllipseAlgorithm.directional_rate(numpy.zeros(2), numpy.zeros(2), numpy.zeros(2), 0, 0).tolist() == [0, 0]
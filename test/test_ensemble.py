@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import datetime
+
+import numpy
+import pytest
+
+from gisfire_spread_simulation.simulation_algorithms.ensemble import BurnProbabilityGrid
+from gisfire_spread_simulation.simulation_algorithms.ensemble import EnsembleRunner
+from gisfire_spread_simulation.simulation_algorithms.perimeter import Perimeter
+from gisfire_spread_simulation.simulation_algorithms.spread_simulator import SpreadSimulator
+
+
+def test_burn_probability_grid_01():
+    """
+    Members are counted per cell in the tiles they burn, across tile boundaries and at negative rows and columns
+    """
+    grid = BurnProbabilityGrid(100, 200, 10, tile_size=4)
+    grid.add_window(-2, 3, numpy.ones((3, 3), dtype=bool))
+    grid.add_window(0, 3, numpy.ones((1, 1), dtype=bool))
+    grid.add_window(0, 0, numpy.zeros((2, 2), dtype=bool))
+    assert grid.members == 3
+    assert grid.tile_count == 4
+    (row, column, counts) = grid.counts()
+    assert (row, column, counts.shape) == (-4, 0, (8, 8))
+    assert counts.sum() == 10
+    assert counts[0 - row, 3 - column] == 2
+    (probability, geo_transform) = grid.probability()
+    assert probability.max() == pytest.approx(2 / 3)
+    assert geo_transform == (100, 10, 0, 240, 0, -10)
+    # A square fire burns the cells whose centre is inside it
+    grid = BurnProbabilityGrid(0, 0, 1)
+    grid.add_member([Perimeter.from_points([(0, -0.2), (3.2, -0.2), (3.2, -2.2), (0, -2.2)])])
+    assert grid.counts()[2].sum() == 6
+
+
+def test_ensemble_runner_01():
+    """
+    The members are drawn around the environment of the simulator and give the same burn probability in this process
+    and in worker processes
+    """
+    start = datetime.datetime(2022, 7, 15, 12)
+    simulator = SpreadSimulator(time_step=60, starting_time=start, perimeter_resolution=5)
+    ignition_points = [SpreadSimulator.IgnitionPoint(x=0, y=0, ignition_date=start)]
+    end = start + datetime.timedelta(minutes=10)
+    runner = EnsembleRunner(simulator, 4, wind_speed_deviation=1, wind_direction_deviation=0.5,
+                            moisture_deviation=((0.01, 0.01, 0.01), (0.1, 0.1)), seed=1)
+    environments = runner.environments()
+    assert len(environments) == 4
+    assert environments == runner.environments()
+    assert len({environment[1] for environment in environments}) == 4
+    serial = runner.run(ignition_points, end, BurnProbabilityGrid(0, 0, 5))
+    parallel = EnsembleRunner(simulator, 4, wind_speed_deviation=1, wind_direction_deviation=0.5,
+                              moisture_deviation=((0.01, 0.01, 0.01), (0.1, 0.1)), seed=1,
+                              workers=2).run(ignition_points, end, BurnProbabilityGrid(0, 0, 5))
+    assert serial.members == parallel.members == 4
+    assert numpy.array_equal(serial.counts()[2], parallel.counts()[2])
+    (probability, _) = serial.probability()
+    assert probability.max() == 1
+    assert numpy.count_nonzero((probability > 0) & (probability < 1)) > 0
+    # Without perturbations all the members burn the same cells
+    deterministic = EnsembleRunner(simulator, 2).run(ignition_points, end, BurnProbabilityGrid(0, 0, 5))
+    assert set(numpy.unique(deterministic.probability()[0]).tolist()) == {0, 1}
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import datetime
+
+from gisfire_spread_simulation.simulation_algorithms.front_store import FrontStore
+from gisfire_spread_simulation.simulation_algorithms.perimeter import Perimeter
+
+
+def test_front_store_01():
+    """
+    Fronts are grouped by simulation time, popping a time removes only its fronts
+    """
+    store = FrontStore()
+    t0 = datetime.datetime(2022, 7, 1, 12, 0, 0)
+    t1 = t0 + datetime.timedelta(seconds=30)
+    a = Perimeter([0.0, 1.0, 1.0], [0.0, 0.0, 1.0])
+    b = Perimeter([5.0, 6.0, 6.0], [5.0, 5.0, 6.0])
+    store.add(t1, [a])
+    store.add(t0, [b])
+    store.add(t1, [b])
+    assert len(store) == 3
+    assert store.dates == [t0, t1]
+    assert store.get(t1) == [a, b]
+    assert len(store) == 3
+    assert store.pop(t0) == [b]
+    assert store.pop(t0) == []
+    assert store.dates == [t1]
+    store.clear()
+    assert len(store) == 0
+    assert store.get(t1) == []
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pytest
+
+import gisfire_spread_simulation.fuel_models.standard_fuel_models as models
+from gisfire_spread_simulation.fuel_models.fuel_model import FuelModelType
+from gisfire_spread_simulation.fuel_models.fuel_model_table import FuelModelTable
+from gisfire_spread_simulation.simulation_algorithms.rate_of_sprerad_algorithms import FuelModelKernel
+from gisfire_spread_simulation.simulation_algorithms.rate_of_sprerad_algorithms import RateOfSpread
+
+
+def test_standard_fuel_models_01():
+    """
+    The catalogue has the 13 Anderson models and the 40 Scott & Burgan models with their 5 non burnable ones, each
+    one with its own code and the Scott & Burgan ones also accessible by mnemonic
+    """
+    fuel_models = {id(fuel_model): fuel_model for fuel_model in models.fuel_models.values()}
+    assert len(fuel_models) == 1 + 13 + 5 + 40
+    assert len({fuel_model.code for fuel_model in fuel_models.values()}) == len(fuel_models)
+    assert models.model_1.code == '1'
+    assert models.model_2.code == '2'
+    assert models.fuel_models['GR1'] is models.model_101
+    assert models.model_101.model_type == FuelModelType.DYNAMIC
+    assert models.model_13.fuel_load_100_h == pytest.approx(28.05 * 2000 / 43560)
+    assert not FuelModelKernel.of(models.fuel_models['NB9']).burnable
+    with pytest.raises(AttributeError):
+        _ = models.model_1000
+
+
+def test_cured_fuel_model_01():
+    """
+    Dynamic models transfer the live herbaceous load to the dead class as it cures, static models are not modified
+    """
+    grass = models.fuel_models['GR2']
+    green = grass.cured(1.5)
+    cured = grass.cured(0.3)
+    half = grass.cured(0.75)
+    assert green.fuel_load_dead_herb == 0
+    assert green.fuel_load_live_herb == pytest.approx(grass.fuel_load_live_herb)
+    assert cured.fuel_load_live_herb == pytest.approx(0, abs=1e-3)
+    assert half.fuel_load_dead_herb + half.fuel_load_live_herb == pytest.approx(grass.fuel_load_live_herb)
+    assert half.sav_ratio_dead_herb == grass.sav_ratio_live_herb
+    assert half.model_type == FuelModelType.STATIC
+    assert models.model_2.cured(0.3) is models.model_2
+    # Cured grass spreads faster
+    moisture = ((0.06, 0.07, 0.08), (0.3, 0.9))
+    assert RateOfSpread.rothermel(fuel_model=cured, moisture=moisture, wind=(2, 0), slope=0)[0] > \
+        RateOfSpread.rothermel(fuel_model=green, moisture=moisture, wind=(2, 0), slope=0)[0]
+
+
+def test_cured_fuel_model_table_01():
+    """
+    The cured table keeps the fuel ids, is computed once per moisture and is discarded when the table changes
+    """
+    table = FuelModelTable([models.model_1, models.fuel_models['GR2']])
+    cured = table.cured(0.6)
+    assert table.cured(0.6) is cured
+    assert len(cured) == len(table)
+    assert cured[1] is models.model_1
+    assert cured[2].fuel_load_dead_herb > 0
+    assert cured.array['fuel_load_dead'][2][3] > 0
+    table.register(models.model_3)
+    assert table.cured(0.6) is not cured
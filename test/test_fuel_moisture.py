@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import datetime
+import pickle
+
+import numpy
+import pytest
+
+from gisfire_spread_simulation.data_providers.fuel_moisture import FuelMoistureField
+from gisfire_spread_simulation.data_providers.fuel_moisture import WeatherStation
+from gisfire_spread_simulation.data_providers.fuel_moisture import read_weather_stations
+
+
+def test_equilibrium_moisture_01():
+    """
+    The equilibrium moisture content grows with the humidity and falls with the temperature
+    """
+    emc = FuelMoistureField.equilibrium_moisture(numpy.array([25, 25, 25, 25]), numpy.array([5, 30, 60, 90]))
+    assert numpy.all(numpy.diff(emc) > 0)
+    assert FuelMoistureField.equilibrium_moisture(35, 30) < FuelMoistureField.equilibrium_moisture(15, 30)
+
+
+def test_fuel_moisture_field_01(tmp_path):
+    """
+    The 1-h dead fuel dries towards the equilibrium moisture of the nearest station hour by hour, the other classes
+    keep their base moisture, and the steps within an hour reuse the cached tiles
+    """
+    start = datetime.datetime(2022, 7, 15, 12)
+    (tmp_path / 'stations.csv').write_text(
+        'station,x,y,datetime,temperature,relative_humidity\n'
+        'dry,0,0,2022-07-15T12:00:00,35,10\n'
+        'wet,5000,0,2022-07-15T12:00:00,15,90\n'
+        'dry,0,0,2022-07-15T18:00:00,35,10\n')
+    stations = read_weather_stations(str(tmp_path / 'stations.csv'))
+    assert len(stations) == 2
+    assert stations[0].weather(start + datetime.timedelta(hours=3)) == (35, 10)
+    field = FuelMoistureField((0.1, 0.11, 0.12, 0.6, 0.9), start, stations, cell_size=100, tile_size=8)
+    (x, y) = (numpy.array([50, 4950]), numpy.array([-50, -50]))
+    assert field.moisture(x, y, start).tolist() == [[0.1, 0.11, 0.12, 0.6, 0.9]] * 2
+    one_hour = field.moisture(x, y, start + datetime.timedelta(hours=1))
+    two_hours = field.moisture(x, y, start + datetime.timedelta(hours=2))
+    emc = FuelMoistureField.equilibrium_moisture(35, 10)
+    assert 0.1 > one_hour[0, 0] > two_hours[0, 0] > emc
+    assert two_hours[1, 0] > one_hour[1, 0] > 0.1
+    assert one_hour[:, 1:].tolist() == [[0.11, 0.12, 0.6, 0.9]] * 2
+    misses = field.misses
+    half = field.moisture(x, y, start + datetime.timedelta(hours=1, minutes=30))
+    assert half[:, 0] == pytest.approx((one_hour[:, 0] + two_hours[:, 0]) / 2)
+    assert field.misses == misses
+    # Pickled fields compute their tiles again
+    copy = pickle.loads(pickle.dumps(field))
+    assert copy.resident_tiles == 0
+    assert copy.moisture(x, y, start + datetime.timedelta(hours=2)).tolist() == two_hours.tolist()
+    # Without stations the moisture does not change
+    constant = FuelMoistureField((0.1, 0.11, 0.12, 0.6, 0.9), start)
+    assert constant.moisture(x, y, start + datetime.timedelta(days=3)).tolist() == [[0.1, 0.11, 0.12, 0.6, 0.9]] * 2
+    with pytest.raises(ValueError):
+        WeatherStation(0, 0, [start], [20, 21], [30])
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy
+import pytest
+from qgis.core import QgsGeometry
+
+from gisfire_spread_simulation.qgis_helper_functions.geometry import clean_perimeter_geometries
+from gisfire_spread_simulation.qgis_helper_functions.geometry import geometry_rings
+from gisfire_spread_simulation.qgis_helper_functions.geometry import perimeter_from_geometry
+from gisfire_spread_simulation.qgis_helper_functions.geometry import perimeter_to_geometry
+
+
+def test_geometry_rings_01():
+    """
+    The rings of each polygon of a multipolygon are read with their closing vertex, the exterior ring first
+    """
+    geometry = QgsGeometry.fromWkt('MultiPolygon (((0 0, 4 0, 4 4, 0 4, 0 0), (1 1, 1 2, 2 2, 1 1)), '
+                                   '((10 0, 11 0, 11 1, 10 0)))')
+    polygons = geometry_rings(geometry)
+    assert [len(polygon) for polygon in polygons] == [2, 1]
+    assert polygons[0][0][0].tolist() == [0, 4, 4, 0, 0]
+    assert polygons[0][1][1].tolist() == [1, 2, 2, 1]
+    assert polygons[1][0][0].dtype == numpy.float64
+    assert geometry_rings(QgsGeometry()) == []
+
+
+def test_perimeter_from_geometry_01():
+    """
+    A polygon with a hole is converted to a perimeter without the closing vertices and back to the same polygon
+    """
+    geometry = QgsGeometry.fromWkt('Polygon ((0 0, 4 0, 4 4, 0 4, 0 0), (1 1, 1 2, 2 2, 1 1))')
+    perimeter = perimeter_from_geometry(geometry)
+    assert perimeter.x.tolist() == [0, 4, 4, 0, 1, 1, 2]
+    assert perimeter.y.tolist() == [0, 0, 4, 4, 1, 2, 2]
+    assert perimeter.rings.tolist() == [0, 4]
+    assert perimeter_to_geometry(perimeter).equals(geometry)
+
+
+def test_clean_perimeter_geometries_01():
+    """
+    A self-intersecting front is made valid, overlapping fronts are dissolved, fronts collapsed to lines are dropped and
+    the resulting single polygons follow the right-hand rule
+    """
+    geometries = [QgsGeometry.fromWkt('Polygon ((0 0, 10 10, 10 0, 0 10, 0 0))'),
+                  QgsGeometry.fromWkt('Polygon ((20 0, 30 0, 30 10, 20 10, 20 0))'),
+                  QgsGeometry.fromWkt('Polygon ((25 0, 35 0, 35 10, 25 10, 25 0))'),
+                  QgsGeometry.fromWkt('Polygon ((40 0, 50 0, 45 0, 40 0))'),
+                  QgsGeometry()]
+    assert not geometries[0].isGeosValid()
+    cleaned = clean_perimeter_geometries(geometries)
+    assert all(not geometry.isMultipart() and geometry.isGeosValid() for geometry in cleaned)
+    assert sorted(geometry.area() for geometry in cleaned) == pytest.approx([25, 25, 150])
+    # Clockwise exterior rings
+    assert all(perimeter_from_geometry(geometry).area() < 0 for geometry in cleaned)
+    assert clean_perimeter_geometries([QgsGeometry()]) == []
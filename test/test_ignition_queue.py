@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import datetime
+
+from gisfire_spread_simulation.simulation_algorithms.ignition_queue import IgnitionQueue
+
+
+class Ignition:
+    def __init__(self, name: str, ignition_date: datetime.datetime):
+        self.name = name
+        self.ignition_date = ignition_date
+
+
+def test_ignition_queue_01():
+    """
+    Ignitions are popped by time window in ignition date order, keeping the insertion order of simultaneous ignitions,
+    and points pushed during the simulation are taken into account
+    """
+    start = datetime.datetime(2022, 7, 15, 12, 0, 0, tzinfo=datetime.timezone.utc)
+    minutes = [datetime.timedelta(minutes=m) for m in range(0, 10)]
+    queue = IgnitionQueue([Ignition('c', start + minutes[5]), Ignition('a', start), Ignition('b', start + minutes[1]),
+                           Ignition('d', start + minutes[5])])
+    assert len(queue) == 4
+    assert queue.peek_date() == start
+    assert [point.name for point in queue.pop_until(start + minutes[2])] == ['a', 'b']
+    assert queue.pop_until(start + minutes[4]) == []
+    queue.push(Ignition('e', start + minutes[4]))
+    assert [point.name for point in queue.pop_until(start + minutes[6])] == ['e', 'c', 'd']
+    assert len(queue) == 0
+    assert queue.peek_date() is None
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy
+import pytest
+
+from gisfire_spread_simulation.simulation_algorithms.level_set import LevelSet
+from test.helpers import ellipses
+
+
+def test_level_set_01():
+    """
+    Without wind the front is close to a circle, only the band is updated and the window grows with the fire
+    """
+    level_set = LevelSet(ellipses(1, 1, 0, 0), 0, 0, 1)
+    level_set.ignite(0.5, -0.5, 0)
+    level_set.advance(30)
+    assert level_set.time == 30
+    assert level_set.reinitializations > 0
+    assert level_set.band_size < level_set.window_shape[0] * level_set.window_shape[1] / 2
+    isochrones = level_set.isochrones(30)
+    assert len(isochrones) == 1
+    # The ignition burns a circle of one cell
+    assert isochrones[0].area() == pytest.approx(numpy.pi * 31 ** 2, rel=0.05)
+    with pytest.raises(ValueError):
+        level_set.isochrones(20)
+
+
+def test_level_set_02():
+    """
+    The front spreads at the head rate towards the heading (east) and at the back rate against it, stops at the cells
+    that do not burn, and fires merge, also around an unburned island that burns later
+    """
+    level_set = LevelSet(ellipses(0.5, 1, 0.8, -numpy.pi / 2, x_limit=20), 0, 0, 1)
+    level_set.ignite(0.5, -0.5, 0)
+    level_set.ignite(40.5, -0.5, 0)
+    level_set.advance(10)
+    isochrones = level_set.isochrones(10)
+    assert len(isochrones) == 1
+    (x_min, _, x_max, _) = isochrones[0].bounds()
+    assert x_max == pytest.approx(1.5 + 1.8 * 10, abs=0.5)
+    assert x_min == pytest.approx(-0.5 - 0.2 * 10, abs=0.5)
+    level_set.advance(30)
+    assert level_set.isochrones(30)[0].bounds()[2] <= 20.5
+    level_set = LevelSet(ellipses(1, 1, 0, 0), 0, 0, 1)
+    for angle in numpy.linspace(0, 2 * numpy.pi, 24, endpoint=False):
+        level_set.ignite(20 * numpy.cos(angle), 20 * numpy.sin(angle), 0)
+    level_set.ignite(60, 0, 2)
+    level_set.advance(3)
+    assert sorted(isochrone.ring_count for isochrone in level_set.isochrones(3)) == [1, 2]
+    level_set.advance(25)
+    assert [isochrone.ring_count for isochrone in level_set.isochrones(25)] == [1]
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy
+import pytest
+
+from gisfire_spread_simulation.simulation_algorithms.minimum_travel_time import MinimumTravelTime
+from test.helpers import ellipses
+
+
+def test_minimum_travel_time_01():
+    """
+    Without wind the isochrones are close to circles and the band stops at the advanced time
+    """
+    grid = MinimumTravelTime(ellipses(1, 1, 0, 0), 0, 0, 1, tile_size=16)
+    grid.ignite(0.5, -0.5, 0)
+    grid.advance(30)
+    assert grid.band_size > 0
+    assert grid.tile_count > 4
+    isochrones = grid.isochrones(30)
+    assert len(isochrones) == 1
+    assert isochrones[0].area() == pytest.approx(numpy.pi * 900, rel=0.05)
+    assert isochrones[0].area() > grid.isochrones(20)[0].area()
+    settled = grid.settled_cells
+    grid.advance(30)
+    assert grid.settled_cells == settled
+
+
+def test_minimum_travel_time_02():
+    """
+    The fire spreads at the head rate towards the heading (east) and at the back rate against it, and does not cross
+    the cells that do not burn
+    """
+    grid = MinimumTravelTime(ellipses(0.5, 1, 0.8, -numpy.pi / 2, x_limit=20), 0, 0, 1, tile_size=16)
+    grid.ignite(0.5, -0.5, 0)
+    grid.ignite(40.5, -0.5, 0)
+    grid.advance(10)
+    isochrones = grid.isochrones(10)
+    assert len(isochrones) == 1
+    (x_min, _, x_max, _) = isochrones[0].bounds()
+    assert x_max == pytest.approx(0.5 + 1.8 * 10, abs=0.5)
+    assert x_min == pytest.approx(0.5 - 0.2 * 10, abs=0.5)
+    grid.advance(30)
+    assert grid.isochrones(30)[0].bounds()[2] == 20
+
+
+def test_minimum_travel_time_03():
+    """
+    Distant fires and fires in diagonal neighbour tiles give one isochrone each
+    """
+    grid = MinimumTravelTime(ellipses(1, 1, 0, 0), 0, 0, 1, tile_size=16)
+    grid.ignite(8.5, -8.5, 0)
+    grid.ignite(200.5, -8.5, 0)
+    grid.ignite(24.5, -24.5, 0)
+    grid.advance(5)
+    isochrones = grid.isochrones(5)
+    assert len(isochrones) == 3
+    assert sorted(round(isochrone.bounds()[0]) for isochrone in isochrones) == [4, 20, 196]
+    assert all(isochrone.area() == pytest.approx(numpy.pi * 25, rel=0.1) for isochrone in isochrones)
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy
+import pytest
+
+from gisfire_spread_simulation.simulation_algorithms.parallel_propagation import ParallelPropagator
+from gisfire_spread_simulation.simulation_algorithms.parallel_propagation import SharedPerimeter
+from gisfire_spread_simulation.simulation_algorithms.perimeter import Perimeter
+from gisfire_spread_simulation.simulation_algorithms.spread_simulator import SpreadSimulator
+from test.helpers import circle
+
+
+def test_shared_perimeter_01():
+    """
+    A perimeter written to a shared memory block is read back with its rings and fuel
+    """
+    perimeter = Perimeter.concatenate([circle(10, 20), circle(2, 5).reversed()])
+    perimeter.fuel = numpy.arange(25)
+    block = SharedPerimeter.write(perimeter)
+    try:
+        copy = SharedPerimeter.read(block, len(perimeter), perimeter.ring_count).copy()
+    finally:
+        block.close()
+        block.unlink()
+    assert copy.x.tolist() == perimeter.x.tolist()
+    assert copy.y.tolist() == perimeter.y.tolist()
+    assert copy.rings.tolist() == [0, 20]
+    assert copy.fuel.tolist() == list(range(25))
+
+
+def test_balance_01():
+    """
+    Items are distributed in bins of similar size, never more bins than items
+    """
+    assert ParallelPropagator.balance([10, 1, 7, 3], 2) == [[0, 1], [2, 3]]
+    assert ParallelPropagator.balance([5], 4) == [[0]]
+
+
+def test_parallel_propagator_01():
+    """
+    The fronts propagated in worker processes are the ones propagated in this process
+    """
+    simulator = SpreadSimulator(time_step=60)
+    fronts = [circle(100, 120), Perimeter.concatenate([circle(100, 150, 500), circle(30, 40, 500).reversed()]),
+              circle(50, 80, 0, 400)]
+    expected = simulator._propagate_fronts([front.copy() for front in fronts])
+    propagator = ParallelPropagator(SpreadSimulator.from_propagation_state, simulator.propagation_state(), 2)
+    try:
+        (propagated, sub_steps, rejected_steps, cache_hits, cache_misses) = propagator.propagate(fronts)
+    finally:
+        propagator.shutdown()
+    assert (sub_steps, rejected_steps) == (1, 0)
+    # Each batch computes the ellipse of the fuel of its vertices once and its corrector reuses it
+    assert (cache_hits, cache_misses) == (2, 2)
+    assert sorted([front.area() for front in propagated]) == \
+        pytest.approx(sorted([front.area() for front in expected]))
+    assert sorted([front.ring_count for front in propagated]) == [1, 1, 2]
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy
+import pytest
+
+from gisfire_spread_simulation.simulation_algorithms.perimeter import Perimeter
+
+
+def test_perimeter_01():
+    """
+    Views and reversed perimeters share the memory of the original perimeter
+    """
+    perimeter = Perimeter.from_points([(0, 0), (1, 0), (1, 1), (0, 1)])
+    assert len(perimeter) == 4
+    assert perimeter.x.dtype == numpy.float64
+    assert perimeter.fuel.tolist() == [0, 0, 0, 0]
+    view = perimeter.view(1, 3)
+    view.x[0] = 5
+    assert perimeter.x[1] == 5
+    reversed_perimeter = perimeter.reversed()
+    assert reversed_perimeter.y.tolist() == [1, 1, 0, 0]
+    reversed_perimeter.fuel[0] = 3
+    assert perimeter.fuel[3] == 3
+    copy = perimeter.copy()
+    copy.x[0] = 7
+    assert perimeter.x[0] == 0
+
+
+def test_perimeter_02():
+    """
+    The signed area is positive for counterclockwise perimeters and array lengths are checked
+    """
+    perimeter = Perimeter.from_points([(0, 0), (2, 0), (2, 1), (0, 1)])
+    assert perimeter.area() == pytest.approx(2)
+    assert perimeter.reversed().area() == pytest.approx(-2)
+    with pytest.raises(ValueError):
+        Perimeter([0, 1], [0])
+    with pytest.raises(ValueError):
+        perimeter.fuel = [1, 2]
+
+
+def test_perimeter_redistributed_01():
+    """
+    Redistributed perimeters have all their segments between the minimum and the maximum spacing, keeping the shape
+    """
+    angles = numpy.linspace(0, 2 * numpy.pi, 1000, endpoint=False)
+    dense = Perimeter(100 * numpy.cos(angles), 100 * numpy.sin(angles))
+    sparse = Perimeter(dense.x[::100], dense.y[::100], numpy.arange(10))
+    for perimeter in (dense, sparse):
+        redistributed = perimeter.redistributed(10)
+        lengths = redistributed.segment_lengths()
+        assert lengths.max() <= 10
+        assert lengths.min() >= 10 / 3
+        assert redistributed.area() == pytest.approx(perimeter.area(), rel=1e-3)
+    assert sparse.redistributed(10).fuel[0:8].tolist() == [0] * 7 + [1]
+    assert len(Perimeter.from_points([(0, 0), (0.1, 0), (0.2, 0), (0.3, 0.1)]).redistributed(10)) == 3
+    with pytest.raises(ValueError):
+        dense.redistributed(10, 6)
+
+
+def test_perimeter_rings_01():
+    """
+    Perimeters with several rings keep the rings apart: neighbours, areas, reversal and redistribution work ring by
+    ring, and polygons start at each counterclockwise ring
+    """
+    exterior = Perimeter.from_points([(0, 0), (10, 0), (10, 10), (0, 10)])
+    island = Perimeter.from_points([(4, 4), (4, 6), (6, 6), (6, 4)])
+    other = Perimeter.from_points([(20, 0), (21, 0), (21, 1)])
+    perimeter = Perimeter.concatenate([Perimeter.concatenate([exterior, island]), other])
+    assert perimeter.rings.tolist() == [0, 4, 8]
+    assert perimeter.ring_areas().tolist() == [100, -4, 0.5]
+    assert perimeter.area() == 96.5
+    (previous, following) = perimeter.neighbours()
+    assert previous[[0, 4, 8]].tolist() == [3, 7, 10]
+    assert following[[3, 7, 10]].tolist() == [0, 4, 8]
+    assert perimeter.reversed().ring_areas().tolist() == [-100, 4, -0.5]
+    assert perimeter.redistributed(1.5).ring_sizes().tolist() == [28, 8, 3]
+    polygons = perimeter.polygons()
+    assert [polygon.ring_count for polygon in polygons] == [2, 1]
+    assert polygons[0].ring(1).x.tolist() == [4, 4, 6, 6]
+    assert perimeter.select_rings(numpy.array([True, False, True])).ring_sizes().tolist() == [4, 3]
+    with pytest.raises(ValueError):
+        Perimeter([0, 1, 1], [0, 0, 1], rings=[1])
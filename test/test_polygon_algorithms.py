@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy
+import pytest
+
+from gisfire_spread_simulation.simulation_algorithms.perimeter import Perimeter
+from gisfire_spread_simulation.simulation_algorithms.polygon_algorithms import PolygonAlgorithm
+
+
+def test_points_in_rings_01():
+    """
+    Points inside the exterior ring and outside the hole are inside the polygon, it does not matter if the rings are
+    closed nor their orientation
+    """
+    exterior = numpy.array([(0, 0), (10, 0), (10, 10), (0, 10), (0, 0)], dtype=float)
+    hole = numpy.array([(4, 4), (4, 6), (6, 6), (6, 4)], dtype=float)
+    x = numpy.array([1, 5, 9, 11, -1, 5, 3])
+    y = numpy.array([1, 5, 9, 5, 5, 11, 5])
+    assert PolygonAlgorithm.points_in_rings(x, y, [exterior]).tolist() == [True, True, True, False, False, False, True]
+    assert PolygonAlgorithm.points_in_rings(x, y, [exterior, hole]).tolist() == [True, False, True, False, False,
+                                                                                 False, True]
+    # Small chunks give the same answer
+    assert PolygonAlgorithm.points_in_rings(x, y, [exterior[::-1], hole], max_elements=4).tolist() == \
+        [True, False, True, False, False, False, True]
+
+
+def test_segment_intersections_01():
+    """
+    The crossings of a ring are found once, with the first segment before the second one, and adjacent segments do not
+    cross
+    """
+    x = numpy.array([0, 6, 6, 4, 4, 10, 10, 0], dtype=float)
+    y = numpy.array([0, 0, 2, 2, -1, -1, 10, 10], dtype=float)
+    (first, second, x_cross, y_cross) = PolygonAlgorithm.segment_intersections(x, y)
+    assert first.tolist() == [0]
+    assert second.tolist() == [3]
+    assert (x_cross.tolist(), y_cross.tolist()) == ([4.0], [0.0])
+    square = numpy.array([0, 10, 10, 0], dtype=float)
+    assert PolygonAlgorithm.segment_intersections(square, square[::-1].copy())[0].shape[0] == 0
+
+
+def test_winding_numbers_01():
+    """
+    Counterclockwise rings turn once around the inner points and clockwise ones turn in the opposite direction
+    """
+    angles = numpy.linspace(0, 2 * numpy.pi, 1000, endpoint=False)
+    (ring_x, ring_y) = (10 * numpy.cos(angles), 10 * numpy.sin(angles))
+    x = numpy.array([0, 5, 11, -9, 0])
+    y = numpy.array([0, 5, 0, 0, 20])
+    assert PolygonAlgorithm.winding_numbers(x, y, ring_x, ring_y).tolist() == [1, 1, 0, 1, 0]
+    assert PolygonAlgorithm.winding_numbers(x, y, ring_x[::-1], ring_y[::-1]).tolist() == [-1, -1, 0, -1, 0]
+
+
+def test_remove_rotten_loops_01():
+    """
+    A loop burned twice (swallowtail) is replaced by the crossing point wherever the front starts, a loop around an
+    unburned area is kept
+    """
+    points = [(0, 0), (6, 0), (6, 2), (4, 2), (4, -1), (10, -1), (10, 10), (0, 10)]
+    for start in range(len(points)):
+        front = Perimeter.from_points(points[start:] + points[:start])
+        front.fuel = numpy.arange(len(front), dtype=numpy.int32)
+        clean = PolygonAlgorithm.remove_rotten_loops(front)
+        assert len(clean) == 6
+        assert clean.area() == pytest.approx(106)
+        assert PolygonAlgorithm.segment_intersections(clean.x, clean.y)[0].shape[0] == 0
+    island = Perimeter.from_points([(0, 0), (6, 0), (6, -1), (4, -1), (4, 1), (10, 1), (10, 10), (0, 10)])
+    assert len(PolygonAlgorithm.remove_rotten_loops(island)) == 8
+
+
+def test_overlapping_groups_01():
+    """
+    Boxes connected through overlapping boxes are in the same group, the padding enlarges the boxes
+    """
+    boxes = numpy.array([(0, 0, 1, 1), (5, 5, 6, 6), (0.5, 0.5, 2, 2), (1.9, 1.9, 5.1, 5.1), (10, 10, 11, 11)])
+    assert PolygonAlgorithm.overlapping_groups(boxes) == [[0, 1, 2, 3], [4]]
+    assert PolygonAlgorithm.overlapping_groups(boxes, padding=4) == [[0, 1, 2, 3, 4]]
+    assert PolygonAlgorithm.overlapping_groups(numpy.zeros((0, 4))) == []
+
+
+def test_overlapping_groups_02():
+    """
+    The groups of random boxes are the connected components of their pairwise overlap, and a long chain of boxes
+    connected end to end is a single group
+    """
+    generator = numpy.random.default_rng(0)
+    corners = generator.uniform(0, 100, (300, 2))
+    boxes = numpy.hstack((corners, corners + generator.uniform(0, 8, (300, 2))))
+    overlap = (boxes[:, None, 0] <= boxes[None, :, 2]) & (boxes[:, None, 2] >= boxes[None, :, 0]) & \
+        (boxes[:, None, 1] <= boxes[None, :, 3]) & (boxes[:, None, 3] >= boxes[None, :, 1])
+    expected = list()
+    unvisited = set(range(len(boxes)))
+    while len(unvisited) > 0:
+        component = {min(unvisited)}
+        pending = list(component)
+        while len(pending) > 0:
+            neighbours = set(numpy.flatnonzero(overlap[pending.pop()]).tolist()) - component
+            component |= neighbours
+            pending.extend(neighbours)
+        unvisited -= component
+        expected.append(sorted(component))
+    assert PolygonAlgorithm.overlapping_groups(boxes) == expected
+    chain = numpy.array([(i, 0, i + 1, 1) for i in range(2000)])[::-1]
+    assert PolygonAlgorithm.overlapping_groups(chain) == [list(range(2000))]
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy
+from osgeo import gdal
+
+import gisfire_spread_simulation.fuel_models.standard_fuel_models as models
+from gisfire_spread_simulation.data_providers.raster_fuel import RasterFuelLookup
+from gisfire_spread_simulation.fuel_models.standard_fuel_models import model_0
+
+
+def write_raster(path, codes, data_type, no_data):
+    dataset = gdal.GetDriverByName('GTiff').Create(path, codes.shape[1], codes.shape[0], 1, data_type)
+    dataset.SetGeoTransform((1000, 10, 0, 2000, 0, -10))
+    band = dataset.GetRasterBand(1)
+    band.SetNoDataValue(no_data)
+    band.WriteArray(codes)
+    dataset.FlushCache()
+    return path
+
+
+def test_raster_fuel_lookup_01():
+    """
+    Codes shared by a model map to the same index, and no data pixels, unknown codes and points outside the raster get
+    the non burnable model
+    """
+    path = write_raster('/vsimem/fuel_01.tif', numpy.array([[1, 2, 3], [-9999, 99, 1]]), gdal.GDT_Int16, -9999)
+    fuel_models = {'1': models.model_1, '2': models.model_2, '3': models.model_1, 'GR1': models.model_101}
+    try:
+        lookup = RasterFuelLookup(path, fuel_models, tile_size=2)
+        assert lookup.fuel_models == [model_0, models.model_1, models.model_2]
+        # Pixel centres of the first row, the no data pixel, the unknown code and points west and south of the raster
+        indices = lookup.lookup(numpy.array([1005, 1015, 1025, 1005, 1015, 995, 1005]),
+                                numpy.array([1995, 1995, 1995, 1985, 1985, 1995, 1975]))
+        assert indices.tolist() == [1, 2, 1, 0, 0, 0, 0]
+        assert indices.dtype == numpy.int32
+    finally:
+        gdal.Unlink(path)
+
+
+def test_raster_fuel_lookup_02():
+    """
+    A NaN no data value of a floating point raster is not converted to an integer code
+    """
+    path = write_raster('/vsimem/fuel_02.tif', numpy.array([[1, numpy.nan], [2, 1]]), gdal.GDT_Float32, numpy.nan)
+    try:
+        lookup = RasterFuelLookup(path, {'1': models.model_1, '2': models.model_2})
+        assert lookup.lookup(numpy.array([1005, 1015, 1005]), numpy.array([1995, 1995, 1985])).tolist() == [1, 0, 2]
+    finally:
+        gdal.Unlink(path)
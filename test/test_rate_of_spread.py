@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy
+import pytest
+
+from gisfire_spread_simulation.fuel_models.fuel_model import FuelModel
+from gisfire_spread_simulation.fuel_models.fuel_model_table import FuelModelTable
+from gisfire_spread_simulation.fuel_models.standard_fuel_models import model_0
+from gisfire_spread_simulation.fuel_models.standard_fuel_models import model_1
+from gisfire_spread_simulation.fuel_models.standard_fuel_models import model_2
+from gisfire_spread_simulation.simulation_algorithms.rate_of_sprerad_algorithms import FuelModelKernel
+from gisfire_spread_simulation.simulation_algorithms.rate_of_sprerad_algorithms import RateOfSpread
+
+
+def test_rothermel_batch_01():
+    """
+    The batch evaluation gives the same results as the scalar one for random moisture, wind and slope values
+    """
+    models = [model_0, model_1, model_2]
+    rng = numpy.random.default_rng(1)
+    size = 100
+    fuel_index = rng.integers(1, 3, size)
+    moisture = numpy.column_stack([rng.uniform(0.02, 0.1, (size, 3)), rng.uniform(0.3, 1.5, (size, 2))])
+    wind_speed = rng.uniform(0, 10, size)
+    wind_direction = rng.uniform(-numpy.pi, numpy.pi, size)
+    slope = rng.uniform(0, 0.5, size)
+    rate, alpha, wind = RateOfSpread.rothermel_batch(models, fuel_index, moisture, wind_speed, wind_direction, slope)
+    for i in range(size):
+        expected = RateOfSpread.rothermel(fuel_model=models[fuel_index[i]],
+                                          moisture=(tuple(moisture[i, 0:3]), tuple(moisture[i, 3:5])),
+                                          wind=(wind_speed[i], wind_direction[i]), slope=slope[i])
+        assert rate[i] == pytest.approx(expected[0])
+        assert alpha[i] == pytest.approx(expected[1])
+        assert wind[i] == pytest.approx(expected[2])
+
+
+def test_rothermel_batch_02():
+    """
+    Non burnable fuel models do not spread and scalar parameters are broadcast to the batch size
+    """
+    rate, alpha, wind = RateOfSpread.rothermel_batch([model_0, model_1], numpy.array([0, 1, 0]),
+                                                     (0.03, 0.03, 0.03, 0.45, 0.82), 2, 0, 0)
+    expected = RateOfSpread.rothermel(fuel_model=model_1, moisture=((0.03, 0.03, 0.03), (0.45, 0.82)), wind=(2, 0),
+                                      slope=0)
+    assert rate.shape == (3, )
+    assert rate[0] == 0 and rate[2] == 0
+    assert rate[1] == pytest.approx(expected[0])
+    assert wind[1] == pytest.approx(expected[2])
+
+
+def test_fuel_model_kernel_01():
+    """
+    The kernel of a fuel model is computed once and discarded when a property of the model changes
+    """
+    fuel_model = FuelModel(code='test', fuel_load_1_h=model_1.fuel_load_1_h, fuel_load_10_h=0, fuel_load_100_h=0,
+                           fuel_load_live_herb=0, fuel_load_live_wood=0, sav_ratio_1_h=3500, sav_ratio_10_h=109,
+                           sav_ratio_100_h=30, sav_ratio_live_herb=0, sav_ratio_live_wood=0, fuel_bed_depth=1,
+                           moisture_of_extinction=0.12)
+    kernel = FuelModelKernel.of(fuel_model)
+    assert FuelModelKernel.of(fuel_model) is kernel
+    rate = RateOfSpread.rothermel(fuel_model=fuel_model, moisture=((0.03, 0.03, 0.03), (0.45, 0.82)), wind=(2, 0),
+                                  slope=0)
+    fuel_model.fuel_bed_depth = 2
+    assert fuel_model.kernel is None
+    assert FuelModelKernel.of(fuel_model) is not kernel
+    assert RateOfSpread.rothermel(fuel_model=fuel_model, moisture=((0.03, 0.03, 0.03), (0.45, 0.82)), wind=(2, 0),
+                                  slope=0)[0] != pytest.approx(rate[0])
+    assert not FuelModelKernel.of(model_0).burnable
+
+
+def test_fuel_model_table_01():
+    """
+    The table registers each model once, the batch evaluation with the table matches the one with the model list and
+    the table is packed again when a registered model changes
+    """
+    fuel_model = FuelModel(code='test', fuel_load_1_h=model_1.fuel_load_1_h, fuel_load_10_h=0, fuel_load_100_h=0,
+                           fuel_load_live_herb=0, fuel_load_live_wood=0, sav_ratio_1_h=3500, sav_ratio_10_h=109,
+                           sav_ratio_100_h=30, sav_ratio_live_herb=0, sav_ratio_live_wood=0, fuel_bed_depth=1,
+                           moisture_of_extinction=0.12)
+    table = FuelModelTable([model_1, model_2])
+    assert table[0] is model_0
+    assert table.register(model_2) == 2
+    assert table.register(fuel_model) == 3
+    assert len(table) == 4
+    assert table.array['burnable'].tolist() == [False, True, True, True]
+    fuel_index = numpy.array([0, 1, 2, 3, 3, 1])
+    moisture = (0.05, 0.06, 0.07, 0.6, 0.9)
+    expected = RateOfSpread.rothermel_batch(table.fuel_models, fuel_index, moisture, 3, 0.4, 0.2)
+    result = RateOfSpread.rothermel_batch(table, fuel_index, moisture, 3, 0.4, 0.2)
+    for i in range(3):
+        assert numpy.allclose(result[i], expected[i])
+    fuel_model.fuel_bed_depth = 2
+    assert table.array['fuel_bed_depth'][3] == 2
+    assert RateOfSpread.rothermel_batch(table, fuel_index, moisture, 3, 0.4, 0.2)[0][3] != pytest.approx(result[0][3])
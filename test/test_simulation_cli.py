@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import datetime
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from qgis.core import QgsApplication
+from qgis.core import QgsFeature
+from qgis.core import QgsGeometry
+from qgis.core import QgsPoint
+from qgis.core import QgsProject
+from qgis.core import QgsVectorFileWriter
+from qgis.core import QgsVectorLayer
+
+from gisfire_spread_simulation.qgis_helper_functions.layer import add_ignition_point
+from gisfire_spread_simulation.qgis_helper_functions.layer import create_ignition_layer
+from gisfire_spread_simulation.qgis_helper_functions.layer import create_perimeter_layer
+from gisfire_spread_simulation.simulation_algorithms.spread_simulator import SpreadSimulator
+
+
+def memory_layer(uri, name, features):
+    layer = QgsVectorLayer(uri, name, 'memory')
+    for (wkt, attributes) in features:
+        feature = QgsFeature(layer.fields())
+        feature.setGeometry(QgsGeometry.fromWkt(wkt))
+        for (field, value) in attributes.items():
+            feature.setAttribute(field, value)
+        layer.dataProvider().addFeatures([feature])
+    return layer
+
+
+def write_geopackage(path, layers):
+    for (index, layer) in enumerate(layers):
+        options = QgsVectorFileWriter.SaveVectorOptions()
+        options.driverName = 'GPKG'
+        options.layerName = layer.name()
+        if index > 0:
+            options.actionOnExistingFile = QgsVectorFileWriter.CreateOrOverwriteLayer
+        error = QgsVectorFileWriter.writeAsVectorFormatV3(layer, path, QgsProject.instance().transformContext(),
+                                                          options)
+        assert error[0] == QgsVectorFileWriter.NoError
+    return path
+
+
+def test_run_until_01(qgis_app: QgsApplication):
+    """
+    A simulation run until an end date simulates the steps to that date, keeps the fronts of the last step to propagate
+    and writes the perimeters of each step with their dates
+
+    :param qgis_app: QGIS application fixture
+    :type qgis_app: QgsApplication
+    """
+    start_date = datetime.datetime(2022, 7, 15, 12)
+    end_date = start_date + datetime.timedelta(minutes=5)
+    ignition_layer = create_ignition_layer('ignition')
+    perimeter_layer = create_perimeter_layer('perimeter')
+    assert add_ignition_point(QgsPoint(1000, 1000), start_date, ignition_layer)
+    # Ignitions before the starting date are discarded
+    assert add_ignition_point(QgsPoint(5000, 5000), start_date - datetime.timedelta(hours=1), ignition_layer)
+    simulator = SpreadSimulator(time_step=60, ignition_layer=ignition_layer, perimeter_layer=perimeter_layer,
+                                starting_time=start_date)
+    assert simulator.run_until(end_date) == 5
+    assert simulator.current_date == end_date
+    assert simulator.front_store.dates == [end_date]
+    assert len(simulator.front_store) == 1
+    assert simulator.step_statistics.steps == 5
+    dates = [datetime.datetime.fromisoformat(feature['datetime']) for feature in perimeter_layer.getFeatures()]
+    assert sorted(dates) == [start_date + datetime.timedelta(minutes=minutes) for minutes in range(1, 6)]
+    areas = [feature.geometry().area() for feature in sorted(perimeter_layer.getFeatures(),
+                                                             key=lambda feature: feature['datetime'])]
+    assert all(area > 0 for area in areas)
+    assert areas == sorted(areas)
+    # The end date has been reached, so running again simulates no step
+    assert simulator.run_until(end_date) == 0
+    simulator.run(2)
+    assert simulator.current_date == end_date + datetime.timedelta(minutes=2)
+    assert simulator.front_store.dates == [simulator.current_date]
+
+
+def test_simulation_cli_01(qgis_app: QgsApplication, tmp_path: Path):
+    """
+    The command line entry point simulates the layers of a GeoPackage until the end date and saves the perimeters of
+    each step
+
+    :param qgis_app: QGIS application fixture
+    :type qgis_app: QgsApplication
+    :param tmp_path: Temporary folder fixture
+    :type tmp_path: Path
+    """
+    ignition_layer = memory_layer('Point?crs=EPSG:25831&field=datetime:string', 'ignition',
+                                  [('Point (1000 1000)', {'datetime': '2022-07-15T12:00:00'})])
+    perimeter_layer = memory_layer('Polygon?crs=EPSG:25831&field=datetime:string', 'perimeter', [])
+    land_cover_layer = memory_layer('Polygon?crs=EPSG:25831&field=fuel_model:string', 'land_cover',
+                                    [('Polygon ((0 0, 2000 0, 2000 2000, 0 2000, 0 0))', {'fuel_model': '1'})])
+    path = write_geopackage(str(tmp_path / 'fire.gpkg'), [ignition_layer, perimeter_layer, land_cover_layer])
+    output = str(tmp_path / 'perimeters.gpkg')
+    source = str(Path(__file__).parent.parent / 'src')
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join([source, os.environ.get('PYTHONPATH', '')]))
+    # The entry point creates and exits its own QGIS application, so it is run in another process
+    result = subprocess.run([sys.executable, '-m', 'gisfire_spread_simulation.simulation_cli', '--geopackage', path,
+                             '--start', '2022-07-15T12:00:00', '--end', '2022-07-15T12:03:00', '--time-step', '60',
+                             '--output', output], env=environment, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert 'Simulated until 2022-07-15T12:03:00' in result.stdout
+    assert '3 steps' in result.stdout
+    perimeters = QgsVectorLayer(output, 'perimeters', 'ogr')
+    assert perimeters.isValid()
+    assert sorted(feature['datetime'] for feature in perimeters.getFeatures()) == \
+        ['2022-07-15T12:01:00', '2022-07-15T12:02:00', '2022-07-15T12:03:00']
+    # A missing end of the simulation is an argument error
+    result = subprocess.run([sys.executable, '-m', 'gisfire_spread_simulation.simulation_cli', '--geopackage', path],
+                            env=environment, capture_output=True, text=True)
+    assert result.returncode != 0
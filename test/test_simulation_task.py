@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import datetime
+
+from qgis.core import QgsApplication
+
+from gisfire_spread_simulation.simulation_algorithms.simulation_task import SimulationTask
+
+
+class StepSimulator:
+    """
+    Simulator whose steps only send a perimeter per step to the perimeter sink, the task is run in the test thread
+    """
+
+    def __init__(self, failing_step=None):
+        self.current_date = datetime.datetime(2022, 7, 15, 12)
+        self.time_step = 60
+        self.perimeter_sink = None
+        self.on_step = None
+        self._failing_step = failing_step
+        self._steps = 0
+
+    def simulation_step(self):
+        self._steps += 1
+        if self._steps == self._failing_step:
+            raise ValueError('Step {} failed'.format(self._steps))
+        self.current_date += datetime.timedelta(seconds=self.time_step)
+        self.perimeter_sink(self.current_date, [])
+        if self.on_step is not None:
+            self.on_step(self._steps)
+
+
+def test_simulation_task_01(qgis_app: QgsApplication):
+    """
+    The perimeters of the steps are sent in batches, the last one with the remaining steps, and the number of steps is
+    given by the end date
+
+    :param qgis_app: QGIS application fixture
+    :type qgis_app: QgsApplication
+    """
+    simulator = StepSimulator()
+    task = SimulationTask(simulator, end_date=simulator.current_date + datetime.timedelta(minutes=24, seconds=30),
+                          batch_size=10)
+    batches = list()
+    task.perimeters_ready.connect(batches.append)
+    assert task.run()
+    assert task.simulated_steps == 25
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+    assert batches[-1][-1][0] == simulator.current_date
+    assert task.feedback.progress() == 100
+    assert task.exception is None
+    assert simulator.perimeter_sink is None
+
+
+def test_simulation_task_02(qgis_app: QgsApplication):
+    """
+    A cancelled task stops before the next step and sends the perimeters of the simulated steps
+
+    :param qgis_app: QGIS application fixture
+    :type qgis_app: QgsApplication
+    """
+    simulator = StepSimulator()
+    task = SimulationTask(simulator, n_steps=20, batch_size=10)
+    simulator.on_step = lambda step: task.cancel() if step == 3 else None
+    batches = list()
+    task.perimeters_ready.connect(batches.append)
+    assert not task.run()
+    assert task.simulated_steps == 3
+    assert [len(batch) for batch in batches] == [3]
+    assert task.exception is None
+    assert simulator.perimeter_sink is None
+
+
+def test_simulation_task_03(qgis_app: QgsApplication):
+    """
+    An error of the simulation ends the task, is kept in the task and the perimeters of the simulated steps are sent
+
+    :param qgis_app: QGIS application fixture
+    :type qgis_app: QgsApplication
+    """
+    simulator = StepSimulator(failing_step=2)
+    task = SimulationTask(simulator, n_steps=5)
+    batches = list()
+    task.perimeters_ready.connect(batches.append)
+    assert not task.run()
+    assert isinstance(task.exception, ValueError)
+    assert task.simulated_steps == 1
+    assert [len(batch) for batch in batches] == [1]
+    assert simulator.perimeter_sink is None
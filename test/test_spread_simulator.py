@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import datetime
+
+import numpy
+import pytest
+
+from gisfire_spread_simulation.data_providers.fuel_moisture import FuelMoistureField
+from gisfire_spread_simulation.data_providers.terrain import TerrainLookup
+from gisfire_spread_simulation.data_providers.wind_field import WindField
+from gisfire_spread_simulation.simulation_algorithms.perimeter import Perimeter
+from gisfire_spread_simulation.simulation_algorithms.spread_simulator import SpreadEngine
+from gisfire_spread_simulation.simulation_algorithms.spread_simulator import SpreadSimulator
+from test.helpers import circle
+
+
+def test_environment_cache_01():
+    """
+    The ellipses of the fuels of the vertices are computed once, the lookups of computed ellipses and the reads of the
+    ellipses of a propagation after the predictor are hits, and the step statistics accumulate them
+    """
+    simulator = SpreadSimulator(time_step=60)
+    cache = simulator.environment_cache
+    fuel = numpy.array([1, 1, 2, 1, 0], dtype=numpy.int32)
+    (a, b, c, alpha, burnable) = cache.ellipses(simulator.fuel_table, fuel, SpreadSimulator.default_moisture,
+                                                SpreadSimulator.default_wind, SpreadSimulator.default_slope)
+    assert (cache.hits, cache.misses) == (0, 3)
+    assert burnable.tolist() == [True, True, True, True, False]
+    assert a[0] == a[1] == a[3]
+    cache.ellipses(simulator.fuel_table, fuel, SpreadSimulator.default_moisture, SpreadSimulator.default_wind,
+                   SpreadSimulator.default_slope)
+    assert (cache.hits, cache.misses) == (3, 3)
+    assert cache.hit_rate == pytest.approx(0.5)
+    perimeter = circle(100, 60)
+    perimeter.fuel[:] = 1
+    simulator._propagate_perimeter(perimeter)
+    simulator._propagate_perimeter(perimeter)
+    # The predictor computes the ellipse of the fuel and the corrector reuses it
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert (simulator.step_statistics.cache_hits, simulator.step_statistics.cache_misses) == (2, 2)
+
+
+def test_environment_cache_03():
+    """
+    With the environment providers each vertex has its own ellipse, computed in the predictor and reused by the
+    corrector and by the propagation tries of the adaptive sub-steps
+    """
+    simulator = SpreadSimulator(time_step=60)
+    simulator.terrain = TerrainLookup(lambda x_offset, y_offset, width, height: numpy.zeros((height, width)), 100, 100,
+                                      (-500, 10, 0, 500, 0, -10))
+    simulator._propagate_perimeter(circle(100, 60))
+    assert (simulator.step_statistics.cache_hits, simulator.step_statistics.cache_misses) == (60, 60)
+    simulator = SpreadSimulator(time_step=60, adaptive_time_step=True)
+    simulator.terrain = TerrainLookup(lambda x_offset, y_offset, width, height: numpy.zeros((height, width)), 100, 100,
+                                      (-500, 10, 0, 500, 0, -10))
+    simulator._propagate_perimeter_adaptive(circle(100, 60), 60)
+    statistics = simulator.step_statistics
+    # The stable time step, the predictor and the corrector of each try read the ellipses of the sub-step
+    assert statistics.cache_misses == 60 * statistics.sub_steps
+    assert statistics.cache_hits == 60 * (2 * statistics.sub_steps + 2 * statistics.rejected_steps)
+
+
+def test_environment_cache_02():
+    """
+    The propagation with the cached ellipses gives the same vertices as the propagation with the ellipses computed for
+    each vertex
+    """
+    simulator = SpreadSimulator(time_step=60)
+    uncached = SpreadSimulator(time_step=60)
+    uncached._ellipses = lambda perimeter: uncached._vertex_ellipses(perimeter.x, perimeter.y, perimeter.fuel)
+    perimeter = circle(100, 120)
+    perimeter.fuel[:] = numpy.repeat([1, 2, 0, 4], 30)
+    propagated = simulator._propagate_perimeter(perimeter)
+    reference = uncached._propagate_perimeter(perimeter)
+    assert uncached.environment_cache.misses == 0
+    assert propagated.x.tolist() == pytest.approx(reference.x.tolist())
+    assert propagated.y.tolist() == pytest.approx(reference.y.tolist())
+    assert not numpy.array_equal(propagated.x, perimeter.x)
+
+
+def test_adaptive_time_step_01():
+    """
+    The adaptive propagation of a small fast front takes several stable sub-steps and matches the propagation with a
+    small fixed time step
+    """
+    simulator = SpreadSimulator(time_step=600, adaptive_time_step=True)
+    perimeter = simulator._propagate_perimeter_adaptive(circle(10, 60), 600)
+    assert simulator.step_statistics.sub_steps > 10
+    assert simulator.step_statistics.rejected_steps == 0
+    reference = circle(10, 60)
+    for _ in range(600):
+        reference.fuel = simulator._get_fire_models(reference.x, reference.y)
+        reference = simulator._propagate_perimeter(reference, 1)
+    assert perimeter.area() == pytest.approx(reference.area(), rel=1e-4)
+
+
+def test_adaptive_time_step_02():
+    """
+    A front that does not move takes the whole interval in a single sub-step and folded fronts are detected
+    """
+    simulator = SpreadSimulator(time_step=600, adaptive_time_step=True)
+    simulator._get_fire_models = lambda x, y: numpy.zeros(numpy.shape(x), dtype=numpy.int32)
+    simulator._propagate_perimeter_adaptive(circle(10, 60), 600)
+    assert simulator.step_statistics.sub_steps == 1
+    square = Perimeter.from_points([(0, 0), (1, 0), (1, 1), (0, 1)])
+    folded = Perimeter.from_points([(0, 0), (-1, 0), (1, 1), (0, 1)])
+    assert not SpreadSimulator._is_folded(square, square.copy())
+    assert SpreadSimulator._is_folded(square, folded)
+
+
+def test_adaptive_time_step_03():
+    """
+    The ellipses of the vertices are computed once per sub-step for the stable time step, the propagation and the
+    rejected tries
+    """
+    simulator = SpreadSimulator(time_step=600, adaptive_time_step=True, courant_number=4.0)
+    ellipses = simulator._ellipses
+    calls = list()
+    simulator._ellipses = lambda perimeter: calls.append(len(perimeter)) or ellipses(perimeter)
+    # A star shaped front folds in its concave vertices with long sub-steps
+    angles = numpy.linspace(0, 2 * numpy.pi, 120, endpoint=False)
+    radius = 20 + 10 * numpy.cos(8 * angles)
+    simulator._propagate_perimeter_adaptive(Perimeter(radius * numpy.cos(angles), radius * numpy.sin(angles)), 600)
+    assert simulator.step_statistics.rejected_steps > 0
+    assert len(calls) == simulator.step_statistics.sub_steps
+
+
+def test_propagate_fronts_01():
+    """
+    All the rings of all the fronts are propagated together: the exterior rings grow, the interior rings shrink into
+    their islands and they are removed when the islands are burned
+    """
+    simulator = SpreadSimulator(time_step=60)
+    island = circle(30, 60).reversed()
+    small_island = Perimeter(island.x / 10 + 200, island.y / 10)
+    fire = Perimeter.concatenate([circle(100, 120), island])
+    other_fire = Perimeter.concatenate([Perimeter(circle(100, 120).x + 200, circle(100, 120).y), small_island])
+    fronts = simulator._propagate_fronts([fire, other_fire])
+    assert len(fronts) == 2
+    assert fronts[0].ring_count == 2
+    assert fronts[1].ring_count == 1
+    assert simulator.step_statistics.sub_steps == 1
+    (exterior, interior) = fronts[0].ring_areas()
+    assert exterior > fire.ring_areas()[0]
+    assert fire.ring_areas()[1] < interior < 0
+    # The adaptive propagation keeps the rings of each fire
+    simulator.adaptive_time_step = True
+    fronts = simulator._propagate_fronts([fire, other_fire])
+    assert [front.ring_count for front in fronts] == [2, 1]
+    assert fronts[0].ring_areas()[1] == pytest.approx(interior, rel=1e-2)
+
+
+def test_wind_field_01(tmp_path):
+    """
+    A uniform wind field propagates the fronts like the same default wind
+    """
+    start = datetime.datetime(2022, 7, 15, 12)
+    grid = 'ncols 2\nnrows 2\nxllcorner -1000\nyllcorner -1000\ncellsize 1000\n{0} {0}\n{0} {0}\n'
+    (tmp_path / 'vel.asc').write_text(grid.format(2))
+    (tmp_path / 'ang.asc').write_text(grid.format(180))
+    simulator = SpreadSimulator(time_step=60, starting_time=start)
+    expected = simulator._propagate_fronts([circle(100, 120)])
+    simulator.wind_field = WindField.from_ascii_grids([(start, str(tmp_path / 'vel.asc'), str(tmp_path / 'ang.asc'))])
+    fronts = simulator._propagate_fronts([circle(100, 120)])
+    assert fronts[0].x.tolist() == pytest.approx(expected[0].x.tolist())
+    assert fronts[0].y.tolist() == pytest.approx(expected[0].y.tolist())
+
+
+def test_terrain_01():
+    """
+    Without wind the fire spreads faster upslope, and a flat terrain does not change the spread
+    """
+    simulator = SpreadSimulator(time_step=60)
+    simulator.default_wind = (0, 0)
+    expected = simulator._propagate_fronts([circle(100, 120)])[0]
+    simulator.terrain = TerrainLookup(lambda x_offset, y_offset, width, height: numpy.zeros((height, width)), 100, 100,
+                                      (-500, 10, 0, 500, 0, -10))
+    flat = simulator._propagate_fronts([circle(100, 120)])[0]
+    assert flat.x.tolist() == pytest.approx(expected.x.tolist())
+    # Rising to the east
+    simulator.terrain = TerrainLookup(lambda x_offset, y_offset, width, height:
+                                      numpy.tile(3.0 * numpy.arange(x_offset, x_offset + width), (height, 1)),
+                                      100, 100, (-500, 10, 0, 500, 0, -10))
+    front = simulator._propagate_fronts([circle(100, 120)])[0]
+    assert front.x.max() - 100 > 100 + front.x.min()
+    assert front.y.max() == pytest.approx(-front.y.min(), rel=1e-6)
+
+
+def test_fuel_moisture_01():
+    """
+    A constant fuel moisture field propagates the fronts like the same default moisture, and wetter fuel spreads slower
+    """
+    start = datetime.datetime(2022, 7, 15, 12)
+    simulator = SpreadSimulator(time_step=60, starting_time=start)
+    expected = simulator._propagate_fronts([circle(100, 120)])[0]
+    simulator.fuel_moisture = FuelMoistureField(numpy.concatenate(SpreadSimulator.default_moisture).tolist(), start)
+    front = simulator._propagate_fronts([circle(100, 120)])[0]
+    assert front.y.tolist() == pytest.approx(expected.y.tolist())
+    simulator.fuel_moisture = FuelMoistureField((0.08, 0.09, 0.1, 0.9, 1.2), start)
+    assert simulator._propagate_fronts([circle(100, 120)])[0].area() < front.area()
+
+
+def test_raster_engine_01():
+    """
+    The raster engine burns about the same area as the vector engine
+    """
+    start = datetime.datetime(2022, 7, 15, 12)
+    end = start + datetime.timedelta(minutes=20)
+    areas = list()
+    for engine in (SpreadEngine.VECTOR, SpreadEngine.RASTER):
+        simulator = SpreadSimulator(time_step=300, starting_time=start, perimeter_resolution=5, engine=engine,
+                                    raster_cell_size=10)
+        fronts = simulator.simulate_fronts([SpreadSimulator.IgnitionPoint(x=0, y=0, ignition_date=start)], end)
+        assert len(fronts) == 1
+        areas.append(fronts[0].area())
+    assert areas[1] == pytest.approx(areas[0], rel=0.15)
+
+
+def test_level_set_engine_01():
+    """
+    The level set engine burns about the same area as the vector engine
+    """
+    start = datetime.datetime(2022, 7, 15, 12)
+    end = start + datetime.timedelta(minutes=20)
+    ignition_points = [SpreadSimulator.IgnitionPoint(x=0, y=0, ignition_date=start)]
+    vector = SpreadSimulator(time_step=300, starting_time=start, perimeter_resolution=5)
+    level_set = SpreadSimulator(time_step=300, starting_time=start, engine=SpreadEngine.LEVEL_SET, raster_cell_size=10)
+    fronts = level_set.simulate_fronts(ignition_points, end)
+    assert len(fronts) == 1
+    assert fronts[0].area() == pytest.approx(vector.simulate_fronts(ignition_points, end)[0].area(), rel=0.15)
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pickle
+
+import numpy
+import pytest
+
+from gisfire_spread_simulation.data_providers.terrain import TerrainLookup
+
+
+def test_terrain_lookup_01(tmp_path):
+    """
+    A plane rising to the east faces west and its upslope direction is east, the border cells repeat their neighbours,
+    and the memory mapped lookup computed by blocks of rows is the same as the one in memory
+    """
+    elevation = numpy.tile(0.5 * 10 * numpy.arange(6), (5, 1))
+
+    def read_window(x_offset, y_offset, width, height):
+        return elevation[y_offset:y_offset + height, x_offset:x_offset + width]
+
+    geo_transform = (1000, 10, 0, 2000, 0, -10)
+    terrain = TerrainLookup(read_window, 6, 5, geo_transform)
+    (slope, aspect) = terrain.lookup(numpy.array([1025, 1005, 900]), numpy.array([1975, 1995, 1975]))
+    assert slope.tolist() == pytest.approx([numpy.arctan(0.5), numpy.arctan(0.25), 0])
+    assert aspect[0:2].tolist() == pytest.approx([1.5 * numpy.pi] * 2)
+    assert numpy.mod(terrain.upslope(numpy.array([1025]), numpy.array([1975]))[1][0], 2 * numpy.pi) == \
+        pytest.approx(1.5 * numpy.pi)
+    mapped = TerrainLookup(read_window, 6, 5, geo_transform, memory_map=str(tmp_path / 'terrain.npy'), block_rows=2)
+    x = numpy.linspace(1000, 1060, 13)
+    y = numpy.linspace(2000, 1950, 13)
+    assert numpy.array_equal(mapped.lookup(x, y)[0], terrain.lookup(x, y)[0])
+    # A pickled memory mapped lookup maps the same file
+    copy = pickle.loads(pickle.dumps(mapped))
+    assert numpy.array_equal(copy.lookup(x, y)[1], terrain.lookup(x, y)[1])
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy
+
+from gisfire_spread_simulation.data_providers.tile_cache import TileCache
+
+
+def test_tile_cache_01():
+    """
+    Pixels are read by tiles, each tile once while it is resident, and the least recently used tile is evicted
+    """
+    grid = numpy.arange(10 * 7).reshape(10, 7)
+    reads = list()
+
+    def read_window(x_offset, y_offset, width, height):
+        reads.append((x_offset, y_offset, width, height))
+        return grid[y_offset:y_offset + height, x_offset:x_offset + width]
+
+    cache = TileCache(read_window, 7, 10, tile_size=4, max_tiles=2, fill=-1, dtype=numpy.int64)
+    rows = numpy.array([0, 9, 3, 5, -1, 2, 10])
+    columns = numpy.array([0, 6, 3, 1, 2, 7, 0])
+    assert cache.values(rows, columns).tolist() == [0, 69, 24, 36, -1, -1, -1]
+    # Tiles (0, 0), (1, 0) and (2, 1) have been read, only the last two are resident
+    assert sorted(reads) == [(0, 0, 4, 4), (0, 4, 4, 4), (4, 8, 3, 2)]
+    assert cache.resident_tiles == 2
+    assert cache.values(numpy.array([8, 1]), numpy.array([5, 1])).tolist() == [61, 8]
+    assert cache.hits == 1
+    assert cache.misses == 4
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pickle
+
+import numpy
+from qgis.core import QgsFeature
+from qgis.core import QgsGeometry
+from qgis.core import QgsVectorLayer
+
+import gisfire_spread_simulation.fuel_models.standard_fuel_models as models
+from gisfire_spread_simulation.data_providers.vector_fuel import VectorFuelLookup
+from gisfire_spread_simulation.fuel_models.standard_fuel_models import model_0
+
+
+def land_cover_layer(polygons):
+    layer = QgsVectorLayer('Polygon?crs=EPSG:25831&field=fuel_model:string', 'land_cover', 'memory')
+    features = list()
+    for (wkt, code) in polygons:
+        feature = QgsFeature(layer.fields())
+        feature.setGeometry(QgsGeometry.fromWkt(wkt))
+        feature.setAttribute('fuel_model', code)
+        features.append(feature)
+    layer.dataProvider().addFeatures(features)
+    return layer
+
+
+def test_vector_fuel_lookup_01():
+    """
+    Points in distant polygons are found by their own buckets, the holes, the polygons with unknown codes and the
+    points outside any polygon get the non burnable model, and a pickled lookup gives the same answer
+    """
+    layer = land_cover_layer([('Polygon ((0 0, 10 0, 10 10, 0 10, 0 0), (4 4, 4 6, 6 6, 6 4, 4 4))', '1'),
+                              ('Polygon ((500 0, 510 0, 510 10, 500 10, 500 0))', '99'),
+                              ('MultiPolygon (((1000 0, 1010 0, 1010 10, 1000 10, 1000 0)), '
+                               '((1020 0, 1030 0, 1030 10, 1020 10, 1020 0)))', '2'),
+                              ('Polygon ((2000 0, 2010 0, 2010 10, 2000 10, 2000 0))', '3')])
+    fuel_models = {'1': models.model_1, '2': models.model_2, '3': models.model_1}
+    lookup = VectorFuelLookup(layer, 'fuel_model', fuel_models)
+    assert lookup.fuel_models == [model_0, models.model_1, models.model_2]
+    x = numpy.array([1, 5, 505, 1005, 1025, 2005, -5, 1015])
+    y = numpy.array([1, 5, 5, 5, 5, 5, 5, 5])
+    indices = lookup.lookup(x, y)
+    assert indices.tolist() == [1, 0, 0, 2, 2, 1, 0, 0]
+    assert indices.dtype == numpy.int32
+    assert pickle.loads(pickle.dumps(lookup)).lookup(x, y).tolist() == indices.tolist()
+    assert lookup.lookup(numpy.zeros(0), numpy.zeros(0)).shape == (0, )
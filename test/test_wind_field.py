@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import datetime
+import pickle
+
+import numpy
+import pytest
+
+from gisfire_spread_simulation.data_providers.wind_field import WindField
+from gisfire_spread_simulation.data_providers.wind_field import read_ascii_grid
+
+
+def write_grid(path, values, no_data=-9999):
+    rows = ['ncols {}'.format(values.shape[1]), 'nrows {}'.format(values.shape[0]), 'xllcorner 100', 'yllcorner 200',
+            'cellsize 10', 'NODATA_value {}'.format(no_data)]
+    rows.extend(' '.join(str(value) for value in row) for row in values.tolist())
+    path.write_text('\n'.join(rows) + '\n')
+    return str(path)
+
+
+def test_read_ascii_grid_01(tmp_path):
+    """
+    The header of an ESRI ASCII grid gives the geo transform of its upper left corner
+    """
+    (values, geo_transform, no_data) = read_ascii_grid(write_grid(tmp_path / 'grid.asc', numpy.arange(6).reshape(2, 3)))
+    assert values.tolist() == [[0, 1, 2], [3, 4, 5]]
+    assert geo_transform == (100, 10, 0, 220, 0, -10)
+    assert no_data == -9999
+
+
+def test_wind_field_01(tmp_path):
+    """
+    The wind is interpolated bilinearly between cell centres and linearly between the two frames around the date, which
+    are the only ones loaded
+    """
+    start = datetime.datetime(2022, 7, 15, 12)
+    speed = numpy.array([[2.0, 4.0], [2.0, 4.0]])
+    frames = list()
+    for hour, direction in enumerate((180, 270, 90)):
+        frames.append((start + datetime.timedelta(hours=hour),
+                       write_grid(tmp_path / 'vel_{}.asc'.format(hour), speed),
+                       write_grid(tmp_path / 'ang_{}.asc'.format(hour), numpy.full((2, 2), direction))))
+    field = WindField.from_ascii_grids(frames, max_frames=2)
+    # From the south (blowing north) in the first frame, the speed grows to the east
+    (wind_speed, wind_direction) = field.wind(numpy.array([105, 110, 200]), numpy.array([215, 210, 0]), start)
+    assert wind_speed.tolist() == pytest.approx([2, 3, 4])
+    assert wind_direction.tolist() == pytest.approx([0, 0, 0])
+    # Half way to the second frame, from the west (blowing east)
+    (east, north) = field.components(numpy.array([105]), numpy.array([215]), start + datetime.timedelta(minutes=30))
+    assert (east[0], north[0]) == pytest.approx((1, 1))
+    assert field.wind(numpy.array([105]), numpy.array([215]), start + datetime.timedelta(hours=1))[1][0] == \
+        pytest.approx(-numpy.pi / 2)
+    assert field.resident_frames == 2
+    assert field.misses == 2
+    # Dates after the last frame get the last frame, pickled fields load their frames again
+    copy = pickle.loads(pickle.dumps(field))
+    assert copy.resident_frames == 0
+    assert copy.components(numpy.array([105]), numpy.array([215]), start + datetime.timedelta(days=1))[0][0] == \
+        pytest.approx(-2)